@@ -21,6 +21,7 @@ from structlog import get_logger
 from hathor.checkpoint import Checkpoint
 from hathor.conf.settings import HathorSettings as HathorSettingsType
 from hathor.consensus import ConsensusAlgorithm
+from hathor.consensus.nc_speculative_execution import DEFAULT_NC_SPECULATIVE_WORKERS, NCSpeculativeExecutor
 from hathor.consensus.poa import PoaBlockProducer, PoaSigner
 from hathor.daa import DifficultyAdjustmentAlgorithm
 from hathor.event import EventManager
@@ -32,9 +33,11 @@ from hathor.feature_activation.feature import Feature
 from hathor.feature_activation.feature_service import FeatureService
 from hathor.feature_activation.storage.feature_activation_storage import FeatureActivationStorage
 from hathor.indexes import IndexesManager, RocksDBIndexesManager
+from hathor.indexes.backfill import IndexesBackfill
 from hathor.manager import HathorManager
 from hathor.mining.cpu_mining_service import CpuMiningService
 from hathor.nanocontracts import NCRocksDBStorageFactory, NCStorageFactory
+from hathor.nanocontracts.blueprint_cache import DEFAULT_BLUEPRINT_CACHE_CAPACITY, BlueprintClassCache
 from hathor.nanocontracts.catalog import NCBlueprintCatalog
 from hathor.nanocontracts.nc_exec_logs import NCLogConfig, NCLogStorage
 from hathor.nanocontracts.runner.runner import RunnerFactory
@@ -44,9 +47,11 @@ from hathor.p2p.peer import PrivatePeer
 from hathor.pubsub import PubSubManager
 from hathor.reactor import ReactorProtocol as Reactor
 from hathor.storage import RocksDBStorage
+from hathor.storage.rocksdb_profile import RocksDBProfile
 from hathor.stratum import StratumFactory
 from hathor.transaction.json_serializer import VertexJsonSerializer
 from hathor.transaction.storage import TransactionCacheStorage, TransactionRocksDBStorage, TransactionStorage
+from hathor.transaction.storage.vertex_blob_store import VERTEX_BLOB_STORE_DIR, VertexBlobStore
 from hathor.transaction.vertex_children import RocksDBVertexChildrenService
 from hathor.transaction.vertex_parser import VertexParser
 from hathor.util import Random, get_environment_info
@@ -153,9 +158,12 @@ class Builder:
         self._rocksdb_path: str | tempfile.TemporaryDirectory | None = None
         self._rocksdb_storage: Optional[RocksDBStorage] = None
         self._rocksdb_cache_capacity: Optional[int] = None
+        self._rocksdb_profile: Optional[RocksDBProfile] = None
+        self._vertex_blob_store: bool = False
 
         self._tx_storage_cache: bool = False
         self._tx_storage_cache_capacity: Optional[int] = None
+        self._tx_storage_cache_max_bytes: Optional[int] = None
 
         self._indexes_manager: Optional[IndexesManager] = None
         self._tx_storage: Optional[TransactionStorage] = None
@@ -172,6 +180,7 @@ class Builder:
         self._enable_tokens_index: bool = False
         self._enable_utxo_index: bool = False
         self._enable_nc_indexes: bool = False
+        self._enable_index_backfill: bool = False
 
         self._sync_v2_support: SyncSupportLevel = SyncSupportLevel.ENABLED
 
@@ -193,6 +202,10 @@ class Builder:
         self._nc_anti_mev: bool = True
 
         self._nc_storage_factory: NCStorageFactory | None = None
+        self._nc_node_cache_capacity: int | None = None
+        self._nc_blueprint_cache_capacity: int | None = None
+        self._nc_persist_compiled_blueprints: bool = False
+        self._nc_speculative_workers: int | None = None
         self._nc_log_storage: NCLogStorage | None = None
         self._runner_factory: RunnerFactory | None = None
         self._nc_log_config: NCLogConfig = NCLogConfig.NONE
@@ -236,6 +249,13 @@ class Builder:
         if settings.ENABLE_NANO_CONTRACTS:
             tx_storage.nc_catalog = self._get_nc_catalog()
 
+        if self._nc_blueprint_cache_capacity is not None or self._nc_persist_compiled_blueprints:
+            tx_storage.blueprint_cache = BlueprintClassCache(
+                self._nc_blueprint_cache_capacity if self._nc_blueprint_cache_capacity is not None
+                else DEFAULT_BLUEPRINT_CACHE_CAPACITY,
+                rocksdb_storage=rocksdb_storage if self._nc_persist_compiled_blueprints else None,
+            )
+
         if self._enable_address_index:
             indexes.enable_address_index(pubsub)
 
@@ -248,6 +268,9 @@ class Builder:
         if self._enable_nc_indexes:
             indexes.enable_nc_indexes()
 
+        if self._enable_index_backfill:
+            indexes.enable_backfill()
+
         kwargs: dict[str, Any] = {}
 
         if self._enable_event_queue is not None:
@@ -285,6 +308,9 @@ class Builder:
         if poa_block_producer:
             poa_block_producer.manager = manager
 
+        if self._enable_index_backfill:
+            manager.index_backfill = IndexesBackfill(reactor=reactor, tx_storage=tx_storage)
+
         stratum_factory: Optional[StratumFactory] = None
         if self._enable_stratum_server:
             stratum_factory = self._create_stratum_server(manager)
@@ -384,7 +410,10 @@ class Builder:
             return self._nc_storage_factory
 
         rocksdb_storage = self._get_or_create_rocksdb_storage()
-        self._nc_storage_factory = NCRocksDBStorageFactory(rocksdb_storage)
+        kwargs: dict[str, Any] = {}
+        if self._nc_node_cache_capacity is not None:
+            kwargs['node_cache_capacity'] = self._nc_node_cache_capacity
+        self._nc_storage_factory = NCRocksDBStorageFactory(rocksdb_storage, **kwargs)
         return self._nc_storage_factory
 
     def _get_nc_calls_sorter(self) -> NCSorterCallable:
@@ -413,6 +442,9 @@ class Builder:
             pubsub = self._get_or_create_pubsub()
             nc_storage_factory = self._get_or_create_nc_storage_factory()
             nc_calls_sorter = self._get_nc_calls_sorter()
+            nc_speculative_executor: NCSpeculativeExecutor | None = None
+            if self._nc_speculative_workers is not None:
+                nc_speculative_executor = NCSpeculativeExecutor(self._nc_speculative_workers)
             self._consensus = ConsensusAlgorithm(
                 nc_storage_factory=nc_storage_factory,
                 soft_voided_tx_ids=soft_voided_tx_ids,
@@ -422,6 +454,7 @@ class Builder:
                 nc_log_storage=self._get_or_create_nc_log_storage(),
                 nc_calls_sorter=nc_calls_sorter,
                 feature_service=self._get_or_create_feature_service(),
+                nc_speculative_executor=nc_speculative_executor,
             )
 
         return self._consensus
@@ -457,7 +490,11 @@ class Builder:
             self._rocksdb_storage = RocksDBStorage(
                 path=self._rocksdb_path,
                 cache_capacity=self._rocksdb_cache_capacity,
-            ) if self._rocksdb_path else RocksDBStorage.create_temp(self._rocksdb_cache_capacity)
+                profile=self._rocksdb_profile,
+            ) if self._rocksdb_path else RocksDBStorage.create_temp(
+                self._rocksdb_cache_capacity,
+                profile=self._rocksdb_profile,
+            )
         return self._rocksdb_storage
 
     def _get_or_create_p2p_manager(self) -> ConnectionsManager:
@@ -514,6 +551,9 @@ class Builder:
         nc_storage_factory = self._get_or_create_nc_storage_factory()
         vertex_parser = self._get_or_create_vertex_parser()
         vertex_children_service = RocksDBVertexChildrenService(rocksdb_storage)
+        vertex_blob_store: Optional[VertexBlobStore] = None
+        if self._vertex_blob_store:
+            vertex_blob_store = VertexBlobStore(os.path.join(rocksdb_storage.path, VERTEX_BLOB_STORE_DIR))
         self._tx_storage = TransactionRocksDBStorage(
             rocksdb_storage,
             indexes=store_indexes,
@@ -521,6 +561,7 @@ class Builder:
             vertex_parser=vertex_parser,
             nc_storage_factory=nc_storage_factory,
             vertex_children_service=vertex_children_service,
+            vertex_blob_store=vertex_blob_store,
         )
 
         if self._tx_storage_cache:
@@ -528,6 +569,8 @@ class Builder:
             kwargs: dict[str, Any] = {}
             if self._tx_storage_cache_capacity is not None:
                 kwargs['capacity'] = self._tx_storage_cache_capacity
+            if self._tx_storage_cache_max_bytes is not None:
+                kwargs['max_bytes'] = self._tx_storage_cache_max_bytes
             self._tx_storage = TransactionCacheStorage(
                 self._tx_storage,
                 reactor,
@@ -717,12 +760,49 @@ class Builder:
         self._rocksdb_cache_capacity = cache_capacity
         return self
 
-    def use_tx_storage_cache(self, capacity: Optional[int] = None) -> 'Builder':
+    def use_vertex_blob_store(self) -> 'Builder':
+        if self._tx_storage:
+            raise ValueError('cannot use the vertex blob store after tx storage is set')
+        self.check_if_can_modify()
+        self._vertex_blob_store = True
+        return self
+
+    def set_rocksdb_profile(self, profile: RocksDBProfile) -> 'Builder':
+        if self._tx_storage:
+            raise ValueError('cannot set rocksdb profile after tx storage is set')
+        self.check_if_can_modify()
+        self._rocksdb_profile = profile
+        return self
+
+    def set_nc_node_cache_capacity(self, cache_capacity: int) -> 'Builder':
+        if self._nc_storage_factory:
+            raise ValueError('cannot set nc node cache capacity after nc storage factory is set')
+        self.check_if_can_modify()
+        self._nc_node_cache_capacity = cache_capacity
+        return self
+
+    def set_nc_blueprint_cache_capacity(self, cache_capacity: int) -> 'Builder':
+        self.check_if_can_modify()
+        self._nc_blueprint_cache_capacity = cache_capacity
+        return self
+
+    def enable_nc_persist_compiled_blueprints(self) -> 'Builder':
+        self.check_if_can_modify()
+        self._nc_persist_compiled_blueprints = True
+        return self
+
+    def enable_nc_speculative_execution(self, workers: int = DEFAULT_NC_SPECULATIVE_WORKERS) -> 'Builder':
+        self.check_if_can_modify()
+        self._nc_speculative_workers = workers
+        return self
+
+    def use_tx_storage_cache(self, capacity: Optional[int] = None, *, max_bytes: Optional[int] = None) -> 'Builder':
         if self._tx_storage:
             raise ValueError('cannot set tx storage cache capacity after tx storage is set')
         self.check_if_can_modify()
         self._tx_storage_cache = True
         self._tx_storage_cache_capacity = capacity
+        self._tx_storage_cache_max_bytes = max_bytes
         return self
 
     def _get_or_create_wallet(self) -> Optional[BaseWallet]:
@@ -778,6 +858,11 @@ class Builder:
         self._enable_nc_indexes = True
         return self
 
+    def enable_index_backfill(self) -> 'Builder':
+        self.check_if_can_modify()
+        self._enable_index_backfill = True
+        return self
+
     def enable_wallet_index(self) -> 'Builder':
         if self._tx_storage or self._indexes_manager:
             raise ValueError('cannot enable index after tx storage or indexes manager is set')
@@ -17,6 +17,7 @@ from hathor.sysctl import (
     ConnectionsManagerSysctl,
     FeatureActivationSysctl,
     HathorManagerSysctl,
+    RocksDBStorageSysctl,
     Sysctl,
     WebsocketManagerSysctl,
 )
@@ -37,6 +38,7 @@ class SysctlBuilder:
 
         root.put_child('core', core)
         root.put_child('p2p', ConnectionsManagerSysctl(self.artifacts.p2p_manager))
+        root.put_child('storage', RocksDBStorageSysctl(self.artifacts.rocksdb_storage))
 
         ws_factory = self.artifacts.manager.websocket_factory
         if ws_factory is not None:
@@ -247,6 +247,10 @@ class HathorSettings(NamedTuple):
     # Maximum number of opened threads that are solving POW for send tokens
     MAX_POW_THREADS: int = 5
 
+    # Number of threads that decode and verify the vertices received by the sync streams ahead of their processing,
+    # when zero they are decoded and verified in the reactor thread
+    SYNC_VERIFICATION_THREADS: int = 0
+
     # The error tolerance, to allow small rounding errors in Python, when comparing weights,
     # accumulated weights, and scores
     # How to use:
@@ -401,6 +405,28 @@ class HathorSettings(NamedTuple):
     CAPABILITY_GET_BEST_BLOCKCHAIN: str = 'get-best-blockchain'
     CAPABILITY_IPV6: str = 'ipv6'  # peers announcing this capability will be relayed ipv6 entrypoints from other peers
     CAPABILITY_NANO_STATE: str = 'nano-state'  # indicates support for nano-state commands
+    CAPABILITY_NANO_STATE_SYNC: str = 'nano-state-sync'  # indicates support for batched nano-state node download
+    CAPABILITY_BINARY_FRAMING: str = 'binary-framing'  # indicates support for length-prefixed binary frames
+    CAPABILITY_COMPRESSION: str = 'zlib-compression'  # indicates support for compressing the connection with zlib
+    CAPABILITY_RELAY_ANNOUNCE: str = 'relay-announce'  # indicates support for ANNOUNCE messages in the relay
+
+    # Whether to announce the binary framing capability, when both peers announce it the connection switches from
+    # lines to length-prefixed binary frames right after the HELLO messages
+    ENABLE_P2P_BINARY_FRAMING: bool = False
+
+    # Whether to announce the compression capability, when both peers announce it the connection is compressed with
+    # zlib right after the HELLO messages
+    ENABLE_P2P_COMPRESSION: bool = False
+
+    # zlib level of the compression of the connections, from 1 (fastest) to 9 (smallest)
+    P2P_COMPRESSION_LEVEL: int = 6
+
+    # Whether to announce the relay announce capability, when both peers announce it new transactions are relayed as
+    # an ANNOUNCE with their hash, and the peer only requests the ones it doesn't have
+    ENABLE_P2P_RELAY_ANNOUNCE: bool = False
+
+    # Whether to download the blocks of a sync from several peers at once, split into ranges of heights
+    ENABLE_PARALLEL_BLOCK_DOWNLOAD: bool = False
 
     # Where to download whitelist from
     WHITELIST_URL: Optional[str] = None
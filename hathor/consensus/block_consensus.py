@@ -34,6 +34,7 @@ from hathor.utils.weight import weight_to_work
 if TYPE_CHECKING:
     from hathor.conf.settings import HathorSettings
     from hathor.consensus.context import ConsensusAlgorithmContext
+    from hathor.consensus.nc_speculative_execution import NCSpeculation, NCSpeculativeExecutor
     from hathor.feature_activation.feature_service import FeatureService
     from hathor.nanocontracts.nc_exec_logs import NCLogStorage
     from hathor.nanocontracts.runner import Runner
@@ -57,6 +58,7 @@ class BlockConsensusAlgorithm:
         feature_service: FeatureService,
         *,
         nc_exec_fail_trace: bool = False,
+        nc_speculative_executor: Optional[NCSpeculativeExecutor] = None,
     ) -> None:
         self._settings = settings
         self.context = context
@@ -64,6 +66,7 @@ class BlockConsensusAlgorithm:
         self._nc_log_storage = nc_log_storage
         self.feature_service = feature_service
         self.nc_exec_fail_trace = nc_exec_fail_trace
+        self.nc_speculative_executor = nc_speculative_executor
 
     @classproperty
     def log(cls) -> Any:
@@ -219,89 +222,124 @@ class BlockConsensusAlgorithm:
             return
 
         nc_sorted_calls = self.context.consensus.nc_calls_sorter(block, nc_calls)
-        block_storage = self.context.consensus.nc_storage_factory.get_block_storage(block_root_id)
-        seed_hasher = hashlib.sha256(block.hash)
+        nc_storage_factory = self.context.consensus.nc_storage_factory
+
+        speculations: dict[bytes, NCSpeculation] = {}
+        if self.nc_speculative_executor is not None and len(nc_sorted_calls) > 1:
+            speculations = self.nc_speculative_executor.speculate(
+                nc_storage_factory,
+                block_root_id,
+                [tx for tx in nc_sorted_calls if not tx.get_metadata().voided_by],
+                self._nc_speculative_execute,
+            )
+        applied_count = 0
 
-        for tx in nc_sorted_calls:
-            seed_hasher.update(tx.hash)
-            seed_hasher.update(block_storage.get_root_id())
-
-            tx_meta = tx.get_metadata()
-            if tx_meta.voided_by:
-                # Skip voided transactions. This might happen if a previous tx in nc_calls fails and
-                # mark this tx as voided.
-                tx_meta.nc_execution = NCExecutionState.SKIPPED
-                self.context.save(tx)
-                # Update seqnum even for skipped nano transactions.
-                nc_header = tx.get_nano_header()
-                seqnum = block_storage.get_address_seqnum(Address(nc_header.nc_address))
-                if nc_header.nc_seqnum > seqnum:
-                    block_storage.set_address_seqnum(Address(nc_header.nc_address), nc_header.nc_seqnum)
-                continue
-
-            runner = self._runner_factory.create(block_storage=block_storage, seed=seed_hasher.digest())
-            exception_and_tb: tuple[NCFail, str] | None = None
-            token_dict = tx.get_complete_token_info(block_storage)
-            should_verify_sum_after_execution = any(token_info.version is None for token_info in token_dict.values())
-
-            try:
-                runner.execute_from_tx(tx)
-
-                # after the execution we have the latest state in the storage
-                # and at this point no tokens pending creation
-                if should_verify_sum_after_execution:
-                    self._verify_sum_after_execution(tx, block_storage)
-
-            except NCFail as e:
-                kwargs: dict[str, Any] = {}
-                if tx.name:
-                    kwargs['__name'] = tx.name
-                if self.nc_exec_fail_trace:
-                    kwargs['exc_info'] = True
-                self.log.info(
-                    'nc execution failed',
-                    tx=tx.hash.hex(),
-                    error=repr(e),
-                    cause=repr(e.__cause__),
-                    **kwargs,
-                )
-                exception_and_tb = e, traceback.format_exc()
-                self.mark_as_nc_fail_execution(tx)
-            else:
-                tx_meta.nc_execution = NCExecutionState.SUCCESS
-                self.context.save(tx)
-                # TODO Avoid calling multiple commits for the same contract. The best would be to call the commit
-                #      method once per contract per block, just like we do for the block_storage. This ensures we will
-                #      have a clean database with no orphan nodes.
-                runner.commit()
-
-                # Update metadata.
-                self.nc_update_metadata(tx, runner)
-
-                # Update indexes. This must be after metadata is updated.
-                assert tx.storage is not None
-                assert tx.storage.indexes is not None
-                tx.storage.indexes.handle_contract_execution(tx)
-
-                # Pubsub event to indicate execution success
-                self.context.nc_exec_success.append(tx)
-
-                # We only emit events when the nc is successfully executed.
-                assert self.context.nc_events is not None
-                last_call_info = runner.get_last_call_info()
-                events_list = last_call_info.nc_logger.__events__
-                self.context.nc_events.append((tx, events_list))
-
-                # Store events in transaction metadata
-                if events_list:
-                    tx_meta.nc_events = [(event.nc_id, event.data) for event in events_list]
+        assert block.storage is not None
+        assert block.storage.indexes is not None
+        indexes = block.storage.indexes
+
+        # All trie nodes created while executing this block, from contract tries and the block trie, are written
+        # in a single batch before the new block root id is saved. The same goes for the index changes.
+        with nc_storage_factory.write_batch(), indexes.write_batch():
+            # Contract tries are kept in memory between calls and only the final state of each contract is
+            # committed by `block_storage.commit()`, once per block.
+            block_storage = nc_storage_factory.get_block_storage(block_root_id, defer_contract_commits=True)
+            if speculations:
+                block_storage.enable_key_tracking()
+            seed_hasher = hashlib.sha256(block.hash)
+
+            for tx in nc_sorted_calls:
+                seed_hasher.update(tx.hash)
+                seed_hasher.update(block_storage.get_root_id())
+
+                tx_meta = tx.get_metadata()
+                if tx_meta.voided_by:
+                    # Skip voided transactions. This might happen if a previous tx in nc_calls fails and
+                    # mark this tx as voided.
+                    tx_meta.nc_execution = NCExecutionState.SKIPPED
                     self.context.save(tx)
-            finally:
-                # We save logs regardless of whether the nc successfully executed.
-                self._nc_log_storage.save_logs(tx, runner.get_last_call_info(), exception_and_tb)
+                    # Update seqnum even for skipped nano transactions.
+                    nc_header = tx.get_nano_header()
+                    seqnum = block_storage.get_address_seqnum(Address(nc_header.nc_address))
+                    if nc_header.nc_seqnum > seqnum:
+                        block_storage.set_address_seqnum(Address(nc_header.nc_address), nc_header.nc_seqnum)
+                    continue
 
-        # Save block state root id. If nothing happens, it should be the same as its block parent.
-        block_storage.commit()
+                exception_and_tb: tuple[NCFail, str] | None = None
+                speculation = speculations.pop(tx.hash, None)
+                if speculation is not None and not speculation.can_be_applied(block_storage.written_keys):
+                    speculation = None
+                if speculation is not None:
+                    assert speculation.runner is not None
+                    runner = speculation.runner
+                else:
+                    runner = self._runner_factory.create(block_storage=block_storage, seed=seed_hasher.digest())
+
+                try:
+                    # The execution is inside the try so the logs are saved even when it raises an exception other
+                    # than NCFail, whether or not the speculative executor is used.
+                    if speculation is not None:
+                        block_storage.apply_changes_from(speculation.block_storage)
+                        applied_count += 1
+                    else:
+                        try:
+                            self._nc_execute_tx(runner, tx, block_storage)
+                        except NCFail as e:
+                            exception_and_tb = e, traceback.format_exc()
+
+                    if exception_and_tb is not None:
+                        error, _ = exception_and_tb
+                        kwargs: dict[str, Any] = {}
+                        if tx.name:
+                            kwargs['__name'] = tx.name
+                        if self.nc_exec_fail_trace:
+                            kwargs['exc_info'] = error
+                        self.log.info(
+                            'nc execution failed',
+                            tx=tx.hash.hex(),
+                            error=repr(error),
+                            cause=repr(error.__cause__),
+                            **kwargs,
+                        )
+                        self.mark_as_nc_fail_execution(tx)
+                        # A failure voids other transactions of the block, which might change the result of their
+                        # execution, so speculative results are no longer used.
+                        speculations.clear()
+                    else:
+                        tx_meta.nc_execution = NCExecutionState.SUCCESS
+                        self.context.save(tx)
+
+                        # Update metadata.
+                        self.nc_update_metadata(tx, runner)
+
+                        # Update indexes. This must be after metadata is updated.
+                        assert tx.storage is not None
+                        assert tx.storage.indexes is not None
+                        tx.storage.indexes.handle_contract_execution(tx)
+
+                        # Pubsub event to indicate execution success
+                        self.context.nc_exec_success.append(tx)
+
+                        # We only emit events when the nc is successfully executed.
+                        assert self.context.nc_events is not None
+                        last_call_info = runner.get_last_call_info()
+                        events_list = last_call_info.nc_logger.__events__
+                        self.context.nc_events.append((tx, events_list))
+
+                        # Store events in transaction metadata
+                        if events_list:
+                            tx_meta.nc_events = [(event.nc_id, event.data) for event in events_list]
+                            self.context.save(tx)
+                finally:
+                    # We save logs regardless of whether the nc successfully executed.
+                    self._nc_log_storage.save_logs(tx, runner.get_last_call_info(), exception_and_tb)
+
+            if self.nc_speculative_executor is not None and len(nc_sorted_calls) > 1:
+                self.log.debug('nc speculative execution', blk=block.hash.hex(), txs=len(nc_sorted_calls),
+                               applied=applied_count)
+
+            # Save block state root id. If nothing happens, it should be the same as its block parent.
+            block_storage.commit()
         assert block_storage.get_root_id() is not None
         meta.nc_block_root_id = block_storage.get_root_id()
         self.context.save(block)
@@ -326,6 +364,25 @@ class BlockConsensusAlgorithm:
                 case _:  # pragma: no cover
                     assert_never(tx_meta.nc_execution)
 
+    def _nc_execute_tx(self, runner: Runner, tx: Transaction, block_storage: NCBlockStorage) -> None:
+        """Execute a nano transaction with a given runner. It raises NCFail if the execution fails."""
+        token_dict = tx.get_complete_token_info(block_storage)
+        should_verify_sum_after_execution = any(token_info.version is None for token_info in token_dict.values())
+
+        runner.execute_from_tx(tx)
+
+        # after the execution we have the latest state in the storage
+        # and at this point no tokens pending creation
+        if should_verify_sum_after_execution:
+            self._verify_sum_after_execution(tx, block_storage)
+
+    def _nc_speculative_execute(self, tx: Transaction, block_storage: NCBlockStorage) -> Runner:
+        """Execute a nano transaction on an isolated storage, see `NCSpeculativeExecutor`."""
+        from hathor.consensus.nc_speculative_execution import NC_SPECULATIVE_SEED
+        runner = self._runner_factory.create(block_storage=block_storage, seed=NC_SPECULATIVE_SEED)
+        self._nc_execute_tx(runner, tx, block_storage)
+        return runner
+
     def _verify_sum_after_execution(self, tx: Transaction, block_storage: NCBlockStorage) -> None:
         from hathor import NCFail
         from hathor.verification.transaction_verifier import TransactionVerifier
@@ -775,27 +832,30 @@ class BlockConsensusAlgorithm:
         assert block.storage is not None
         storage = block.storage
 
+        assert storage.indexes is not None
+
         from hathor.transaction.storage.traversal import BFSTimestampWalk
         bfs = BFSTimestampWalk(storage, is_dag_verifications=True, is_dag_funds=True, is_left_to_right=False)
-        for tx in bfs.run(block, skip_root=True):
-            if tx.is_block:
-                bfs.skip_neighbors(tx)
-                continue
+        with storage.indexes.write_batch():
+            for tx in bfs.run(block, skip_root=True):
+                if tx.is_block:
+                    bfs.skip_neighbors(tx)
+                    continue
 
-            meta = tx.get_metadata()
-            if meta.first_block != block.hash:
-                bfs.skip_neighbors(tx)
-                continue
+                meta = tx.get_metadata()
+                if meta.first_block != block.hash:
+                    bfs.skip_neighbors(tx)
+                    continue
 
-            if tx.is_nano_contract():
-                if meta.nc_execution == NCExecutionState.SUCCESS:
-                    assert tx.storage is not None
-                    assert tx.storage.indexes is not None
-                    tx.storage.indexes.handle_contract_unexecution(tx)
-                meta.nc_execution = NCExecutionState.PENDING
-                meta.nc_calls = None
-            meta.first_block = None
-            self.context.save(tx)
+                if tx.is_nano_contract():
+                    if meta.nc_execution == NCExecutionState.SUCCESS:
+                        assert tx.storage is not None
+                        assert tx.storage.indexes is not None
+                        tx.storage.indexes.handle_contract_unexecution(tx)
+                    meta.nc_execution = NCExecutionState.PENDING
+                    meta.nc_calls = None
+                meta.first_block = None
+                self.context.save(tx)
 
     def _score_block_dfs(self, block: BaseTransaction, used: set[bytes],
                          mark_as_best_chain: bool, newest_timestamp: int) -> int:
@@ -883,7 +943,14 @@ class BlockConsensusAlgorithm:
 
 
 class BlockConsensusAlgorithmFactory:
-    __slots__ = ('settings', 'nc_log_storage', '_runner_factory', 'feature_service', 'nc_exec_fail_trace')
+    __slots__ = (
+        'settings',
+        'nc_log_storage',
+        '_runner_factory',
+        'feature_service',
+        'nc_exec_fail_trace',
+        'nc_speculative_executor',
+    )
 
     def __init__(
         self,
@@ -893,12 +960,14 @@ class BlockConsensusAlgorithmFactory:
         feature_service: FeatureService,
         *,
         nc_exec_fail_trace: bool = False,
+        nc_speculative_executor: Optional[NCSpeculativeExecutor] = None,
     ) -> None:
         self.settings = settings
         self._runner_factory = runner_factory
         self.nc_log_storage = nc_log_storage
         self.feature_service = feature_service
         self.nc_exec_fail_trace = nc_exec_fail_trace
+        self.nc_speculative_executor = nc_speculative_executor
 
     def __call__(self, context: 'ConsensusAlgorithmContext') -> BlockConsensusAlgorithm:
         return BlockConsensusAlgorithm(
@@ -907,4 +976,6 @@ class BlockConsensusAlgorithmFactory:
             self._runner_factory,
             self.nc_log_storage,
             self.feature_service,
+            nc_exec_fail_trace=self.nc_exec_fail_trace,
+            nc_speculative_executor=self.nc_speculative_executor,
         )
@@ -15,7 +15,7 @@
 from __future__ import annotations
 
 from collections import defaultdict
-from typing import TYPE_CHECKING, Callable
+from typing import TYPE_CHECKING, Callable, Optional
 
 from structlog import get_logger
 
@@ -30,6 +30,7 @@ from hathor.util import not_none
 
 if TYPE_CHECKING:
     from hathor.conf.settings import HathorSettings
+    from hathor.consensus.nc_speculative_execution import NCSpeculativeExecutor
     from hathor.feature_activation.feature_service import FeatureService
     from hathor.nanocontracts import NCStorageFactory
     from hathor.nanocontracts.nc_exec_logs import NCLogStorage
@@ -81,14 +82,21 @@ class ConsensusAlgorithm:
         nc_log_storage: NCLogStorage,
         feature_service: FeatureService,
         nc_exec_fail_trace: bool = False,
+        nc_speculative_executor: Optional[NCSpeculativeExecutor] = None,
     ) -> None:
         self._settings = settings
         self.log = logger.new()
         self._pubsub = pubsub
         self.nc_storage_factory = nc_storage_factory
+        self.nc_speculative_executor = nc_speculative_executor
         self.soft_voided_tx_ids = frozenset(soft_voided_tx_ids)
         self.block_algorithm_factory = BlockConsensusAlgorithmFactory(
-            settings, runner_factory, nc_log_storage, feature_service, nc_exec_fail_trace=nc_exec_fail_trace,
+            settings,
+            runner_factory,
+            nc_log_storage,
+            feature_service,
+            nc_exec_fail_trace=nc_exec_fail_trace,
+            nc_speculative_executor=nc_speculative_executor,
         )
         self.transaction_algorithm_factory = TransactionConsensusAlgorithmFactory()
         self.nc_calls_sorter = nc_calls_sorter
@@ -0,0 +1,122 @@
+# Copyright 2025 Hathor Labs
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Iterable, Optional
+
+from structlog import get_logger
+
+if TYPE_CHECKING:
+    from hathor.nanocontracts.runner import Runner
+    from hathor.nanocontracts.storage import NCBlockStorage, NCStorageFactory
+    from hathor.transaction import Transaction
+
+logger = get_logger()
+
+# Default number of threads used to speculatively execute nano transactions.
+DEFAULT_NC_SPECULATIVE_WORKERS: int = 4
+
+# Seed given to speculative executions. The real seed depends on the state left by the previous transactions of the
+# block, so any execution that uses the RNG is discarded.
+NC_SPECULATIVE_SEED: bytes = bytes(32)
+
+# Execute a transaction on a block storage, returning its runner. It raises NCFail if the execution fails.
+NCExecuteCallable = Callable[['Transaction', 'NCBlockStorage'], 'Runner']
+
+
+@dataclass(slots=True)
+class NCSpeculation:
+    """Result of the speculative execution of a transaction on the state of the parent block."""
+    runner: Optional[Runner]
+    # Isolated storage where the transaction was executed. It records the keys read and written.
+    block_storage: NCBlockStorage
+    # Exception raised by the execution, if any.
+    error: Optional[Exception]
+
+    def can_be_applied(self, written_keys: set[bytes]) -> bool:
+        """Return whether the speculative result is exactly what a serial execution would produce, given the keys
+        written by the transactions executed before this one in the same block.
+
+        Only successful executions are applied, failures are always executed again so their logs and traces are the
+        ones of the actual execution."""
+        if self.error is not None or self.runner is None:
+            return False
+        if self.runner.has_used_rng():
+            return False
+        return (
+            self.block_storage.read_keys.isdisjoint(written_keys)
+            and self.block_storage.written_keys.isdisjoint(written_keys)
+        )
+
+
+class NCSpeculativeExecutor:
+    """Speculatively execute the nano transactions of a block in parallel.
+
+    Each transaction is executed in a thread of its own, on an isolated block storage created from the state of the
+    parent block, which records every key of the block trie it reads or writes. The block is then executed in the
+    canonical order and, for each transaction, the speculative result is applied only when it cannot have been
+    affected by the previous transactions of the block: it succeeded, it did not use the RNG (whose seed depends on
+    the previous state) and none of the keys it accessed was written before. Otherwise the transaction is executed
+    again on the actual state. So the resulting state is identical to a serial execution.
+
+    Contract execution is pure Python and threads share the GIL, so the gains come mainly from overlapping storage
+    reads. All speculative executions finish before the block is executed, so they never run concurrently with trie
+    writes. They do change shared caches while reading, like the transaction storage cache when loading blueprints
+    and token creation transactions, the trie node cache and the blueprint class cache, so those must be safe to use
+    from multiple threads.
+    """
+
+    __slots__ = ('log', 'max_workers', '_pool')
+
+    def __init__(self, max_workers: int = DEFAULT_NC_SPECULATIVE_WORKERS) -> None:
+        assert max_workers > 0
+        self.log = logger.new()
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='nc-speculative')
+
+    def speculate(
+        self,
+        storage_factory: NCStorageFactory,
+        block_root_id: bytes,
+        txs: Iterable[Transaction],
+        execute: NCExecuteCallable,
+    ) -> dict[bytes, NCSpeculation]:
+        """Execute all transactions on the state of `block_root_id` and wait for all of them to finish."""
+        futures = {
+            tx.hash: self._pool.submit(self._speculate_one, storage_factory, block_root_id, tx, execute)
+            for tx in txs
+        }
+        return {tx_id: future.result() for tx_id, future in futures.items()}
+
+    @staticmethod
+    def _speculate_one(
+        storage_factory: NCStorageFactory,
+        block_root_id: bytes,
+        tx: Transaction,
+        execute: NCExecuteCallable,
+    ) -> NCSpeculation:
+        block_storage = storage_factory.get_block_storage(block_root_id, defer_contract_commits=True)
+        block_storage.enable_key_tracking()
+        try:
+            runner = execute(tx, block_storage)
+        except Exception as e:
+            return NCSpeculation(runner=None, block_storage=block_storage, error=e)
+        return NCSpeculation(runner=runner, block_storage=block_storage, error=None)
+
+    def shutdown(self) -> None:
+        """Stop the worker threads."""
+        self._pool.shutdown(wait=True)
@@ -0,0 +1,170 @@
+# Copyright 2025 Hathor Labs
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, NamedTuple, Optional
+
+from structlog import get_logger
+from twisted.internet.interfaces import IDelayedCall
+
+from hathor.util import LogDuration
+
+if TYPE_CHECKING:  # pragma: no cover
+    from hathor.indexes.base_index import BaseIndex
+    from hathor.reactor import ReactorProtocol
+    from hathor.transaction.storage import TransactionStorage
+
+logger = get_logger()
+
+# Default number of vertices added to the indexes in each step.
+DEFAULT_BACKFILL_BATCH_SIZE: int = 1_000
+
+# Default delay between two steps, in seconds, so the reactor can handle other events.
+DEFAULT_BACKFILL_INTERVAL: float = 0.01
+
+# Time in seconds after which the progress is logged.
+_DT_LOG_PROGRESS = 30
+
+
+class BackfillCursor(NamedTuple):
+    """Position of the backfill of an index in the timestamp index: the last vertex that was added to it."""
+    timestamp: int
+    # empty before the first vertex
+    hash: bytes
+
+    def to_str(self) -> str:
+        return f'{self.timestamp}:{self.hash.hex()}'
+
+    @classmethod
+    def from_str(cls, value: str) -> BackfillCursor:
+        timestamp, hash_hex = value.split(':')
+        return cls(int(timestamp), bytes.fromhex(hash_hex))
+
+
+BACKFILL_START = BackfillCursor(0, b'')
+
+
+class IndexesBackfill:
+    """Initialize indexes in the background, while the node runs and serves requests.
+
+    When backfill is enabled in the `IndexesManager`, the indexes that need initialization and `supports_backfill()`
+    are cleared and left in a building state instead of being initialized before the node starts. They get the live
+    updates of new vertices as usual, and this job adds the old vertices in small steps scheduled in the reactor, in
+    the order of the `sorted_all` timestamp index. The position of each index is persisted after each step, so the
+    backfill resumes where it stopped when the node is restarted.
+
+    The indexes that are still building are reported by `IndexesManager.is_building()`, the APIs that depend on them
+    answer that the index is warming up until they are ready.
+    """
+
+    def __init__(
+        self,
+        *,
+        reactor: ReactorProtocol,
+        tx_storage: TransactionStorage,
+        batch_size: int = DEFAULT_BACKFILL_BATCH_SIZE,
+        interval: float = DEFAULT_BACKFILL_INTERVAL,
+    ) -> None:
+        assert batch_size > 0
+        self.log = logger.new()
+        self.reactor = reactor
+        self.tx_storage = tx_storage
+        self.batch_size = batch_size
+        self.interval = interval
+        self._delayed_call: Optional[IDelayedCall] = None
+        self._count = 0
+        self._total = 0
+        self._t_start = 0.0
+        self._t_log_prev = 0.0
+
+    def start(self) -> None:
+        """Start backfilling the indexes that are building, if there are any."""
+        assert self._delayed_call is None
+        indexes = self.tx_storage.indexes
+        assert indexes is not None
+        building = indexes.get_building_indexes()
+        if not building:
+            return
+        self._count = 0
+        self._total = self.tx_storage.get_vertices_count()
+        self._t_start = self._t_log_prev = time.time()
+        self.log.info('start indexes backfill', indexes=[index.get_db_name() for index in building])
+        self._schedule(0)
+
+    def stop(self) -> None:
+        """Stop backfilling. The progress of the last step is persisted, so nothing is lost."""
+        if self._delayed_call is not None and self._delayed_call.active():
+            self._delayed_call.cancel()
+        self._delayed_call = None
+
+    def is_running(self) -> bool:
+        return self._delayed_call is not None
+
+    def _schedule(self, delay: float) -> None:
+        self._delayed_call = self.reactor.callLater(delay, self._run_step)
+
+    def _run_step(self) -> None:
+        self._delayed_call = None
+        indexes = self.tx_storage.indexes
+        assert indexes is not None
+        building = indexes.get_building_indexes()
+        if not building:
+            return
+
+        # Indexes that started in different runs of the node have different cursors. The one that is further behind
+        # goes first, so it eventually reaches the others and they all go together from there.
+        cursor = min(building.values())
+        step_indexes: list[BaseIndex] = [index for index, index_cursor in building.items() if index_cursor == cursor]
+        hashes, has_more = indexes.sorted_all.get_newer(cursor.timestamp, cursor.hash or None, self.batch_size)
+        txs = self.tx_storage.get_transactions(hashes)
+        for tx in txs:
+            for index in step_indexes:
+                if index.get_scope().matches(tx):
+                    index.backfill_step(tx)
+        self._count += len(txs)
+
+        new_cursor: Optional[BackfillCursor] = None
+        if has_more and txs:
+            new_cursor = BackfillCursor(txs[-1].timestamp, txs[-1].hash)
+        for index in step_indexes:
+            indexes.set_backfill_cursor(self.tx_storage, index, new_cursor)
+            if new_cursor is None:
+                self.log.info('index backfill finished', index=index.get_db_name(),
+                              elapsed=LogDuration(time.time() - self._t_start))
+
+        t_log = time.time()
+        if t_log - self._t_log_prev > _DT_LOG_PROGRESS:
+            self._t_log_prev = t_log
+            self._log_progress(t_log)
+        if indexes.get_building_indexes():
+            self._schedule(self.interval)
+
+    def _log_progress(self, t_log: float) -> None:
+        indexes = self.tx_storage.indexes
+        assert indexes is not None
+        progress_ = min(1.0, self._count / self._total) if self._total else None
+        elapsed_time = t_log - self._t_start
+        remaining_time: str | LogDuration = '?'
+        if progress_:
+            remaining_time = LogDuration(elapsed_time / progress_ - elapsed_time)
+        for index, cursor in indexes.get_building_indexes().items():
+            self.log.info(
+                'index backfill progress',
+                index=index.get_db_name(),
+                latest_ts=cursor.timestamp,
+                progress=progress_,
+                remaining_time=remaining_time,
+            )
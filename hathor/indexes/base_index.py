@@ -15,14 +15,17 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Callable, Optional
 
 from structlog import get_logger
+from typing_extensions import Self
 
 from hathor.indexes.scope import Scope
 from hathor.transaction.base_transaction import BaseTransaction
 
 if TYPE_CHECKING:  # pragma: no cover
+    import rocksdb
+
     from hathor.conf.settings import HathorSettings
     from hathor.indexes.manager import IndexesManager
 
@@ -66,6 +69,58 @@ class BaseIndex(ABC):
         """
         raise NotImplementedError
 
+    def init_batch_start(self) -> bool:
+        """ Start collecting the writes of `init_loop_step` in a batch, returns False if the index doesn't support it.
+
+        This is only called when the index is initialized from scratch, after `force_clear`, so the index should only
+        support it if `init_loop_step` doesn't need to read back what it writes.
+        """
+        return False
+
+    def init_batch_end(self) -> Callable[[], None]:
+        """ Stop collecting the writes and return a function that writes them to the database.
+
+        The returned function can be called from another thread, while `init_loop_step` is called for the next batch.
+        The functions returned by an index are called in the order they were returned, one at a time.
+        """
+        raise NotImplementedError
+
+    def write_batch_start(self, batch: rocksdb.WriteBatch) -> bool:
+        """ Start adding the writes of this index to a batch shared with other indexes, returns False if the index
+        doesn't support it, in which case it keeps writing directly to the database.
+
+        This is used by `IndexesManager.write_batch()` to write all changes of a vertex at once. Unlike the batch of
+        `init_batch_start`, the index must still see its own pending writes when it reads them back.
+        """
+        return False
+
+    def write_batch_end(self) -> None:
+        """ Stop adding the writes to the shared batch, after adding any writes that were kept pending in memory.
+        """
+        raise NotImplementedError
+
+    def supports_backfill(self) -> bool:
+        """ Whether the index can be initialized in the background, while the node runs, see `IndexesBackfill`.
+
+        While it's backfilled the index gets the live updates of vertices it has never seen, and a vertex can be
+        backfilled before or after its live updates, so `backfill_step` must not depend on the order of the vertices
+        and adding a vertex again must not change the index.
+        """
+        return False
+
+    def backfill_step(self, tx: BaseTransaction) -> None:
+        """ Add a vertex to an index that is being backfilled. By default it's the same as `init_loop_step`.
+        """
+        self.init_loop_step(tx)
+
+    def read_snapshot(self, db: rocksdb.DB) -> Optional[Self]:
+        """ Return a copy of this index that reads from `db`, which is a read snapshot of the database, or None if
+        the index doesn't support it, like the indexes that are kept in memory.
+
+        The copy is only used for reading, see `IndexesManager.read_snapshot()`.
+        """
+        return None
+
     @abstractmethod
     def force_clear(self) -> None:
         """ Clear any existing data in the index.
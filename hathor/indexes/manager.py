@@ -14,8 +14,10 @@
 
 from __future__ import annotations
 
+import copy
 import operator
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from functools import reduce
 from typing import TYPE_CHECKING, Iterator, Optional
 
@@ -23,6 +25,7 @@ from structlog import get_logger
 from typing_extensions import assert_never
 
 from hathor.indexes.address_index import AddressIndex
+from hathor.indexes.backfill import BACKFILL_START, BackfillCursor
 from hathor.indexes.base_index import BaseIndex
 from hathor.indexes.blueprint_history_index import BlueprintHistoryIndex
 from hathor.indexes.blueprint_timestamp_index import BlueprintTimestampIndex
@@ -31,6 +34,7 @@ from hathor.indexes.info_index import InfoIndex
 from hathor.indexes.mempool_tips_index import MempoolTipsIndex
 from hathor.indexes.nc_creation_index import NCCreationIndex
 from hathor.indexes.nc_history_index import NCHistoryIndex
+from hathor.indexes.rebuild import DEFAULT_REBUILD_BATCH_SIZE, IndexesRebuild
 from hathor.indexes.timestamp_index import ScopeType as TimestampScopeType, TimestampIndex
 from hathor.indexes.tips_index import ScopeType as TipsScopeType, TipsIndex
 from hathor.indexes.tokens_index import TokensIndex
@@ -40,6 +44,8 @@ from hathor.transaction.nc_execution_state import NCExecutionState
 from hathor.util import tx_progress
 
 if TYPE_CHECKING:  # pragma: no cover
+    import rocksdb
+
     from hathor.conf.settings import HathorSettings
     from hathor.pubsub import PubSubManager
     from hathor.storage import RocksDBStorage
@@ -78,6 +84,13 @@ class IndexesManager(ABC):
     blueprints: Optional[BlueprintTimestampIndex]
     blueprint_history: Optional[BlueprintHistoryIndex]
 
+    # number of vertices fed to the indexes being initialized between two writes of their batches
+    rebuild_batch_size: int = DEFAULT_REBUILD_BATCH_SIZE
+
+    # whether the indexes that support it are initialized in the background, see `IndexesBackfill`
+    backfill_enabled: bool = False
+    _building_indexes: dict[BaseIndex, BackfillCursor]
+
     def __init_checks__(self):
         """ Implementations must call this at the **end** of their __init__ for running ValueError checks."""
         # check if every index has a unique db_name
@@ -136,6 +149,36 @@ class IndexesManager(ABC):
         """Enable Nano Contract related indexes."""
         raise NotImplementedError
 
+    def enable_backfill(self) -> None:
+        """Initialize the indexes that support it in the background, after the node has started."""
+        self.backfill_enabled = True
+
+    def get_building_indexes(self) -> dict[BaseIndex, BackfillCursor]:
+        """Return the indexes that are being backfilled and their positions."""
+        return self._building_indexes
+
+    def is_building(self, *indexes: Optional[BaseIndex]) -> bool:
+        """Return whether any of the given indexes is being backfilled, so it doesn't have all vertices yet."""
+        building = self.get_building_indexes()
+        return any(index in building for index in indexes if index is not None)
+
+    def set_backfill_cursor(
+        self,
+        tx_storage: 'TransactionStorage',
+        index: BaseIndex,
+        cursor: Optional[BackfillCursor],
+    ) -> None:
+        """Persist the position of an index that is being backfilled, None means the backfill has finished."""
+        index_db_name = index.get_db_name()
+        assert index_db_name is not None
+        building = self.get_building_indexes()
+        if cursor is None:
+            building.pop(index, None)
+            tx_storage.set_index_backfill_cursor(index_db_name, None)
+        else:
+            building[index] = cursor
+            tx_storage.set_index_backfill_cursor(index_db_name, cursor.to_str())
+
     def force_clear_all(self) -> None:
         """ Force clear all indexes.
         """
@@ -149,27 +192,48 @@ class IndexesManager(ABC):
 
         db_last_started_at = tx_storage.get_last_started_at()
 
+        self._building_indexes.clear()
         indexes_to_init: list[BaseIndex] = []
+        indexes_to_backfill: list[BaseIndex] = []
         for index in self.iter_all_indexes():
             index_db_name = index.get_db_name()
             if index_db_name is None:
                 indexes_to_init.append(index)
                 continue
+            can_backfill = self.backfill_enabled and index.supports_backfill()
+            backfill_cursor = tx_storage.get_index_backfill_cursor(index_db_name)
+            if backfill_cursor is not None:
+                # the backfill of this index didn't finish in a previous run
+                if can_backfill:
+                    self._building_indexes[index] = BackfillCursor.from_str(backfill_cursor)
+                    continue
+                indexes_to_init.append(index)
+                continue
             index_last_started_at = tx_storage.get_index_last_started_at(index_db_name)
             if db_last_started_at != index_last_started_at:
-                indexes_to_init.append(index)
+                if can_backfill:
+                    indexes_to_backfill.append(index)
+                else:
+                    indexes_to_init.append(index)
 
         if indexes_to_init:
             self.log.info('there are indexes that need initialization', indexes_to_init=indexes_to_init)
         else:
             self.log.info('there are no indexes that need initialization')
+        if indexes_to_backfill or self._building_indexes:
+            self.log.info('there are indexes that will be initialized in the background',
+                          indexes_to_backfill=indexes_to_backfill, resumed=list(self._building_indexes))
 
         # make sure that all the indexes that we're rebuilding are cleared
-        for index in indexes_to_init:
+        for index in indexes_to_init + indexes_to_backfill:
             index_db_name = index.get_db_name()
             if index_db_name:
                 tx_storage.set_index_last_started_at(index_db_name, NULL_INDEX_LAST_STARTED_AT)
             index.force_clear()
+            if index in indexes_to_backfill:
+                self.set_backfill_cursor(tx_storage, index, BACKFILL_START)
+            elif index_db_name:
+                tx_storage.set_index_backfill_cursor(index_db_name, None)
 
         cache_capacity = None
 
@@ -186,30 +250,55 @@ class IndexesManager(ABC):
         if indexes_to_init:
             overall_scope = reduce(operator.__or__, map(lambda i: i.get_scope(), indexes_to_init))
             tx_iter_inner = overall_scope.get_iterator(tx_storage)
-            tx_iter = tx_progress(tx_iter_inner, log=self.log, total=tx_storage.get_vertices_count())
+            total = tx_storage.get_vertices_count()
+            tx_iter = tx_progress(tx_iter_inner, log=self.log, total=total)
             self.log.debug('indexes init', scope=overall_scope)
+            # feed each transaction to the indexes that they are interested in
+            rebuild = IndexesRebuild(indexes_to_init, batch_size=self.rebuild_batch_size, log=self.log)
+            rebuild.run(tx_iter, total=total)
         else:
-            tx_iter = iter([])
             self.log.debug('indexes init')
 
-        for tx in tx_iter:
-            # feed each transaction to the indexes that they are interested in
-            for index in indexes_to_init:
-                if index.get_scope().matches(tx):
-                    index.init_loop_step(tx)
-
         # Restore cache capacity.
         if isinstance(tx_storage, TransactionCacheStorage):
             assert cache_capacity is not None
             tx_storage.set_capacity(cache_capacity)
 
+    @contextmanager
+    def write_batch(self) -> Iterator[None]:
+        """Group the writes of all indexes that support `write_batch_start()` into a single write, which happens
+        when the context exits, so the changes caused by a vertex (or by all vertices of a block) are applied at once.
+
+        Nested contexts are merged into the outermost one. If the context exits with an error, the pending writes are
+        discarded. By default, indexes write immediately."""
+        yield
+
+    def read_snapshot(self, db: 'rocksdb.DB') -> 'IndexesManager':
+        """Return a copy of this manager whose indexes read from `db`, which is a read snapshot of the database.
+
+        The indexes that don't support `read_snapshot()`, like the ones kept in memory, are None in the copy. The copy
+        must only be used for reading, and it can be used from another thread."""
+        indexes = copy.copy(self)
+        snapshots: dict[BaseIndex, BaseIndex] = {}
+        for name, index in vars(self).items():
+            if isinstance(index, BaseIndex):
+                index_snapshot = index.read_snapshot(db)
+                setattr(indexes, name, index_snapshot)
+                if index_snapshot is not None:
+                    snapshots[index] = index_snapshot
+        indexes._building_indexes = {
+            snapshots[index]: cursor for index, cursor in self._building_indexes.items() if index in snapshots
+        }
+        return indexes
+
     def update(self, tx: BaseTransaction) -> None:
         """ This is the new update method that indexes should use instead of add_tx/del_tx
         """
-        if self.mempool_tips:
-            self.mempool_tips.update(tx)
-        if self.utxo:
-            self.utxo.update(tx)
+        with self.write_batch():
+            if self.mempool_tips:
+                self.mempool_tips.update(tx)
+            if self.utxo:
+                self.utxo.update(tx)
 
     def handle_contract_execution(self, tx: BaseTransaction) -> None:
         """
@@ -447,16 +536,31 @@ class RocksDBIndexesManager(IndexesManager):
 
         self.settings = settings
         self._db = rocksdb_storage.get_db()
+        # new index column families are created with the options of the storage tuning profile
+        self._get_cf_options = rocksdb_storage.get_column_family_options
+        get_cf_options = self._get_cf_options
+
+        self.info = RocksDBInfoIndex(self._db, settings=settings, get_cf_options=get_cf_options)
+        self.height = RocksDBHeightIndex(self._db, settings=settings, get_cf_options=get_cf_options)
+        self.all_tips = PartialRocksDBTipsIndex(
+            self._db, scope_type=TipsScopeType.ALL, settings=settings, get_cf_options=get_cf_options
+        )
+        self.block_tips = PartialRocksDBTipsIndex(
+            self._db, scope_type=TipsScopeType.BLOCKS, settings=settings, get_cf_options=get_cf_options
+        )
+        self.tx_tips = PartialRocksDBTipsIndex(
+            self._db, scope_type=TipsScopeType.TXS, settings=settings, get_cf_options=get_cf_options
+        )
 
-        self.info = RocksDBInfoIndex(self._db, settings=settings)
-        self.height = RocksDBHeightIndex(self._db, settings=settings)
-        self.all_tips = PartialRocksDBTipsIndex(self._db, scope_type=TipsScopeType.ALL, settings=settings)
-        self.block_tips = PartialRocksDBTipsIndex(self._db, scope_type=TipsScopeType.BLOCKS, settings=settings)
-        self.tx_tips = PartialRocksDBTipsIndex(self._db, scope_type=TipsScopeType.TXS, settings=settings)
-
-        self.sorted_all = RocksDBTimestampIndex(self._db, scope_type=TimestampScopeType.ALL, settings=settings)
-        self.sorted_blocks = RocksDBTimestampIndex(self._db, scope_type=TimestampScopeType.BLOCKS, settings=settings)
-        self.sorted_txs = RocksDBTimestampIndex(self._db, scope_type=TimestampScopeType.TXS, settings=settings)
+        self.sorted_all = RocksDBTimestampIndex(
+            self._db, scope_type=TimestampScopeType.ALL, settings=settings, get_cf_options=get_cf_options
+        )
+        self.sorted_blocks = RocksDBTimestampIndex(
+            self._db, scope_type=TimestampScopeType.BLOCKS, settings=settings, get_cf_options=get_cf_options
+        )
+        self.sorted_txs = RocksDBTimestampIndex(
+            self._db, scope_type=TimestampScopeType.TXS, settings=settings, get_cf_options=get_cf_options
+        )
 
         self.addresses = None
         self.tokens = None
@@ -467,23 +571,48 @@ class RocksDBIndexesManager(IndexesManager):
         self.blueprints = None
         self.blueprint_history = None
 
+        self._building_indexes = {}
+        self._write_batch: Optional[rocksdb.WriteBatch] = None
+
         # XXX: this has to be at the end of __init__, after everything has been initialized
         self.__init_checks__()
 
+    @contextmanager
+    def write_batch(self) -> Iterator[None]:
+        import rocksdb
+        if self._write_batch is not None:
+            # Nested batch, the outermost one will write everything.
+            yield
+            return
+
+        batch = rocksdb.WriteBatch()
+        batched_indexes = [index for index in self.iter_all_indexes() if index.write_batch_start(batch)]
+        self._write_batch = batch
+        try:
+            yield
+        finally:
+            self._write_batch = None
+            # this also runs on errors, so the indexes stop using the batch, which is then discarded
+            for index in batched_indexes:
+                index.write_batch_end()
+        self._db.write(batch)
+
     def enable_address_index(self, pubsub: 'PubSubManager') -> None:
         from hathor.indexes.rocksdb_address_index import RocksDBAddressIndex
         if self.addresses is None:
-            self.addresses = RocksDBAddressIndex(self._db, pubsub=pubsub, settings=self.settings)
+            self.addresses = RocksDBAddressIndex(
+                self._db, pubsub=pubsub, settings=self.settings, get_cf_options=self._get_cf_options
+            )
 
     def enable_tokens_index(self) -> None:
         from hathor.indexes.rocksdb_tokens_index import RocksDBTokensIndex
         if self.tokens is None:
-            self.tokens = RocksDBTokensIndex(self._db, settings=self.settings)
+            self.tokens = RocksDBTokensIndex(self._db, settings=self.settings, get_cf_options=self._get_cf_options)
 
     def enable_utxo_index(self) -> None:
         from hathor.indexes.rocksdb_utxo_index import RocksDBUtxoIndex
         if self.utxo is None:
-            self.utxo = RocksDBUtxoIndex(self._db, settings=self.settings)
+            self.utxo = RocksDBUtxoIndex(self._db, settings=self.settings, get_cf_options=self._get_cf_options)
 
     def enable_mempool_index(self) -> None:
         from hathor.indexes.memory_mempool_tips_index import MemoryMempoolTipsIndex
@@ -496,10 +625,10 @@ class RocksDBIndexesManager(IndexesManager):
         from hathor.indexes.rocksdb_blueprint_history_index import RocksDBBlueprintHistoryIndex
         from hathor.indexes.rocksdb_nc_history_index import RocksDBNCHistoryIndex
         if self.nc_creation is None:
-            self.nc_creation = NCCreationIndex(self._db)
+            self.nc_creation = NCCreationIndex(self._db, get_cf_options=self._get_cf_options)
         if self.nc_history is None:
-            self.nc_history = RocksDBNCHistoryIndex(self._db)
+            self.nc_history = RocksDBNCHistoryIndex(self._db, get_cf_options=self._get_cf_options)
         if self.blueprints is None:
-            self.blueprints = BlueprintTimestampIndex(self._db)
+            self.blueprints = BlueprintTimestampIndex(self._db, get_cf_options=self._get_cf_options)
         if self.blueprint_history is None:
-            self.blueprint_history = RocksDBBlueprintHistoryIndex(self._db)
+            self.blueprint_history = RocksDBBlueprintHistoryIndex(self._db, get_cf_options=self._get_cf_options)
@@ -20,7 +20,7 @@ from structlog import get_logger
 
 from hathor.conf.settings import HathorSettings
 from hathor.indexes.memory_tips_index import MemoryTipsIndex
-from hathor.indexes.rocksdb_utils import RocksDBIndexUtils
+from hathor.indexes.rocksdb_utils import ColumnFamilyOptionsGetter, RocksDBIndexUtils
 from hathor.indexes.tips_index import ScopeType
 from hathor.util import progress
 
@@ -62,11 +62,12 @@ class PartialRocksDBTipsIndex(MemoryTipsIndex, RocksDBIndexUtils):
     # It is useful because the interval tree allows access only by the interval.
     tx_last_interval: dict[bytes, Interval]
 
-    def __init__(self, db: 'rocksdb.DB', *, scope_type: ScopeType, settings: HathorSettings) -> None:
+    def __init__(self, db: 'rocksdb.DB', *, scope_type: ScopeType, settings: HathorSettings,
+                 get_cf_options: Optional[ColumnFamilyOptionsGetter] = None) -> None:
         MemoryTipsIndex.__init__(self, scope_type=scope_type, settings=settings)
         self._name = scope_type.get_name()
         self.log = logger.new()  # XXX: override MemoryTipsIndex logger so it shows the correct module
-        RocksDBIndexUtils.__init__(self, db, f'tips-{self._name}'.encode())
+        RocksDBIndexUtils.__init__(self, db, f'tips-{self._name}'.encode(), get_cf_options=get_cf_options)
 
     def get_db_name(self) -> Optional[str]:
         return f'tips_{self._name}'
@@ -0,0 +1,153 @@
+# Copyright 2025 Hathor Labs
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import TYPE_CHECKING, Callable, Iterator, Optional
+
+from structlog import get_logger
+
+from hathor.indexes.base_index import BaseIndex
+from hathor.transaction import BaseTransaction
+from hathor.util import LogDuration
+
+if TYPE_CHECKING:  # pragma: no cover
+    import structlog
+
+logger = get_logger()
+
+# Number of vertices fed to the indexes between two writes of their batches.
+DEFAULT_REBUILD_BATCH_SIZE: int = 10_000
+
+# Time in seconds after which the progress of each index is logged.
+_DT_LOG_PROGRESS = 30
+
+
+@dataclass(slots=True)
+class _IndexBuilder:
+    """State of the rebuild of a single index."""
+    index: BaseIndex
+    name: str
+    batched: bool
+    vertices: int = 0
+    step_time: float = 0.0
+    write_time: float = 0.0
+    # the write of the previous batch, the next one is only submitted after it's done to keep the order
+    pending_write: Optional[Future[None]] = field(default=None)
+
+    def run_write(self, write: Callable[[], None]) -> None:
+        t0 = time.perf_counter()
+        write()
+        self.write_time += time.perf_counter() - t0
+
+    def wait_write(self) -> None:
+        if self.pending_write is not None:
+            self.pending_write.result()
+            self.pending_write = None
+
+
+class IndexesRebuild:
+    """Feed the vertices to the indexes that are being initialized, in batches.
+
+    The indexes that support `init_batch_start()` collect the writes of each batch of vertices in a RocksDB write
+    batch of their own, which is written in a worker thread while the next batch of vertices is fed to the indexes.
+    RocksDB doesn't hold the GIL while writing, so the writes of all indexes run alongside the vertex loop. The
+    vertices are still fed in the same order as before, in a single thread, because the storage and the indexes that
+    read their own state are not thread-safe.
+    """
+
+    def __init__(
+        self,
+        indexes: list[BaseIndex],
+        *,
+        batch_size: int = DEFAULT_REBUILD_BATCH_SIZE,
+        log: Optional['structlog.stdlib.BoundLogger'] = None,
+    ) -> None:
+        assert batch_size > 0
+        self.log = log or logger.new()
+        self.batch_size = batch_size
+        self._builders = [
+            _IndexBuilder(index=index, name=index.get_db_name() or type(index).__name__, batched=False)
+            for index in indexes
+        ]
+
+    def run(self, tx_iter: Iterator[BaseTransaction], *, total: Optional[int] = None) -> None:
+        """Feed all vertices of the iterator to the indexes and wait until all their writes are done."""
+        for builder in self._builders:
+            builder.batched = builder.index.init_batch_start()
+        batched_builders = [builder for builder in self._builders if builder.batched]
+        self.log.debug('rebuild indexes', batched=[builder.name for builder in batched_builders])
+
+        executor = None
+        if batched_builders:
+            executor = ThreadPoolExecutor(max_workers=len(batched_builders), thread_name_prefix='index-rebuild')
+        t_start = t_log_prev = time.time()
+        count = 0
+        try:
+            while batch := list(islice(tx_iter, self.batch_size)):
+                self._run_batch(batch)
+                count += len(batch)
+                for builder in batched_builders:
+                    assert executor is not None
+                    builder.wait_write()
+                    builder.pending_write = executor.submit(builder.run_write, builder.index.init_batch_end())
+                    builder.index.init_batch_start()
+                t_log = time.time()
+                if t_log - t_log_prev > _DT_LOG_PROGRESS:
+                    t_log_prev = t_log
+                    self._log_progress(count=count, total=total, elapsed=t_log - t_start)
+        finally:
+            # the last batch is always written, if there was an error the index will be initialized again anyway
+            for builder in batched_builders:
+                write = builder.index.init_batch_end()
+                builder.wait_write()
+                builder.run_write(write)
+            if executor is not None:
+                executor.shutdown(wait=True)
+        self._log_progress(count=count, total=count, elapsed=time.time() - t_start)
+
+    def _run_batch(self, batch: list[BaseTransaction]) -> None:
+        """Feed each vertex to the indexes that are interested in it, in order."""
+        for tx in batch:
+            for builder in self._builders:
+                if not builder.index.get_scope().matches(tx):
+                    continue
+                t0 = time.perf_counter()
+                builder.index.init_loop_step(tx)
+                builder.step_time += time.perf_counter() - t0
+                builder.vertices += 1
+
+    def _log_progress(self, *, count: int, total: Optional[int], elapsed: float) -> None:
+        """Log how much time each index took so far and how much it's expected to take to finish."""
+        progress_ = count / total if total else None
+        for builder in self._builders:
+            spent = builder.step_time + builder.write_time
+            remaining_time: str | LogDuration = '?'
+            if progress_:
+                remaining_time = LogDuration(max(0.0, spent / progress_ - spent))
+            self.log.info(
+                'index rebuild progress',
+                index=builder.name,
+                batched=builder.batched,
+                vertices=builder.vertices,
+                step_time=LogDuration(builder.step_time),
+                write_time=LogDuration(builder.write_time),
+                remaining_time=remaining_time,
+                progress=progress_,
+                elapsed=LogDuration(elapsed),
+            )
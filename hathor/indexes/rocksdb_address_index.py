@@ -19,7 +19,7 @@ from structlog import get_logger
 from hathor.conf.settings import HathorSettings
 from hathor.indexes.address_index import AddressIndex
 from hathor.indexes.rocksdb_tx_group_index import RocksDBTxGroupIndex
-from hathor.indexes.rocksdb_utils import RocksDBIndexUtils
+from hathor.indexes.rocksdb_utils import ColumnFamilyOptionsGetter, RocksDBIndexUtils
 from hathor.transaction import BaseTransaction
 
 if TYPE_CHECKING:  # pragma: no cover
@@ -40,8 +40,9 @@ class RocksDBAddressIndex(RocksDBTxGroupIndex[str], AddressIndex, RocksDBIndexUt
     _KEY_SIZE = 34
 
     def __init__(self, db: 'rocksdb.DB', *, settings: HathorSettings, cf_name: Optional[bytes] = None,
-                 pubsub: Optional['PubSubManager'] = None) -> None:
-        RocksDBTxGroupIndex.__init__(self, db, cf_name or _CF_NAME_ADDRESS_INDEX)
+                 pubsub: Optional['PubSubManager'] = None,
+                 get_cf_options: Optional[ColumnFamilyOptionsGetter] = None) -> None:
+        RocksDBTxGroupIndex.__init__(self, db, cf_name or _CF_NAME_ADDRESS_INDEX, get_cf_options=get_cf_options)
         AddressIndex.__init__(self, settings=settings)
 
         self.pubsub = pubsub
@@ -65,6 +66,10 @@ class RocksDBAddressIndex(RocksDBTxGroupIndex[str], AddressIndex, RocksDBIndexUt
         super().add_tx(tx)
         self._publish_tx(tx)
 
+    def backfill_step(self, tx: BaseTransaction) -> None:
+        # old vertices are not published, the subscribers only expect new ones while the node is running
+        super().add_tx(tx)
+
     def get_from_address(self, address: str) -> list[bytes]:
         return list(self._get_sorted_from_key(address))
 
@@ -12,12 +12,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from typing import Optional
+
 import rocksdb
 from typing_extensions import override
 
 from hathor.indexes.blueprint_history_index import BlueprintHistoryIndex
 from hathor.indexes.rocksdb_tx_group_index import RocksDBTxGroupIndex
-from hathor.indexes.rocksdb_utils import RocksDBIndexUtils
+from hathor.indexes.rocksdb_utils import ColumnFamilyOptionsGetter, RocksDBIndexUtils
 
 _CF_NAME_BLUEPRINT_HISTORY_INDEX = b'blueprint-history-index'
 _DB_NAME: str = 'blueprint-history'
@@ -26,8 +28,8 @@ _DB_NAME: str = 'blueprint-history'
 class RocksDBBlueprintHistoryIndex(RocksDBTxGroupIndex[bytes], BlueprintHistoryIndex, RocksDBIndexUtils):
     _KEY_SIZE = 32
 
-    def __init__(self, db: rocksdb.DB) -> None:
-        RocksDBTxGroupIndex.__init__(self, db, _CF_NAME_BLUEPRINT_HISTORY_INDEX)
+    def __init__(self, db: rocksdb.DB, *, get_cf_options: Optional[ColumnFamilyOptionsGetter] = None) -> None:
+        RocksDBTxGroupIndex.__init__(self, db, _CF_NAME_BLUEPRINT_HISTORY_INDEX, get_cf_options=get_cf_options)
 
     @override
     def _serialize_key(self, key: bytes) -> bytes:
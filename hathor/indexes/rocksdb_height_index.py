@@ -15,10 +15,11 @@
 from typing import TYPE_CHECKING, Any, Optional
 
 from structlog import get_logger
+from typing_extensions import Self
 
 from hathor.conf.settings import HathorSettings
 from hathor.indexes.height_index import HeightIndex, HeightInfo, IndexEntry
-from hathor.indexes.rocksdb_utils import RocksDBIndexUtils
+from hathor.indexes.rocksdb_utils import ColumnFamilyOptionsGetter, RocksDBIndexUtils
 
 if TYPE_CHECKING:  # pragma: no cover
     import rocksdb
@@ -43,10 +44,11 @@ class RocksDBHeightIndex(HeightIndex, RocksDBIndexUtils):
     It works nicely because rocksdb uses a tree sorted by key under the hood.
     """
 
-    def __init__(self, db: 'rocksdb.DB', *, settings: HathorSettings, cf_name: Optional[bytes] = None) -> None:
+    def __init__(self, db: 'rocksdb.DB', *, settings: HathorSettings, cf_name: Optional[bytes] = None,
+                 get_cf_options: Optional[ColumnFamilyOptionsGetter] = None) -> None:
         self.log = logger.new()
         HeightIndex.__init__(self, settings=settings)
-        RocksDBIndexUtils.__init__(self, db, cf_name or _CF_NAME_HEIGHT_INDEX)
+        RocksDBIndexUtils.__init__(self, db, cf_name or _CF_NAME_HEIGHT_INDEX, get_cf_options=get_cf_options)
 
     def get_db_name(self) -> Optional[str]:
         # XXX: we don't need it to be parametrizable, so this is fine
@@ -55,6 +57,9 @@ class RocksDBHeightIndex(HeightIndex, RocksDBIndexUtils):
     def force_clear(self) -> None:
         self.clear()
 
+    def read_snapshot(self, db: 'rocksdb.DB') -> Self:
+        return self._with_db(db)
+
     def _init_db(self) -> None:
         """ Initialize the database with the genesis entry."""
         key_genesis = self._to_key(0)
@@ -15,10 +15,11 @@
 from typing import TYPE_CHECKING, Optional
 
 from structlog import get_logger
+from typing_extensions import Self
 
 from hathor.conf.settings import HathorSettings
 from hathor.indexes.memory_info_index import MemoryInfoIndex
-from hathor.indexes.rocksdb_utils import RocksDBIndexUtils
+from hathor.indexes.rocksdb_utils import ColumnFamilyOptionsGetter, RocksDBIndexUtils
 from hathor.transaction import BaseTransaction
 
 if TYPE_CHECKING:  # pragma: no cover
@@ -38,9 +39,10 @@ _DB_LATEST_TIMESTAMP = b'latest_ts'
 
 
 class RocksDBInfoIndex(MemoryInfoIndex, RocksDBIndexUtils):
-    def __init__(self, db: 'rocksdb.DB', *, settings: HathorSettings, cf_name: Optional[bytes] = None) -> None:
+    def __init__(self, db: 'rocksdb.DB', *, settings: HathorSettings, cf_name: Optional[bytes] = None,
+                 get_cf_options: Optional[ColumnFamilyOptionsGetter] = None) -> None:
         self.log = logger.new()
-        RocksDBIndexUtils.__init__(self, db, cf_name or _CF_NAME_ADDRESS_INDEX)
+        RocksDBIndexUtils.__init__(self, db, cf_name or _CF_NAME_ADDRESS_INDEX, get_cf_options=get_cf_options)
         MemoryInfoIndex.__init__(self, settings=settings)
 
     def init_start(self, indexes_manager: 'IndexesManager') -> None:
@@ -55,6 +57,10 @@ class RocksDBInfoIndex(MemoryInfoIndex, RocksDBIndexUtils):
         super().force_clear()
         self._store_all_values()
 
+    def read_snapshot(self, db: 'rocksdb.DB') -> Self:
+        # the values are kept in memory, and they are copied as they are now
+        return self._with_db(db)
+
     def _load_value(self, key: bytes) -> int:
         import struct
         db_value = self._db.get((self._cf, key))
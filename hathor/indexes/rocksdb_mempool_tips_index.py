@@ -18,7 +18,7 @@ from structlog import get_logger
 
 from hathor.conf.settings import HathorSettings
 from hathor.indexes.mempool_tips_index import ByteCollectionMempoolTipsIndex
-from hathor.indexes.rocksdb_utils import RocksDBSimpleSet
+from hathor.indexes.rocksdb_utils import ColumnFamilyOptionsGetter, RocksDBSimpleSet
 
 if TYPE_CHECKING:  # pragma: no cover
     import rocksdb
@@ -32,11 +32,12 @@ _DB_NAME: str = 'mempool_tips'
 class RocksDBMempoolTipsIndex(ByteCollectionMempoolTipsIndex):
     _index: RocksDBSimpleSet
 
-    def __init__(self, db: 'rocksdb.DB', *, settings: HathorSettings, cf_name: Optional[bytes] = None) -> None:
+    def __init__(self, db: 'rocksdb.DB', *, settings: HathorSettings, cf_name: Optional[bytes] = None,
+                 get_cf_options: Optional[ColumnFamilyOptionsGetter] = None) -> None:
         super().__init__(settings=settings)
         self.log = logger.new()
         _cf_name = cf_name or _CF_NAME_MEMPOOL_TIPS_INDEX
-        self._index = RocksDBSimpleSet(db, self.log, cf_name=_cf_name)
+        self._index = RocksDBSimpleSet(db, self.log, cf_name=_cf_name, get_cf_options=get_cf_options)
 
     def get_db_name(self) -> Optional[str]:
         # XXX: we don't need it to be parametrizable, so this is fine
@@ -18,7 +18,7 @@ from structlog import get_logger
 
 from hathor.indexes.nc_history_index import NCHistoryIndex
 from hathor.indexes.rocksdb_tx_group_index import RocksDBTxGroupIndex
-from hathor.indexes.rocksdb_utils import RocksDBIndexUtils
+from hathor.indexes.rocksdb_utils import ColumnFamilyOptionsGetter, RocksDBIndexUtils
 
 if TYPE_CHECKING:  # pragma: no cover
     import rocksdb
@@ -35,8 +35,15 @@ class RocksDBNCHistoryIndex(RocksDBTxGroupIndex[bytes], NCHistoryIndex, RocksDBI
 
     _KEY_SIZE = 32
 
-    def __init__(self, db: 'rocksdb.DB', *, cf_name: Optional[bytes] = None) -> None:
-        RocksDBTxGroupIndex.__init__(self, db, cf_name or _CF_NAME_NC_HISTORY_INDEX, _CF_NAME_NC_HISTORY_INDEX_STATS)
+    def __init__(self, db: 'rocksdb.DB', *, cf_name: Optional[bytes] = None,
+                 get_cf_options: Optional[ColumnFamilyOptionsGetter] = None) -> None:
+        RocksDBTxGroupIndex.__init__(
+            self,
+            db,
+            cf_name or _CF_NAME_NC_HISTORY_INDEX,
+            _CF_NAME_NC_HISTORY_INDEX_STATS,
+            get_cf_options=get_cf_options,
+        )
 
     def _serialize_key(self, key: bytes) -> bytes:
         return key
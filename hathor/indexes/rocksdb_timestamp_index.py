@@ -15,9 +15,10 @@
 from typing import TYPE_CHECKING, Iterator, Optional
 
 from structlog import get_logger
+from typing_extensions import Self
 
 from hathor.conf.settings import HathorSettings
-from hathor.indexes.rocksdb_utils import RocksDBIndexUtils, incr_key
+from hathor.indexes.rocksdb_utils import ColumnFamilyOptionsGetter, RocksDBIndexUtils, incr_key
 from hathor.indexes.timestamp_index import ScopeType, TimestampIndex
 from hathor.transaction import BaseTransaction
 from hathor.util import collect_n
@@ -39,11 +40,13 @@ class RocksDBTimestampIndex(TimestampIndex, RocksDBIndexUtils):
     It works nicely because rocksdb uses a tree sorted by key under the hood.
     """
 
-    def __init__(self, db: 'rocksdb.DB', *, settings: HathorSettings, scope_type: ScopeType) -> None:
+    def __init__(self, db: 'rocksdb.DB', *, settings: HathorSettings, scope_type: ScopeType,
+                 get_cf_options: Optional[ColumnFamilyOptionsGetter] = None) -> None:
         TimestampIndex.__init__(self, scope_type=scope_type, settings=settings)
         self._name = scope_type.get_name()
         self.log = logger.new()
-        RocksDBIndexUtils.__init__(self, db, f'timestamp-sorted-{self._name}'.encode())
+        cf_name = f'timestamp-sorted-{self._name}'.encode()
+        RocksDBIndexUtils.__init__(self, db, cf_name, get_cf_options=get_cf_options)
 
     def get_db_name(self) -> Optional[str]:
         return f'timestamp_{self._name}'
@@ -51,6 +54,9 @@ class RocksDBTimestampIndex(TimestampIndex, RocksDBIndexUtils):
     def force_clear(self) -> None:
         self.clear()
 
+    def read_snapshot(self, db: 'rocksdb.DB') -> Self:
+        return self._with_db(db)
+
     def _to_key(self, timestamp: int, tx_hash: Optional[bytes] = None) -> bytes:
         """Make a key for a timestamp and optionally tx_hash, the key represents the membership itself."""
         import struct
@@ -17,10 +17,11 @@ from enum import Enum
 from typing import TYPE_CHECKING, Iterator, NamedTuple, Optional, cast
 
 from structlog import get_logger
-from typing_extensions import assert_never, override
+from typing_extensions import Self, assert_never, override
 
 from hathor.conf.settings import HathorSettings
 from hathor.indexes.rocksdb_utils import (
+    ColumnFamilyOptionsGetter,
     InternalUid,
     RocksDBIndexUtils,
     from_internal_token_uid,
@@ -107,10 +108,11 @@ class RocksDBTokensIndex(TokensIndex, RocksDBIndexUtils):
     It works nicely because rocksdb uses a tree sorted by key under the hood.
     """
 
-    def __init__(self, db: 'rocksdb.DB', *, settings: HathorSettings, cf_name: Optional[bytes] = None) -> None:
+    def __init__(self, db: 'rocksdb.DB', *, settings: HathorSettings, cf_name: Optional[bytes] = None,
+                 get_cf_options: Optional[ColumnFamilyOptionsGetter] = None) -> None:
         self.log = logger.new()
         TokensIndex.__init__(self, settings=settings)
-        RocksDBIndexUtils.__init__(self, db, cf_name or _CF_NAME_TOKENS_INDEX)
+        RocksDBIndexUtils.__init__(self, db, cf_name or _CF_NAME_TOKENS_INDEX, get_cf_options=get_cf_options)
 
     def get_db_name(self) -> Optional[str]:
         # XXX: we don't need it to be parametrizable, so this is fine
@@ -119,6 +121,9 @@ class RocksDBTokensIndex(TokensIndex, RocksDBIndexUtils):
     def force_clear(self) -> None:
         self.clear()
 
+    def read_snapshot(self, db: 'rocksdb.DB') -> Self:
+        return self._with_db(db)
+
     def _to_key_info(self, token_uid: bytes) -> bytes:
         """Make a key for accessing a token's info"""
         token_uid_internal = to_internal_token_uid(token_uid)
@@ -13,13 +13,14 @@
 # limitations under the License.
 
 from abc import abstractmethod
+from collections import Counter
 from typing import Callable, Iterator, Optional, Sized, TypeVar
 
 import rocksdb
 from structlog import get_logger
-from typing_extensions import override
+from typing_extensions import Self, override
 
-from hathor.indexes.rocksdb_utils import RocksDBIndexUtils, incr_key
+from hathor.indexes.rocksdb_utils import ColumnFamilyOptionsGetter, RocksDBIndexUtils, incr_key
 from hathor.indexes.tx_group_index import TxGroupIndex
 from hathor.transaction import BaseTransaction
 from hathor.transaction.util import bytes_to_int, int_to_bytes
@@ -37,10 +38,14 @@ class _RocksDBTxGroupStatsIndex(RocksDBIndexUtils):
         db: rocksdb.DB,
         cf_name: bytes,
         serialize_key: Callable[[KT], bytes],
+        *,
+        get_cf_options: Optional[ColumnFamilyOptionsGetter] = None,
     ) -> None:
         self.log = logger.new()
-        super().__init__(db, cf_name)
+        super().__init__(db, cf_name, get_cf_options=get_cf_options)
         self._serialize_key = serialize_key
+        # changes of the group counts while in a shared write batch, see `write_batch_start()`
+        self._pending_counts: Optional[Counter[KT]] = None
 
     def increase_group_count(self, key: KT) -> None:
         """Increase the group count for the provided key."""
@@ -52,16 +57,43 @@ class _RocksDBTxGroupStatsIndex(RocksDBIndexUtils):
 
     def _increment_group_count(self, key: KT, *, amount: int) -> None:
         """Increment the group count for the provided key with the provided amount."""
+        if self._pending_counts is not None:
+            self._pending_counts[key] += amount
+            return
         count_key = self._serialize_key(key)
         count = self.get_group_count(key)
         new_count_bytes = int_to_bytes(number=count + amount, size=GROUP_COUNT_VALUE_SIZE)
         self._db.put((self._cf, count_key), new_count_bytes)
 
+    def add_group_counts(self, counts: Counter[KT], batch: rocksdb.WriteBatch) -> None:
+        """Add the provided amounts to the group counts, putting the new counts in the batch."""
+        for key, amount in counts.items():
+            if amount == 0:
+                continue
+            count = self.get_group_count(key)
+            new_count_bytes = int_to_bytes(number=count + amount, size=GROUP_COUNT_VALUE_SIZE)
+            batch.put((self._cf, self._serialize_key(key)), new_count_bytes)
+
     def get_group_count(self, key: KT) -> int:
         """Return the group count for the provided key."""
         count_key = self._serialize_key(key)
         count_bytes = self._db.get((self._cf, count_key)) or b''
-        return bytes_to_int(count_bytes)
+        pending = self._pending_counts[key] if self._pending_counts is not None else 0
+        return bytes_to_int(count_bytes) + pending
+
+    def write_batch_start(self, batch: rocksdb.WriteBatch) -> None:
+        """Accumulate the changes of the group counts in memory, instead of a read and a write for each change."""
+        assert self._pending_counts is None
+        self._join_write_batch(batch)
+        self._pending_counts = Counter()
+
+    def write_batch_end(self) -> None:
+        """Put each changed group count in the shared batch, once."""
+        counts = self._pending_counts
+        assert counts is not None and self._write_batch is not None
+        self._pending_counts = None
+        self.add_group_counts(counts, self._write_batch)
+        self._leave_write_batch()
 
 
 class RocksDBTxGroupIndex(TxGroupIndex[KT], RocksDBIndexUtils):
@@ -82,16 +114,78 @@ class RocksDBTxGroupIndex(TxGroupIndex[KT], RocksDBIndexUtils):
 
     _KEY_SIZE: int
 
-    def __init__(self, db: rocksdb.DB, cf_name: bytes, stats_cf_name: bytes | None = None) -> None:
+    def __init__(
+        self,
+        db: rocksdb.DB,
+        cf_name: bytes,
+        stats_cf_name: bytes | None = None,
+        *,
+        get_cf_options: Optional[ColumnFamilyOptionsGetter] = None,
+    ) -> None:
         self.log = logger.new()
-        RocksDBIndexUtils.__init__(self, db, cf_name)
-        self._stats = _RocksDBTxGroupStatsIndex(db, stats_cf_name, self._serialize_key) if stats_cf_name else None
+        RocksDBIndexUtils.__init__(self, db, cf_name, get_cf_options=get_cf_options)
+        self._stats: Optional[_RocksDBTxGroupStatsIndex] = None
+        if stats_cf_name:
+            self._stats = _RocksDBTxGroupStatsIndex(
+                db,
+                stats_cf_name,
+                self._serialize_key,
+                get_cf_options=get_cf_options,
+            )
+        # whether the index is being initialized in a write batch, and the group counts of the keys added to it, see
+        # `init_batch_start()`
+        self._init_batch = False
+        self._batch_group_counts: Counter[KT] = Counter()
 
     def force_clear(self) -> None:
         if self._stats:
             self._stats.clear()
         self.clear()
 
+    def supports_backfill(self) -> bool:
+        # adding a key that is already there is a no-op, and the keys don't depend on the other vertices
+        return True
+
+    def init_batch_start(self) -> bool:
+        # The index was cleared, so the keys added by `add_single_key` are always new and we don't have to check
+        # them. The group counts are accumulated and only read and written when the batch is written.
+        self._start_write_batch()
+        self._init_batch = True
+        self._batch_group_counts = Counter()
+        return True
+
+    def init_batch_end(self) -> Callable[[], None]:
+        batch = self._end_write_batch()
+        group_counts = self._batch_group_counts
+        self._init_batch = False
+        self._batch_group_counts = Counter()
+
+        def write() -> None:
+            if self._stats:
+                self._stats.add_group_counts(group_counts, batch)
+            self._write(batch)
+        return write
+
+    def write_batch_start(self, batch: rocksdb.WriteBatch) -> bool:
+        self._join_write_batch(batch)
+        if self._stats:
+            self._stats.write_batch_start(batch)
+        return True
+
+    def write_batch_end(self) -> None:
+        if self._stats:
+            self._stats.write_batch_end()
+        self._leave_write_batch()
+
+    def read_snapshot(self, db: rocksdb.DB) -> Self:
+        index = self._with_db(db)
+        index._init_batch = False
+        index._batch_group_counts = Counter()
+        if self._stats:
+            index._stats = self._stats._with_db(db)
+            index._stats._pending_counts = None
+        return index
+
     @abstractmethod
     def _serialize_key(self, key: KT) -> bytes:
         """Serialize key, so it can be part of RockDB's key."""
@@ -125,15 +219,20 @@ class RocksDBTxGroupIndex(TxGroupIndex[KT], RocksDBIndexUtils):
         return key, timestamp, tx_hash
 
     def add_tx(self, tx: BaseTransaction) -> None:
-        for key in self._extract_keys(tx):
+        # the keys are deduplicated because a write batch doesn't check whether a key is already there
+        for key in dict.fromkeys(self._extract_keys(tx)):
             self.add_single_key(key, tx)
 
     def add_single_key(self, key: KT, tx: BaseTransaction) -> None:
         self.log.debug('put key', key=key)
         internal_key = self._to_rocksdb_key(key, tx)
-        if self._db.get((self._cf, internal_key)) is not None:
+        if self._init_batch:
+            self.put(internal_key, b'')
+            self._batch_group_counts[key] += 1
+            return
+        if self.get_value(internal_key) is not None:
             return
-        self._db.put((self._cf, internal_key), b'')
+        self.put(internal_key, b'')
         if self._stats:
             self._stats.increase_group_count(key)
 
@@ -144,9 +243,9 @@ class RocksDBTxGroupIndex(TxGroupIndex[KT], RocksDBIndexUtils):
     def remove_single_key(self, key: KT, tx: BaseTransaction) -> None:
         self.log.debug('delete key', key=key)
         internal_key = self._to_rocksdb_key(key, tx)
-        if self._db.get((self._cf, internal_key)) is None:
+        if self.get_value(internal_key) is None:
             return
-        self._db.delete((self._cf, internal_key))
+        self.delete(internal_key)
         if self._stats:
             self._stats.decrease_group_count(key)
 
@@ -12,8 +12,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
 from collections.abc import Collection
-from typing import TYPE_CHECKING, Iterable, Iterator, NewType
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, NewType, Optional
+
+from typing_extensions import Self
 
 from hathor.conf.get_settings import get_global_settings
 
@@ -27,6 +30,9 @@ if TYPE_CHECKING:  # pragma: no cover
 InternalUid = NewType('InternalUid', bytes)
 _INTERNAL_HATHOR_TOKEN_UID = InternalUid(b'\x00' * 32)
 
+# returns the options of a new column family by its name, see `RocksDBStorage.get_column_family_options()`
+ColumnFamilyOptionsGetter = Callable[[bytes], 'rocksdb.ColumnFamilyOptions']
+
 
 def to_internal_token_uid(token_uid: bytes) -> InternalUid:
     """Normalizes a token_uid so that the native token (\x00) will have the same length as custom tokens."""
@@ -81,11 +87,17 @@ class RocksDBIndexUtils:
     _db: 'rocksdb.DB'
     _cf: 'rocksdb.ColumnFamilyHandle'
     log: 'structlog.stdlib.BoundLogger'
+    # when set, `put()` and `delete()` go to this batch instead of the database, see `_start_write_batch()`
+    _write_batch: Optional['rocksdb.WriteBatch'] = None
+    # pending writes of a shared batch, seen by `get_value()` before the batch is written, see `_join_write_batch()`
+    _batch_writes: Optional[dict[bytes, Optional[bytes]]] = None
 
-    def __init__(self, db: 'rocksdb.DB', cf_name: bytes) -> None:
+    def __init__(self, db: 'rocksdb.DB', cf_name: bytes, *,
+                 get_cf_options: Optional[ColumnFamilyOptionsGetter] = None) -> None:
         self._log = self.log.new(cf=cf_name.decode('ascii'))
         self._db = db
         self._cf_name = cf_name
+        self._get_cf_options = get_cf_options
         self._ensure_cf_exists(cf_name)
 
     def _init_db(self):
@@ -98,7 +110,13 @@ class RocksDBIndexUtils:
 
         self._cf = self._db.get_column_family(cf_name)
         if self._cf is None:
-            self._cf = self._db.create_column_family(cf_name, rocksdb.ColumnFamilyOptions())
+            # The options come from the tuning profile of the RocksDBStorage, when it's given, so a new column family
+            # doesn't have to wait for the database to be opened again to use them.
+            if self._get_cf_options is not None:
+                options = self._get_cf_options(cf_name)
+            else:
+                options = rocksdb.ColumnFamilyOptions()
+            self._cf = self._db.create_column_family(cf_name, options)
             self._init_db()
         self._log.debug('got column family', is_valid=self._cf.is_valid, id=self._cf.id)
 
@@ -132,15 +150,72 @@ class RocksDBIndexUtils:
 
     def get_value(self, key: bytes) -> bytes | None:
         """Get the value with the provided key, or None if it doesn't exist."""
+        if self._batch_writes is not None and key in self._batch_writes:
+            return self._batch_writes[key]
         return self._db.get((self._cf, key))
 
     def put(self, key: bytes, value: bytes) -> None:
         """Put the value with the provided key."""
-        self._db.put((self._cf, key), value)
+        if self._write_batch is not None:
+            self._write_batch.put((self._cf, key), value)
+            if self._batch_writes is not None:
+                self._batch_writes[key] = value
+        else:
+            self._db.put((self._cf, key), value)
 
     def delete(self, key: bytes) -> None:
         """Delete the value with the provided key."""
-        self._db.delete((self._cf, key))
+        if self._write_batch is not None:
+            self._write_batch.delete((self._cf, key))
+            if self._batch_writes is not None:
+                self._batch_writes[key] = None
+        else:
+            self._db.delete((self._cf, key))
+
+    def _start_write_batch(self) -> None:
+        """Make `put()` and `delete()` collect the writes in a batch instead of writing them to the database.
+
+        The collected writes are not visible to reads until the batch is written, so this should only be used when
+        the caller doesn't read what it has just written, like when an index is being initialized from scratch.
+        """
+        import rocksdb
+        assert self._write_batch is None
+        self._write_batch = rocksdb.WriteBatch()
+
+    def _end_write_batch(self) -> 'rocksdb.WriteBatch':
+        """Stop collecting the writes and return the batch, which must be written with `_write()`."""
+        batch = self._write_batch
+        assert batch is not None
+        self._write_batch = None
+        return batch
+
+    def _join_write_batch(self, batch: 'rocksdb.WriteBatch') -> None:
+        """Make `put()` and `delete()` add the writes to a batch that is shared with other indexes and written by
+        its owner. Unlike `_start_write_batch()`, the pending writes are visible to `get_value()`, but not to the
+        iterators.
+        """
+        assert self._write_batch is None
+        self._write_batch = batch
+        self._batch_writes = {}
+
+    def _leave_write_batch(self) -> None:
+        """Stop adding the writes to the shared batch."""
+        assert self._batch_writes is not None
+        self._write_batch = None
+        self._batch_writes = None
+
+    def _write(self, batch: 'rocksdb.WriteBatch') -> None:
+        """Write a batch to the database, it's safe to call this from another thread."""
+        self._db.write(batch)
+
+    def _with_db(self, db: 'rocksdb.DB') -> Self:
+        """Return a shallow copy of this index that uses another database, used to read from a snapshot."""
+        index = copy.copy(self)
+        index._db = db
+        # the copy only reads, the pending writes of this index are not part of the snapshot
+        index._write_batch = None
+        index._batch_writes = None
+        return index
 
     def iterkeys(self) -> 'rocksdb.KeysIterator':
         """Iter over the keys in the column family."""
@@ -148,9 +223,10 @@ class RocksDBIndexUtils:
 
 
 class RocksDBSimpleSet(Collection[bytes], RocksDBIndexUtils):
-    def __init__(self, db: 'rocksdb.DB', log: 'structlog.stdlib.BoundLogger', *, cf_name: bytes) -> None:
+    def __init__(self, db: 'rocksdb.DB', log: 'structlog.stdlib.BoundLogger', *, cf_name: bytes,
+                 get_cf_options: Optional[ColumnFamilyOptionsGetter] = None) -> None:
         self.log = log
-        super().__init__(db, cf_name)
+        super().__init__(db, cf_name, get_cf_options=get_cf_options)
 
     def __iter__(self) -> Iterator[bytes]:
         it = self._db.iterkeys(self._cf)
@@ -15,13 +15,21 @@
 import struct
 from dataclasses import dataclass
 from enum import Enum
-from typing import TYPE_CHECKING, Any, Iterator, Optional
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable, Iterator, Optional
 
 from structlog import get_logger
+from typing_extensions import Self
 
 from hathor.conf.settings import HathorSettings
 from hathor.crypto.util import decode_address, get_address_b58_from_bytes
-from hathor.indexes.rocksdb_utils import InternalUid, RocksDBIndexUtils, from_internal_token_uid, to_internal_token_uid
+from hathor.indexes.rocksdb_utils import (
+    ColumnFamilyOptionsGetter,
+    InternalUid,
+    RocksDBIndexUtils,
+    from_internal_token_uid,
+    to_internal_token_uid,
+)
 from hathor.indexes.utxo_index import UtxoIndex, UtxoIndexItem
 
 if TYPE_CHECKING:  # pragma: no cover
@@ -312,10 +320,11 @@ class RocksDBUtxoIndex(UtxoIndex, RocksDBIndexUtils):
     It works nicely because rocksdb uses a tree sorted by key under the hood.
     """
 
-    def __init__(self, db: 'rocksdb.DB', *, settings: HathorSettings, cf_name: Optional[bytes] = None) -> None:
+    def __init__(self, db: 'rocksdb.DB', *, settings: HathorSettings, cf_name: Optional[bytes] = None,
+                 get_cf_options: Optional[ColumnFamilyOptionsGetter] = None) -> None:
         super().__init__(settings=settings)
         self.log = logger.new()
-        RocksDBIndexUtils.__init__(self, db, cf_name or _CF_NAME_UTXO_INDEX)
+        RocksDBIndexUtils.__init__(self, db, cf_name or _CF_NAME_UTXO_INDEX, get_cf_options=get_cf_options)
 
     def get_db_name(self) -> Optional[str]:
         return _DB_NAME
@@ -323,13 +332,31 @@ class RocksDBUtxoIndex(UtxoIndex, RocksDBIndexUtils):
     def force_clear(self) -> None:
         self.clear()
 
+    def init_batch_start(self) -> bool:
+        # the utxos are only put and deleted, never read, while the index is initialized
+        self._start_write_batch()
+        return True
+
+    def init_batch_end(self) -> Callable[[], None]:
+        return partial(self._write, self._end_write_batch())
+
+    def write_batch_start(self, batch: 'rocksdb.WriteBatch') -> bool:
+        self._join_write_batch(batch)
+        return True
+
+    def write_batch_end(self) -> None:
+        self._leave_write_batch()
+
+    def read_snapshot(self, db: 'rocksdb.DB') -> Self:
+        return self._with_db(db)
+
     def _add_utxo(self, item: UtxoIndexItem) -> None:
         key = bytes(_key_from_index_item(item))
-        self._db.put((self._cf, key), b'')
+        self.put(key, b'')
 
     def _remove_utxo(self, item: UtxoIndexItem) -> None:
         key = bytes(_key_from_index_item(item))
-        self._db.delete((self._cf, key))
+        self.delete(key)
 
     def _iter_utxos_nolock(self, *, token_uid: bytes, address: str, target_amount: int) -> Iterator[UtxoIndexItem]:
         seek = _SeekKeyNoLock(token_uid_internal=to_internal_token_uid(token_uid), address=decode_address(address),
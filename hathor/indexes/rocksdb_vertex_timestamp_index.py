@@ -14,13 +14,14 @@
 
 import struct
 from abc import ABC
-from typing import Iterator, final
+from functools import partial
+from typing import Callable, Iterator, Optional, final
 
 import rocksdb
 from structlog import get_logger
-from typing_extensions import override
+from typing_extensions import Self, override
 
-from hathor.indexes.rocksdb_utils import RocksDBIndexUtils, incr_key
+from hathor.indexes.rocksdb_utils import ColumnFamilyOptionsGetter, RocksDBIndexUtils, incr_key
 from hathor.indexes.vertex_timestamp_index import VertexTimestampIndex
 from hathor.transaction import BaseTransaction, Vertex
 
@@ -40,9 +41,9 @@ class RocksDBVertexTimestampIndex(VertexTimestampIndex, RocksDBIndexUtils, ABC):
     It works nicely because rocksdb uses a tree sorted by key under the hood.
     """
 
-    def __init__(self, db: rocksdb.DB) -> None:
+    def __init__(self, db: rocksdb.DB, *, get_cf_options: Optional[ColumnFamilyOptionsGetter] = None) -> None:
         self.log = logger.new()
-        RocksDBIndexUtils.__init__(self, db, self.cf_name)
+        RocksDBIndexUtils.__init__(self, db, self.cf_name, get_cf_options=get_cf_options)
 
     @final
     @override
@@ -54,6 +55,38 @@ class RocksDBVertexTimestampIndex(VertexTimestampIndex, RocksDBIndexUtils, ABC):
     def force_clear(self) -> None:
         self.clear()
 
+    @final
+    @override
+    def supports_backfill(self) -> bool:
+        return True
+
+    @final
+    @override
+    def init_batch_start(self) -> bool:
+        self._start_write_batch()
+        return True
+
+    @final
+    @override
+    def init_batch_end(self) -> Callable[[], None]:
+        return partial(self._write, self._end_write_batch())
+
+    @final
+    @override
+    def write_batch_start(self, batch: rocksdb.WriteBatch) -> bool:
+        self._join_write_batch(batch)
+        return True
+
+    @final
+    @override
+    def write_batch_end(self) -> None:
+        self._leave_write_batch()
+
+    @final
+    @override
+    def read_snapshot(self, db: rocksdb.DB) -> Self:
+        return self._with_db(db)
+
     @staticmethod
     @final
     def _to_key(vertex: Vertex) -> bytes:
@@ -81,14 +114,14 @@ class RocksDBVertexTimestampIndex(VertexTimestampIndex, RocksDBIndexUtils, ABC):
     def _add_tx(self, tx: BaseTransaction) -> None:
         key = self._to_key(tx)
         self.log.debug('put key', key=key)
-        self._db.put((self._cf, key), b'')
+        self.put(key, b'')
 
     @final
     @override
     def del_tx(self, tx: BaseTransaction) -> None:
         key = self._to_key(tx)
         self.log.debug('delete key', key=key)
-        self._db.delete((self._cf, key))
+        self.delete(key)
 
     @final
     @override
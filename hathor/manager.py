@@ -52,6 +52,7 @@ from hathor.nanocontracts.storage import NCBlockStorage, NCContractStorage
 from hathor.p2p.manager import ConnectionsManager
 from hathor.p2p.peer import PrivatePeer
 from hathor.p2p.peer_id import PeerId
+from hathor.p2p.sync_v2.verification_pipeline import VerificationPipeline
 from hathor.pubsub import HathorEvents, PubSubManager
 from hathor.reactor import ReactorProtocol as Reactor
 from hathor.reward_lock import is_spent_reward_locked
@@ -70,6 +71,8 @@ from hathor.vertex_handler import VertexHandler
 from hathor.wallet import BaseWallet
 
 if TYPE_CHECKING:
+    from hathor.indexes.backfill import IndexesBackfill
+    from hathor.nanocontracts.storage.garbage_collector import NCStateGarbageCollector
     from hathor.websocket.factory import HathorAdminWebsocketFactory
 
 logger = get_logger()
@@ -216,6 +219,7 @@ class HathorManager:
             tx_storage=self.tx_storage,
             reactor=self.reactor,
             websocket_factory=self.websocket_factory,
+            nc_storage_factory=self.consensus_algorithm.nc_storage_factory,
         )
 
         self.wallet = wallet
@@ -227,11 +231,29 @@ class HathorManager:
         # XXX Remove this attribute after all dependencies are cleared.
         self.stratum_factory: Optional[StratumFactory] = None
 
+        # Online garbage collector of the nano contract state, disabled by default.
+        self.nc_state_gc: Optional['NCStateGarbageCollector'] = None
+
+        # Background initialization of the indexes that are building, disabled by default.
+        self.index_backfill: Optional['IndexesBackfill'] = None
+
         self._allow_mining_without_peers = False
 
         # Thread pool used to resolve pow when sending tokens
         self.pow_thread_pool = ThreadPool(minthreads=0, maxthreads=settings.MAX_POW_THREADS, name='Pow thread pool')
 
+        # Decodes and verifies the vertices received by the sync streams in a thread pool, disabled by default
+        self.sync_verification_pipeline: Optional[VerificationPipeline] = None
+        if settings.SYNC_VERIFICATION_THREADS > 0:
+            self.sync_verification_pipeline = VerificationPipeline(
+                self.reactor,
+                settings=settings,
+                tx_storage=tx_storage,
+                vertex_parser=vertex_parser,
+                verification_service=verification_service,
+                max_threads=settings.SYNC_VERIFICATION_THREADS,
+            )
+
         # List of whitelisted peers
         self.peers_whitelist: list[PeerId] = []
 
@@ -262,6 +284,13 @@ class HathorManager:
         # only include nano-state if ENABLE_NANO_CONTRACTS is true (enabled/feature_activation)
         if self._settings.ENABLE_NANO_CONTRACTS:
             default_capabilities.append(self._settings.CAPABILITY_NANO_STATE)
+            default_capabilities.append(self._settings.CAPABILITY_NANO_STATE_SYNC)
+        if self._settings.ENABLE_P2P_BINARY_FRAMING:
+            default_capabilities.append(self._settings.CAPABILITY_BINARY_FRAMING)
+        if self._settings.ENABLE_P2P_COMPRESSION:
+            default_capabilities.append(self._settings.CAPABILITY_COMPRESSION)
+        if self._settings.ENABLE_P2P_RELAY_ANNOUNCE:
+            default_capabilities.append(self._settings.CAPABILITY_RELAY_ANNOUNCE)
         return default_capabilities
 
     def start(self) -> None:
@@ -299,6 +328,8 @@ class HathorManager:
         self.pubsub.publish(HathorEvents.MANAGER_ON_START)
         self._event_manager.load_started()
         self.pow_thread_pool.start()
+        if self.sync_verification_pipeline is not None:
+            self.sync_verification_pipeline.start()
 
         # Disable get transaction lock when initializing components
         self.tx_storage.disable_lock()
@@ -330,6 +361,12 @@ class HathorManager:
         if self.poa_block_producer:
             self.poa_block_producer.start()
 
+        if self.nc_state_gc:
+            self.nc_state_gc.start(self.reactor)
+
+        if self.index_backfill:
+            self.index_backfill.start()
+
         # Start running
         self.tx_storage.start_running_manager(self._execution_manager)
 
@@ -346,6 +383,8 @@ class HathorManager:
         self.pubsub.publish(HathorEvents.MANAGER_ON_STOP)
         if self.pow_thread_pool.started:
             self.pow_thread_pool.stop()
+        if self.sync_verification_pipeline is not None:
+            self.sync_verification_pipeline.stop()
 
         # Metric stops to capture data
         self.metrics.stop()
@@ -370,7 +409,17 @@ class HathorManager:
         if self.poa_block_producer:
             self.poa_block_producer.stop()
 
+        if self.nc_state_gc:
+            self.nc_state_gc.stop()
+
+        if self.consensus_algorithm.nc_speculative_executor is not None:
+            self.consensus_algorithm.nc_speculative_executor.shutdown()
+
+        if self.index_backfill:
+            self.index_backfill.stop()
+
         self.tx_storage.flush()
+        self.tx_storage.close()
 
         return defer.DeferredList(waits)
 
@@ -842,15 +891,23 @@ class HathorManager:
         quiet: bool = False,
         propagate_to_peers: bool = True,
         reject_locked_reward: bool = True,
+        skip_script_verification: bool = False,
+        skip_pow_verification: bool = False,
     ) -> bool:
         """ New method for adding transactions or blocks that steps the validation state machine.
 
         :param vertex: transaction to be added
         :param quiet: if True will not log when a new tx is accepted
         :param propagate_to_peers: if True will relay the tx to other peers if it is accepted
+        :param skip_script_verification: if True the input scripts are not verified, only for trusted vertices
+        :param skip_pow_verification: if True the proof-of-work is not verified, only when it was already verified
         """
         success = self.vertex_handler.on_new_relayed_vertex(
-            vertex, quiet=quiet, reject_locked_reward=reject_locked_reward
+            vertex,
+            quiet=quiet,
+            reject_locked_reward=reject_locked_reward,
+            skip_script_verification=skip_script_verification,
+            skip_pow_verification=skip_pow_verification,
         )
 
         if propagate_to_peers and success:
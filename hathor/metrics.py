@@ -29,6 +29,7 @@ from hathor.transaction.storage import TransactionRocksDBStorage, TransactionSto
 from hathor.transaction.storage.cache_storage import TransactionCacheStorage
 
 if TYPE_CHECKING:
+    from hathor.nanocontracts.storage import NCStorageFactory  # noqa: F401
     from hathor.stratum import StratumFactory  # noqa: F401
     from hathor.websocket.factory import HathorAdminWebsocketFactory  # noqa: F401
 
@@ -54,6 +55,10 @@ class PeerConnectionMetrics:
     discarded_txs: int = 0
     received_blocks: int = 0
     discarded_blocks: int = 0
+    received_compressed_bytes: int = 0
+    sent_compressed_bytes: int = 0
+    decompression_time: float = 0.0
+    compression_time: float = 0.0
 
 
 @dataclass
@@ -104,6 +109,28 @@ class Metrics:
     # TxCache Data
     transaction_cache_hits: int = 0
     transaction_cache_misses: int = 0
+    transaction_cache_evictions: int = 0
+    transaction_cache_size: int = 0
+    transaction_cache_bytes: int = 0
+    transaction_cache_flushes: int = 0
+    transaction_cache_flushed_txs: int = 0
+    transaction_cache_flush_duration: float = 0.0
+    transaction_cache_pending_evicted_txs: int = 0
+    # The same data by vertex type name, e.g.: {'Block': {'hits': 10, 'misses': 2, ...}}
+    transaction_cache_data_by_type: dict[str, dict[str, int]] = field(default_factory=dict)
+    # Nano contract storage factory, used to collect the trie node cache data
+    nc_storage_factory: Optional['NCStorageFactory'] = None
+    # NC trie node cache data
+    nc_node_cache_hits: int = 0
+    nc_node_cache_misses: int = 0
+    nc_node_cache_evictions: int = 0
+    nc_node_cache_size: int = 0
+    # On-chain blueprint class cache data
+    blueprint_cache_hits: int = 0
+    blueprint_cache_misses: int = 0
+    blueprint_cache_evictions: int = 0
+    blueprint_cache_compiled_hits: int = 0
+    blueprint_cache_size: int = 0
     # The time interval to control periodic collection of RocksDB data
     txstorage_data_interval = settings.METRICS_COLLECT_ROCKSDB_DATA_INTERVAL
     # Variables to store the last block when we updated the RocksDB storage metrics
@@ -265,6 +292,10 @@ class Metrics:
                 discarded_txs=connection.metrics.discarded_txs,
                 received_blocks=connection.metrics.received_blocks,
                 discarded_blocks=connection.metrics.discarded_blocks,
+                received_compressed_bytes=connection.metrics.received_compressed_bytes,
+                sent_compressed_bytes=connection.metrics.sent_compressed_bytes,
+                decompression_time=connection.metrics.decompression_time,
+                compression_time=connection.metrics.compression_time,
             )
 
             self.peer_connection_metrics.append(metric)
@@ -279,6 +310,50 @@ class Metrics:
                 self.transaction_cache_hits = hits
             if misses:
                 self.transaction_cache_misses = misses
+            cache = self.tx_storage.cache
+            self.transaction_cache_evictions = self.tx_storage.stats.get("eviction", 0)
+            self.transaction_cache_size = len(cache)
+            self.transaction_cache_bytes = cache.total_bytes
+            flush_stats = self.tx_storage.flush_stats
+            self.transaction_cache_flushes = flush_stats['count']
+            self.transaction_cache_flushed_txs = flush_stats['txs']
+            self.transaction_cache_flush_duration = flush_stats['last_duration']
+            self.transaction_cache_pending_evicted_txs = len(self.tx_storage._evicted_dirty_txs)
+            self.transaction_cache_data_by_type = {
+                vertex_type: dict(
+                    hits=stats["hit"],
+                    misses=stats["miss"],
+                    evictions=stats["eviction"],
+                    size=cache.count_by_type[vertex_type],
+                    bytes=cache.bytes_by_type[vertex_type],
+                )
+                for vertex_type, stats in self.tx_storage.stats_by_type.items()
+            }
+
+    def set_nc_node_cache_data(self) -> None:
+        """ Collect and set data related to the nano contract trie node cache.
+        """
+        if self.nc_storage_factory is None:
+            return
+
+        node_cache = self.nc_storage_factory.get_node_cache()
+        if node_cache is None:
+            return
+
+        self.nc_node_cache_hits = node_cache.stats['hit']
+        self.nc_node_cache_misses = node_cache.stats['miss']
+        self.nc_node_cache_evictions = node_cache.stats['eviction']
+        self.nc_node_cache_size = node_cache.size
+
+    def set_blueprint_cache_data(self) -> None:
+        """ Collect and set data related to the on-chain blueprint class cache.
+        """
+        blueprint_cache = self.tx_storage.blueprint_cache
+        self.blueprint_cache_hits = blueprint_cache.stats['hit']
+        self.blueprint_cache_misses = blueprint_cache.stats['miss']
+        self.blueprint_cache_evictions = blueprint_cache.stats['eviction']
+        self.blueprint_cache_compiled_hits = blueprint_cache.stats['compiled_hit']
+        self.blueprint_cache_size = len(blueprint_cache)
 
     def set_tx_storage_data(self) -> None:
         store = self.tx_storage
@@ -307,5 +382,7 @@ class Metrics:
         self.set_websocket_data()
         self.set_stratum_data()
         self.set_cache_data()
+        self.set_nc_node_cache_data()
+        self.set_blueprint_cache_data()
         self.collect_peer_connection_metrics()
         self.set_tx_storage_data()
@@ -0,0 +1,129 @@
+# Copyright 2025 Hathor Labs
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import marshal
+from collections import OrderedDict
+from importlib.util import MAGIC_NUMBER
+from threading import Lock
+from types import CodeType
+from typing import TYPE_CHECKING, Optional
+
+from structlog import get_logger
+
+if TYPE_CHECKING:
+    from hathor.nanocontracts.blueprint import Blueprint
+    from hathor.nanocontracts.on_chain_blueprint import OnChainBlueprint
+    from hathor.storage import RocksDBStorage
+
+logger = get_logger()
+
+# Default number of on-chain blueprint classes kept in memory.
+DEFAULT_BLUEPRINT_CACHE_CAPACITY: int = 256
+
+# Prefix of every persisted code object. Code objects are only valid for the same interpreter version, and this
+# version should be increased whenever the way blueprints are compiled changes.
+_COMPILED_CODE_FORMAT_VERSION: int = 1
+_COMPILED_CODE_HEADER: bytes = bytes([_COMPILED_CODE_FORMAT_VERSION]) + MAGIC_NUMBER
+
+_CF_NAME_BLUEPRINT_CODE = b'blueprint-code'
+
+
+class BlueprintClassCache:
+    """Node-wide LRU cache of loaded on-chain blueprint classes, keyed by blueprint id.
+
+    The blueprint class is memoized on the `OnChainBlueprint` instance too, but the instance is lost whenever the
+    transaction is evicted from the storage cache, and then the code would have to be decompressed, compiled and
+    executed again. Since a blueprint's code can never change, the class can be shared by all instances.
+
+    Optionally, compiled code objects are persisted to RocksDB, so after a restart the blueprints only need to be
+    executed, not compiled.
+
+    It is safe to use from multiple threads, which happens during speculative nano execution.
+    """
+
+    __slots__ = ('log', 'capacity', 'stats', '_classes', '_db', '_cf_code', '_lock')
+
+    def __init__(self, capacity: int = DEFAULT_BLUEPRINT_CACHE_CAPACITY, *,
+                 rocksdb_storage: Optional[RocksDBStorage] = None) -> None:
+        assert capacity >= 0
+        self.log = logger.new()
+        self.capacity = capacity
+        self.stats = dict(hit=0, miss=0, eviction=0, compiled_hit=0)
+        self._classes: OrderedDict[bytes, type[Blueprint]] = OrderedDict()
+        self._lock = Lock()
+        if rocksdb_storage is not None:
+            self._db = rocksdb_storage.get_db()
+            self._cf_code = rocksdb_storage.get_or_create_column_family(_CF_NAME_BLUEPRINT_CODE)
+        else:
+            self._db = None
+            self._cf_code = None
+
+    def __len__(self) -> int:
+        return len(self._classes)
+
+    def __contains__(self, blueprint_id: bytes) -> bool:
+        return blueprint_id in self._classes
+
+    def get_blueprint_class(self, blueprint: OnChainBlueprint) -> type[Blueprint]:
+        """Return the class of an on-chain blueprint, loading it only if it is not in the cache."""
+        blueprint_id = blueprint.hash
+        with self._lock:
+            blueprint_class = self._classes.get(blueprint_id)
+            if blueprint_class is not None:
+                self._classes.move_to_end(blueprint_id, last=True)
+                self.stats['hit'] += 1
+                return blueprint_class
+            self.stats['miss'] += 1
+        # The lock is not held while loading, at worst the same blueprint is loaded twice.
+        blueprint_class = blueprint.get_blueprint_class(compiled_code=self._get_compiled_code(blueprint))
+        self._put(blueprint_id, blueprint_class)
+        return blueprint_class
+
+    def _put(self, blueprint_id: bytes, blueprint_class: type[Blueprint]) -> None:
+        if self.capacity == 0:
+            return
+        with self._lock:
+            self._classes[blueprint_id] = blueprint_class
+            while len(self._classes) > self.capacity:
+                self._classes.popitem(last=False)
+                self.stats['eviction'] += 1
+
+    def _get_compiled_code(self, blueprint: OnChainBlueprint) -> Optional[CodeType]:
+        """Return the persisted code object of a blueprint, compiling and persisting it if needed.
+
+        It returns None when persistence is disabled, the blueprint will be compiled as usual."""
+        if self._db is None:
+            return None
+        key = (self._cf_code, blueprint.hash)
+        data = self._db.get(key)
+        if data is not None and data.startswith(_COMPILED_CODE_HEADER):
+            try:
+                code = marshal.loads(data[len(_COMPILED_CODE_HEADER):])
+            except (EOFError, ValueError, TypeError):
+                self.log.warn('invalid persisted blueprint code, compiling again', blueprint_id=blueprint.hash.hex())
+            else:
+                if isinstance(code, CodeType):
+                    self.stats['compiled_hit'] += 1
+                    return code
+        from hathor.nanocontracts.metered_exec import MeteredExecutor
+        code = MeteredExecutor.compile(blueprint.code.text)
+        self._db.put(key, _COMPILED_CODE_HEADER + marshal.dumps(code))
+        return code
+
+    def clear(self) -> None:
+        """Remove all classes from memory. Stats and persisted code are kept."""
+        with self._lock:
+            self._classes.clear()
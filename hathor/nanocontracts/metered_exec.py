@@ -14,6 +14,7 @@
 
 from __future__ import annotations
 
+from types import CodeType
 from typing import Any, Callable, ParamSpec, TypeVar, cast
 
 from structlog import get_logger
@@ -55,15 +56,11 @@ class MeteredExecutor:
     def get_memory_limit(self) -> int:
         return self._memory_limit
 
-    def exec(self, source: str, /) -> dict[str, Any]:
-        """ This is equivalent to `exec(source)` but with execution metering and memory limiting.
+    @staticmethod
+    def compile(source: str, /) -> CodeType:
+        """ Compile a blueprint module the same way `exec` does, so the result can be reused by it.
         """
-        from hathor.nanocontracts.custom_builtins import EXEC_BUILTINS
-        env: dict[str, object] = {
-            '__builtins__': EXEC_BUILTINS,
-        }
-        # XXX: calling compile now makes the exec step consume less fuel
-        code = compile(
+        return compile(
             source=source,
             filename='<blueprint>',
             mode='exec',
@@ -72,6 +69,18 @@ class MeteredExecutor:
             optimize=0,
             _feature_version=PYTHON_CODE_COMPAT_VERSION[1],
         )
+
+    def exec(self, source: str | CodeType, /) -> dict[str, Any]:
+        """ This is equivalent to `exec(source)` but with execution metering and memory limiting.
+
+        The source can also be a code object previously returned by `MeteredExecutor.compile`.
+        """
+        from hathor.nanocontracts.custom_builtins import EXEC_BUILTINS
+        env: dict[str, object] = {
+            '__builtins__': EXEC_BUILTINS,
+        }
+        # XXX: calling compile now makes the exec step consume less fuel
+        code = self.compile(source) if isinstance(source, str) else source
         # XXX: SECURITY: `code` and `env` need the proper restrictions by this point
         exec(code, env)
         del env['__builtins__']
@@ -81,31 +90,33 @@ class MeteredExecutor:
         """ This is equivalent to `func(*args, **kwargs)` but with execution metering and memory limiting.
         """
         from hathor import NCFail
-        from hathor.nanocontracts.custom_builtins import EXEC_BUILTINS
-
-        env: dict[str, object] = {
-            '__builtins__': EXEC_BUILTINS,
-            '__func__': func,
-            '__args__': args,
-            '__result__': None,
-        }
-        # XXX: calling compile now makes the exec step consume less fuel
-        code = compile(
-            source='__result__ = __func__(*__args__)',
-            filename='<blueprint>',
-            mode='exec',
-            flags=0,
-            dont_inherit=True,
-            optimize=0,
-            _feature_version=PYTHON_CODE_COMPAT_VERSION[1],
-        )
 
         try:
-            exec(code, env)
+            return _get_call_trampoline()(func, args)
         except NCFail:
             raise
         except Exception as e:
             # Convert any other exception to NCFail.
             raise NCFail from e
 
-        return cast(_T, env['__result__'])
+
+# The trampoline is a function defined in the same restricted environment used by `MeteredExecutor.exec`, so calls
+# run from a `<blueprint>` frame without builtins. It used to be compiled and executed on every call, now it is created
+# only once per process.
+_CALL_TRAMPOLINE_SOURCE = '''
+def __trampoline__(__func__, __args__):
+    return __func__(*__args__)
+'''
+_call_trampoline: Callable[[Callable[..., Any], tuple[Any, ...]], Any] | None = None
+
+
+def _get_call_trampoline() -> Callable[[Callable[..., Any], tuple[Any, ...]], Any]:
+    global _call_trampoline
+    if _call_trampoline is None:
+        from hathor.nanocontracts.custom_builtins import EXEC_BUILTINS
+        env: dict[str, object] = {
+            '__builtins__': EXEC_BUILTINS,
+        }
+        exec(MeteredExecutor.compile(_CALL_TRAMPOLINE_SOURCE), env)
+        _call_trampoline = cast(Callable[[Callable[..., Any], tuple[Any, ...]], Any], env['__trampoline__'])
+    return _call_trampoline
@@ -18,6 +18,7 @@ import ast
 import zlib
 from dataclasses import InitVar, dataclass, field
 from enum import IntEnum, unique
+from types import CodeType
 from typing import TYPE_CHECKING, Any, Optional
 
 from cryptography.hazmat.primitives import hashes
@@ -190,14 +191,17 @@ class OnChainBlueprint(Transaction):
         """The blueprint's contract-id is it's own tx-id, this helper method just converts to the right type."""
         return blueprint_id_from_bytes(self.hash)
 
-    def _load_blueprint_code_exec(self) -> tuple[object, dict[str, object]]:
+    def _load_blueprint_code_exec(
+        self,
+        compiled_code: Optional[CodeType] = None,
+    ) -> tuple[object, dict[str, object]]:
         """XXX: DO NOT CALL THIS METHOD UNLESS YOU REALLY KNOW WHAT IT DOES."""
         from hathor.nanocontracts.metered_exec import MeteredExecutor, OutOfFuelError, OutOfMemoryError
         fuel = self._settings.NC_INITIAL_FUEL_TO_LOAD_BLUEPRINT_MODULE
         memory_limit = self._settings.NC_MEMORY_LIMIT_TO_LOAD_BLUEPRINT_MODULE
         metered_executor = MeteredExecutor(fuel=fuel, memory_limit=memory_limit)
         try:
-            env = metered_executor.exec(self.code.text)
+            env = metered_executor.exec(compiled_code if compiled_code is not None else self.code.text)
         except OutOfFuelError as e:
             self.log.error('loading blueprint module failed, fuel limit exceeded')
             raise OCBOutOfFuelDuringLoading from e
@@ -207,10 +211,15 @@ class OnChainBlueprint(Transaction):
         blueprint_class = env[BLUEPRINT_EXPORT_NAME]
         return blueprint_class, env
 
-    def _load_blueprint_code(self) -> tuple[type[Blueprint], dict[str, object]]:
-        """This method loads the on-chain code (if not loaded) and returns the blueprint class and env."""
+    def _load_blueprint_code(
+        self,
+        compiled_code: Optional[CodeType] = None,
+    ) -> tuple[type[Blueprint], dict[str, object]]:
+        """This method loads the on-chain code (if not loaded) and returns the blueprint class and env.
+
+        When `compiled_code` is given, it must be `self.code.text` compiled by `MeteredExecutor.compile`."""
         if self._blueprint_loaded_env is None:
-            blueprint_class, env = self._load_blueprint_code_exec()
+            blueprint_class, env = self._load_blueprint_code_exec(compiled_code)
             assert isinstance(blueprint_class, type)
             assert issubclass(blueprint_class, Blueprint)
             self._blueprint_loaded_env = blueprint_class, env
@@ -221,9 +230,9 @@ class OnChainBlueprint(Transaction):
         blueprint_class, _ = self._load_blueprint_code_exec()
         return blueprint_class
 
-    def get_blueprint_class(self) -> type[Blueprint]:
+    def get_blueprint_class(self, *, compiled_code: Optional[CodeType] = None) -> type[Blueprint]:
         """Returns the blueprint class, loads and executes the code as needed."""
-        blueprint_class, _ = self._load_blueprint_code()
+        blueprint_class, _ = self._load_blueprint_code(compiled_code)
         return blueprint_class
 
     def serialize_code(self) -> bytes:
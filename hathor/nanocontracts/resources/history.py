@@ -48,6 +48,10 @@ class NanoContractHistoryResource(Resource):
             request.setResponseCode(503)
             error_response = ErrorResponse(success=False, error='Nano contract history index not initialized')
             return error_response.json_dumpb()
+        if tx_storage.indexes.is_building(tx_storage.indexes.nc_history):
+            request.setResponseCode(503)
+            error_response = ErrorResponse(success=False, error='Nano contract history index is warming up')
+            return error_response.json_dumpb()
 
         params = NCHistoryParams.from_request(request)
         if isinstance(params, ErrorResponse):
@@ -51,6 +51,11 @@ class NCCreationResource(Resource):
             request.setResponseCode(503)
             error_response = ErrorResponse(success=False, error='NC indexes not initialized, use --nc-indexes')
             return error_response.json_dumpb()
+        assert self.tx_storage.indexes is not None
+        if self.tx_storage.indexes.is_building(self.nc_creation_index, self.nc_history_index, self.bp_history_index):
+            request.setResponseCode(503)
+            error_response = ErrorResponse(success=False, error='NC indexes are warming up')
+            return error_response.json_dumpb()
 
         params = NCCreationParams.from_request(request)
         if isinstance(params, ErrorResponse):
@@ -49,6 +49,10 @@ class BlueprintOnChainResource(Resource):
             request.setResponseCode(503)
             error_response = ErrorResponse(success=False, error='Blueprint index not initialized')
             return error_response.json_dumpb()
+        if tx_storage.indexes.is_building(tx_storage.indexes.blueprints):
+            request.setResponseCode(503)
+            error_response = ErrorResponse(success=False, error='Blueprint index is warming up')
+            return error_response.json_dumpb()
 
         bp_index = tx_storage.indexes.blueprints
 
@@ -17,6 +17,8 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Any, Optional
 
 from pydantic import Field
+from twisted.internet import threads
+from twisted.web.server import NOT_DONE_YET
 
 from hathor._openapi.register import register_resource
 from hathor.api_util import Resource, set_cors
@@ -34,6 +36,7 @@ if TYPE_CHECKING:
     from hathor.manager import HathorManager
     from hathor.nanocontracts.storage import NCContractStorage
     from hathor.transaction import Block
+    from hathor.transaction.storage.snapshot import StorageSnapshot
 
 
 @register_resource
@@ -47,7 +50,7 @@ class NanoContractStateResource(Resource):
         super().__init__()
         self.manager = manager
 
-    def render_GET(self, request: 'Request') -> bytes:
+    def render_GET(self, request: 'Request') -> bytes | int:
         request.setHeader(b'content-type', b'application/json; charset=utf-8')
         set_cors(request, 'GET')
 
@@ -71,8 +74,6 @@ class NanoContractStateResource(Resource):
             error_response = ErrorResponse(success=False, error=f'Invalid id: {params.id}')
             return error_response.json_dumpb()
 
-        nc_storage: NCContractStorage
-        block: Block
         block_hash: Optional[bytes]
         try:
             block_hash = bytes.fromhex(params.block_hash) if params.block_hash else None
@@ -82,74 +83,95 @@ class NanoContractStateResource(Resource):
             error_response = ErrorResponse(success=False, error=f'Invalid block_hash parameter: {params.block_hash}')
             return error_response.json_dumpb()
 
+        # the state is read in another thread, from a snapshot of the storage taken now, so the view methods don't
+        # block the reactor
+        snapshot = self.manager.tx_storage.snapshot()
+        deferred = threads.deferToThread(self.get_state, snapshot, params, nc_id_bytes, block_hash)
+        deferred.addCallback(self._cb_state, request)
+        deferred.addErrback(self._err_state, request)
+        return NOT_DONE_YET
+
+    def _cb_state(self, result: tuple[int, bytes], request: 'Request') -> None:
+        code, data = result
+        request.setResponseCode(code)
+        request.write(data)
+        request.finish()
+
+    def _err_state(self, reason: Any, request: 'Request') -> None:
+        request.processingFailed(reason)
+
+    def get_state(
+        self,
+        snapshot: 'StorageSnapshot',
+        params: NCStateParams,
+        nc_id_bytes: ContractId,
+        block_hash: Optional[bytes],
+    ) -> tuple[int, bytes]:
+        """Return the response code and the body of a request, it runs in another thread."""
+        nc_storage: NCContractStorage
+        block: Block
         if params.block_height is not None:
             # Get hash of the block with the height
-            if self.manager.tx_storage.indexes is None:
+            if snapshot.indexes is None:
                 # No indexes enabled in the storage
-                request.setResponseCode(503)
                 error_response = ErrorResponse(
                                     success=False,
                                     error='No indexes enabled in the storage, so we can\'t filter by block height.'
                                 )
-                return error_response.json_dumpb()
+                return 503, error_response.json_dumpb()
 
-            block_hash = self.manager.tx_storage.indexes.height.get(params.block_height)
+            block_hash = snapshot.indexes.height.get(params.block_height)
             if block_hash is None:
                 # No block hash was found with this height
-                request.setResponseCode(400)
                 error_response = ErrorResponse(
                                     success=False,
                                     error=f'No block hash was found with height {params.block_height}.'
                                 )
-                return error_response.json_dumpb()
+                return 400, error_response.json_dumpb()
         elif params.timestamp is not None:
-            if self.manager.tx_storage.indexes is None:
+            if snapshot.indexes is None:
                 # No indexes enabled in the storage
-                request.setResponseCode(503)
                 error_response = ErrorResponse(
                     success=False,
                     error='No indexes enabled in the storage, so we can\'t filter by timestamp.'
                 )
-                return error_response.json_dumpb()
+                return 503, error_response.json_dumpb()
 
-            block_hashes, has_more = self.manager.tx_storage.indexes.sorted_blocks.get_older(
+            block_hashes, has_more = snapshot.indexes.sorted_blocks.get_older(
                 timestamp=params.timestamp,
                 hash_bytes=None,
                 count=1,
             )
             if not block_hashes:
                 # No block hash was found before this timestamp
-                request.setResponseCode(400)
                 error_response = ErrorResponse(
                     success=False,
                     error=f'No block hash was found before timestamp {params.timestamp}.'
                 )
-                return error_response.json_dumpb()
+                return 400, error_response.json_dumpb()
             assert len(block_hashes) == 1
             block_hash = block_hashes[0]
 
         if block_hash:
             try:
-                block = self.manager.tx_storage.get_block(block_hash)
+                block = snapshot.get_block(block_hash)
             except AssertionError:
                 # This block hash is not from a block
-                request.setResponseCode(400)
                 error_response = ErrorResponse(success=False, error=f'Invalid block_hash {params.block_hash}.')
-                return error_response.json_dumpb()
+                return 400, error_response.json_dumpb()
         else:
-            block = self.manager.tx_storage.get_best_block()
+            block = snapshot.get_best_block()
 
         try:
-            runner = self.manager.get_nc_runner(block)
+            runner = self.manager.runner_factory.create(block_storage=snapshot.get_nc_block_storage(block))
             nc_storage = runner.get_storage(nc_id_bytes)
         except NanoContractDoesNotExist:
             # Nano contract does not exist at this block
-            request.setResponseCode(404)
             error_response = ErrorResponse(
                 success=False,
                 error=f'Nano contract does not exist at block {block.hash_hex}.'
             )
-            return error_response.json_dumpb()
+            return 404, error_response.json_dumpb()
 
         blueprint_id = nc_storage.get_blueprint_id()
         blueprint_class = self.manager.tx_storage.get_blueprint_class(blueprint_id)
@@ -229,7 +251,7 @@ class NanoContractStateResource(Resource):
             balances=balances,
             calls=calls,
         )
-        return response.json_dumpb()
+        return 200, response.json_dumpb()
 
     def get_key_for_field(self, field: str) -> Optional[str]:
         """Return the storage key for a given field."""
@@ -898,6 +898,10 @@ class Runner:
             self._rng_per_contract[contract_id] = create_with_shell(NanoRNG, seed=self._rng.randbytes(32))
         return self._rng_per_contract[contract_id]
 
+    def has_used_rng(self) -> bool:
+        """Return whether any contract has used the RNG, i.e., whether the execution depends on the seed."""
+        return bool(self._rng_per_contract)
+
     def _internal_create_contract(self, contract_id: ContractId, blueprint_id: BlueprintId) -> None:
         """Create a new contract without calling the initialize() method."""
         assert not self.has_contract_been_initialized(contract_id)
@@ -14,9 +14,14 @@
 
 from __future__ import annotations
 
+import copy
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional
 
+import rocksdb
+
+from hathor.nanocontracts.storage.node_cache import NodeCache
 from hathor.nanocontracts.storage.node_nc_type import NodeNCType
 from hathor.serialization import Deserializer, Serializer
 from hathor.storage.rocksdb_storage import RocksDBStorage
@@ -42,16 +47,36 @@ class NodeTrieStore(ABC):
     def __contains__(self, key: bytes) -> bool:
         raise NotImplementedError
 
+    @contextmanager
+    def write_batch(self) -> Iterator[None]:
+        """Group all nodes added inside this context into a single write, which happens when the context exits.
+
+        Nested contexts are merged into the outermost one. If the context exits with an error, the pending nodes
+        are discarded. By default, nodes are written immediately."""
+        yield
+
+    def read_snapshot(self, db: rocksdb.DB) -> NodeTrieStore:
+        """Return a copy of this store that reads from `db`, which is a read snapshot of the database. By default,
+        the store isn't backed by the database and it's returned as it is."""
+        return self
+
 
 class RocksDBNodeTrieStore(NodeTrieStore):
     _CF_NAME = b'nc-state'
     _KEY_LENGTH = b'length'
 
-    def __init__(self, rocksdb_storage: RocksDBStorage) -> None:
+    def __init__(self, rocksdb_storage: RocksDBStorage, *, cache_capacity: Optional[int] = None) -> None:
         self._rocksdb_storage = rocksdb_storage
         self._db = self._rocksdb_storage.get_db()
         self._cf_key = self._rocksdb_storage.get_or_create_column_family(self._CF_NAME)
         self._node_nc_type = NodeNCType()
+        # Cache of decoded nodes, it is disabled when no capacity is given.
+        self.cache: Optional[NodeCache] = NodeCache(cache_capacity) if cache_capacity else None
+        # Pending write batch and the nodes added to it, used while inside `write_batch()`.
+        self._batch: Optional[rocksdb.WriteBatch] = None
+        self._batch_nodes: dict[bytes, tuple[Node, int]] = {}
+        # Keys read or written while inside `track_touched_keys()`, used by the garbage collector.
+        self._touched_keys: Optional[set[bytes]] = None
 
     def _serialize_node(self, node: Node, /) -> bytes:
         serializer = Serializer.build_bytes_serializer()
@@ -65,14 +90,37 @@ class RocksDBNodeTrieStore(NodeTrieStore):
         return node
 
     def __getitem__(self, key: bytes) -> Node:
+        if self._touched_keys is not None:
+            self._touched_keys.add(key)
+        pending = self._batch_nodes.get(key)
+        if pending is not None:
+            pending_node, _ = pending
+            return pending_node
+        if self.cache is not None:
+            node = self.cache.get(key)
+            if node is not None:
+                return node
         item_bytes = self._db.get((self._cf_key, key))
         if item_bytes is None:
             raise KeyError(key.hex())
-        return self._deserialize_node(item_bytes)
+        node = self._deserialize_node(item_bytes)
+        if self.cache is not None:
+            self.cache.put(key, node, len(item_bytes))
+        return node
 
     def __setitem__(self, key: bytes, item: Node) -> None:
+        if self._touched_keys is not None:
+            self._touched_keys.add(key)
         item_bytes = self._serialize_node(item)
+        if self._batch is not None:
+            # The node only goes to the cache after the batch is written, otherwise a discarded batch would leave
+            # nodes in the cache that are not in the database.
+            self._batch.put((self._cf_key, key), item_bytes)
+            self._batch_nodes[key] = (item, len(item_bytes))
+            return
         self._db.put((self._cf_key, key), item_bytes)
+        if self.cache is not None:
+            self.cache.put(key, item, len(item_bytes))
 
     def __len__(self) -> int:
         it = self._db.iterkeys()
@@ -80,4 +128,96 @@ class RocksDBNodeTrieStore(NodeTrieStore):
         return sum(1 for _ in it)
 
     def __contains__(self, key: bytes) -> bool:
+        if self._touched_keys is not None:
+            # Even a negative answer counts, the caller is probably about to write this node.
+            self._touched_keys.add(key)
+        if key in self._batch_nodes:
+            return True
+        if self.cache is not None and key in self.cache:
+            return True
+        # The bloom filter check is cheap and avoids a read for the common case of new nodes.
+        may_exist, _ = self._db.key_may_exist((self._cf_key, key))
+        if not may_exist:
+            return False
         return bool(self._db.get((self._cf_key, key)) is not None)
+
+    @contextmanager
+    def write_batch(self) -> Iterator[None]:
+        if self._batch is not None:
+            # Nested batch, the outermost one will write everything.
+            yield
+            return
+
+        self._batch = rocksdb.WriteBatch()
+        try:
+            yield
+        except BaseException:
+            self._batch = None
+            self._batch_nodes = {}
+            raise
+        batch, batch_nodes = self._batch, self._batch_nodes
+        self._batch = None
+        self._batch_nodes = {}
+        self._db.write(batch)
+        if self.cache is not None:
+            for key, (node, size) in batch_nodes.items():
+                self.cache.put(key, node, size)
+
+    def read_snapshot(self, db: rocksdb.DB) -> RocksDBNodeTrieStore:
+        # XXX: the copy doesn't use the cache, a node that was removed by the garbage collector after the snapshot was
+        #      taken would be put back in it without being in the database
+        store = copy.copy(self)
+        store._db = db
+        store.cache = None
+        store._batch = None
+        store._batch_nodes = {}
+        store._touched_keys = None
+        return store
+
+    def get_uncached(self, key: bytes) -> Node:
+        """Read a node directly from the database, without using or filling the cache."""
+        item_bytes = self._db.get((self._cf_key, key))
+        if item_bytes is None:
+            raise KeyError(key.hex())
+        return self._deserialize_node(item_bytes)
+
+    def iter_sizes(self) -> Iterator[tuple[bytes, int]]:
+        """Iterate over the keys of all stored nodes along with the size of their serialized form.
+
+        Nodes written after the iteration started are not yielded."""
+        it = self._db.iteritems(self._cf_key)
+        it.seek_to_first()
+        for (_, key), item_bytes in it:
+            yield key, len(item_bytes)
+
+    def estimate_num_keys(self) -> int:
+        """Return RocksDB's estimate of the number of stored nodes."""
+        return int(self._db.get_property(b'rocksdb.estimate-num-keys', self._cf_key))
+
+    def remove_nodes(self, keys: Iterable[bytes]) -> None:
+        """Delete the given nodes in a single write. The caller must make sure they are not reachable anymore."""
+        assert self._batch is None, 'cannot remove nodes while inside a write batch'
+        batch = rocksdb.WriteBatch()
+        for key in keys:
+            batch.delete((self._cf_key, key))
+            if self.cache is not None:
+                self.cache.remove(key)
+        self._db.write(batch)
+
+    def compact(self) -> None:
+        """Compact the column family, so the space of removed nodes is reclaimed."""
+        self._db.compact_range(column_family=self._cf_key)
+
+    @contextmanager
+    def track_touched_keys(self) -> Iterator[set[bytes]]:
+        """Collect the keys of all nodes read, written or looked up while inside this context.
+
+        It allows the garbage collector to run while the store is in use: a node that was touched might have become
+        reachable again after the reachable set was calculated, so it must not be removed."""
+        assert self._touched_keys is None, 'keys are already being tracked'
+        touched_keys: set[bytes] = set()
+        self._touched_keys = touched_keys
+        try:
+            yield touched_keys
+        finally:
+            self._touched_keys = None
@@ -23,7 +23,7 @@ from hathor.nanocontracts.nc_types.token_version_nc_type import TokenVersionNCTy
 from hathor.nanocontracts.storage.contract_storage import NCContractStorage
 from hathor.nanocontracts.storage.patricia_trie import NodeId, PatriciaTrie
 from hathor.nanocontracts.storage.token_proxy import TokenProxy
-from hathor.nanocontracts.types import Address, ContractId, TokenUid
+from hathor.nanocontracts.types import Address, ContractId, TokenUid, VertexId
 from hathor.transaction.headers.nano_header import ADDRESS_SEQNUM_SIZE
 from hathor.transaction.token_info import TokenVersion
 from hathor.utils import leb128
@@ -68,9 +68,65 @@ class NCBlockStorage:
         },
     )
 
-    def __init__(self, block_trie: PatriciaTrie) -> None:
+    def __init__(self, block_trie: PatriciaTrie, *, defer_contract_commits: bool = False) -> None:
         self._block_trie: PatriciaTrie = block_trie
 
+        # When enabled, there is a single live trie per contract, which is shared by all storages returned by
+        # `get_contract_storage()`. So changes made by one call are seen by the next ones without being committed,
+        # and contract tries are only committed once, by `commit()`.
+        self._defer_contract_commits = defer_contract_commits
+        self._contract_tries: dict[ContractId, PatriciaTrie] = {}
+
+        # Keys of the block trie read and written through this storage, only recorded after `enable_key_tracking()`.
+        self._read_keys: Optional[set[bytes]] = None
+        self._written_keys: Optional[set[bytes]] = None
+
+    def enable_key_tracking(self) -> None:
+        """Start recording the keys of the block trie that are read and written through this storage.
+
+        All the state of a block hangs from keys of the block trie, including the state of each contract, so these
+        keys are enough to tell whether two executions might have affected each other."""
+        self._read_keys = set()
+        self._written_keys = set()
+
+    @property
+    def read_keys(self) -> set[bytes]:
+        """Keys of the block trie read through this storage, including keys that were not found."""
+        assert self._read_keys is not None, 'key tracking is not enabled'
+        return self._read_keys
+
+    @property
+    def written_keys(self) -> set[bytes]:
+        """Keys of the block trie updated through this storage."""
+        assert self._written_keys is not None, 'key tracking is not enabled'
+        return self._written_keys
+
+    def _trie_get(self, key: bytes) -> bytes:
+        if self._read_keys is not None:
+            self._read_keys.add(key)
+        return self._block_trie.get(key)
+
+    def _trie_update(self, key: bytes, value: bytes) -> None:
+        if self._written_keys is not None:
+            self._written_keys.add(key)
+        self._block_trie.update(key, value)
+
+    def apply_changes_from(self, other: NCBlockStorage) -> None:
+        """Apply all the changes made through another storage of the same block, which must be tracking keys.
+
+        Both storages must defer contract commits, so the live tries of the changed contracts are moved to this
+        storage and committed with it."""
+        assert self._defer_contract_commits and other._defer_contract_commits
+        contract_tag = _Tag.CONTRACT.value
+        for key in other.written_keys:
+            value = other._block_trie.get(key)
+            self._trie_update(key, value)
+            if key.startswith(contract_tag):
+                contract_id = ContractId(VertexId(key[len(contract_tag):]))
+                trie = other._contract_tries[contract_id]
+                assert trie.root.id == value
+                self._contract_tries[contract_id] = trie
+
     def has_contract(self, contract_id: ContractId) -> bool:
         try:
             self.get_contract_root_id(contract_id)
@@ -82,14 +138,24 @@ class NCBlockStorage:
     def get_contract_root_id(self, contract_id: ContractId) -> bytes:
         """Return the root id of a contract's storage."""
         key = ContractKey(contract_id)
-        return self._block_trie.get(bytes(key))
+        return self._trie_get(bytes(key))
 
     def update_contract_trie(self, nc_id: ContractId, root_id: bytes) -> None:
         key = ContractKey(nc_id)
-        self._block_trie.update(bytes(key), root_id)
+        self._trie_update(bytes(key), root_id)
 
     def commit(self) -> None:
-        """Flush all local changes to the storage."""
+        """Flush all local changes to the storage.
+
+        When contract commits are deferred, the final state of each contract is committed too. Intermediate states
+        are discarded, so no orphan nodes are created."""
+        for contract_id, trie in self._contract_tries.items():
+            if not trie.is_dirty():
+                continue
+            # Skip tries that are not linked from the block trie, e.g., contracts whose creation has failed.
+            if not self.has_contract(contract_id) or self.get_contract_root_id(contract_id) != trie.root.id:
+                continue
+            trie.commit()
         self._block_trie.commit()
 
     def get_root_id(self) -> bytes:
@@ -109,10 +175,20 @@ class NCBlockStorage:
         trie = PatriciaTrie(store, root_id=self.bytes_to_node_id(root_id))
         return trie
 
+    def _get_contract_trie(self, contract_id: ContractId, root_id: bytes) -> PatriciaTrie:
+        """Return the trie of a contract with a given root, reusing the live trie when commits are deferred."""
+        if not self._defer_contract_commits:
+            return self._get_trie(root_id)
+        trie = self._contract_tries.get(contract_id)
+        if trie is None or trie.root.id != root_id:
+            trie = self._get_trie(root_id)
+            self._contract_tries[contract_id] = trie
+        return trie
+
     def get_contract_storage(self, contract_id: ContractId) -> NCContractStorage:
         try:
             nc_root_id = self.get_contract_root_id(contract_id)
-            trie = self._get_trie(nc_root_id)
+            trie = self._get_contract_trie(contract_id, nc_root_id)
         except KeyError:
             raise NanoContractDoesNotExist(contract_id.hex())
         token_proxy = TokenProxy(self)
@@ -121,13 +197,15 @@ class NCBlockStorage:
     def get_empty_contract_storage(self, contract_id: ContractId) -> NCContractStorage:
         """Create a new contract storage instance for a given contract."""
         trie = self._get_trie(None)
+        if self._defer_contract_commits:
+            self._contract_tries[contract_id] = trie
         token_proxy = TokenProxy(self)
         return NCContractStorage(trie=trie, nc_id=contract_id, token_proxy=token_proxy)
 
     def get_token_description(self, token_id: TokenUid) -> TokenDescription:
         """Return the token description for a given token_id."""
         key = TokenKey(token_id)
-        token_description_bytes = self._block_trie.get(bytes(key))
+        token_description_bytes = self._trie_get(bytes(key))
         token_description = self._TOKEN_DESCRIPTION_NC_TYPE.from_bytes(token_description_bytes)
         return token_description
 
@@ -135,7 +213,7 @@ class NCBlockStorage:
         """Return True if the token_id already exists in this block's nano state."""
         key = TokenKey(token_id)
         try:
-            self._block_trie.get(bytes(key))
+            self._trie_get(bytes(key))
         except KeyError:
             return False
         else:
@@ -159,7 +237,7 @@ class NCBlockStorage:
             token_version=token_version
         )
         token_description_bytes = self._TOKEN_DESCRIPTION_NC_TYPE.to_bytes(token_description)
-        self._block_trie.update(bytes(key), token_description_bytes)
+        self._trie_update(bytes(key), token_description_bytes)
 
     def get_address_seqnum(self, address: Address) -> int:
         """Get the latest seqnum for an address.
@@ -167,7 +245,7 @@ class NCBlockStorage:
         For clarity, new transactions must have a GREATER seqnum to be able to be executed."""
         key = AddressKey(address)
         try:
-            seqnum_bytes = self._block_trie.get(bytes(key))
+            seqnum_bytes = self._trie_get(bytes(key))
         except KeyError:
             return -1
         else:
@@ -182,4 +260,4 @@ class NCBlockStorage:
         assert seqnum > old_seqnum
         key = AddressKey(address)
         seqnum_bytes = leb128.encode_unsigned(seqnum, max_bytes=ADDRESS_SEQNUM_SIZE)
-        self._block_trie.update(bytes(key), seqnum_bytes)
+        self._trie_update(bytes(key), seqnum_bytes)
@@ -14,17 +14,18 @@
 
 # XXX: avoid using `from __future__ import annotations` here because `make_dataclass_nc_type` doesn't support it
 
+import copy
 import hashlib
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from enum import Enum
-from typing import TypeVar
+from typing import Any, Optional, TypeVar
 
 from hathor.conf.settings import HATHOR_TOKEN_UID
 from hathor.nanocontracts.nc_types import BytesNCType, NCType
 from hathor.nanocontracts.nc_types.dataclass_nc_type import make_dataclass_nc_type
 from hathor.nanocontracts.storage.maybedeleted_nc_type import MaybeDeletedNCType
-from hathor.nanocontracts.storage.patricia_trie import PatriciaTrie
+from hathor.nanocontracts.storage.patricia_trie import Node, PatriciaTrie
 from hathor.nanocontracts.storage.token_proxy import TokenProxy
 from hathor.nanocontracts.storage.types import _NOT_PROVIDED, DeletedKey, DeletedKeyType
 from hathor.nanocontracts.types import BlueprintId, TokenUid, VertexId
@@ -134,15 +135,62 @@ class MetadataKey(TrieKey):
 _BLUEPRINT_ID_KEY = b'blueprint_id'
 
 
+@dataclass(slots=True)
+class _CachedValue:
+    """A value read from or written to the trie, kept by `NCContractStorage` to serve repeated reads."""
+    # Content stored in the trie, or None if the key is not in the trie.
+    content: Optional[bytes]
+    # NCType used to deserialize `obj`, or None if the content has not been deserialized yet.
+    nc_type: Optional[NCType]
+    obj: Any = None
+
+
+def _is_cacheable(obj: Any) -> bool:
+    """Return whether a deserialized object can be kept in the cache and shared by all reads of the same key.
+
+    Objects that could be modified by the caller are not shared, they are deserialized again on every read."""
+    if obj is None or isinstance(obj, (int, str, bytes, MutableBalance)):
+        return True
+    if isinstance(obj, tuple):
+        return all(_is_cacheable(item) for item in obj)
+    return False
+
+
+def _has_mutable_balance(obj: Any) -> bool:
+    """Return whether a cacheable object is a MutableBalance or a tuple containing one at any depth."""
+    if isinstance(obj, MutableBalance):
+        return True
+    return isinstance(obj, tuple) and any(_has_mutable_balance(item) for item in obj)
+
+
+def _copy_cached(obj: T) -> T:
+    """Return a cached object to a caller, copying it if it is mutable or contains mutable objects."""
+    if isinstance(obj, MutableBalance):
+        return replace(obj)
+    if isinstance(obj, tuple) and _has_mutable_balance(obj):
+        # cacheable tuples only contain immutable objects and balances, so only the balances and the tuples holding
+        # them are actually copied
+        return copy.deepcopy(obj)
+    return obj
+
+
 class NCContractStorage:
     """This is the storage used by NanoContracts.
 
-    This implementation works for both memory and rocksdb backends."""
+    This implementation works for both memory and rocksdb backends.
+
+    Every value read or written is cached by trie-key, so repeated reads of the same key do not walk the trie and,
+    when the object is immutable, do not deserialize it again. Writes still go to the trie immediately."""
 
     def __init__(self, *, trie: PatriciaTrie, nc_id: VertexId, token_proxy: TokenProxy) -> None:
         # State (balances, metadata and attributes)
         self._trie: PatriciaTrie = trie
 
+        # Values read from or written to the trie. The cache is only valid while the root of the trie is
+        # `self._cache_root`, since the trie might be shared with other storages of the same contract.
+        self._cache: dict[TrieKey, _CachedValue] = {}
+        self._cache_root: Node = trie.root
+
         # Nano contract id
         self.nc_id = nc_id
 
@@ -206,31 +254,50 @@ class NCContractStorage:
             return DeletedKey
         return obj
 
+    def _get_cached_value(self, trie_key: TrieKey) -> _CachedValue:
+        """Return the cached value of a trie-key, reading its content from the trie if it is not in the cache."""
+        if self._trie.root is not self._cache_root:
+            # The trie has been updated by someone else.
+            self._cache.clear()
+            self._cache_root = self._trie.root
+        cached = self._cache.get(trie_key)
+        if cached is None:
+            try:
+                content = self._trie.get(bytes(trie_key))
+            except KeyError:
+                cached = _CachedValue(None, None)
+            else:
+                cached = _CachedValue(content, None)
+            self._cache[trie_key] = cached
+        return cached
+
     def _trie_has_key(self, trie_key: TrieKey) -> bool:
         """Returns True if trie-key exists and is not deleted."""
-        try:
-            value_bytes = self._trie.get(bytes(trie_key))
-        except KeyError:
+        content = self._get_cached_value(trie_key).content
+        if content is None:
             return False
-        if MaybeDeletedNCType.is_deleted_key(value_bytes):
+        if MaybeDeletedNCType.is_deleted_key(content):
             return False
         return True
 
     def _trie_get_obj(self, trie_key: TrieKey, nc_type: NCType[T], *, default: D = _NOT_PROVIDED) -> T | D:
         """Internal method that gets the object stored at a given trie-key."""
         obj: T | DeletedKeyType
-        key_bytes = bytes(trie_key)
-        try:
-            content = self._trie.get(key_bytes)
-        except KeyError:
+        cached = self._get_cached_value(trie_key)
+        if cached.content is None:
             obj = DeletedKey
+        elif cached.nc_type is nc_type:
+            obj = _copy_cached(cached.obj)
         else:
             # XXX: extra variable used so mypy can infer the correct type
-            obj_t = self._deserialize(content, nc_type)
+            obj_t = self._deserialize(cached.content, nc_type)
             obj = obj_t
+            if _is_cacheable(obj):
+                cached.nc_type = nc_type
+                cached.obj = _copy_cached(obj)
         if obj is DeletedKey:
             if default is _NOT_PROVIDED:
-                raise KeyError(f'trie_key={key_bytes!r}')
+                raise KeyError(f'trie_key={bytes(trie_key)!r}')
             return default
         assert not isinstance(obj, DeletedKeyType)
         return obj
@@ -242,7 +309,15 @@ class NCContractStorage:
         knowing the actual NCType isn't needed.
         """
         content = self._serialize(obj, nc_type)
+        is_cache_valid = self._trie.root is self._cache_root
         self._trie.update(bytes(trie_key), content)
+        if not is_cache_valid:
+            self._cache.clear()
+        self._cache_root = self._trie.root
+        if nc_type is not None and _is_cacheable(obj):
+            self._cache[trie_key] = _CachedValue(content, nc_type, _copy_cached(obj))
+        else:
+            self._cache[trie_key] = _CachedValue(content, None)
 
     def _to_attr_key(self, key: bytes) -> AttrKey:
         """Return the actual key used in the storage."""
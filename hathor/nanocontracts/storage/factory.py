@@ -14,13 +14,18 @@
 
 from __future__ import annotations
 
+import copy
 from abc import ABC
+from contextlib import AbstractContextManager
 from typing import TYPE_CHECKING, Optional
 
 from hathor.nanocontracts.storage.backends import NodeTrieStore, RocksDBNodeTrieStore
 from hathor.nanocontracts.storage.block_storage import NCBlockStorage
+from hathor.nanocontracts.storage.node_cache import DEFAULT_NODE_CACHE_CAPACITY, NodeCache
 
 if TYPE_CHECKING:
+    import rocksdb
+
     from hathor.nanocontracts.storage.patricia_trie import NodeId, PatriciaTrie
     from hathor.storage import RocksDBStorage
     from hathor.transaction.block import Block
@@ -42,6 +47,25 @@ class NCStorageFactory(ABC):
         trie = PatriciaTrie(self._store, root_id=self.bytes_to_node_id(root_id))
         return trie
 
+    def write_batch(self) -> AbstractContextManager[None]:
+        """Return a context in which all trie nodes committed by any trie are written to the database at once."""
+        return self._store.write_batch()
+
+    def get_node_store(self) -> NodeTrieStore:
+        """Return the store of the nodes of all tries."""
+        return self._store
+
+    def get_node_cache(self) -> Optional[NodeCache]:
+        """Return the cache of decoded nodes shared by all tries, or None if there is no cache."""
+        return None
+
+    def read_snapshot(self, db: rocksdb.DB) -> NCStorageFactory:
+        """Return a copy of this factory whose storages read from `db`, which is a read snapshot of the database. The
+        copy must only be used for reading."""
+        factory = copy.copy(self)
+        factory._store = self._store.read_snapshot(db)
+        return factory
+
     def get_block_storage_from_block(self, block: Block) -> NCBlockStorage:
         """Return a block storage. If the block is genesis, it will return an empty block storage."""
         meta = block.get_metadata()
@@ -51,10 +75,12 @@ class NCStorageFactory(ABC):
         assert meta.nc_block_root_id is not None
         return self.get_block_storage(meta.nc_block_root_id)
 
-    def get_block_storage(self, block_root_id: bytes) -> NCBlockStorage:
-        """Return a non-empty block storage."""
+    def get_block_storage(self, block_root_id: bytes, *, defer_contract_commits: bool = False) -> NCBlockStorage:
+        """Return a non-empty block storage.
+
+        See `NCBlockStorage` for the meaning of `defer_contract_commits`."""
         trie = self._get_trie(block_root_id)
-        return NCBlockStorage(trie)
+        return NCBlockStorage(trie, defer_contract_commits=defer_contract_commits)
 
     def get_empty_block_storage(self) -> NCBlockStorage:
         """Create an empty block storage."""
@@ -66,6 +92,19 @@ class NCRocksDBStorageFactory(NCStorageFactory):
     """Factory to create a RocksDB storage for a contract.
     """
 
-    def __init__(self, rocksdb_storage: 'RocksDBStorage') -> None:
+    _store: RocksDBNodeTrieStore
+
+    def __init__(
+        self,
+        rocksdb_storage: 'RocksDBStorage',
+        *,
+        node_cache_capacity: Optional[int] = DEFAULT_NODE_CACHE_CAPACITY,
+    ) -> None:
         # This store keeps data from all contracts.
-        self._store = RocksDBNodeTrieStore(rocksdb_storage)
+        self._store = RocksDBNodeTrieStore(rocksdb_storage, cache_capacity=node_cache_capacity)
+
+    def get_node_store(self) -> RocksDBNodeTrieStore:
+        return self._store
+
+    def get_node_cache(self) -> Optional[NodeCache]:
+        return self._store.cache
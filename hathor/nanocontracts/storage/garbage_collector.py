@@ -0,0 +1,330 @@
+# Copyright 2025 Hathor Labs
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Generator, Iterable, Iterator, Optional
+
+from structlog import get_logger
+from twisted.internet.defer import Deferred
+from twisted.internet.task import CooperativeTask, Cooperator, LoopingCall, TaskStopped
+from twisted.python.failure import Failure
+
+from hathor.nanocontracts.storage.block_storage import _Tag as BlockTrieTag
+from hathor.nanocontracts.storage.patricia_trie import Node, NodeId
+from hathor.util import progress
+
+if TYPE_CHECKING:
+    from hathor.checkpoint import Checkpoint
+    from hathor.nanocontracts.storage.backends import RocksDBNodeTrieStore
+    from hathor.reactor import ReactorProtocol
+    from hathor.transaction import Block
+    from hathor.transaction.storage import TransactionStorage
+
+logger = get_logger()
+
+# Default number of best-chain blocks whose state is kept.
+DEFAULT_GC_KEEP_BLOCKS: int = 10_000
+
+# Default number of nodes removed in each write.
+DEFAULT_GC_BATCH_SIZE: int = 10_000
+
+# Default interval between runs of the online garbage collector, in seconds.
+DEFAULT_GC_INTERVAL: int = 6 * 3600
+
+# Number of nodes processed between each yield, so the online mode does not block the reactor for too long.
+_STEP_SIZE: int = 1_000
+
+# Encoded prefix of the keys of the block trie that point to the root of a contract trie.
+_CONTRACT_KEY_PREFIX: bytes = BlockTrieTag.CONTRACT.value.hex().encode('ascii')
+
+
+@dataclass
+class NCStateGCStats:
+    """Result of a garbage collector run. Sizes are the sizes of the serialized nodes, in bytes."""
+    root_count: int = 0
+    reachable_count: int = 0
+    total_count: int = 0
+    total_size: int = 0
+    removed_count: int = 0
+    removed_size: int = 0
+
+
+class NCStateGarbageCollector:
+    """Remove nodes of the nano contract state that are not reachable from recent blocks.
+
+    Every trie update creates a new path of immutable nodes and the old ones are never deleted, so the store only
+    grows. This runs a mark-and-sweep: the nodes reachable from the `nc_block_root_id` of the last `keep_blocks` blocks
+    of the best chain and of all checkpoints are marked, including the contract tries referenced by the block tries,
+    and all other nodes are removed.
+
+    After a run, the state of older blocks can no longer be queried nor executed upon, so `keep_blocks` must be larger
+    than any reorg the node is expected to handle.
+
+    It can run offline, through `run()`, or online, through `start()`, in which case each run is split in small steps
+    cooperatively scheduled in the reactor. In the online mode, all nodes touched by the store while a run is in
+    progress are preserved along with their whole subtree, since they might have become reachable from a new block.
+    """
+
+    def __init__(
+        self,
+        *,
+        store: RocksDBNodeTrieStore,
+        tx_storage: TransactionStorage,
+        checkpoints: Iterable[Checkpoint] = (),
+        keep_blocks: int = DEFAULT_GC_KEEP_BLOCKS,
+        batch_size: int = DEFAULT_GC_BATCH_SIZE,
+    ) -> None:
+        assert keep_blocks > 0
+        assert batch_size > 0
+        self.log = logger.new()
+        self._store = store
+        self._tx_storage = tx_storage
+        self._checkpoints = list(checkpoints)
+        self.keep_blocks = keep_blocks
+        self.batch_size = batch_size
+        self._lc_run: Optional[LoopingCall] = None
+        self._task: Optional[CooperativeTask] = None
+        self._cooperator: Optional[Cooperator] = None
+
+    def iter_collect_root_ids(self, root_ids: set[NodeId]) -> Iterator[None]:
+        """Add to `root_ids` the block roots that must be kept.
+
+        It yields periodically so it can be run cooperatively."""
+        root_ids.add(Node(key=b'', length=0).calculate_id())
+        best_height = self._tx_storage.get_height_best_block()
+        heights = range(max(0, best_height - self.keep_blocks + 1), best_height + 1)
+        for count, height in enumerate(heights, start=1):
+            self._add_root_id(root_ids, self._tx_storage.get_block_by_height(height))
+            if count % _STEP_SIZE == 0:
+                yield
+        for checkpoint in self._checkpoints:
+            if self._tx_storage.transaction_exists(checkpoint.hash):
+                self._add_root_id(root_ids, self._tx_storage.get_block(checkpoint.hash))
+
+    def collect_root_ids(self) -> set[NodeId]:
+        """Return the block roots that must be kept."""
+        root_ids: set[NodeId] = set()
+        for _ in self.iter_collect_root_ids(root_ids):
+            pass
+        return root_ids
+
+    @staticmethod
+    def _add_root_id(root_ids: set[NodeId], block: Optional[Block]) -> None:
+        if block is None:
+            return
+        root_id = block.get_metadata().nc_block_root_id
+        if root_id is not None:
+            root_ids.add(NodeId(root_id))
+
+    def iter_mark(
+        self,
+        block_root_ids: Iterable[NodeId],
+        marked: set[bytes],
+        visited_block_nodes: Optional[set[bytes]] = None,
+    ) -> Iterator[None]:
+        """Add to `marked` all nodes reachable from the given block roots. Nodes already marked are not visited again.
+
+        Block trie nodes are also tracked in `visited_block_nodes`, because they have to be inspected for contract
+        roots, which could be skipped if the same node had already been marked as part of a contract trie.
+
+        It yields periodically so it can be run cooperatively."""
+        if visited_block_nodes is None:
+            visited_block_nodes = set()
+        block_stack: list[bytes] = list(block_root_ids)
+        contract_stack: list[bytes] = []
+        count = 0
+        while block_stack or contract_stack:
+            if block_stack:
+                node_id = block_stack.pop()
+                if node_id in visited_block_nodes:
+                    continue
+                visited_block_nodes.add(node_id)
+                node = self._store.get_uncached(node_id)
+                if node.content is not None and node.key.startswith(_CONTRACT_KEY_PREFIX):
+                    contract_stack.append(node.content)
+                block_stack.extend(node.children.values())
+            else:
+                node_id = contract_stack.pop()
+                if node_id in marked:
+                    continue
+                node = self._store.get_uncached(node_id)
+                contract_stack.extend(child_id for child_id in node.children.values() if child_id not in marked)
+            marked.add(node_id)
+            count += 1
+            if count % _STEP_SIZE == 0:
+                yield
+
+    def iter_mark_touched(
+        self,
+        touched_keys: set[bytes],
+        marked: set[bytes],
+        visited_block_nodes: set[bytes],
+    ) -> Iterator[None]:
+        """Add to `marked` the whole subtree of every touched node, so nodes reused by a new trie are not removed.
+
+        A touched node can belong to a block trie or to a contract trie, so nodes that look like a contract entry of a
+        block trie have their content followed when it is a stored node, which at worst keeps a few more nodes. Nodes
+        walked here are also added to `visited_block_nodes`, since they were inspected for contract roots.
+
+        It only returns after a pass over the touched keys that did not yield, so when it returns the subtree of every
+        touched node is marked and the caller can remove nodes before giving control back to the reactor."""
+        count = 0
+        while True:
+            stack = [key for key in touched_keys if key not in visited_block_nodes]
+            yielded = False
+            while stack:
+                node_id = stack.pop()
+                if node_id in visited_block_nodes:
+                    continue
+                try:
+                    node = self._store.get_uncached(node_id)
+                except KeyError:
+                    # Looked up but not stored (yet), or the content of a contract entry that is not a node.
+                    continue
+                visited_block_nodes.add(node_id)
+                marked.add(node_id)
+                if node.content is not None and node.key.startswith(_CONTRACT_KEY_PREFIX):
+                    stack.append(node.content)
+                stack.extend(child_id for child_id in node.children.values() if child_id not in visited_block_nodes)
+                count += 1
+                if count % _STEP_SIZE == 0:
+                    yielded = True
+                    yield
+            if not yielded:
+                return
+
+    def iter_run(
+        self,
+        *,
+        dry_run: bool = False,
+        stats: Optional[NCStateGCStats] = None,
+    ) -> Generator[None, None, None]:
+        """Run a full mark-and-sweep, updating `stats` as it goes.
+
+        When `dry_run` is set, nothing is removed and `stats` tells how many nodes and bytes would be removed.
+        It yields periodically so it can be run cooperatively."""
+        if stats is None:
+            stats = NCStateGCStats()
+        with self._store.track_touched_keys() as touched_keys:
+            marked: set[bytes] = set()
+            visited_block_nodes: set[bytes] = set()
+            root_ids: set[NodeId] = set()
+            yield from self.iter_collect_root_ids(root_ids)
+            self.log.info('marking reachable nc-state nodes', roots=len(root_ids))
+            yield from self.iter_mark(root_ids, marked, visited_block_nodes)
+
+            # New blocks might have been executed while marking. Their nodes were either touched or are reachable
+            # from the previous roots, but marking them again is cheap and makes the sweep less dependent on that.
+            new_root_ids: set[NodeId] = set()
+            yield from self.iter_collect_root_ids(new_root_ids)
+            new_root_ids -= root_ids
+            yield from self.iter_mark(new_root_ids, marked, visited_block_nodes)
+            stats.root_count = len(root_ids) + len(new_root_ids)
+            yield from self.iter_mark_touched(touched_keys, marked, visited_block_nodes)
+            stats.reachable_count = len(marked)
+            yield
+
+            self.log.info('sweeping unreachable nc-state nodes', reachable=stats.reachable_count, dry_run=dry_run)
+            to_remove: list[tuple[bytes, int]] = []
+            it = progress(self._store.iter_sizes(), log=self.log, total=self._store.estimate_num_keys())
+            for key, size in it:
+                stats.total_count += 1
+                stats.total_size += size
+                if key not in marked:
+                    to_remove.append((key, size))
+                if len(to_remove) >= self.batch_size:
+                    # Nodes touched since the last batch might have made older nodes reachable again.
+                    yield from self.iter_mark_touched(touched_keys, marked, visited_block_nodes)
+                    self._remove(to_remove, marked, stats, dry_run=dry_run)
+                    to_remove = []
+                if stats.total_count % _STEP_SIZE == 0:
+                    yield
+            yield from self.iter_mark_touched(touched_keys, marked, visited_block_nodes)
+            self._remove(to_remove, marked, stats, dry_run=dry_run)
+
+        self.log.info(
+            'nc-state garbage collection finished',
+            dry_run=dry_run,
+            roots=stats.root_count,
+            reachable=stats.reachable_count,
+            total=stats.total_count,
+            total_size=stats.total_size,
+            removed=stats.removed_count,
+            removed_size=stats.removed_size,
+        )
+
+    def _remove(
+        self,
+        nodes: list[tuple[bytes, int]],
+        marked: set[bytes],
+        stats: NCStateGCStats,
+        *,
+        dry_run: bool,
+    ) -> None:
+        """Remove a batch of unreachable nodes, except those that were marked after the batch was collected."""
+        nodes = [(key, size) for key, size in nodes if key not in marked]
+        if not nodes:
+            return
+        if not dry_run:
+            self._store.remove_nodes(key for key, _ in nodes)
+        stats.removed_count += len(nodes)
+        stats.removed_size += sum(size for _, size in nodes)
+
+    def run(self, *, dry_run: bool = False) -> NCStateGCStats:
+        """Run a full mark-and-sweep synchronously and return its stats."""
+        stats = NCStateGCStats()
+        for _ in self.iter_run(dry_run=dry_run, stats=stats):
+            pass
+        return stats
+
+    def start(self, reactor: ReactorProtocol, *, interval: int = DEFAULT_GC_INTERVAL) -> None:
+        """Start running periodically in the background."""
+        assert self._lc_run is None
+        # the steps of a run are scheduled on the given reactor, not on the global one
+        self._cooperator = Cooperator(scheduler=lambda step: reactor.callLater(0, step))
+        self._lc_run = LoopingCall(self._start_run)
+        self._lc_run.clock = reactor
+        self._lc_run.start(interval, now=False)
+
+    def stop(self) -> None:
+        """Stop running in the background. A run in progress is interrupted, nothing is lost by doing so."""
+        if self._lc_run is not None and self._lc_run.running:
+            self._lc_run.stop()
+        self._lc_run = None
+        if self._task is not None:
+            self._task.stop()
+
+    def _start_run(self) -> None:
+        if self._task is not None:
+            self.log.warn('previous nc-state garbage collection is still running, skipping')
+            return
+        assert self._cooperator is not None
+        run = self.iter_run()
+        self._task = self._cooperator.cooperate(run)
+        deferred: Deferred[Iterator[None]] = self._task.whenDone()
+        deferred.addErrback(self._on_run_error)
+        deferred.addBoth(self._on_run_done, run)
+
+    def _on_run_error(self, failure: Failure) -> None:
+        if failure.check(TaskStopped):
+            self.log.info('nc-state garbage collection interrupted')
+        else:
+            self.log.error('nc-state garbage collection failed', failure=failure)
+
+    def _on_run_done(self, _: object, run: Generator[None, None, None]) -> None:
+        # Make sure the store stops tracking touched keys, even if the run was interrupted.
+        run.close()
+        self._task = None
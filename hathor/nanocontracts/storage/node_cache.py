@@ -0,0 +1,109 @@
+# Copyright 2025 Hathor Labs
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from threading import Lock
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from hathor.nanocontracts.storage.patricia_trie import Node
+
+# Default capacity of the decoded node cache, in bytes.
+DEFAULT_NODE_CACHE_CAPACITY: int = 64 * 1024 * 1024
+
+
+class NodeCache:
+    """Bounded LRU cache of decoded trie nodes, keyed by node id.
+
+    Nodes are content-addressed and never mutated after their id is calculated, so the same decoded object can be
+    safely shared by all tries reading from the same store.
+
+    The capacity is a budget in bytes, and each entry is accounted by the size of its serialized form.
+
+    It is safe to use from multiple threads, which happens during speculative nano execution.
+    """
+
+    __slots__ = ('capacity', 'size', 'stats', '_nodes', '_lock')
+
+    def __init__(self, capacity: int) -> None:
+        assert capacity >= 0
+        self.capacity = capacity
+        # Sum of the sizes of all cached entries.
+        self.size = 0
+        self.stats = dict(hit=0, miss=0, eviction=0)
+        self._nodes: OrderedDict[bytes, tuple[Node, int]] = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, key: bytes) -> bool:
+        return key in self._nodes
+
+    def get(self, key: bytes) -> Optional[Node]:
+        """Return the cached node or None if it is not in the cache. Updates hit/miss stats."""
+        with self._lock:
+            entry = self._nodes.get(key)
+            if entry is None:
+                self.stats['miss'] += 1
+                return None
+            self._nodes.move_to_end(key, last=True)
+            self.stats['hit'] += 1
+        node, _ = entry
+        return node
+
+    def put(self, key: bytes, node: Node, size: int) -> None:
+        """Add a node to the cache, evicting the least recently used ones if the capacity is exceeded."""
+        if size > self.capacity:
+            # It would evict the whole cache and then be evicted itself.
+            return
+        with self._lock:
+            old_entry = self._nodes.pop(key, None)
+            if old_entry is not None:
+                _, old_size = old_entry
+                self.size -= old_size
+            self._nodes[key] = (node, size)
+            self.size += size
+            while self.size > self.capacity:
+                self._popitem()
+
+    def remove(self, key: bytes) -> None:
+        """Remove an entry if it is in the cache."""
+        with self._lock:
+            entry = self._nodes.pop(key, None)
+            if entry is not None:
+                _, size = entry
+                self.size -= size
+
+    def set_capacity(self, capacity: int) -> None:
+        """Change the capacity, evicting entries if needed."""
+        assert capacity >= 0
+        with self._lock:
+            self.capacity = capacity
+            while self.size > self.capacity:
+                self._popitem()
+
+    def clear(self) -> None:
+        """Remove all entries. Stats are kept."""
+        with self._lock:
+            self._nodes.clear()
+            self.size = 0
+
+    def _popitem(self) -> None:
+        """Evict the least recently used entry. It must be called with the lock held."""
+        _, (_, size) = self._nodes.popitem(last=False)
+        self.size -= size
+        self.stats['eviction'] += 1
@@ -15,7 +15,7 @@
 import hashlib
 from dataclasses import dataclass, field
 from itertools import chain
-from typing import Iterable, NamedTuple, NewType, Optional
+from typing import Any, Iterable, NamedTuple, NewType, Optional
 
 from hathor.nanocontracts.storage.backends import NodeTrieStore
 
@@ -23,18 +23,67 @@ NodeId = NewType('NodeId', bytes)
 
 
 class DictChildren(dict[bytes, NodeId]):
-    """Data structure to store children of tree nodes."""
+    """Data structure to store children of tree nodes.
+
+    In a radix trie, no two children of the same node share their first byte. So we keep an index from the first
+    byte to the child key, which allows finding the edge to follow without scanning all children.
+    """
+
+    __slots__ = ('_index',)
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._index: dict[bytes, bytes] = {key[:1]: key for key in self}
+
+    def __setitem__(self, key: bytes, node_id: NodeId) -> None:
+        super().__setitem__(key, node_id)
+        self._index[key[:1]] = key
+
+    def __delitem__(self, key: bytes) -> None:
+        super().__delitem__(key)
+        del self._index[key[:1]]
+
+    def pop(self, key: bytes, *args: Any) -> Any:
+        if key in self:
+            del self._index[key[:1]]
+        return super().pop(key, *args)
+
+    def popitem(self) -> tuple[bytes, NodeId]:
+        key, node_id = super().popitem()
+        del self._index[key[:1]]
+        return key, node_id
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        for key, node_id in dict(*args, **kwargs).items():
+            self[key] = node_id
+
+    def clear(self) -> None:
+        super().clear()
+        self._index.clear()
+
+    def find_first_byte(self, a: bytes) -> Optional[tuple[bytes, NodeId]]:
+        """Find the only key that might share a prefix with `a`, i.e., the key with the same first byte."""
+        key = self._index.get(a[:1])
+        if key is None:
+            return None
+        return key, self[key]
+
     def find_prefix(self, a: bytes) -> Optional[tuple[bytes, NodeId]]:
         """Find the key that is a prefix of `a`."""
-        # TODO Optimize search.
-        for key, node_id in self.items():
-            if a.startswith(key):
-                return key, node_id
-        return None
+        match = self.find_first_byte(a)
+        if match is None:
+            return None
+        key, _ = match
+        if not a.startswith(key):
+            return None
+        return match
 
     def copy(self):
         """Return a copy of itself."""
-        return DictChildren(self)
+        new = DictChildren()
+        dict.update(new, self)
+        new._index = self._index.copy()
+        return new
 
 
 @dataclass(kw_only=True, slots=True)
@@ -107,7 +156,7 @@ class PatriciaTrie:
         if root_id is None:
             self.root: Node = Node(key=b'', length=0)
             self.root.update_id()
-            self._db[self.root.id] = self.root
+            self._add_to_db_if_missing(self.root)
         else:
             self.root = self._db[root_id]
             assert self.root.id == root_id
@@ -126,7 +175,7 @@ class PatriciaTrie:
 
     def _commit_dfs(self, node: Node) -> None:
         """Auxiliary method to run a dfs from self.root and flush local changes to the database."""
-        self._add_to_db_or_assert(node)
+        self._add_to_db_if_missing(node)
         for child_id in node.children.values():
             child = self._local_changes.get(child_id, None)
             if child is not None:
@@ -134,11 +183,12 @@ class PatriciaTrie:
             else:
                 assert child_id in self._db
 
-    def _add_to_db_or_assert(self, node: Node) -> None:
-        """Auxiliary method to either add to the database or check consistency."""
-        if node.id in self._db:
-            assert self._db[node.id] == node
-        else:
+    def _add_to_db_if_missing(self, node: Node) -> None:
+        """Auxiliary method to add a node to the database if it is not there yet.
+
+        Nodes are content-addressed, so a node already in the database must be equal to this one and we skip
+        reading it back."""
+        if node.id not in self._db:
             self._db[node.id] = node
 
     def rollback(self) -> None:
@@ -306,16 +356,15 @@ class PatriciaTrie:
 
         # If this point is reached, then `parent.key` is a prefix of `key`. So we have to check whether
         # any of parent's children shares a prefix with `key` too. Notice that at most one children can
-        # share a prefix with `key`.
-        # TODO Optimize this search.
+        # share a prefix with `key`, and it must be the one that starts with the same byte.
         suffix = key[parent.length:]
-        for k, _v in parent.children.items():
+        match = parent.children.find_first_byte(suffix)
+        if match is not None:
+            k, _v = match
             idx = self._find_longest_common_prefix(suffix, k)
-            if idx < 0:
-                # No share with `key`. So skip it.
-                continue
+            assert idx >= 0
 
-            # Found the child the shares a prefix with `key`. So we can stop the search.
+            # Found the child the shares a prefix with `key`.
             # Now we have to add a "split node" between the parent and its child.
             #
             # Before: parent -> child
@@ -345,7 +394,6 @@ class PatriciaTrie:
             # to store the object.
             parent = split
             parent_match = common_key_suffix
-            break
 
         # Finally, create the new node that will store the object.
         assert parent.key != key
@@ -12,14 +12,21 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from collections import deque
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, Any, Iterable, NamedTuple, Optional
 
 from structlog import get_logger
 from twisted.internet import endpoints
 from twisted.internet.address import IPv4Address, IPv6Address
 from twisted.internet.defer import Deferred
-from twisted.internet.interfaces import IListeningPort, IProtocol, IProtocolFactory, IStreamClientEndpoint
+from twisted.internet.interfaces import (
+    IDelayedCall,
+    IListeningPort,
+    IProtocol,
+    IProtocolFactory,
+    IStreamClientEndpoint,
+)
 from twisted.internet.task import LoopingCall
 from twisted.protocols.tls import TLSMemoryBIOFactory, TLSMemoryBIOProtocol
 from twisted.python.failure import Failure
@@ -35,22 +42,48 @@ from hathor.p2p.peer_storage import VerifiedPeerStorage
 from hathor.p2p.protocol import HathorProtocol
 from hathor.p2p.rate_limiter import RateLimiter
 from hathor.p2p.states.ready import ReadyState
+from hathor.p2p.serialized_vertex import SerializedVertex
 from hathor.p2p.sync_factory import SyncAgentFactory
+from hathor.p2p.sync_v2.block_download import BlockDownloadCoordinator
 from hathor.p2p.sync_version import SyncVersion
 from hathor.p2p.utils import parse_whitelist
 from hathor.pubsub import HathorEvents, PubSubManager
 from hathor.reactor import ReactorProtocol as Reactor
 from hathor.transaction import BaseTransaction
+from hathor.types import VertexId
 from hathor.util import Random
 
 if TYPE_CHECKING:
     from hathor.manager import HathorManager
+    from hathor.p2p.sync_v2.agent import NodeBlockSync
 
 logger = get_logger()
 
 # The timeout in seconds for the whitelist GET request
 WHITELIST_REQUEST_TIMEOUT = 45
 
+# The time in seconds after which an announced vertex that was requested from a peer is requested from another one
+ANNOUNCED_REQUEST_TIMEOUT = 10
+
+# Maximum number of announced vertices being requested that are kept, see `ConnectionsManager.start_announced_request`
+ANNOUNCED_REQUEST_MAX_SIZE = 10_000
+
+# Maximum number of other peers that announced a vertex being requested that are kept to request it from on failure
+ANNOUNCED_REQUEST_MAX_ALTERNATES = 8
+
+# Maximum number of recently relayed vertices whose serialization is kept, see `ConnectionsManager.send_tx_to_peers`
+SERIALIZED_VERTEX_CACHE_SIZE = 1_000
+
+
+@dataclass(slots=True)
+class _AnnouncedRequest:
+    # the sync agent the vertex is being requested from
+    requested_from: 'NodeBlockSync'
+    # timer to request the vertex from one of the alternates if it isn't received in time
+    timeout_call: IDelayedCall
+    # other sync agents that announced the vertex, in the order they announced it
+    alternates: list['NodeBlockSync'] = field(default_factory=list)
+
 
 class _SyncRotateInfo(NamedTuple):
     candidates: list[PeerId]
@@ -211,6 +244,19 @@ class ConnectionsManager:
         self._sync_factories = {}
         self._enabled_sync_versions = set()
 
+        # Vertices announced by peers that are being requested from one of them, so the same vertex isn't downloaded
+        # from every peer that announces it. The other peers that announced it are kept to fail over to.
+        self._announced_requests: OrderedDict[VertexId, _AnnouncedRequest] = OrderedDict()
+
+        # Serializations of the recently relayed vertices, in LRU order. When the vertices are announced, the peers
+        # request them with GET-DATA, and each request reuses the serialization instead of building it again.
+        self._serialized_vertices: OrderedDict[VertexId, SerializedVertex] = OrderedDict()
+
+        # Coordinator of the block download from several peers at once, when it's enabled.
+        self.block_download: Optional[BlockDownloadCoordinator] = None
+        if self._settings.ENABLE_PARALLEL_BLOCK_DOWNLOAD:
+            self.block_download = BlockDownloadCoordinator(self.reactor)
+
         # agent to perform HTTP requests
         self._http_agent = Agent(self.reactor)
 
@@ -392,10 +438,81 @@ class ConnectionsManager:
         """
         connections = list(self.iter_ready_connections())
         self.rng.shuffle(connections)
+        # the same serialization is sent to all peers, and kept for the ones that will request it
+        vertex = SerializedVertex(tx)
+        self._serialized_vertices[tx.hash] = vertex
+        self._serialized_vertices.move_to_end(tx.hash)
+        if len(self._serialized_vertices) > SERIALIZED_VERTEX_CACHE_SIZE:
+            self._serialized_vertices.popitem(last=False)
         for conn in connections:
             assert conn.state is not None
             assert isinstance(conn.state, ReadyState)
-            conn.state.send_tx_to_peer(tx)
+            conn.state.send_tx_to_peer(vertex)
+
+    def get_serialized_vertex(self, vertex_id: VertexId) -> Optional[SerializedVertex]:
+        """ Return the serialization of a recently relayed vertex, if it's still kept.
+        """
+        vertex = self._serialized_vertices.get(vertex_id)
+        if vertex is not None:
+            self._serialized_vertices.move_to_end(vertex_id)
+        return vertex
+
+    def start_announced_request(self, vertex_id: VertexId, sync_agent: 'NodeBlockSync') -> bool:
+        """ Return whether a vertex announced by a peer should be requested from it, which is when it isn't being
+        requested from another peer. Otherwise the peer is kept as an alternate, and the vertex is requested from it
+        if the other peer doesn't send it in `ANNOUNCED_REQUEST_TIMEOUT` seconds or doesn't have it anymore.
+        """
+        request = self._announced_requests.get(vertex_id)
+        if request is not None:
+            if (
+                sync_agent is not request.requested_from
+                and sync_agent not in request.alternates
+                and len(request.alternates) < ANNOUNCED_REQUEST_MAX_ALTERNATES
+            ):
+                request.alternates.append(sync_agent)
+            return False
+        timeout_call = self.reactor.callLater(ANNOUNCED_REQUEST_TIMEOUT, self._retry_announced_request, vertex_id)
+        self._announced_requests[vertex_id] = _AnnouncedRequest(requested_from=sync_agent, timeout_call=timeout_call)
+        if len(self._announced_requests) > ANNOUNCED_REQUEST_MAX_SIZE:
+            _, evicted = self._announced_requests.popitem(last=False)
+            evicted.timeout_call.cancel()
+        return True
+
+    def finish_announced_request(self, vertex_id: VertexId) -> None:
+        """ Called when a requested announced vertex is received.
+        """
+        request = self._announced_requests.pop(vertex_id, None)
+        if request is not None and request.timeout_call.active():
+            request.timeout_call.cancel()
+
+    def fail_announced_request(self, vertex_id: VertexId, sync_agent: 'NodeBlockSync') -> None:
+        """ Called when the peer an announced vertex was requested from doesn't have it anymore, it's requested from
+        one of the alternates right away.
+        """
+        request = self._announced_requests.get(vertex_id)
+        if request is None or request.requested_from is not sync_agent:
+            return
+        request.timeout_call.cancel()
+        self._retry_announced_request(vertex_id)
+
+    def _retry_announced_request(self, vertex_id: VertexId) -> None:
+        """ Request an announced vertex from the next alternate that can still be requested from, or forget about it
+        when there's none left, so the next peer that announces it starts a new request.
+        """
+        request = self._announced_requests.get(vertex_id)
+        if request is None:
+            return
+        while request.alternates:
+            sync_agent = request.alternates.pop(0)
+            if sync_agent.request_announced_vertex(vertex_id):
+                self.log.debug('announced vertex requested from another peer', tx=vertex_id.hex(),
+                               peer=sync_agent.protocol.get_peer_id())
+                request.requested_from = sync_agent
+                request.timeout_call = self.reactor.callLater(
+                    ANNOUNCED_REQUEST_TIMEOUT, self._retry_announced_request, vertex_id
+                )
+                return
+        del self._announced_requests[vertex_id]
 
     def disconnect_all_peers(self, *, force: bool = False) -> None:
         """Disconnect all peers."""
@@ -95,6 +95,7 @@ class ProtocolMessages(Enum):
     TIPS_END = 'TIPS-END'
 
     RELAY = 'RELAY'
+    ANNOUNCE = 'ANNOUNCE'  # Announce a new vertex by its hash, the peer requests it with GET-DATA if needed.
 
     GET_NEXT = 'GET-NEXT'
     NEXT = 'NEXT'
@@ -128,3 +129,5 @@ class ProtocolMessages(Enum):
     BLOCK_NC_ROOT_ID = 'BLOCK-NC-ROOT-ID'
     GET_NC_DB_NODE = 'GET-NC-DB-NODE'
     NC_DB_NODE = 'NC-DB-NODE'
+    GET_NC_DB_NODES = 'GET-NC-DB-NODES'
+    NC_DB_NODES = 'NC-DB-NODES'
@@ -0,0 +1,261 @@
+# Copyright 2025 Hathor Labs
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections import deque
+from typing import TYPE_CHECKING, Iterable, Optional
+
+from structlog import get_logger
+from twisted.internet.defer import Deferred
+
+from hathor.nanocontracts.storage.block_storage import _Tag as BlockTrieTag
+from hathor.nanocontracts.storage.node_nc_type import NodeNCType
+from hathor.nanocontracts.storage.patricia_trie import Node, NodeId
+from hathor.serialization import Deserializer, Serializer
+from hathor.types import VertexId
+
+if TYPE_CHECKING:
+    from hathor.nanocontracts.storage.backends import NodeTrieStore
+    from hathor.p2p.states.ready import ReadyState
+
+logger = get_logger()
+
+# Maximum number of node ids in a single GET-NC-DB-NODES message.
+MAX_NC_DB_NODES_PER_REQUEST: int = 100
+
+# Maximum size of the payload of a NC-DB-NODES message, it must fit in the protocol line limit.
+MAX_NC_DB_NODES_RESPONSE_SIZE: int = 60_000
+
+# Default number of GET-NC-DB-NODES requests waiting for a response at the same time.
+DEFAULT_NC_STATE_SYNC_WINDOW: int = 4
+
+# Encoded prefix of the keys of the block trie that point to the root of a contract trie.
+_CONTRACT_KEY_PREFIX: bytes = BlockTrieTag.CONTRACT.value.hex().encode('ascii')
+
+_node_nc_type = NodeNCType()
+
+
+def serialize_nc_db_node(node: Node) -> bytes:
+    """Serialize a node in the same format used by the store."""
+    serializer = Serializer.build_bytes_serializer()
+    _node_nc_type.serialize(serializer, node)
+    return bytes(serializer.finalize())
+
+
+def deserialize_nc_db_node(data: bytes) -> Node:
+    """Deserialize a node serialized by `serialize_nc_db_node()`."""
+    deserializer = Deserializer.build_bytes_deserializer(data)
+    node = _node_nc_type.deserialize(deserializer)
+    deserializer.finalize()
+    return node
+
+
+class NCStateSyncError(Exception):
+    """Raised when the nano state cannot be downloaded from a peer."""
+    pass
+
+
+class NCStateSyncClient:
+    """Download the whole nano contract state of a block from a peer.
+
+    The block root id is asked with GET-BLOCK-NC-ROOT-ID. Starting from the block root, nodes are requested in
+    batches through GET-NC-DB-NODES, with up to `window` requests in flight. Every received node has its id
+    recalculated and its key checked against the key its parent expects, so the peer cannot send anything that is not
+    part of the requested trie. The contract roots referenced by the block trie are downloaded too.
+
+    Nodes are only written to the store after all their descendants have been written, i.e., the trie is built
+    bottom-up. So the store never has a node whose subtree is incomplete, nodes that already exist locally are not
+    downloaded again, and an interrupted sync can simply be restarted.
+
+    Only the state tries are downloaded, which is not enough to bootstrap a node without executing the nano
+    transactions: their execution results, which void the failed ones, are not part of the tries. It is used through
+    the `p2p.nc_state_sync` sysctl, to restore the state of a block, e.g. one removed by the garbage collector.
+    """
+
+    def __init__(
+        self,
+        state: 'ReadyState',
+        store: 'NodeTrieStore',
+        block_id: VertexId,
+        *,
+        batch_size: int = MAX_NC_DB_NODES_PER_REQUEST,
+        window: int = DEFAULT_NC_STATE_SYNC_WINDOW,
+    ) -> None:
+        assert 0 < batch_size <= MAX_NC_DB_NODES_PER_REQUEST
+        assert window > 0
+        self.state = state
+        self.store = store
+        self.block_id = block_id
+        # Root of the block trie, as informed by the peer.
+        self.block_root_id: Optional[NodeId] = None
+        self.batch_size = batch_size
+        self.window = window
+
+        self.log = logger.new(peer=self.state.protocol.get_short_peer_id())
+
+        self._deferred: Deferred[NodeId] = Deferred()
+
+        # Ids waiting to be requested. It is used as a stack, so the download goes depth-first and the number of
+        # incomplete nodes kept in memory stays small.
+        self._to_request: list[NodeId] = []
+        # Batches of ids requested and waiting for a response, in the order they were sent.
+        self._in_flight: deque[list[NodeId]] = deque()
+        # The key each node must have, as expected by its parent. Only nodes not received yet are here.
+        self._expected_keys: dict[NodeId, bytes] = {}
+        # Ids of the nodes that belong to the block trie, their leaves might point to contract roots.
+        self._block_nodes: set[NodeId] = set()
+        # Received nodes that cannot be written yet, along with the number of dependencies still missing.
+        self._incomplete: dict[NodeId, tuple[Node, int]] = {}
+        # Nodes waiting for each dependency to be written.
+        self._dependents: dict[NodeId, list[NodeId]] = {}
+
+        self.received_count: int = 0
+        self.written_count: int = 0
+
+    def wait(self) -> Deferred[NodeId]:
+        """Return a deferred that is resolved with the block root id when the whole state has been written."""
+        return self._deferred
+
+    def fails(self, reason: NCStateSyncError) -> None:
+        """Fail the execution by resolving the deferred with an error."""
+        if self._deferred.called:
+            return
+        self.log.warn('nc-state sync failed', reason=repr(reason))
+        self._deferred.errback(reason)
+
+    def start(self) -> None:
+        """Start by asking the root id of the block."""
+        self.log.info('nc-state sync started', block_id=self.block_id.hex())
+        self.state.send_get_block_nc_root_id(self.block_id)
+
+    def handle_block_nc_root_id(self, block_id: VertexId, block_root_id: NodeId) -> None:
+        """This method is called by the ready state when a BLOCK-NC-ROOT-ID message is received."""
+        if self._deferred.called or self.block_root_id is not None or block_id != self.block_id:
+            return
+        self.block_root_id = block_root_id
+        if block_root_id in self.store:
+            self._finish()
+            return
+        self._add_dependency(block_root_id, b'', is_block_node=True)
+        self._send_requests()
+
+    def _finish(self) -> None:
+        assert self.block_root_id is not None
+        self.log.info('nc-state sync finished', block_id=self.block_id.hex(), block_root_id=self.block_root_id.hex(),
+                      received=self.received_count, written=self.written_count)
+        self._deferred.callback(self.block_root_id)
+
+    def _add_dependency(self, node_id: NodeId, expected_key: bytes, *, is_block_node: bool) -> None:
+        """Schedule the download of a node that is not in the store."""
+        if is_block_node:
+            self._block_nodes.add(node_id)
+        if node_id in self._expected_keys or node_id in self._incomplete:
+            # Already requested or received, it is probably shared by two contracts.
+            return
+        self._expected_keys[node_id] = expected_key
+        self._to_request.append(node_id)
+
+    def _send_requests(self) -> None:
+        while self._to_request and len(self._in_flight) < self.window:
+            batch = self._to_request[-self.batch_size:]
+            del self._to_request[-self.batch_size:]
+            self._in_flight.append(batch)
+            self.state.send_get_nc_db_nodes(batch)
+
+    def handle_nc_db_nodes(self, nodes: list[Node]) -> None:
+        """This method is called by the ready state when a NC-DB-NODES message is received."""
+        if self._deferred.called:
+            return
+        if not self._in_flight:
+            self.fails(NCStateSyncError('unexpected NC-DB-NODES received'))
+            return
+        assert self.block_root_id is not None
+        batch = self._in_flight.popleft()
+        requested = set(batch)
+        if not nodes and requested:
+            # The peer does not have these nodes, retrying would never finish.
+            self.fails(NCStateSyncError('peer sent none of the requested nodes'))
+            return
+
+        with self.store.write_batch():
+            for node in nodes:
+                if node.id not in requested:
+                    self.fails(NCStateSyncError(f'unexpected node received: {node.id.hex()}'))
+                    return
+                requested.remove(node.id)
+                try:
+                    self._verify_node(node)
+                except NCStateSyncError as e:
+                    self.fails(e)
+                    return
+                self._on_node_received(node)
+
+        # The peer can leave nodes out to fit the response size, these are requested again.
+        self._to_request.extend(node_id for node_id in batch if node_id in requested)
+
+        if self._deferred.called:
+            return
+        if self.block_root_id in self.store:
+            self._finish()
+            return
+        self._send_requests()
+
+    def _verify_node(self, node: Node) -> None:
+        """Check that a node is exactly the one its parent refers to."""
+        if node.calculate_id() != node.id:
+            raise NCStateSyncError(f'node with invalid id received: {node.id.hex()}')
+        if node.key != self._expected_keys[node.id]:
+            raise NCStateSyncError(f'node with unexpected key received: {node.id.hex()}')
+        if node.length != len(node.key):
+            raise NCStateSyncError(f'node with invalid length received: {node.id.hex()}')
+
+    def _on_node_received(self, node: Node) -> None:
+        self.received_count += 1
+        del self._expected_keys[node.id]
+        is_block_node = node.id in self._block_nodes
+
+        missing_count = 0
+        dependencies: Iterable[tuple[NodeId, bytes, bool]] = (
+            (child_id, node.key + child_key, is_block_node) for child_key, child_id in node.children.items()
+        )
+        if is_block_node and node.content is not None and node.key.startswith(_CONTRACT_KEY_PREFIX):
+            # A block trie leaf is only complete when the contract trie it points to is.
+            contract_root = (NodeId(node.content), b'', False)
+            dependencies = [*dependencies, contract_root]
+        for dependency_id, expected_key, is_dependency_block_node in dependencies:
+            if dependency_id in self.store:
+                continue
+            self._add_dependency(dependency_id, expected_key, is_block_node=is_dependency_block_node)
+            self._dependents.setdefault(dependency_id, []).append(node.id)
+            missing_count += 1
+
+        if missing_count:
+            self._incomplete[node.id] = (node, missing_count)
+        else:
+            self._write(node)
+
+    def _write(self, node: Node) -> None:
+        """Write a complete node and all the nodes that were only waiting for it."""
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            self.store[node.id] = node
+            self.written_count += 1
+            self._block_nodes.discard(node.id)
+            for dependent_id in self._dependents.pop(node.id, []):
+                dependent, missing_count = self._incomplete[dependent_id]
+                if missing_count > 1:
+                    self._incomplete[dependent_id] = (dependent, missing_count - 1)
+                else:
+                    del self._incomplete[dependent_id]
+                    stack.append(dependent)
@@ -12,7 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import struct
 import time
+import zlib
 from enum import Enum
 from typing import TYPE_CHECKING, Optional, cast
 
@@ -33,7 +35,7 @@ from hathor.p2p.peer_storage import UnverifiedPeerStorage
 from hathor.p2p.rate_limiter import RateLimiter
 from hathor.p2p.states import BaseState, HelloState, PeerIdState, ReadyState
 from hathor.p2p.sync_version import SyncVersion
-from hathor.p2p.utils import format_address
+from hathor.p2p.utils import format_address, get_compression_dict
 from hathor.profiler import get_cpu_profiler
 
 if TYPE_CHECKING:
@@ -47,6 +49,10 @@ MISBEHAVIOR_KEY = 'misbehavior'
 MISBEHAVIOR_THRESHOLD = 100
 MISBEHAVIOR_WINDOW = 3600  # decay in 1h
 
+# Binary framing, see `HathorLineReceiver.enable_binary_framing()`
+_FRAME_LENGTH = struct.Struct('!I')
+_FRAME_TEXT_LENGTH = struct.Struct('!H')
+
 
 class HathorProtocol:
     """ Implements Hathor Peer-to-Peer Protocol. An instance of this class is
@@ -95,6 +101,8 @@ class HathorProtocol:
     idle_timeout: int
     sync_version: Optional[SyncVersion]  # version chosen to be used on this connection
     capabilities: set[str]  # capabilities received from the peer in HelloState
+    binary_framing: bool  # whether the messages are sent and received in binary frames instead of lines
+    compression: bool  # whether what is sent and received after the HELLO is compressed
 
     @property
     def peer(self) -> PublicPeer:
@@ -187,6 +195,10 @@ class HathorProtocol:
 
         self.capabilities = set()
 
+        # Binary framing and compression are negotiated in HelloState
+        self.binary_framing = False
+        self.compression = False
+
     def change_state(self, state_enum: PeerState) -> None:
         """Called to change the state of the connection."""
         if state_enum not in self._state_instances:
@@ -318,9 +330,30 @@ class HathorProtocol:
         """
         raise NotImplementedError
 
-    @cpu.profiler(key=lambda self, cmd: 'p2p-cmd!{}'.format(str(cmd)))
-    def recv_message(self, cmd: ProtocolMessages, payload: str) -> None:
-        """ Executed when a new message arrives.
+    def send_binary_message(self, cmd: ProtocolMessages, data: bytes, payload: Optional[str] = None) -> None:
+        """ Send a message that carries binary data, which must not be empty. It can only be used when the binary
+        framing is enabled, see `enable_binary_framing()`.
+        """
+        raise NotImplementedError
+
+    def enable_binary_framing(self) -> None:
+        """ Switch the connection from lines to binary frames, in both directions.
+
+        It's called by HelloState when both peers have the binary framing capability, right after the HELLO of the
+        peer is received. The HELLO is the first message each peer sends, so both sides switch at the same point.
+        """
+        raise NotImplementedError
+
+    def enable_compression(self) -> None:
+        """ Compress the connection with zlib, in both directions, see `get_compression_dict()`.
+
+        It's called by HelloState when both peers have the compression capability, at the same point as
+        `enable_binary_framing()`, with which it can be combined.
+        """
+        raise NotImplementedError
+
+    def _on_message_received(self) -> bool:
+        """ Update the state of the connection when a message arrives, return False if it was throttled.
         """
         assert self.state is not None
 
@@ -331,6 +364,16 @@ class HathorProtocol:
 
         if not self.ratelimit.add_hit(self.RateLimitKeys.GLOBAL):
             self.state.send_throttle(self.RateLimitKeys.GLOBAL.value)
+            return False
+        return True
+
+    @cpu.profiler(key=lambda self, cmd: 'p2p-cmd!{}'.format(str(cmd)))
+    def recv_message(self, cmd: ProtocolMessages, payload: str) -> None:
+        """ Executed when a new message arrives.
+        """
+        assert self.state is not None
+
+        if not self._on_message_received():
             return
 
         cmd_handler = self.state.cmd_map.get(cmd)
@@ -344,6 +387,27 @@ class HathorProtocol:
             .addCallback(lambda _: self.reset_idle_timeout()) \
             .addErrback(self._on_cmd_handler_error, cmd)
 
+    @cpu.profiler(key=lambda self, cmd, payload, data: 'p2p-cmd!{}'.format(str(cmd)))
+    def recv_binary_message(self, cmd: ProtocolMessages, payload: str, data: bytes) -> None:
+        """ Executed when a new message that carries binary data arrives.
+        """
+        assert self.state is not None
+
+        if not self._on_message_received():
+            return
+
+        cmd_handler = self.state.binary_cmd_map.get(cmd)
+        if cmd_handler is None:
+            self.log.debug('binary cmd not found', cmd=cmd, payload=payload,
+                           available=list(self.state.binary_cmd_map.keys()))
+            self.send_error_and_close_connection('Invalid Command: {} {}'.format(cmd, payload))
+            return
+
+        deferred_result: Deferred[None] = defer.maybeDeferred(cmd_handler, payload, data)
+        deferred_result \
+            .addCallback(lambda _: self.reset_idle_timeout()) \
+            .addErrback(self._on_cmd_handler_error, cmd)
+
     def _on_cmd_handler_error(self, failure: Failure, cmd: ProtocolMessages) -> None:
         self.log.error(f'recv_message processing error:\n{failure.getTraceback()}', reason=failure.getErrorMessage())
         self.send_error_and_close_connection(f'Error processing "{cmd.value}" command')
@@ -430,9 +494,20 @@ class HathorProtocol:
 class HathorLineReceiver(LineReceiver, HathorProtocol):
     """ Implements HathorProtocol in a LineReceiver protocol.
     It is simply a TCP connection which sends one message per line.
+
+    When the binary framing is enabled, the messages are sent in length-prefixed frames instead of lines:
+
+        frame = [length: 4][text_length: 2][text][data]
+
+    The text is the same as the line of the message, and the data is the binary data of the message, which is empty
+    for the messages sent with `send_message()`. The length doesn't include itself and can't be over `MAX_LENGTH`.
     """
     MAX_LENGTH = 65536
 
+    _frame_buffer: bytearray
+    _compressor: Optional['zlib._Compress'] = None
+    _decompressor: Optional['zlib._Decompress'] = None
+
     def connectionMade(self) -> None:
         super(HathorLineReceiver, self).connectionMade()
         self.setLineMode()
@@ -442,6 +517,36 @@ class HathorLineReceiver(LineReceiver, HathorProtocol):
         super(HathorLineReceiver, self).connectionLost()
         self.on_disconnect(reason)
 
+    def dataReceived(self, data: bytes) -> None:
+        if self._decompressor is None:
+            super(HathorLineReceiver, self).dataReceived(data)
+            return
+        self.metrics.received_compressed_bytes += len(data)
+        self._decompress(data)
+
+    def _decompress(self, data: bytes) -> None:
+        """ Decompress the received data and pass it on in chunks of at most `MAX_LENGTH`, so little compressed data
+        can't fill the memory before the line or frame length is checked.
+        """
+        assert self.transport is not None
+        assert self._decompressor is not None
+        while not self.aborting:
+            start = time.thread_time()
+            try:
+                chunk = self._decompressor.decompress(data, self.MAX_LENGTH)
+            except zlib.error:
+                self.log.warn('invalid compressed data')
+                self.transport.loseConnection()
+                return
+            finally:
+                self.metrics.decompression_time += time.thread_time() - start
+            data = self._decompressor.unconsumed_tail
+            if chunk:
+                # XXX: when called from lineReceived, LineReceiver only adds the chunk to its buffer
+                LineReceiver.dataReceived(self, chunk)
+            if not data and len(chunk) < self.MAX_LENGTH:
+                return
+
     def lineLengthExceeded(self, line: str) -> None:
         self.log.warn('line length exceeded', line=line, line_len=len(line), max_line_len=self.MAX_LENGTH)
         super(HathorLineReceiver, self).lineLengthExceeded(line)
@@ -476,16 +581,125 @@ class HathorLineReceiver(LineReceiver, HathorProtocol):
 
         self.recv_message(cmd, msgdata)
 
+    def enable_binary_framing(self) -> None:
+        self.log.debug('enable binary framing')
+        self.binary_framing = True
+        self._frame_buffer = bytearray()
+        # XXX: when called from lineReceived, LineReceiver passes the rest of its buffer to rawDataReceived
+        self.setRawMode()
+
+    def enable_compression(self) -> None:
+        self.log.debug('enable compression')
+        self.compression = True
+        zdict = get_compression_dict(self.node.tx_storage)
+        self._compressor = zlib.compressobj(self._settings.P2P_COMPRESSION_LEVEL, zdict=zdict)
+        self._decompressor = zlib.decompressobj(zdict=zdict)
+        # the data buffered after the HELLO is already compressed
+        pending = self.clearLineBuffer()
+        if pending:
+            self.metrics.received_compressed_bytes += len(pending)
+            self._decompress(pending)
+
+    def rawDataReceived(self, data: bytes) -> None:
+        assert self.transport is not None
+        self._frame_buffer.extend(data)
+        while len(self._frame_buffer) >= _FRAME_LENGTH.size:
+            if self.aborting:
+                # XXX: same as in lineReceived, the buffered frames are ignored
+                self.log.debug('ignore received messager after abort')
+                self._frame_buffer.clear()
+                return
+            frame_len, = _FRAME_LENGTH.unpack_from(self._frame_buffer)
+            if frame_len < _FRAME_TEXT_LENGTH.size or frame_len > self.MAX_LENGTH:
+                self.log.warn('invalid frame length', frame_len=frame_len, max_frame_len=self.MAX_LENGTH)
+                self.transport.loseConnection()
+                return
+            frame_end = _FRAME_LENGTH.size + frame_len
+            if len(self._frame_buffer) < frame_end:
+                return
+            frame = bytes(self._frame_buffer[_FRAME_LENGTH.size:frame_end])
+            del self._frame_buffer[:frame_end]
+            self._frame_received(frame)
+
+    @cpu.profiler(key=lambda self, frame: 'p2p!{}'.format(self.get_short_remote()))
+    def _frame_received(self, frame: bytes) -> None:
+        assert self.transport is not None
+
+        self.metrics.received_messages += 1
+        self.metrics.received_bytes += len(frame)
+
+        text_len, = _FRAME_TEXT_LENGTH.unpack_from(frame)
+        text_end = _FRAME_TEXT_LENGTH.size + text_len
+        if text_end > len(frame):
+            self.transport.loseConnection()
+            return
+
+        try:
+            text = frame[_FRAME_TEXT_LENGTH.size:text_end].decode('utf-8')
+        except UnicodeDecodeError:
+            self.transport.loseConnection()
+            return
+
+        msgtype, _, msgdata = text.partition(' ')
+        try:
+            cmd = ProtocolMessages(msgtype)
+        except ValueError:
+            self.transport.loseConnection()
+            return
+
+        data = frame[text_end:]
+        if data:
+            self.recv_binary_message(cmd, msgdata, data)
+        else:
+            self.recv_message(cmd, msgdata)
+
+    def _send_frame(self, text: bytes, data: bytes = b'') -> None:
+        frame_len = _FRAME_TEXT_LENGTH.size + len(text) + len(data)
+        self.metrics.sent_messages += 1
+        self.metrics.sent_bytes += frame_len
+        self._write(b''.join([
+            _FRAME_LENGTH.pack(frame_len),
+            _FRAME_TEXT_LENGTH.pack(len(text)),
+            text,
+            data,
+        ]))
+
+    def _write(self, data: bytes) -> None:
+        assert self.transport is not None
+        if self._compressor is not None:
+            # XXX: each message is flushed so it can be decompressed as soon as it arrives
+            start = time.thread_time()
+            data = self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+            self.metrics.compression_time += time.thread_time() - start
+            self.metrics.sent_compressed_bytes += len(data)
+        self.transport.write(data)
+
+    def sendLine(self, line: bytes) -> None:
+        self._write(line + self.delimiter)
+
     def send_message(self, cmd_enum: ProtocolMessages, payload: Optional[str] = None) -> None:
         cmd = cmd_enum.value
         if payload:
             line = '{} {}'.format(cmd, payload).encode('utf-8')
         else:
             line = cmd.encode('utf-8')
+        if self.binary_framing:
+            self._send_frame(line)
+            return
         self.metrics.sent_messages += 1
         self.metrics.sent_bytes += len(line)
         self.sendLine(line)
 
+    def send_binary_message(self, cmd_enum: ProtocolMessages, data: bytes, payload: Optional[str] = None) -> None:
+        assert self.binary_framing
+        assert data
+        cmd = cmd_enum.value
+        if payload:
+            text = '{} {}'.format(cmd, payload).encode('utf-8')
+        else:
+            text = cmd.encode('utf-8')
+        self._send_frame(text, data)
+
 
 class ConnectionMetrics:
     def __init__(self) -> None:
@@ -497,6 +711,11 @@ class ConnectionMetrics:
         self.discarded_txs: int = 0
         self.received_blocks: int = 0
         self.discarded_blocks: int = 0
+        # bytes on the wire and CPU time in seconds spent on them, only counted when the compression is enabled
+        self.received_compressed_bytes: int = 0
+        self.sent_compressed_bytes: int = 0
+        self.decompression_time: float = 0.0
+        self.compression_time: float = 0.0
 
     def format_bytes(self, value: int) -> str:
         """ Format bytes in MB and kB.
@@ -522,6 +741,13 @@ class ConnectionMetrics:
             self.sent_messages,
             self.format_bytes(self.sent_bytes))
         )
+        if self.received_compressed_bytes or self.sent_compressed_bytes:
+            print('{}Compressed:     {} received  {} sent  ({:.2f}s cpu)'.format(
+                prefix,
+                self.format_bytes(self.received_compressed_bytes),
+                self.format_bytes(self.sent_compressed_bytes),
+                self.decompression_time + self.compression_time,
+            ))
         print('{}Blocks:         {:8d} received  {:8d} discarded ({:2.0f}%)'.format(
             prefix,
             self.received_blocks,
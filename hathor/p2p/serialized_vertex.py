@@ -0,0 +1,47 @@
+# Copyright 2025 Hathor Labs
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import base64
+from typing import Optional
+
+from hathor.transaction import BaseTransaction
+
+
+class SerializedVertex:
+    """A vertex and its serializations for the P2P messages.
+
+    The serializations are only built when needed, and then reused, so a vertex that is relayed to many peers is
+    serialized once instead of once per connection.
+    """
+
+    __slots__ = ('vertex', '_vertex_bytes', '_base64')
+
+    def __init__(self, vertex: BaseTransaction) -> None:
+        self.vertex = vertex
+        self._vertex_bytes: Optional[bytes] = None
+        self._base64: Optional[str] = None
+
+    @property
+    def vertex_bytes(self) -> bytes:
+        """The bytes of the vertex, as sent when the binary framing is enabled."""
+        if self._vertex_bytes is None:
+            self._vertex_bytes = self.vertex.get_struct()
+        return self._vertex_bytes
+
+    @property
+    def base64(self) -> str:
+        """The bytes of the vertex encoded in base64, as sent in the line protocol."""
+        if self._base64 is None:
+            self._base64 = base64.b64encode(self.vertex_bytes).decode('ascii')
+        return self._base64
@@ -33,6 +33,8 @@ class BaseState:
         ProtocolMessages,
         Callable[[str], None] | Callable[[str], Deferred[None]] | Callable[[str], Coroutine[Deferred[None], Any, None]]
     ]
+    # handlers of the messages that carry binary data, they get the payload and the data
+    binary_cmd_map: dict[ProtocolMessages, Callable[[str, bytes], None]]
 
     def __init__(self, protocol: 'HathorProtocol', settings: HathorSettings):
         self.log = logger.new(**protocol.get_logger_context())
@@ -42,6 +44,7 @@ class BaseState:
             ProtocolMessages.ERROR: self.handle_error,
             ProtocolMessages.THROTTLE: self.handle_throttle,
         }
+        self.binary_cmd_map = {}
 
         # This variable is set by HathorProtocol after instantiating the state
         self.state_name = None
@@ -55,6 +58,9 @@ class BaseState:
     def send_message(self, cmd: ProtocolMessages, payload: Optional[str] = None) -> None:
         self.protocol.send_message(cmd, payload)
 
+    def send_binary_message(self, cmd: ProtocolMessages, data: bytes, payload: Optional[str] = None) -> None:
+        self.protocol.send_binary_message(cmd, data, payload)
+
     def send_throttle(self, key: str) -> None:
         limit = self.protocol.ratelimit.get_limit(key)
         if limit is None:
@@ -170,6 +170,14 @@ class HelloState(BaseState):
             self.protocol.disconnect('rejected by netfilter: filter post_hello', force=True)
             return
 
+        common_capabilities = protocol.capabilities & set(protocol.node.capabilities)
+        if self._settings.CAPABILITY_COMPRESSION in common_capabilities:
+            # same as the binary framing, both sides compress what they send after their HELLO
+            protocol.enable_compression()
+        if self._settings.CAPABILITY_BINARY_FRAMING in common_capabilities:
+            # both sides switch after their HELLO, which is the first message each one sends
+            protocol.enable_binary_framing()
+
         protocol.change_state(protocol.PeerState.PEER_ID)
 
 
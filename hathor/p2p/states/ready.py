@@ -16,17 +16,26 @@ from collections import deque
 from typing import TYPE_CHECKING, Any, Iterable, Optional
 
 from structlog import get_logger
+from twisted.internet.defer import Deferred
 from twisted.internet.task import LoopingCall
 
 from hathor.conf.settings import HathorSettings
 from hathor.indexes.height_index import HeightInfo
 from hathor.nanocontracts.storage.patricia_trie import NodeId
 from hathor.p2p.messages import ProtocolMessages
+from hathor.p2p.nc_state_sync import (
+    MAX_NC_DB_NODES_PER_REQUEST,
+    MAX_NC_DB_NODES_RESPONSE_SIZE,
+    NCStateSyncClient,
+    NCStateSyncError,
+    deserialize_nc_db_node,
+    serialize_nc_db_node,
+)
 from hathor.p2p.peer import PublicPeer, UnverifiedPeer
+from hathor.p2p.serialized_vertex import SerializedVertex
 from hathor.p2p.states.base import BaseState
 from hathor.p2p.sync_agent import SyncAgent
 from hathor.p2p.utils import to_height_info, to_serializable_best_blockchain
-from hathor.transaction import BaseTransaction
 from hathor.transaction.storage.exceptions import TransactionDoesNotExist
 from hathor.types import VertexId
 from hathor.util import json_dumps, json_loads
@@ -80,6 +89,9 @@ class ReadyState(BaseState):
         self.peer_nc_block_root_id: tuple[VertexId, NodeId] | None = None
         self.peer_nc_node: dict[str, Any] | None = None
 
+        # The nc-state being downloaded from this peer, if any
+        self.nc_state_sync: NCStateSyncClient | None = None
+
         self.cmd_map.update({
             # p2p control messages
             ProtocolMessages.PING: self.handle_ping,
@@ -116,6 +128,16 @@ class ReadyState(BaseState):
                 ProtocolMessages.NC_DB_NODE: self.handle_nc_db_node,
             })
 
+        # whether to enable batched nano-state download
+        self.enable_nano_state_sync = (
+            enable_nano_state_commands and self._settings.CAPABILITY_NANO_STATE_SYNC in common_capabilities
+        )
+        if self.enable_nano_state_sync:
+            self.cmd_map.update({
+                ProtocolMessages.GET_NC_DB_NODES: self.handle_get_nc_db_nodes,
+                ProtocolMessages.NC_DB_NODES: self.handle_nc_db_nodes,
+            })
+
         # Initialize sync manager and add its commands to the list of available commands.
         connections = self.protocol.connections
         assert connections is not None
@@ -128,6 +150,7 @@ class ReadyState(BaseState):
 
         self.sync_agent: SyncAgent = sync_factory.create_sync_agent(self.protocol, reactor=self.reactor)
         self.cmd_map.update(self.sync_agent.get_cmd_dict())
+        self.binary_cmd_map.update(self.sync_agent.get_binary_cmd_dict())
 
     def on_enter(self) -> None:
         if self.protocol.connections:
@@ -156,12 +179,16 @@ class ReadyState(BaseState):
         if self.sync_agent.is_started():
             self.sync_agent.stop()
 
+        if self.nc_state_sync is not None:
+            self.nc_state_sync.fails(NCStateSyncError('connection closed'))
+            self.nc_state_sync = None
+
     def prepare_to_disconnect(self) -> None:
         if self.sync_agent.is_started():
             self.sync_agent.stop()
 
-    def send_tx_to_peer(self, tx: BaseTransaction) -> None:
-        self.sync_agent.send_tx_to_peer_if_possible(tx)
+    def send_tx_to_peer(self, vertex: SerializedVertex) -> None:
+        self.sync_agent.send_tx_to_peer_if_possible(vertex)
 
     def is_synced(self) -> bool:
         return self.sync_agent.is_synced()
@@ -363,6 +390,8 @@ class ReadyState(BaseState):
             return
         self.peer_nc_block_root_id = (block_id, nc_root_id)
         self.log.info('response received', block_id=block_id.hex(), nc_root_id=nc_root_id.hex())
+        if self.nc_state_sync is not None:
+            self.nc_state_sync.handle_block_nc_root_id(block_id, nc_root_id)
 
     def send_get_nc_db_node(self, node_id: NodeId) -> None:
         """ Send a GET-NC-DB-NODE command requesting a node with a given node-id.
@@ -410,3 +439,79 @@ class ReadyState(BaseState):
             return
         self.peer_nc_node = nc_db_node_data
         self.log.info('response received', nc_node=nc_db_node_data)
+
+    def sync_nc_state(self, block_id: VertexId) -> Deferred[NodeId]:
+        """ Download the whole nano state of a given block from this peer, see `NCStateSyncClient`.
+
+        The returned deferred is resolved with the root id of the block after all nodes have been stored.
+        """
+        assert self.enable_nano_state_sync, 'peer does not support nano-state sync'
+        assert self.nc_state_sync is None, 'a nano-state sync is already running'
+        store = self.protocol.node.consensus_algorithm.nc_storage_factory.get_node_store()
+        self.nc_state_sync = NCStateSyncClient(self, store, block_id)
+        deferred = self.nc_state_sync.wait()
+        deferred.addBoth(self._on_nc_state_sync_done)
+        self.nc_state_sync.start()
+        return deferred
+
+    def _on_nc_state_sync_done(self, result: Any) -> Any:
+        self.nc_state_sync = None
+        return result
+
+    def send_get_nc_db_nodes(self, node_ids: list[NodeId]) -> None:
+        """ Send a GET-NC-DB-NODES command requesting the nodes with the given node-ids.
+        """
+        payload = ' '.join(node_id.hex() for node_id in node_ids)
+        self.send_message(ProtocolMessages.GET_NC_DB_NODES, payload)
+
+    def handle_get_nc_db_nodes(self, payload: str) -> None:
+        """ Handle a GET-NC-DB-NODES command by returning the serialized storage Nodes of the given NodeIds.
+
+        Nodes that we do not have are left out, and so are the ones that would make the response exceed the line
+        limit, it's up to the peer to request them again.
+        """
+        payload_list = payload.split()
+        if len(payload_list) > MAX_NC_DB_NODES_PER_REQUEST:
+            self.protocol.send_error_and_close_connection('Invalid GET-NC-DB-NODES received (too many node-ids).')
+            return
+        node_ids: list[NodeId] = []
+        for node_id_payload in payload_list:
+            try:
+                node_id = bytes.fromhex(node_id_payload)
+            except ValueError:
+                self.protocol.send_error_and_close_connection('Invalid node-id received (not hex)')
+                return
+            if len(node_id) != 32:
+                self.protocol.send_error_and_close_connection('Invalid node-id received (bad size)')
+                return
+            node_ids.append(NodeId(node_id))
+        store = self.protocol.node.consensus_algorithm.nc_storage_factory.get_node_store()
+        nodes_data: list[str] = []
+        size = 0
+        for node_id in node_ids:
+            try:
+                node = store[node_id]
+            except KeyError:
+                continue
+            node_data = serialize_nc_db_node(node).hex()
+            if size + len(node_data) + 1 > MAX_NC_DB_NODES_RESPONSE_SIZE:
+                break
+            nodes_data.append(node_data)
+            size += len(node_data) + 1
+        self.send_message(ProtocolMessages.NC_DB_NODES, ' '.join(nodes_data))
+
+    def handle_nc_db_nodes(self, payload: str) -> None:
+        """ Handle a NC-DB-NODES command by passing the received nodes to the running nano-state sync.
+        """
+        if self.nc_state_sync is None:
+            # Probably a late response to a sync that has already failed.
+            self.log.debug('ignoring unexpected NC-DB-NODES')
+            return
+        nodes = []
+        for node_data in payload.split():
+            try:
+                nodes.append(deserialize_nc_db_node(bytes.fromhex(node_data)))
+            except Exception:
+                self.protocol.send_error_and_close_connection('Invalid NC-DB-NODES received.')
+                return
+        self.nc_state_sync.handle_nc_db_nodes(nodes)
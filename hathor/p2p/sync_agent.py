@@ -16,7 +16,7 @@ from abc import ABC, abstractmethod
 from typing import Callable
 
 from hathor.p2p.messages import ProtocolMessages
-from hathor.transaction import BaseTransaction
+from hathor.p2p.serialized_vertex import SerializedVertex
 
 
 class SyncAgent(ABC):
@@ -40,8 +40,12 @@ class SyncAgent(ABC):
         """Command dict to add to the protocol handler"""
         raise NotImplementedError
 
+    def get_binary_cmd_dict(self) -> dict[ProtocolMessages, Callable[[str, bytes], None]]:
+        """Command dict of the messages that carry binary data, used when the binary framing is enabled"""
+        return {}
+
     @abstractmethod
-    def send_tx_to_peer_if_possible(self, tx: BaseTransaction) -> None:
+    def send_tx_to_peer_if_possible(self, vertex: SerializedVertex) -> None:
         """Propagate a transaction to the connected peer"""
         raise NotImplementedError
 
@@ -18,7 +18,7 @@ import math
 import struct
 from collections import OrderedDict
 from enum import Enum
-from typing import TYPE_CHECKING, Any, Callable, Generator, NamedTuple, Optional
+from typing import TYPE_CHECKING, Any, Callable, Container, Generator, NamedTuple, Optional
 
 from structlog import get_logger
 from twisted.internet.defer import Deferred, inlineCallbacks
@@ -27,7 +27,9 @@ from twisted.internet.task import LoopingCall
 from hathor.conf.settings import HathorSettings
 from hathor.exception import InvalidNewTransaction
 from hathor.p2p.messages import ProtocolMessages
+from hathor.p2p.serialized_vertex import SerializedVertex
 from hathor.p2p.sync_agent import SyncAgent
+from hathor.p2p.sync_v2.block_download import BlockDownloadCoordinator, BlockRangeClient
 from hathor.p2p.sync_v2.blockchain_streaming_client import BlockchainStreamingClient, StreamingError
 from hathor.p2p.sync_v2.mempool import SyncMempoolManager
 from hathor.p2p.sync_v2.payloads import BestBlockPayload, GetNextBlocksPayload, GetTransactionsBFSPayload
@@ -57,6 +59,12 @@ MAX_MEMPOOL_STATUS_TIPS: int = 20
 
 RUN_SYNC_MAIN_LOOP_INTERVAL = 1  # second(s)
 
+# After a range download is stopped, the BLOCKS and BLOCKS-END that were already sent are dropped for this long.
+STOPPED_BLOCK_RANGE_TIMEOUT = 30  # second(s)
+
+# Origin of the GET-DATA and DATA messages of the vertices requested after an ANNOUNCE.
+RELAY_ORIGIN = 'relay'
+
 
 class _HeightInfo(NamedTuple):
     height: int
@@ -133,11 +141,18 @@ class NodeBlockSync(SyncAgent):
         self._deferred_tips: Optional[Deferred[list[bytes]]] = None
         self._deferred_best_block: Optional[Deferred[_HeightInfo]] = None
         self._deferred_peer_block_hashes: Optional[Deferred[list[_HeightInfo]]] = None
+        # Number of PEER-BLOCK-HASHES replies to ignore, because their requests were cancelled before they arrived.
+        self._peer_block_hashes_to_ignore: int = 0
 
         # Clients to handle streaming messages.
         self._blk_streaming_client: Optional[BlockchainStreamingClient] = None
         self._tx_streaming_client: Optional[TransactionStreamingClient] = None
 
+        # Client of a range of blocks being downloaded for the `BlockDownloadCoordinator`.
+        self._blk_range_client: Optional[BlockRangeClient] = None
+        # Until when the remaining messages of a stopped range download are dropped, see `_is_blk_range_stopped()`.
+        self._blk_range_stopped_until: Optional[float] = None
+
         # Streaming server objects
         self._blk_streaming_server: Optional[BlockchainStreamingServer] = None
         self._tx_streaming_server: Optional[TransactionsStreamingServer] = None
@@ -175,6 +190,14 @@ class NodeBlockSync(SyncAgent):
         self._outbound_relay_enabled = False  # from us to the peer
         self._inbound_relay_enabled = False   # from the peer to us
 
+        # Whether new transactions are relayed as an ANNOUNCE instead of a DATA, blocks are always sent right away.
+        common_capabilities = protocol.capabilities & set(protocol.node.capabilities)
+        self._relay_announce = self._settings.CAPABILITY_RELAY_ANNOUNCE in common_capabilities
+
+        # Announced vertices that were requested from the peer and weren't received yet.
+        self._announced_requests: OrderedDict[VertexId, None] = OrderedDict()
+        self._announced_requests_maxsize = 1000
+
         # Whether to sync with this peer
         self._is_enabled: bool = False
 
@@ -215,7 +238,7 @@ class NodeBlockSync(SyncAgent):
     def disable_sync(self) -> None:
         self._is_enabled = False
 
-    def send_tx_to_peer_if_possible(self, tx: BaseTransaction) -> None:
+    def send_tx_to_peer_if_possible(self, vertex: SerializedVertex) -> None:
         if not self._is_enabled:
             self.log.debug('sync is disabled')
             return
@@ -225,8 +248,12 @@ class NodeBlockSync(SyncAgent):
         # blocks as priorities to help miners get the blocks as fast as we can
         # We decided not to implement this right now because we already have some producers
         # being used in the sync algorithm and the code was becoming a bit too complex
-        if self._outbound_relay_enabled:
-            self.send_data(tx)
+        if not self._outbound_relay_enabled:
+            return
+        if self._relay_announce and not vertex.vertex.is_block:
+            self.send_announce(vertex.vertex.hash)
+        else:
+            self.send_data(vertex)
 
     def is_started(self) -> bool:
         return self._started
@@ -235,6 +262,9 @@ class NodeBlockSync(SyncAgent):
         if self._started:
             raise Exception('NodeSyncBlock is already running')
         self._started = True
+        block_download = self._get_block_download()
+        if block_download is not None:
+            block_download.add_agent(self)
         self._lc_run.start(RUN_SYNC_MAIN_LOOP_INTERVAL)
 
     def stop(self) -> None:
@@ -243,6 +273,18 @@ class NodeBlockSync(SyncAgent):
         self._started = False
         if self._lc_run.running:
             self._lc_run.stop()
+        block_download = self._get_block_download()
+        if block_download is not None:
+            block_download.remove_agent(self)
+        if self._blk_range_client is not None:
+            self._blk_range_client.fails(StreamingError('sync stopped'))
+            self._blk_range_client = None
+
+    def _get_block_download(self) -> Optional[BlockDownloadCoordinator]:
+        """Return the coordinator of the parallel block download, if it's enabled."""
+        if self.protocol.connections is None:
+            return None
+        return self.protocol.connections.block_download
 
     def get_cmd_dict(self) -> dict[ProtocolMessages, Callable[[str], None]]:
         """ Return a dict of messages of the plugin.
@@ -250,7 +292,7 @@ class NodeBlockSync(SyncAgent):
         For further information about each message, see the RFC.
         Link: https://github.com/HathorNetwork/rfcs/blob/master/text/0025-p2p-sync-v2.md#p2p-sync-protocol-messages
         """
-        return {
+        cmd_dict: dict[ProtocolMessages, Callable[[str], None]] = {
             ProtocolMessages.GET_NEXT_BLOCKS: self.handle_get_next_blocks,
             ProtocolMessages.BLOCKS: self.handle_blocks,
             ProtocolMessages.BLOCKS_END: self.handle_blocks_end,
@@ -273,10 +315,35 @@ class NodeBlockSync(SyncAgent):
             ProtocolMessages.RELAY: self.handle_relay,
             ProtocolMessages.NOT_FOUND: self.handle_not_found,
         }
+        if self._relay_announce:
+            cmd_dict[ProtocolMessages.ANNOUNCE] = self.handle_announce
+        return cmd_dict
+
+    def get_binary_cmd_dict(self) -> dict[ProtocolMessages, Callable[[str, bytes], None]]:
+        """ Return a dict of the messages that carry a vertex, which is sent as raw bytes when the binary framing is
+        enabled, see `_send_vertex()`.
+        """
+        return {
+            ProtocolMessages.BLOCKS: self.handle_binary_blocks,
+            ProtocolMessages.TRANSACTION: self.handle_binary_transaction,
+            ProtocolMessages.DATA: self.handle_binary_data,
+        }
 
     def handle_not_found(self, payload: str) -> None:
         """ Handle a received NOT-FOUND message.
         """
+        try:
+            vertex_id = VertexId(bytes.fromhex(payload))
+        except ValueError:
+            vertex_id = None
+        if vertex_id is not None and vertex_id in self._announced_requests:
+            # the peer doesn't have an announced vertex anymore, which can happen when it's removed from the mempool
+            self.log.debug('announced vertex not found', tx=payload)
+            del self._announced_requests[vertex_id]
+            assert self.protocol.connections is not None
+            self.protocol.connections.fail_announced_request(vertex_id, self)
+            return
+
         # XXX: NOT_FOUND is a valid message, but we shouldn't ever receive it unless the other peer is running with a
         #                modified code or if there is a bug
         self.log.warn('vertex not found? close connection', payload=payload)
@@ -319,6 +386,13 @@ class NodeBlockSync(SyncAgent):
             self.log.debug('already running')
             self.watchdog()
             return
+        if self._blk_range_client is not None:
+            # Downloading a range of blocks for another agent.
+            self.log.debug('downloading a block range')
+            return
+        if self._is_blk_range_stopped():
+            self.log.debug('waiting for a stopped block range to end')
+            return
         self._is_running = True
         self._sync_started_at = self.reactor.seconds()
         try:
@@ -328,6 +402,9 @@ class NodeBlockSync(SyncAgent):
             self.log.error('unhandled exception', exc_info=True)
         finally:
             self._is_running = False
+            block_download = self._get_block_download()
+            if block_download is not None:
+                block_download.on_agent_idle(self)
 
     @inlineCallbacks
     def _run_sync(self) -> Generator[Any, Any, None]:
@@ -407,27 +484,45 @@ class NodeBlockSync(SyncAgent):
             self.log.debug('find_best_common_block failed.')
             return False
 
+        block_download = self._get_block_download()
+        if block_download is not None and block_download.is_downloading():
+            # Another agent is downloading the blocks, so this one is free to help it.
+            self.log.debug('blocks are being downloaded by another agent')
+            return False
+
         self.log.debug('starting to sync blocks',
                        my_best_block=my_best_block,
                        peer_best_block=self.peer_best_block,
                        synced_block=self.synced_block)
 
         # Sync from common block
-        try:
-            yield self.start_blockchain_streaming(self.synced_block,
-                                                  self.peer_best_block)
-        except StreamingError as e:
-            self.log.info('block streaming failed', reason=repr(e))
-            self.send_stop_block_streaming()
-            self.receiving_stream = False
-            return False
+        if block_download is not None and block_download.should_download(self, self.synced_block,
+                                                                         self.peer_best_block):
+            self._blk_streaming_client = BlockchainStreamingClient(self, self.synced_block, self.peer_best_block)
+            try:
+                yield block_download.download(self, self._blk_streaming_client)
+            except StreamingError as e:
+                self.log.info('parallel block download failed', reason=repr(e))
+                return False
+        else:
+            try:
+                yield self.start_blockchain_streaming(self.synced_block,
+                                                      self.peer_best_block)
+            except StreamingError as e:
+                self.log.info('block streaming failed', reason=repr(e))
+                self.send_stop_block_streaming()
+                self.receiving_stream = False
+                return False
 
         assert self._blk_streaming_client is not None
         partial_blocks = self._blk_streaming_client._partial_blocks
         if partial_blocks:
             self.state = PeerState.SYNCING_TRANSACTIONS
             try:
-                reason = yield self.start_transactions_streaming(partial_blocks)
+                reason = yield self.start_transactions_streaming(
+                    partial_blocks,
+                    pow_verified=self._blk_streaming_client._pow_verified,
+                )
             except StreamingError as e:
                 self.log.info('tx streaming failed', reason=repr(e))
                 self.send_stop_transactions_streaming()
@@ -533,6 +628,56 @@ class NodeBlockSync(SyncAgent):
                 self.protocol.send_error_and_close_connection('RELAY: invalid value')
                 return
 
+    def send_announce(self, vertex_id: VertexId) -> None:
+        """ Send an ANNOUNCE message.
+
+        It tells the peer about a new vertex without sending it, the peer requests it with a GET-DATA if needed.
+        """
+        self.send_message(ProtocolMessages.ANNOUNCE, vertex_id.hex())
+
+    def handle_announce(self, payload: str) -> None:
+        """ Handle an ANNOUNCE message.
+
+        The vertex is requested unless we already have it or it's being requested from another peer, in which case
+        this peer is only asked for it if the other one fails to send it.
+        """
+        if not self._inbound_relay_enabled:
+            # Unsolicited vertex, same as in handle_data.
+            self.protocol.increase_misbehavior_score(weight=1)
+            return
+
+        try:
+            vertex_id = VertexId(bytes.fromhex(payload))
+        except ValueError:
+            self.protocol.send_error_and_close_connection('ANNOUNCE: invalid hash')
+            return
+
+        if self.tx_storage.partial_vertex_exists(vertex_id):
+            return
+
+        assert self.protocol.connections is not None
+        if not self.protocol.connections.start_announced_request(vertex_id, self):
+            return
+
+        self._send_get_announced_data(vertex_id)
+
+    def request_announced_vertex(self, vertex_id: VertexId) -> bool:
+        """ Request a vertex announced by this peer that another peer failed to send, called by the connections
+        manager. Return whether it was requested.
+        """
+        if not self._started or not self._inbound_relay_enabled:
+            return False
+        if self.tx_storage.partial_vertex_exists(vertex_id):
+            return False
+        self._send_get_announced_data(vertex_id)
+        return True
+
+    def _send_get_announced_data(self, vertex_id: VertexId) -> None:
+        self._announced_requests[vertex_id] = None
+        if len(self._announced_requests) > self._announced_requests_maxsize:
+            self._announced_requests.popitem(last=False)
+        self.send_get_data(vertex_id, origin=RELAY_ORIGIN)
+
     def start_blockchain_streaming(self,
                                    start_block: _HeightInfo,
                                    end_block: _HeightInfo) -> Deferred[StreamEnd]:
@@ -546,6 +691,54 @@ class NodeBlockSync(SyncAgent):
         self.send_get_next_blocks(start_block.id, end_block.id, quantity)
         return self._blk_streaming_client.wait()
 
+    def start_block_range_download(self, client: BlockRangeClient) -> Deferred[list[Block]]:
+        """Request peer to stream a range of blocks, which are collected by the client for the coordinator."""
+        assert self._blk_range_client is None
+        self._blk_range_client = client
+        self.log.debug('requesting block range', start_block=client.start_block, end_block=client.end_block)
+        self.send_get_next_blocks(client.start_block.id, client.end_block.id, client.quantity)
+        return client.wait()
+
+    def stop_block_range_download(self) -> None:
+        """Stop the download of a range that failed or timed out.
+
+        The peer might not respond at all, so the client is released right away, and the blocks it might still send
+        are dropped until the BLOCKS-END or until `STOPPED_BLOCK_RANGE_TIMEOUT`, whichever comes first."""
+        blk_range_client = self._blk_range_client
+        if blk_range_client is None:
+            return
+        self._blk_range_client = None
+        blk_range_client.fails(StreamingError('range download stopped'))
+        if self.receiving_stream:
+            self.receiving_stream = False
+            self._blk_range_stopped_until = self.reactor.seconds() + STOPPED_BLOCK_RANGE_TIMEOUT
+            if self._started:
+                self.send_stop_block_streaming()
+
+    def _is_blk_range_stopped(self) -> bool:
+        """Whether the messages of a stopped range download are still being dropped."""
+        if self._blk_range_stopped_until is None:
+            return False
+        if self.reactor.seconds() >= self._blk_range_stopped_until:
+            self._blk_range_stopped_until = None
+            return False
+        return True
+
+    def can_download_block_range(self, end_height: int) -> bool:
+        """Whether this agent is idle and its peer has the blocks up to `end_height`, so it can download a range of
+        blocks for the `BlockDownloadCoordinator`."""
+        return (
+            self._started
+            and self._is_enabled
+            and not self._is_running
+            and not self.receiving_stream
+            and self._blk_range_client is None
+            and not self._is_blk_range_stopped()
+            and self._deferred_peer_block_hashes is None
+            and self.peer_best_block is not None
+            and self.peer_best_block.height >= end_height
+        )
+
     def stop_blk_streaming_server(self, response_code: StreamEnd) -> None:
         """Stop blockchain streaming server."""
         assert self._blk_streaming_server is not None
@@ -559,6 +752,21 @@ class NodeBlockSync(SyncAgent):
         assert self.protocol.state is not None
         self.protocol.state.send_message(cmd, payload)
 
+    def _send_vertex(self, cmd: ProtocolMessages, vertex: SerializedVertex, *, origin: str = '') -> None:
+        """ Helper to send a message that carries a vertex.
+
+        The vertex is sent as raw bytes when the binary framing is enabled, otherwise it's encoded in base64 and the
+        payload is the origin, if any, followed by the vertex.
+        """
+        assert self.protocol.state is not None
+        if self.protocol.binary_framing:
+            self.protocol.state.send_binary_message(cmd, vertex.vertex_bytes, origin)
+            return
+        payload = vertex.base64
+        if origin:
+            payload = ' '.join([origin, payload])
+        self.send_message(cmd, payload)
+
     @inlineCallbacks
     def find_best_common_block(self,
                                my_best_block: _HeightInfo,
@@ -615,11 +823,17 @@ class NodeBlockSync(SyncAgent):
         return lo
 
     @inlineCallbacks
-    def on_block_complete(self, blk: Block, vertex_list: list[Transaction]) -> Generator[Any, Any, None]:
+    def on_block_complete(
+        self,
+        blk: Block,
+        vertex_list: list[Transaction],
+        *,
+        pow_verified: Container[VertexId] = (),
+    ) -> Generator[Any, Any, None]:
         """This method is called when a block and its transactions are downloaded."""
         # Note: Any vertex and block could have already been added by another concurrent syncing peer.
         try:
-            yield self.vertex_handler.on_new_block(blk, deps=vertex_list)
+            yield self.vertex_handler.on_new_block(blk, deps=vertex_list, pow_verified=pow_verified)
         except InvalidNewTransaction:
             self.protocol.send_error_and_close_connection('invalid vertex received')
 
@@ -629,9 +843,17 @@ class NodeBlockSync(SyncAgent):
         if self._deferred_peer_block_hashes is not None:
             raise Exception('latest_deferred is not None')
         self.send_get_peer_block_hashes(heights)
-        self._deferred_peer_block_hashes = Deferred()
+        self._deferred_peer_block_hashes = Deferred(canceller=self._cancel_peer_block_hashes)
         return self._deferred_peer_block_hashes
 
+    def _cancel_peer_block_hashes(self, deferred: Deferred[list[_HeightInfo]]) -> None:
+        """ Called when a GET-PEER-BLOCK-HASHES request is cancelled, like when it times out, so another one can be
+        sent. The peer answers in order, so its reply to the cancelled request will be the next one.
+        """
+        if self._deferred_peer_block_hashes is deferred:
+            self._deferred_peer_block_hashes = None
+            self._peer_block_hashes_to_ignore += 1
+
     def send_get_peer_block_hashes(self, heights: list[int]) -> None:
         """ Send a GET-PEER-BLOCK-HASHES message.
         """
@@ -662,6 +884,10 @@ class NodeBlockSync(SyncAgent):
     def handle_peer_block_hashes(self, payload: str) -> None:
         """ Handle a PEER-BLOCK-HASHES message.
         """
+        if self._peer_block_hashes_to_ignore > 0:
+            # the reply to a request that was cancelled
+            self._peer_block_hashes_to_ignore -= 1
+            return
         data = json.loads(payload)
         data = [_HeightInfo(height=h, id=bytes.fromhex(block_hash)) for (h, block_hash) in data]
         deferred = self._deferred_peer_block_hashes
@@ -731,8 +957,7 @@ class NodeBlockSync(SyncAgent):
 
         This message is called from a streamer for each block to being sent.
         """
-        payload = base64.b64encode(bytes(blk)).decode('ascii')
-        self.send_message(ProtocolMessages.BLOCKS, payload)
+        self._send_vertex(ProtocolMessages.BLOCKS, SerializedVertex(blk))
 
     def send_blocks_end(self, response_code: StreamEnd) -> None:
         """ Send a BLOCKS-END message.
@@ -756,6 +981,18 @@ class NodeBlockSync(SyncAgent):
         self.receiving_stream = False
         assert self.protocol.connections is not None
 
+        if self._blk_range_client is not None:
+            blk_range_client = self._blk_range_client
+            self._blk_range_client = None
+            blk_range_client.handle_blocks_end(response_code)
+            self.log.debug('block range streaming ended', reason=str(response_code))
+            return
+
+        if self._is_blk_range_stopped():
+            self._blk_range_stopped_until = None
+            self.log.debug('stopped block range streaming ended', reason=str(response_code))
+            return
+
         if self.state is not PeerState.SYNCING_BLOCKS:
             self.log.error('unexpected BLOCKS-END', state=self.state, response_code=response_code.name)
             self.protocol.send_error_and_close_connection('Not expecting to receive BLOCKS-END message')
@@ -768,20 +1005,38 @@ class NodeBlockSync(SyncAgent):
     def handle_blocks(self, payload: str) -> None:
         """ Handle a BLOCKS message.
         """
-        if self.state is not PeerState.SYNCING_BLOCKS:
+        self.handle_binary_blocks('', base64.b64decode(payload))
+
+    def handle_binary_blocks(self, payload: str, blk_bytes: bytes) -> None:
+        """ Handle a BLOCKS message, with the block already decoded.
+        """
+        if self._blk_range_client is None and self._is_blk_range_stopped():
+            # the remaining blocks of a stopped range download
+            return
+
+        if self.state is not PeerState.SYNCING_BLOCKS and self._blk_range_client is None:
             self.log.error('unexpected BLOCK', state=self.state)
             self.protocol.send_error_and_close_connection('Not expecting to receive BLOCK message')
             return
 
         assert self.protocol.connections is not None
 
-        blk_bytes = base64.b64decode(payload)
+        pipeline = self.protocol.node.sync_verification_pipeline
+        if pipeline is not None and self._blk_range_client is None:
+            assert self._blk_streaming_client is not None
+            self._blk_streaming_client.handle_block_bytes(blk_bytes)
+            return
+
         blk = self.vertex_parser.deserialize(blk_bytes)
         if not isinstance(blk, Block):
             # Not a block. Punish peer?
             return
         blk.storage = self.tx_storage
 
+        if self._blk_range_client is not None:
+            self._blk_range_client.handle_blocks(blk)
+            return
+
         assert self._blk_streaming_client is not None
         self._blk_streaming_client.handle_blocks(blk)
 
@@ -861,10 +1116,16 @@ class NodeBlockSync(SyncAgent):
         if deferred:
             deferred.callback(best_block)
 
-    def start_transactions_streaming(self, partial_blocks: list[Block]) -> Deferred[StreamEnd]:
+    def start_transactions_streaming(
+        self,
+        partial_blocks: list[Block],
+        *,
+        pow_verified: Optional[set[VertexId]] = None,
+    ) -> Deferred[StreamEnd]:
         """Request peer to start streaming transactions to us."""
         self._tx_streaming_client = TransactionStreamingClient(self,
                                                                partial_blocks,
+                                                               pow_verified=pow_verified,
                                                                limit=self.DEFAULT_STREAMING_LIMIT)
 
         start_from: list[bytes] = []
@@ -990,9 +1251,7 @@ class NodeBlockSync(SyncAgent):
     def send_transaction(self, tx: Transaction) -> None:
         """ Send a TRANSACTION message.
         """
-        # payload = bytes(tx).hex()  # fails for big transactions
-        payload = base64.b64encode(bytes(tx)).decode('ascii')
-        self.send_message(ProtocolMessages.TRANSACTION, payload)
+        self._send_vertex(ProtocolMessages.TRANSACTION, SerializedVertex(tx))
 
     def send_transactions_end(self, response_code: StreamEnd) -> None:
         """ Send a TRANSACTIONS-END message.
@@ -1022,10 +1281,18 @@ class NodeBlockSync(SyncAgent):
     def handle_transaction(self, payload: str) -> None:
         """ Handle a TRANSACTION message.
         """
+        self.handle_binary_transaction('', base64.b64decode(payload))
+
+    def handle_binary_transaction(self, payload: str, tx_bytes: bytes) -> None:
+        """ Handle a TRANSACTION message, with the transaction already decoded.
+        """
         assert self.protocol.connections is not None
 
-        # tx_bytes = bytes.fromhex(payload)
-        tx_bytes = base64.b64decode(payload)
+        if self.protocol.node.sync_verification_pipeline is not None:
+            assert self._tx_streaming_client is not None
+            self._tx_streaming_client.handle_transaction_bytes(tx_bytes)
+            return
+
         tx = self.vertex_parser.deserialize(tx_bytes)
         if not isinstance(tx, Transaction):
             self.log.warn('not a transaction', hash=tx.hash_hex)
@@ -1086,16 +1353,11 @@ class NodeBlockSync(SyncAgent):
             self._get_tx_cache.popitem(last=False)
         deferred.callback(tx)
 
-    def send_data(self, tx: BaseTransaction, *, origin: str = '') -> None:
+    def send_data(self, vertex: SerializedVertex, *, origin: str = '') -> None:
         """ Send a DATA message.
         """
-        self.log.debug('send tx', tx=tx.hash_hex)
-        tx_payload = base64.b64encode(tx.get_struct()).decode('ascii')
-        if not origin:
-            payload = tx_payload
-        else:
-            payload = ' '.join([origin, tx_payload])
-        self.send_message(ProtocolMessages.DATA, payload)
+        self.log.debug('send tx', tx=vertex.vertex.hash_hex)
+        self._send_vertex(ProtocolMessages.DATA, vertex, origin=origin)
 
     def send_get_data(self, txid: bytes, *, origin: Optional[str] = None) -> None:
         """ Send a GET-DATA message for a given txid.
@@ -1115,9 +1377,15 @@ class NodeBlockSync(SyncAgent):
         txid_hex = data['txid']
         origin = data.get('origin', '')
         # self.log.debug('handle_get_data', payload=hash_hex)
+        txid = bytes.fromhex(txid_hex)
+        # the vertices requested after being announced were relayed recently, so their serialization is reused
+        vertex = self.protocol.connections.get_serialized_vertex(txid)
+        if vertex is not None:
+            self.send_data(vertex, origin=origin)
+            return
         try:
-            tx = self.protocol.node.tx_storage.get_transaction(bytes.fromhex(txid_hex))
-            self.send_data(tx, origin=origin)
+            tx = self.protocol.node.tx_storage.get_transaction(txid)
+            self.send_data(SerializedVertex(tx), origin=origin)
         except TransactionDoesNotExist:
             # In case the tx does not exist we send a NOT-FOUND message
             self.send_message(ProtocolMessages.NOT_FOUND, txid_hex)
@@ -1125,21 +1393,23 @@ class NodeBlockSync(SyncAgent):
     def handle_data(self, payload: str) -> None:
         """ Handle a DATA message.
         """
+        part1, _, part2 = payload.partition(' ')
+        if not part2:
+            self.handle_binary_data('', base64.b64decode(part1))
+        else:
+            self.handle_binary_data(part1, base64.b64decode(part2))
+
+    def handle_binary_data(self, origin: str, data: bytes) -> None:
+        """ Handle a DATA message, with the vertex already decoded. The payload is the origin of the request, if any.
+        """
         if not self._inbound_relay_enabled:
             # Unsolicited vertex.
             # Should we have a grace period when incoming relay is disabled? Is the decay mechanism enough?
             self.protocol.increase_misbehavior_score(weight=1)
             return
 
-        if not payload:
+        if not data:
             return
-        part1, _, part2 = payload.partition(' ')
-        if not part2:
-            origin = None
-            data = base64.b64decode(part1)
-        else:
-            origin = part1
-            data = base64.b64decode(part2)
 
         try:
             tx = self.vertex_parser.deserialize(data)
@@ -1147,16 +1417,24 @@ class NodeBlockSync(SyncAgent):
             # Invalid data for tx decode
             return
 
-        if origin:
+        assert tx is not None
+        if origin == RELAY_ORIGIN:
+            # an announced vertex we requested, it's handled as if it was relayed. Its id might have been evicted
+            # from `_announced_requests` already, so an unknown one is handled the same way.
+            if tx.hash in self._announced_requests:
+                del self._announced_requests[tx.hash]
+            else:
+                self.log.debug('relayed DATA with an unknown announced vertex', tx=tx.hash_hex)
+            assert self.protocol.connections is not None
+            self.protocol.connections.finish_announced_request(tx.hash)
+        elif origin:
             if origin != 'mempool':
                 # XXX: ban peer?
                 self.protocol.send_error_and_close_connection(f'DATA {origin}: unsupported origin')
                 return
-            assert tx is not None
             self._on_get_data(tx, origin)
             return
 
-        assert tx is not None
         if self.protocol.node.tx_storage.get_genesis(tx.hash):
             # We just got the data of a genesis tx/block. What should we do?
             # Will it reduce peer reputation score?
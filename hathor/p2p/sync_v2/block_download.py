@@ -0,0 +1,312 @@
+# Copyright 2025 Hathor Labs
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import TYPE_CHECKING, Any, Generator, Optional
+
+from structlog import get_logger
+from twisted.internet.defer import CancelledError, Deferred, TimeoutError, inlineCallbacks
+from twisted.internet.task import deferLater
+
+from hathor.p2p.sync_v2.exception import (
+    BlockNotConnectedToPreviousBlock,
+    StreamingError,
+    TooManyVerticesReceivedError,
+    UnexpectedVertex,
+)
+from hathor.p2p.sync_v2.streamers import DEFAULT_STREAMING_LIMIT, StreamEnd
+from hathor.reactor import ReactorProtocol as Reactor
+from hathor.transaction import Block
+
+if TYPE_CHECKING:
+    from hathor.p2p.sync_v2.agent import NodeBlockSync, _HeightInfo
+    from hathor.p2p.sync_v2.blockchain_streaming_client import BlockchainStreamingClient
+
+logger = get_logger()
+
+# Number of blocks in each range, the stream of a range also has its first block so it must fit in the limit.
+DEFAULT_RANGE_SIZE: int = DEFAULT_STREAMING_LIMIT // 2
+
+# Maximum number of ranges of a download, which is limited by the heights of a GET-PEER-BLOCK-HASHES.
+MAX_RANGES: int = 20
+
+# Maximum number of ranges being downloaded or waiting to be processed.
+DEFAULT_MAX_PENDING_RANGES: int = 4
+
+# Time in seconds for a peer to send a range.
+DEFAULT_RANGE_TIMEOUT: int = 60
+
+# Number of blocks processed in each reactor iteration.
+PROCESS_BATCH_SIZE: int = 100
+
+
+class BlockRangeClient:
+    """Collect the blocks of a stream of a range, which are only processed later, in order, by the leader.
+
+    The stream starts with `start_block`, which isn't collected, and must end with `end_block`.
+    """
+
+    def __init__(self, sync_agent: 'NodeBlockSync', start_block: '_HeightInfo', end_block: '_HeightInfo') -> None:
+        self.sync_agent = sync_agent
+        self.log = logger.new(peer=sync_agent.protocol.get_short_peer_id())
+
+        self.start_block = start_block
+        self.end_block = end_block
+        self.quantity = end_block.height - start_block.height + 1
+        assert 1 < self.quantity <= DEFAULT_STREAMING_LIMIT
+
+        self._deferred: Deferred[list[Block]] = Deferred()
+        self._blk_received: int = 0
+        self._blocks: list[Block] = []
+
+    def wait(self) -> Deferred[list[Block]]:
+        """Return the deferred."""
+        return self._deferred
+
+    def fails(self, reason: StreamingError) -> None:
+        """Fail the execution by resolving the deferred with an error."""
+        if self._deferred.called:
+            return
+        self._deferred.errback(reason)
+
+    def handle_blocks(self, blk: Block) -> None:
+        """This method is called by the sync agent when a BLOCKS message is received."""
+        if self._deferred.called:
+            return
+
+        self._blk_received += 1
+        if self._blk_received > self.quantity:
+            self.fails(TooManyVerticesReceivedError())
+            return
+
+        if self._blk_received == 1:
+            if blk.hash != self.start_block.id:
+                self.fails(UnexpectedVertex(blk.hash.hex()))
+            return
+
+        previous_hash = self._blocks[-1].hash if self._blocks else self.start_block.id
+        if blk.get_block_parent_hash() != previous_hash:
+            self.fails(BlockNotConnectedToPreviousBlock())
+            return
+        self._blocks.append(blk)
+
+    def handle_blocks_end(self, response_code: StreamEnd) -> None:
+        """This method is called by the sync agent when a BLOCKS-END message is received."""
+        if self._deferred.called:
+            return
+        if not self._blocks or self._blocks[-1].hash != self.end_block.id:
+            self.fails(StreamingError(f'range stream ended early: {response_code.name}'))
+            return
+        self._deferred.callback(self._blocks)
+
+
+class BlockDownloadCoordinator:
+    """Download the blocks of a sync from several peers at once.
+
+    The agent that found the common block with its peer is the leader: the missing heights are split into ranges,
+    whose boundaries are given by the leader, and each range is downloaded from any agent whose peer has the range,
+    including the leader. The blocks are then given to the streaming client of the leader in height order, as if they
+    had been streamed by it, so the transactions of the partial blocks are still downloaded from the leader.
+
+    Only one download runs at a time, and the other agents don't sync blocks while it runs.
+    """
+
+    def __init__(
+        self,
+        reactor: Reactor,
+        *,
+        range_size: int = DEFAULT_RANGE_SIZE,
+        max_pending_ranges: int = DEFAULT_MAX_PENDING_RANGES,
+        range_timeout: int = DEFAULT_RANGE_TIMEOUT,
+    ) -> None:
+        assert 0 < range_size < DEFAULT_STREAMING_LIMIT
+        assert max_pending_ranges > 0
+        self.reactor = reactor
+        self.log = logger.new()
+        self.range_size = range_size
+        self.max_pending_ranges = max_pending_ranges
+        self.range_timeout = range_timeout
+
+        # Agents that are started, in the order they were started.
+        self._agents: dict['NodeBlockSync', None] = {}
+
+        # Leader of the running download.
+        self._leader: Optional['NodeBlockSync'] = None
+
+        # Agents that are downloading a range.
+        self._busy: set['NodeBlockSync'] = set()
+
+        # Highest height that each agent's peer was confirmed to have in the leader's blockchain.
+        self._confirmed_heights: dict['NodeBlockSync', int] = {}
+
+        # Deferreds of the ranges that are waiting for an agent to be free.
+        self._waiting: list[Deferred[None]] = []
+
+    def add_agent(self, agent: 'NodeBlockSync') -> None:
+        """Called when an agent is started."""
+        self._agents[agent] = None
+
+    def remove_agent(self, agent: 'NodeBlockSync') -> None:
+        """Called when an agent is stopped."""
+        self._agents.pop(agent, None)
+        self._confirmed_heights.pop(agent, None)
+
+    def is_downloading(self) -> bool:
+        """Whether a download is running."""
+        return self._leader is not None
+
+    def on_agent_idle(self, agent: 'NodeBlockSync') -> None:
+        """Called when an agent finishes a sync step, so the ranges waiting for an agent may use it."""
+        if self.is_downloading():
+            self._wake_up_waiting()
+
+    def should_download(self, leader: 'NodeBlockSync', start_block: '_HeightInfo', end_block: '_HeightInfo') -> bool:
+        """Whether the blocks from `start_block` to `end_block` should be downloaded in parallel, which is the case
+        when there are more than one range and other agents that may help, as soon as they are idle."""
+        if self.is_downloading():
+            return False
+        if end_block.height - start_block.height <= self.range_size:
+            return False
+        return any(agent is not leader and agent.is_sync_enabled() for agent in self._agents)
+
+    @inlineCallbacks
+    def download(self, leader: 'NodeBlockSync',
+                 client: 'BlockchainStreamingClient') -> Generator[Any, Any, StreamEnd]:
+        """Download the blocks from the start to the end block of the leader's streaming client and give them to it.
+
+        At most `MAX_RANGES` ranges are downloaded, in which case it returns `StreamEnd.LIMIT_EXCEEDED` and the sync
+        continues in the next run. It raises a `StreamingError` if the leader fails or the blocks are invalid.
+        """
+        assert not self.is_downloading()
+        self._leader = leader
+        self._confirmed_heights.clear()
+        try:
+            return (yield self._download(leader, client))
+        finally:
+            self._leader = None
+            self._wake_up_waiting()
+
+    @inlineCallbacks
+    def _download(self, leader: 'NodeBlockSync',
+                  client: 'BlockchainStreamingClient') -> Generator[Any, Any, StreamEnd]:
+        start_block = client.start_block
+        end_block = client.end_block
+        last_height = min(start_block.height + MAX_RANGES * self.range_size, end_block.height)
+        heights = list(range(start_block.height + self.range_size, last_height, self.range_size))
+        heights.append(last_height)
+        boundaries = yield leader.get_peer_block_hashes(heights)
+        if not boundaries or [info.height for info in boundaries] != heights[:len(boundaries)]:
+            raise StreamingError('invalid range boundaries')
+        ranges = list(zip([start_block] + boundaries[:-1], boundaries))
+        self.log.info('parallel block download started', leader=leader.protocol.get_short_peer_id(),
+                      start_block=start_block, end_block=ranges[-1][1], ranges=len(ranges))
+
+        pending: dict[int, Deferred[list[Block]]] = {}
+        try:
+            next_range = 0
+            for index in range(len(ranges)):
+                # back-pressure: only a few ranges are downloaded ahead of the one being processed
+                while next_range < len(ranges) and next_range - index < self.max_pending_ranges:
+                    pending[next_range] = self._fetch_range(leader, *ranges[next_range])
+                    next_range += 1
+                blocks = yield pending.pop(index)
+                yield self._process_blocks(leader, client, blocks)
+        finally:
+            for deferred in pending.values():
+                # the failures of the ranges that are not needed anymore are ignored
+                deferred.addErrback(lambda _: None)
+
+        if ranges[-1][1] == end_block:
+            response_code = StreamEnd.END_HASH_REACHED
+        else:
+            response_code = StreamEnd.LIMIT_EXCEEDED
+        client.handle_blocks_end(response_code)
+        return (yield client.wait())
+
+    @inlineCallbacks
+    def _process_blocks(self, leader: 'NodeBlockSync', client: 'BlockchainStreamingClient',
+                        blocks: list[Block]) -> Generator[Any, Any, None]:
+        """Give the blocks of a range to the leader's streaming client, in batches to not block the reactor."""
+        for i, blk in enumerate(blocks):
+            if not leader.is_started():
+                raise StreamingError('leader stopped')
+            client.handle_blocks(blk)
+            if client.wait().called:
+                # the client failed, so the failure is raised
+                yield client.wait()
+            if (i + 1) % PROCESS_BATCH_SIZE == 0:
+                yield deferLater(self.reactor, 0, lambda: None)
+
+    @inlineCallbacks
+    def _fetch_range(self, leader: 'NodeBlockSync', start_block: '_HeightInfo',
+                     end_block: '_HeightInfo') -> Generator[Any, Any, list[Block]]:
+        """Download a range from any agent that can, it only fails if the leader fails."""
+        excluded: set['NodeBlockSync'] = set()
+        while True:
+            if self._leader is not leader:
+                raise StreamingError('download stopped')
+            if not leader.is_started():
+                raise StreamingError('leader stopped')
+            agent = self._pick_agent(leader, end_block, excluded)
+            if agent is None:
+                deferred: Deferred[None] = Deferred()
+                self._waiting.append(deferred)
+                yield deferred
+                continue
+
+            self._busy.add(agent)
+            try:
+                blocks = yield self._fetch_range_from(agent, start_block, end_block)
+            except (StreamingError, TimeoutError, CancelledError) as e:
+                agent.stop_block_range_download()
+                if agent is leader:
+                    raise StreamingError(f'leader failed to download a range: {e!r}')
+                self.log.info('range download failed', peer=agent.protocol.get_short_peer_id(), reason=repr(e))
+                excluded.add(agent)
+                continue
+            finally:
+                self._busy.discard(agent)
+                self._wake_up_waiting()
+            return blocks
+
+    @inlineCallbacks
+    def _fetch_range_from(self, agent: 'NodeBlockSync', start_block: '_HeightInfo',
+                          end_block: '_HeightInfo') -> Generator[Any, Any, list[Block]]:
+        if agent is not self._leader and self._confirmed_heights.get(agent, -1) < end_block.height:
+            # the peer must have the end of the range in the leader's blockchain, so it has the whole range
+            deferred = agent.get_peer_block_hashes([end_block.height])
+            block_hashes = yield deferred.addTimeout(self.range_timeout, self.reactor)
+            if block_hashes != [end_block]:
+                raise StreamingError('peer is not in the same blockchain')
+            self._confirmed_heights[agent] = end_block.height
+        deferred = agent.start_block_range_download(BlockRangeClient(agent, start_block, end_block))
+        return (yield deferred.addTimeout(self.range_timeout, self.reactor))
+
+    def _pick_agent(self, leader: 'NodeBlockSync', end_block: '_HeightInfo',
+                    excluded: set['NodeBlockSync']) -> Optional['NodeBlockSync']:
+        """Return a free agent to download a range that ends at `end_block`."""
+        if leader not in self._busy:
+            return leader
+        for agent in self._agents:
+            if agent is leader or agent in self._busy or agent in excluded:
+                continue
+            if agent.can_download_block_range(end_block.height):
+                return agent
+        return None
+
+    def _wake_up_waiting(self) -> None:
+        """Wake up the ranges waiting for an agent, so they look for one again."""
+        waiting = self._waiting
+        self._waiting = []
+        for deferred in waiting:
+            deferred.callback(None)
@@ -12,10 +12,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import TYPE_CHECKING, Optional
+from collections import deque
+from typing import TYPE_CHECKING, Any, Generator, Optional
 
 from structlog import get_logger
-from twisted.internet.defer import Deferred
+from twisted.internet.defer import Deferred, inlineCallbacks
 
 from hathor.p2p.sync_v2.exception import (
     BlockNotConnectedToPreviousBlock,
@@ -25,8 +26,10 @@ from hathor.p2p.sync_v2.exception import (
     TooManyVerticesReceivedError,
 )
 from hathor.p2p.sync_v2.streamers import StreamEnd
+from hathor.p2p.sync_v2.verification_pipeline import VerifiedVertex
 from hathor.transaction import Block
 from hathor.transaction.exceptions import HathorError
+from hathor.types import VertexId
 
 if TYPE_CHECKING:
     from hathor.p2p.sync_v2.agent import NodeBlockSync, _HeightInfo
@@ -40,6 +43,8 @@ class BlockchainStreamingClient:
         self.protocol = self.sync_agent.protocol
         self.tx_storage = self.sync_agent.tx_storage
         self.vertex_handler = self.sync_agent.vertex_handler
+        self.verification_pipeline = self.protocol.node.sync_verification_pipeline
+        self.reactor = self.sync_agent.reactor
 
         self.log = logger.new(peer=self.protocol.get_short_peer_id())
 
@@ -66,18 +71,55 @@ class BlockchainStreamingClient:
 
         self._partial_blocks: list[Block] = []
 
+        # Partial blocks whose proof-of-work was verified by the verification pipeline, it's shared with the
+        # transaction streaming so their full validation doesn't verify it again.
+        self._pow_verified: set[VertexId] = set()
+
+        # Blocks being decoded and verified by the verification pipeline, in the order they were received.
+        self._queue: deque[Deferred[VerifiedVertex]] = deque()
+
+        # True if we are processing a block from the queue.
+        self._is_processing: bool = False
+
+        # Keeps the response code if the streaming has ended while there are blocks in the queue.
+        self._response_code: Optional[StreamEnd] = None
+
     def wait(self) -> Deferred[StreamEnd]:
         """Return the deferred."""
         return self._deferred
 
     def fails(self, reason: 'StreamingError') -> None:
         """Fail the execution by resolving the deferred with an error."""
+        for deferred in self._queue:
+            # the failures of the blocks that won't be processed are ignored
+            deferred.addErrback(lambda _: None)
+        self._queue.clear()
+        if self._deferred.called:
+            self.log.warn('already failed before', new_reason=repr(reason))
+            return
         self._deferred.errback(reason)
 
     def handle_blocks(self, blk: Block) -> None:
         """This method is called by the sync agent when a BLOCKS message is received."""
-        if self._deferred.called:
+        if not self._receive():
             return
+        self._process_block(blk)
+
+    def handle_block_bytes(self, blk_bytes: bytes) -> None:
+        """This method is called by the sync agent when a BLOCKS message is received and the verification pipeline
+        is enabled, the block is decoded and verified by the pipeline and then processed in order by `process_queue`.
+        """
+        assert self.verification_pipeline is not None
+        if not self._receive():
+            return
+        self._queue.append(self.verification_pipeline.submit(blk_bytes))
+        if not self._is_processing:
+            self.reactor.callLater(0, self.process_queue)
+
+    def _receive(self) -> bool:
+        """Count a received block, return False if it must be ignored."""
+        if self._deferred.called:
+            return False
 
         self._blk_received += 1
         if self._blk_received > self._blk_max_quantity:
@@ -85,8 +127,45 @@ class BlockchainStreamingClient:
                           blk_received=self._blk_received,
                           blk_max_quantity=self._blk_max_quantity)
             self.fails(TooManyVerticesReceivedError())
+            return False
+        return True
+
+    @inlineCallbacks
+    def process_queue(self) -> Generator[Any, Any, None]:
+        """Process the next block in the queue, once the pipeline is done with it."""
+        if self._deferred.called or self._is_processing:
             return
 
+        if not self._queue:
+            self._check_end()
+            return
+
+        self._is_processing = True
+        try:
+            try:
+                verified = yield self._queue.popleft()
+            except InvalidVertexError as e:
+                self.fails(e)
+                return
+            except Exception as e:
+                # the stream would stall until its timeout if the next vertex wasn't scheduled or the stream failed
+                self.log.error('unexpected error in the verification pipeline', exc_info=True)
+                self.fails(InvalidVertexError(repr(e)))
+                return
+            blk = verified.vertex
+            if not isinstance(blk, Block):
+                # Not a block. Punish peer?
+                self.log.warn('not a block', hash=blk.hash_hex)
+            elif not self._deferred.called:
+                blk.storage = self.tx_storage
+                self._process_block(blk, pow_verified=verified.pow_verified)
+        finally:
+            self._is_processing = False
+
+        self.reactor.callLater(0, self.process_queue)
+
+    def _process_block(self, blk: Block, *, pow_verified: bool = False) -> None:
+        """Process a received block, in the order they were received."""
         # TODO Run basic verification. We will uncomment these lines after we finish
         # refactoring our verification services.
         #
@@ -126,12 +205,14 @@ class BlockchainStreamingClient:
 
         if self.tx_storage.can_validate_full(blk):
             try:
-                self.vertex_handler.on_new_block(blk, deps=[])
+                self.vertex_handler.on_new_block(blk, deps=[], pow_verified={blk.hash} if pow_verified else ())
             except HathorError:
                 self.fails(InvalidVertexError(blk.hash.hex()))
                 return
         else:
             self._partial_blocks.append(blk)
+            if pow_verified:
+                self._pow_verified.add(blk.hash)
 
         self._last_received_block = blk
         self._blk_repeated = 0
@@ -143,4 +224,11 @@ class BlockchainStreamingClient:
         """This method is called by the sync agent when a BLOCKS-END message is received."""
         if self._deferred.called:
             return
-        self._deferred.callback(response_code)
+        self._response_code = response_code
+        self._check_end()
+
+    def _check_end(self) -> None:
+        """Finish the streaming if it has ended and all the received blocks were processed."""
+        if self._response_code is None or self._queue or self._is_processing:
+            return
+        self._deferred.callback(self._response_code)
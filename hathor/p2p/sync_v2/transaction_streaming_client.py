@@ -16,7 +16,7 @@ from collections import deque
 from typing import TYPE_CHECKING, Any, Generator, Optional
 
 from structlog import get_logger
-from twisted.internet.defer import Deferred, inlineCallbacks
+from twisted.internet.defer import Deferred, inlineCallbacks, succeed
 
 from hathor.p2p.sync_v2.exception import (
     InvalidVertexError,
@@ -25,6 +25,7 @@ from hathor.p2p.sync_v2.exception import (
     UnexpectedVertex,
 )
 from hathor.p2p.sync_v2.streamers import StreamEnd
+from hathor.p2p.sync_v2.verification_pipeline import VerifiedVertex
 from hathor.transaction import BaseTransaction, Transaction
 from hathor.transaction.exceptions import HathorError, TxValidationError
 from hathor.types import VertexId
@@ -42,11 +43,13 @@ class TransactionStreamingClient:
                  sync_agent: 'NodeBlockSync',
                  partial_blocks: list['Block'],
                  *,
+                 pow_verified: Optional[set[VertexId]] = None,
                  limit: int) -> None:
         self.sync_agent = sync_agent
         self.protocol = self.sync_agent.protocol
         self.tx_storage = self.sync_agent.tx_storage
         self.verification_service = self.protocol.node.verification_service
+        self.verification_pipeline = self.protocol.node.sync_verification_pipeline
 
         # XXX: Since it's not straightforward to get the correct block, it's OK to just disable checkdatasig counting,
         #      it will be correctly enabled when doing a full validation anyway.
@@ -75,8 +78,9 @@ class TransactionStreamingClient:
         # Maximum number of transactions to be received.
         self._tx_max_quantity = limit
 
-        # Queue of transactions waiting to be processed.
-        self._queue: deque[Transaction] = deque()
+        # Queue of transactions waiting to be processed, in the order they were received. They may still be being
+        # decoded and verified by the verification pipeline.
+        self._queue: deque[Deferred[VerifiedVertex]] = deque()
 
         # Keeps the response code if the streaming has ended.
         self._response_code: Optional[StreamEnd] = None
@@ -92,6 +96,10 @@ class TransactionStreamingClient:
         self._db: dict[VertexId, Transaction] = {}
         self._existing_deps: set[VertexId] = set()
 
+        # Vertices whose proof-of-work was already verified, by the basic verification for the transactions and by
+        # the verification pipeline for the partial blocks, so their full validation doesn't verify it again.
+        self._pow_verified: set[VertexId] = pow_verified if pow_verified is not None else set()
+
         self._prepare_block(self.partial_blocks[0])
 
     def wait(self) -> Deferred[StreamEnd]:
@@ -108,6 +116,10 @@ class TransactionStreamingClient:
 
     def fails(self, reason: 'StreamingError') -> None:
         """Fail the execution by resolving the deferred with an error."""
+        for deferred in self._queue:
+            # the failures of the transactions that won't be processed are ignored
+            deferred.addErrback(lambda _: None)
+        self._queue.clear()
         if self._deferred.called:
             self.log.warn('already failed before', new_reason=repr(reason))
             return
@@ -115,8 +127,23 @@ class TransactionStreamingClient:
 
     def handle_transaction(self, tx: Transaction) -> None:
         """This method is called by the sync agent when a TRANSACTION message is received."""
-        if self._deferred.called:
+        if not self._receive():
+            return
+        self.log.debug('tx received', tx_id=tx.hash.hex())
+        self._enqueue(succeed(VerifiedVertex(tx, basic_verified=False, pow_verified=False)))
+
+    def handle_transaction_bytes(self, tx_bytes: bytes) -> None:
+        """This method is called by the sync agent when a TRANSACTION message is received and the verification
+        pipeline is enabled, the transaction is decoded and verified by the pipeline until it's processed."""
+        assert self.verification_pipeline is not None
+        if not self._receive():
             return
+        self._enqueue(self.verification_pipeline.submit(tx_bytes))
+
+    def _receive(self) -> bool:
+        """Count a received transaction, return False if it must be ignored."""
+        if self._deferred.called:
+            return False
 
         self._tx_received += 1
         if self._tx_received > self._tx_max_quantity:
@@ -124,10 +151,12 @@ class TransactionStreamingClient:
                           tx_received=self._tx_received,
                           tx_max_quantity=self._tx_max_quantity)
             self.fails(TooManyVerticesReceivedError())
-            return
+            return False
+        return True
 
-        self.log.debug('tx received', tx_id=tx.hash.hex())
-        self._queue.append(tx)
+    def _enqueue(self, deferred: Deferred[VerifiedVertex]) -> None:
+        """Add a received transaction to the queue."""
+        self._queue.append(deferred)
         assert len(self._queue) <= self._tx_max_quantity
 
         if not self._is_processing:
@@ -148,20 +177,35 @@ class TransactionStreamingClient:
 
         self._is_processing = True
         try:
-            tx = self._queue.popleft()
-            self.log.debug('processing tx', tx_id=tx.hash.hex())
-            yield self._process_transaction(tx)
+            try:
+                verified = yield self._queue.popleft()
+            except InvalidVertexError as e:
+                self.fails(e)
+                return
+            except Exception as e:
+                # the stream would stall until its timeout if the next vertex wasn't scheduled or the stream failed
+                self.log.error('unexpected error in the verification pipeline', exc_info=True)
+                self.fails(InvalidVertexError(repr(e)))
+                return
+            tx = verified.vertex
+            if not isinstance(tx, Transaction):
+                self.log.warn('not a transaction', hash=tx.hash_hex)
+                # Not a transaction. Punish peer?
+            else:
+                tx.storage = self.tx_storage
+                self.log.debug('processing tx', tx_id=tx.hash.hex())
+                yield self._process_transaction(tx, basic_verified=verified.basic_verified)
         finally:
             self._is_processing = False
 
         self.reactor.callLater(0, self.process_queue)
 
     @inlineCallbacks
-    def _process_transaction(self, tx: Transaction) -> Generator[Any, Any, None]:
+    def _process_transaction(self, tx: Transaction, *, basic_verified: bool) -> Generator[Any, Any, None]:
         """Process transaction."""
 
-        # Run basic verification.
-        if not tx.is_genesis:
+        # Run basic verification, unless the verification pipeline already did it.
+        if not tx.is_genesis and not basic_verified:
             try:
                 self.verification_service.verify_basic(tx, self.verification_params)
             except TxValidationError as e:
@@ -189,6 +233,8 @@ class TransactionStreamingClient:
 
         assert isinstance(tx, Transaction)
         self._db[tx.hash] = tx
+        # the basic verification includes the proof-of-work
+        self._pow_verified.add(tx.hash)
 
         if not self._waiting_for:
             self.log.debug('no pending dependencies, processing buffer')
@@ -223,7 +269,7 @@ class TransactionStreamingClient:
         if self._response_code is None:
             return
 
-        if self._queue:
+        if self._queue or self._is_processing:
             return
 
         self.log.info('transactions streaming ended', reason=self._response_code, waiting_for=len(self._waiting_for))
@@ -239,11 +285,14 @@ class TransactionStreamingClient:
         vertex_list.sort(key=lambda v: v.timestamp)
 
         try:
-            yield self.sync_agent.on_block_complete(blk, vertex_list)
+            yield self.sync_agent.on_block_complete(blk, vertex_list, pow_verified=self._pow_verified)
         except HathorError as e:
             self.fails(InvalidVertexError(repr(e)))
             return False
 
+        self._pow_verified.discard(blk.hash)
+        self._pow_verified.difference_update(vertex.hash for vertex in vertex_list)
+
         self._idx += 1
         if self._idx >= len(self.partial_blocks):
             return False
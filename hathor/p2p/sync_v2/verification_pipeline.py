@@ -0,0 +1,113 @@
+# Copyright 2025 Hathor Labs
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import TYPE_CHECKING, NamedTuple
+
+from twisted.internet import threads
+from twisted.internet.defer import Deferred
+from twisted.python.threadpool import ThreadPool
+
+from hathor.conf.settings import HathorSettings
+from hathor.nanocontracts import OnChainBlueprint
+from hathor.p2p.sync_v2.exception import InvalidVertexError
+from hathor.reactor import ReactorProtocol as Reactor
+from hathor.transaction import BaseTransaction
+from hathor.transaction.exceptions import TxValidationError
+from hathor.transaction.vertex_parser import VertexParser
+from hathor.verification.verification_params import VerificationParams
+from hathor.verification.verification_service import VerificationService
+
+if TYPE_CHECKING:
+    from hathor.transaction.storage import TransactionStorage
+
+
+class VerifiedVertex(NamedTuple):
+    vertex: BaseTransaction
+    # whether `VerificationService.verify_basic()` was already run
+    basic_verified: bool
+    # whether the proof-of-work was already verified, the full validation skips it, see `VertexHandler.on_new_block`
+    pow_verified: bool
+
+
+class VerificationPipeline:
+    """Decode and verify the vertices received by the sync streams in a thread pool, ahead of their processing.
+
+    The streaming clients keep the deferreds in the order the vertices were received, so the reactor thread only does
+    the ordered bookkeeping and the consensus, while the next vertices are being decoded and verified. Only the
+    verifications that don't need the storage are run in the pool: `verify_basic` for transactions, except on-chain
+    blueprints, and the proof-of-work for blocks, whose basic verification needs their parents. The scripts of the
+    inputs need the spent outputs, so they are still verified by the full validation in the reactor thread, which
+    doesn't verify the proof-of-work of these vertices again.
+    """
+
+    def __init__(
+        self,
+        reactor: Reactor,
+        *,
+        settings: HathorSettings,
+        tx_storage: 'TransactionStorage',
+        vertex_parser: VertexParser,
+        verification_service: VerificationService,
+        max_threads: int,
+    ) -> None:
+        assert max_threads > 0
+        self.reactor = reactor
+        self._settings = settings
+        self.tx_storage = tx_storage
+        self.vertex_parser = vertex_parser
+        self.verification_service = verification_service
+        self.thread_pool = ThreadPool(minthreads=0, maxthreads=max_threads, name='Sync verification thread pool')
+
+        # XXX: same as the `TransactionStreamingClient`, checkdatasig counting is disabled and `nc_block_root_id` is
+        #      `None` because only `verify_basic` is called, the full validation runs later with the right values.
+        self.verification_params = VerificationParams(
+            enable_checkdatasig_count=False,
+            nc_block_root_id=None,
+        )
+
+    def start(self) -> None:
+        self.thread_pool.start()
+
+    def stop(self) -> None:
+        if self.thread_pool.started:
+            self.thread_pool.stop()
+
+    def submit(self, vertex_bytes: bytes) -> Deferred[VerifiedVertex]:
+        """Decode and verify a vertex in the thread pool, the deferred fails with an `InvalidVertexError`."""
+        return threads.deferToThreadPool(self.reactor, self.thread_pool, self._decode_and_verify, vertex_bytes)
+
+    def _decode_and_verify(self, vertex_bytes: bytes) -> VerifiedVertex:
+        """Run in a thread of the pool, it must not read from the storage."""
+        try:
+            vertex = self.vertex_parser.deserialize(vertex_bytes, storage=self.tx_storage)
+        except Exception as e:
+            # besides `struct.error`, the parser raises `ValueError` and validation errors for malformed vertices
+            raise InvalidVertexError(repr(e))
+
+        if vertex.is_genesis:
+            return VerifiedVertex(vertex, basic_verified=True, pow_verified=True)
+
+        try:
+            if vertex.is_block:
+                if self._settings.CONSENSUS_ALGORITHM.is_pow():
+                    self.verification_service.verifiers.vertex.verify_pow(vertex)
+                return VerifiedVertex(vertex, basic_verified=False, pow_verified=True)
+            if isinstance(vertex, OnChainBlueprint):
+                # its basic verification needs the storage, see `VerificationService._verify_basic_on_chain_blueprint`
+                return VerifiedVertex(vertex, basic_verified=False, pow_verified=False)
+            # it includes the proof-of-work
+            self.verification_service.verify_basic(vertex, self.verification_params)
+        except TxValidationError as e:
+            raise InvalidVertexError(repr(e))
+        return VerifiedVertex(vertex, basic_verified=True, pow_verified=True)
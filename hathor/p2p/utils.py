@@ -14,7 +14,7 @@
 
 import datetime
 import re
-from typing import Any, Optional
+from typing import TYPE_CHECKING, Any, Optional
 
 import requests
 from cryptography import x509
@@ -32,7 +32,10 @@ from hathor.indexes.height_index import HeightInfo
 from hathor.p2p.peer_discovery import DNSPeerDiscovery
 from hathor.p2p.peer_endpoint import PeerEndpoint
 from hathor.p2p.peer_id import PeerId
-from hathor.transaction.genesis import get_representation_for_all_genesis
+from hathor.transaction.genesis import get_all_genesis_hashes, get_representation_for_all_genesis
+
+if TYPE_CHECKING:
+    from hathor.transaction.storage import TransactionStorage
 
 
 def discover_hostname(timeout: float | None = None) -> Optional[str]:
@@ -61,6 +64,23 @@ def get_genesis_short_hash() -> str:
     return get_representation_for_all_genesis(settings).hex()[:7]
 
 
+def get_compression_dict(tx_storage: 'TransactionStorage') -> bytes:
+    """ Return the preset dictionary of the compression of the connections, it must be the same in both peers.
+
+    zlib can't train a dictionary, so it's made of what the messages usually have: the genesis vertices, which both
+    peers have checked in HELLO, and the start of the messages that carry vertices. zlib favors the end of the
+    dictionary, so the most common strings are the last ones. Changing it requires a new compression capability.
+    """
+    settings = get_global_settings()
+    zdict = bytearray()
+    for genesis_hash in get_all_genesis_hashes(settings):
+        genesis = tx_storage.get_genesis(genesis_hash)
+        assert genesis is not None
+        zdict.extend(bytes(genesis))
+    zdict.extend(b'DATA mempool TRANSACTION BLOCKS ')
+    return bytes(zdict)
+
+
 def get_settings_hello_dict(settings: HathorSettings) -> dict[str, Any]:
     """ Return a dict of settings values that must be validated in the hello state
     """
@@ -44,6 +44,22 @@ METRIC_INFO = {
     'send_token_timeouts': 'Number of times send_token API has timed-out',
     'transaction_cache_hits': 'Number of hits in the transactions cache',
     'transaction_cache_misses': 'Number of misses in the transactions cache',
+    'transaction_cache_evictions': 'Number of evictions in the transactions cache',
+    'transaction_cache_size': 'Number of transactions in the transactions cache',
+    'transaction_cache_bytes': 'Estimated size in bytes of the transactions cache',
+    'transaction_cache_flushes': 'Number of flushes of the transactions cache',
+    'transaction_cache_flushed_txs': 'Number of transactions written by the transactions cache flushes',
+    'transaction_cache_flush_duration': 'Duration in seconds of the last flush of the transactions cache',
+    'transaction_cache_pending_evicted_txs': 'Number of dirty transactions evicted from cache waiting to be flushed',
+    'nc_node_cache_hits': 'Number of hits in the nano contract trie node cache',
+    'nc_node_cache_misses': 'Number of misses in the nano contract trie node cache',
+    'nc_node_cache_evictions': 'Number of evictions in the nano contract trie node cache',
+    'nc_node_cache_size': 'Estimated size in bytes of the nano contract trie node cache',
+    'blueprint_cache_hits': 'Number of hits in the on-chain blueprint class cache',
+    'blueprint_cache_misses': 'Number of misses in the on-chain blueprint class cache',
+    'blueprint_cache_evictions': 'Number of evictions in the on-chain blueprint class cache',
+    'blueprint_cache_compiled_hits': 'Number of on-chain blueprints loaded from persisted compiled code',
+    'blueprint_cache_size': 'Number of classes in the on-chain blueprint class cache',
 }
 
 PEER_CONNECTION_METRICS = {
@@ -56,6 +72,19 @@ PEER_CONNECTION_METRICS = {
     "discarded_txs": "Counts how many txs the node discarded from a peer",
     "received_blocks": "Counts how many blocks the node received from a peer",
     "discarded_blocks": "Counts how many blocks the node discarded from a peer",
+    "received_compressed_bytes": "Counts how many compressed bytes the node received from a peer",
+    "sent_compressed_bytes": "Counts how many compressed bytes the node sent to a peer",
+    "decompression_time": "CPU time in seconds spent decompressing what the node received from a peer",
+    "compression_time": "CPU time in seconds spent compressing what the node sent to a peer",
+}
+
+TX_CACHE_BY_TYPE_METRICS = {
+    # The keys here need to match the keys of the dicts in hathor.metrics.Metrics.transaction_cache_data_by_type
+    'hits': 'Number of hits in the transactions cache, by vertex type',
+    'misses': 'Number of misses in the transactions cache, by vertex type',
+    'evictions': 'Number of evictions in the transactions cache, by vertex type',
+    'size': 'Number of transactions in the transactions cache, by vertex type',
+    'bytes': 'Estimated size in bytes of the transactions in the transactions cache, by vertex type',
 }
 
 TX_STORAGE_METRICS = {
@@ -129,6 +158,7 @@ class PrometheusMetricsExporter:
 
         self._initialize_peer_connection_metrics()
         self._initialize_tx_storage_metrics()
+        self._initialize_tx_cache_by_type_metrics()
         self._initialize_garbage_collection_metrics()
 
         for name, comment in METRIC_INFO.items():
@@ -165,6 +195,22 @@ class PrometheusMetricsExporter:
             ) for name, description in TX_STORAGE_METRICS.items()
         }
 
+    def _initialize_tx_cache_by_type_metrics(self) -> None:
+        """Initializes the metrics related to the transactions cache, by vertex type
+        """
+        tx_cache_labels = ["vertex_type"]
+
+        prefix = self.metrics_prefix + "transaction_cache_by_type_"
+
+        self.tx_cache_by_type_metrics = {
+            name: Gauge(
+                prefix + name,
+                description,
+                labelnames=tx_cache_labels,
+                registry=self.registry
+            ) for name, description in TX_CACHE_BY_TYPE_METRICS.items()
+        }
+
     def _initialize_garbage_collection_metrics(self) -> None:
         """Initializes the metrics related to garbage collection
         """
@@ -195,6 +241,7 @@ class PrometheusMetricsExporter:
             self.metric_gauges[metric_name].set(getattr(self.metrics, metric_name))
 
         self._set_rocksdb_tx_storage_metrics()
+        self._set_tx_cache_by_type_metrics()
         self._set_new_peer_connection_metrics()
 
         write_to_textfile(self.filepath, self.registry)
@@ -205,6 +252,11 @@ class PrometheusMetricsExporter:
                 column_family=cf
             ).set(size)
 
+    def _set_tx_cache_by_type_metrics(self) -> None:
+        for vertex_type, data in self.metrics.transaction_cache_data_by_type.items():
+            for name, metric in self.tx_cache_by_type_metrics.items():
+                metric.labels(vertex_type=vertex_type).set(data[name])
+
     def _set_new_peer_connection_metrics(self) -> None:
         for name, metric in self.peer_connection_metrics.items():
             for connection_metric in self.metrics.peer_connection_metrics:
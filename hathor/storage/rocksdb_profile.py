@@ -0,0 +1,169 @@
+# Copyright 2025 Hathor Labs
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from enum import StrEnum, unique
+from typing import TYPE_CHECKING, Any, Optional
+
+if TYPE_CHECKING:
+    import rocksdb
+
+MiB: int = 1024 * 1024
+
+# Number of keys between restart points of a data block when optimizing for point lookups, rocksdb's default is 16.
+_POINT_LOOKUP_BLOCK_RESTART_INTERVAL: int = 4
+
+
+@unique
+class RocksDBProfileName(StrEnum):
+    """Names of the tuning profiles that can be used to open the RocksDB database."""
+    # Same options used by older versions: no compression and default options for every column family.
+    DEFAULT = 'default'
+    # Compresses the column families that are mostly read by point lookups and uses bloom filters everywhere.
+    FULLNODE = 'fullnode'
+    # Favors disk usage over CPU, compressing almost everything with zstd.
+    ARCHIVE = 'archive'
+    # Like fullnode, with larger block caches for the metadata and the indexes used by the APIs.
+    API_HEAVY = 'api-heavy'
+
+
+@unique
+class RocksDBCompression(StrEnum):
+    NONE = 'none'
+    LZ4 = 'lz4'
+    ZSTD = 'zstd'
+
+    def to_rocksdb(self) -> Any:
+        import rocksdb
+        match self:
+            case RocksDBCompression.NONE:
+                return rocksdb.CompressionType.no_compression
+            case RocksDBCompression.LZ4:
+                return rocksdb.CompressionType.lz4_compression
+            case RocksDBCompression.ZSTD:
+                return rocksdb.CompressionType.zstd_compression
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class ColumnFamilyProfile:
+    """Options used to open a column family."""
+    compression: RocksDBCompression = RocksDBCompression.NONE
+    # Bits per key of the bloom filters, or None to not use bloom filters.
+    bloom_bits_per_key: Optional[int] = None
+    # Size of a dedicated block cache, or None to use the block cache of the database. Column families with the
+    # same options share the same dedicated block cache.
+    block_cache_size: Optional[int] = None
+    # Size of the memtable, or None to use the default.
+    write_buffer_size: Optional[int] = None
+    # Tune the data blocks for point lookups (like rocksdb's `OptimizeForPointLookup`), for column families that are
+    # read by exact keys and never scanned: more restart points make the search inside a block shorter.
+    point_lookups: bool = False
+
+    def to_options(self, block_cache: Optional['rocksdb.LRUCache']) -> 'rocksdb.ColumnFamilyOptions':
+        """Create the rocksdb options, the caller is responsible for creating the dedicated block cache, if any."""
+        import rocksdb
+        options = rocksdb.ColumnFamilyOptions()
+        if self == ColumnFamilyProfile():
+            # keep exactly the options used before profiles existed
+            return options
+
+        options.compression = self.compression.to_rocksdb()
+        if self.write_buffer_size is not None:
+            options.write_buffer_size = self.write_buffer_size
+        filter_policy = None
+        if self.bloom_bits_per_key is not None:
+            filter_policy = rocksdb.BloomFilterPolicy(self.bloom_bits_per_key)
+        options.table_factory = rocksdb.BlockBasedTableFactory(
+            block_cache=block_cache,
+            filter_policy=filter_policy,
+            # keep the bloom filters in the block cache, so memory is bounded by the cache size
+            cache_index_and_filter_blocks=filter_policy is not None and block_cache is not None,
+            block_restart_interval=_POINT_LOOKUP_BLOCK_RESTART_INTERVAL if self.point_lookups else None,
+            whole_key_filtering=True if self.point_lookups else None,
+        )
+        return options
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class RocksDBProfile:
+    """A set of options for each column family of the database."""
+    name: RocksDBProfileName
+    # Used by the column families that are not listed and are not indexes.
+    default: ColumnFamilyProfile = ColumnFamilyProfile()
+    # Used by the index column families, the ones with names ending in `-index` or `-index-stats`.
+    indexes: ColumnFamilyProfile = ColumnFamilyProfile()
+    column_families: dict[bytes, ColumnFamilyProfile] = field(default_factory=dict)
+
+    def get_cf_profile(self, cf_name: bytes) -> ColumnFamilyProfile:
+        """Return the options of a column family."""
+        cf_profile = self.column_families.get(cf_name)
+        if cf_profile is not None:
+            return cf_profile
+        if cf_name.endswith(b'-index') or cf_name.endswith(b'-index-stats'):
+            return self.indexes
+        return self.default
+
+
+def _fullnode_profile(name: RocksDBProfileName, *, api_cache_size: Optional[int] = None) -> RocksDBProfile:
+    lz4 = ColumnFamilyProfile(compression=RocksDBCompression.LZ4, bloom_bits_per_key=10)
+    return RocksDBProfile(
+        name=name,
+        default=ColumnFamilyProfile(bloom_bits_per_key=10),
+        indexes=ColumnFamilyProfile(bloom_bits_per_key=10, block_cache_size=api_cache_size),
+        column_families={
+            b'tx': lz4,
+            b'event': lz4,
+            b'blueprint-code': lz4,
+            b'meta': ColumnFamilyProfile(bloom_bits_per_key=10, block_cache_size=api_cache_size or 256 * MiB),
+            # the nano contract state is read by point lookups of trie nodes, which is what bloom filters are good at
+            b'nc-state': ColumnFamilyProfile(
+                compression=RocksDBCompression.LZ4,
+                bloom_bits_per_key=10,
+                block_cache_size=128 * MiB,
+                point_lookups=True,
+            ),
+        },
+    )
+
+
+_ROCKSDB_PROFILES: dict[RocksDBProfileName, RocksDBProfile] = {
+    RocksDBProfileName.DEFAULT: RocksDBProfile(name=RocksDBProfileName.DEFAULT),
+    RocksDBProfileName.FULLNODE: _fullnode_profile(RocksDBProfileName.FULLNODE),
+    RocksDBProfileName.API_HEAVY: _fullnode_profile(RocksDBProfileName.API_HEAVY, api_cache_size=1024 * MiB),
+    RocksDBProfileName.ARCHIVE: RocksDBProfile(
+        name=RocksDBProfileName.ARCHIVE,
+        default=ColumnFamilyProfile(compression=RocksDBCompression.ZSTD, bloom_bits_per_key=10),
+        indexes=ColumnFamilyProfile(compression=RocksDBCompression.LZ4, bloom_bits_per_key=10),
+        column_families={
+            b'meta': ColumnFamilyProfile(
+                compression=RocksDBCompression.LZ4,
+                bloom_bits_per_key=10,
+                block_cache_size=256 * MiB,
+            ),
+            b'nc-state': ColumnFamilyProfile(
+                compression=RocksDBCompression.ZSTD,
+                bloom_bits_per_key=10,
+                block_cache_size=128 * MiB,
+                point_lookups=True,
+            ),
+        },
+    ),
+}
+
+
+def get_rocksdb_profile(name: RocksDBProfileName | str) -> RocksDBProfile:
+    """Return a tuning profile by its name."""
+    return _ROCKSDB_PROFILES[RocksDBProfileName(name)]
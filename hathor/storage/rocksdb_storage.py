@@ -21,6 +21,13 @@ import rocksdb
 from structlog import get_logger
 from typing_extensions import assert_never
 
+from hathor.storage.rocksdb_profile import (
+    ColumnFamilyProfile,
+    RocksDBProfile,
+    RocksDBProfileName,
+    get_rocksdb_profile,
+)
+
 logger = get_logger()
 _DB_NAME = 'data_v2.db'
 
@@ -33,13 +40,17 @@ class RocksDBStorage:
         self,
         path: str | tempfile.TemporaryDirectory,
         cache_capacity: int | None = None,
+        profile: RocksDBProfile | None = None,
     ) -> None:
         self.log = logger.new()
+        self.profile = profile or get_rocksdb_profile(RocksDBProfileName.DEFAULT)
         # We have to keep a reference to the TemporaryDirectory because it is cleaned up when garbage collected.
         self.path, self.temp_dir = self._get_path_and_temp_dir(path)
 
         db_path = os.path.join(self.path, _DB_NAME)
         lru_cache = cache_capacity and rocksdb.LRUCache(cache_capacity)
+        self._lru_cache = lru_cache or None
+        self._dedicated_caches: dict[ColumnFamilyProfile, rocksdb.LRUCache] = {}
         table_factory = rocksdb.BlockBasedTableFactory(block_cache=lru_cache)
         options = rocksdb.Options(
             table_factory=table_factory,
@@ -59,17 +70,17 @@ class RocksDBStorage:
             cf_names = []
 
         # we need to open all column families
-        column_families = {cf: rocksdb.ColumnFamilyOptions() for cf in cf_names}
+        column_families = {cf: self.get_column_family_options(cf) for cf in cf_names}
 
         # finally, open the database
         self._db = rocksdb.DB(db_path, options, column_families=column_families)
-        self.log.info('starting rocksdb', path=self.path)
+        self.log.info('starting rocksdb', path=self.path, profile=self.profile.name)
         self.log.debug('open db', cf_list=[cf.name.decode('ascii') for cf in self._db.column_families])
 
     @staticmethod
-    def create_temp(cache_capacity: int | None = None) -> RocksDBStorage:
+    def create_temp(cache_capacity: int | None = None, profile: RocksDBProfile | None = None) -> RocksDBStorage:
         """Create a RocksDBStorage instance with a temporary directory."""
-        return RocksDBStorage(path=tempfile.TemporaryDirectory(), cache_capacity=cache_capacity)
+        return RocksDBStorage(path=tempfile.TemporaryDirectory(), cache_capacity=cache_capacity, profile=profile)
 
     @staticmethod
     def _get_path_and_temp_dir(
@@ -89,8 +100,30 @@ class RocksDBStorage:
     def get_or_create_column_family(self, cf_name: bytes) -> 'rocksdb.ColumnFamilyHandle':
         cf = self._db.get_column_family(cf_name)
         if cf is None:
-            cf = self._db.create_column_family(cf_name, rocksdb.ColumnFamilyOptions())
+            cf = self._db.create_column_family(cf_name, self.get_column_family_options(cf_name))
         return cf
 
+    def get_column_family_options(self, cf_name: bytes) -> rocksdb.ColumnFamilyOptions:
+        """Return the options used to open a column family, according to the tuning profile."""
+        cf_profile = self.profile.get_cf_profile(cf_name)
+        block_cache = self._lru_cache
+        if cf_profile.block_cache_size is not None:
+            block_cache = self._dedicated_caches.get(cf_profile)
+            if block_cache is None:
+                block_cache = rocksdb.LRUCache(cf_profile.block_cache_size)
+                self._dedicated_caches[cf_profile] = block_cache
+        return cf_profile.to_options(block_cache)
+
+    def get_column_family_profiles(self) -> dict[bytes, str]:
+        """Return a short description of the options used by each column family, according to the tuning profile."""
+        descriptions: dict[bytes, str] = {}
+        for cf in self._db.column_families:
+            cf_profile = self.profile.get_cf_profile(cf.name)
+            descriptions[cf.name] = (
+                f'compression={cf_profile.compression} bloom_bits_per_key={cf_profile.bloom_bits_per_key} '
+                f'block_cache_size={cf_profile.block_cache_size} point_lookups={cf_profile.point_lookups}'
+            )
+        return descriptions
+
     def close(self) -> None:
         self._db.close()
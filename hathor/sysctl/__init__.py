@@ -15,6 +15,7 @@
 from hathor.sysctl.core.manager import HathorManagerSysctl
 from hathor.sysctl.feature_activation.manager import FeatureActivationSysctl
 from hathor.sysctl.p2p.manager import ConnectionsManagerSysctl
+from hathor.sysctl.storage.manager import RocksDBStorageSysctl
 from hathor.sysctl.sysctl import Sysctl
 from hathor.sysctl.websocket.manager import WebsocketManagerSysctl
 
@@ -24,4 +25,5 @@ __all__ = [
     'HathorManagerSysctl',
     'WebsocketManagerSysctl',
     'FeatureActivationSysctl',
+    'RocksDBStorageSysctl',
 ]
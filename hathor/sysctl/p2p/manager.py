@@ -14,12 +14,17 @@
 
 import os
 
+from twisted.python.failure import Failure
+
+from hathor.nanocontracts.storage.patricia_trie import NodeId
 from hathor.p2p.manager import ConnectionsManager
 from hathor.p2p.peer_id import PeerId
+from hathor.p2p.states import ReadyState
 from hathor.p2p.sync_version import SyncVersion
 from hathor.p2p.utils import discover_hostname
 from hathor.sysctl.exception import SysctlException
 from hathor.sysctl.sysctl import Sysctl, signal_handler_safe
+from hathor.types import VertexId
 
 AUTO_HOSTNAME_TIMEOUT_SECONDS: float = 5
 
@@ -107,6 +112,11 @@ class ConnectionsManagerSysctl(Sysctl):
             None,
             self.set_kill_connection,
         )
+        self.register(
+            'nc_state_sync',
+            None,
+            self.set_nc_state_sync,
+        )
         self.register(
             'hostname',
             self.get_hostname,
@@ -241,6 +251,37 @@ class ConnectionsManagerSysctl(Sysctl):
             raise SysctlException('peer-id is not connected')
         conn.disconnect(force=force)
 
+    @signal_handler_safe
+    def set_nc_state_sync(self, peer_id: str, block_id: str) -> None:
+        """Download the nano state of a block from a connected peer, e.g. to restore a state removed by the garbage
+        collector. Only the state tries are stored, no metadata is changed and no execution is skipped."""
+        try:
+            peer_id_obj = PeerId(peer_id)
+        except ValueError:
+            raise SysctlException('invalid peer-id')
+        try:
+            block_hash = bytes.fromhex(block_id)
+        except ValueError:
+            raise SysctlException('invalid block-id')
+        if len(block_hash) != 32:
+            raise SysctlException('invalid block-id')
+        conn = self.connections.connected_peers.get(peer_id_obj, None)
+        if conn is None:
+            raise SysctlException('peer-id is not connected')
+        state = conn.state
+        if not isinstance(state, ReadyState) or not state.enable_nano_state_sync:
+            raise SysctlException('peer does not support nano-state sync')
+        if state.nc_state_sync is not None:
+            raise SysctlException('a nano-state sync is already running with this peer')
+        deferred = state.sync_nc_state(VertexId(block_hash))
+        deferred.addCallbacks(self._on_nc_state_synced, self._on_nc_state_sync_failed)
+
+    def _on_nc_state_synced(self, block_root_id: NodeId) -> None:
+        self.log.info('nano state downloaded through sysctl', block_root_id=block_root_id.hex())
+
+    def _on_nc_state_sync_failed(self, failure: Failure) -> None:
+        self.log.warn('nano state download through sysctl failed', reason=failure.getErrorMessage())
+
     def get_hostname(self) -> str | None:
         """Return the configured hostname."""
         assert self.connections.manager is not None
@@ -0,0 +1,50 @@
+# Copyright 2025 Hathor Labs
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from hathor.storage import RocksDBStorage
+from hathor.sysctl.sysctl import Sysctl
+
+
+class RocksDBStorageSysctl(Sysctl):
+    def __init__(self, rocksdb_storage: RocksDBStorage) -> None:
+        super().__init__()
+        self.rocksdb_storage = rocksdb_storage
+
+        self.register(
+            'rocksdb.profile',
+            self.get_profile,
+            None,
+        )
+        self.register(
+            'rocksdb.column_families',
+            self.get_column_families,
+            None,
+        )
+
+    def get_profile(self) -> str:
+        """Return the name of the tuning profile used to open the database.
+        Use `--rocksdb-profile` to change it, it only takes effect when the database is opened."""
+        return str(self.rocksdb_storage.profile.name)
+
+    def get_column_families(self) -> dict[str, dict[str, str | float]]:
+        """Return the options of each column family according to the tuning profile, and its SST files size."""
+        db = self.rocksdb_storage.get_db()
+        profiles = self.rocksdb_storage.get_column_family_profiles()
+        column_families: dict[str, dict[str, str | float]] = {}
+        for cf in db.column_families:
+            column_families[cf.name.decode('ascii')] = dict(
+                options=profiles[cf.name],
+                total_sst_files_size=float(db.get_property(b'rocksdb.total-sst-files-size', cf)),
+            )
+        return column_families
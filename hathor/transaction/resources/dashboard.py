@@ -12,9 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from typing import Any
+
+from twisted.internet import threads
+from twisted.web.http import Request
+from twisted.web.server import NOT_DONE_YET
+
 from hathor._openapi.register import register_resource
 from hathor.api_util import Resource, get_args, get_missing_params_msg, parse_args, parse_int, set_cors
 from hathor.conf.get_settings import get_global_settings
+from hathor.transaction.storage.snapshot import StorageSnapshot
 from hathor.util import json_dumpb
 
 ARGS = ['block', 'tx']
@@ -71,10 +78,25 @@ class DashboardTransactionResource(Resource):
         block_count = min(block_count, self._settings.MAX_DASHBOARD_COUNT)
         tx_count = min(tx_count, self._settings.MAX_DASHBOARD_COUNT)
 
-        transactions, _ = self.manager.tx_storage.get_newest_txs(count=tx_count)
+        # the response is built in another thread, from a snapshot of the storage taken now
+        snapshot = self.manager.tx_storage.snapshot()
+        deferred = threads.deferToThread(self.get_dashboard, snapshot, block_count, tx_count)
+        deferred.addCallback(self._cb_dashboard, request)
+        deferred.addErrback(self._err_dashboard, request)
+        return NOT_DONE_YET
+
+    def _cb_dashboard(self, result: bytes, request: Request) -> None:
+        request.write(result)
+        request.finish()
+
+    def _err_dashboard(self, reason: Any, request: Request) -> None:
+        request.processingFailed(reason)
+
+    def get_dashboard(self, snapshot: StorageSnapshot, block_count: int, tx_count: int) -> bytes:
+        transactions, _ = snapshot.get_newest_txs(count=tx_count)
         serialized_tx = [tx.to_json_extended() for tx in transactions]
 
-        blocks, _ = self.manager.tx_storage.get_newest_blocks(count=block_count)
+        blocks, _ = snapshot.get_newest_blocks(count=block_count)
         serialized_blocks = [block.to_json_extended() for block in blocks]
 
         data = {
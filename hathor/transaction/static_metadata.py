@@ -14,7 +14,8 @@
 
 from __future__ import annotations
 
-from abc import ABC
+import struct
+from abc import ABC, abstractmethod
 from itertools import chain, starmap, zip_longest
 from operator import add
 from typing import TYPE_CHECKING, Callable
@@ -23,6 +24,7 @@ from typing_extensions import Self, override
 
 from hathor.feature_activation.feature import Feature
 from hathor.feature_activation.model.feature_state import FeatureState
+from hathor.transaction.util import unpack, unpack_len
 from hathor.types import VertexId
 from hathor.util import json_loadb
 from hathor.utils.pydantic import BaseModel
@@ -32,6 +34,10 @@ if TYPE_CHECKING:
     from hathor.transaction import BaseTransaction, Block, Transaction
     from hathor.transaction.storage import TransactionStorage
 
+# First byte of the binary representation of static metadata. The json representation used by older versions always
+# starts with `{`, so both can be told apart.
+_BINARY_FORMAT_VERSION: int = 1
+
 
 class VertexStaticMetadata(ABC, BaseModel):
     """
@@ -49,6 +55,32 @@ class VertexStaticMetadata(ABC, BaseModel):
 
     @classmethod
     def from_bytes(cls, data: bytes, *, target: 'BaseTransaction') -> 'VertexStaticMetadata':
+        """Create a static metadata instance from a bytes representation, with a known vertex type target.
+
+        Both the binary representation created by `to_bytes()` and the json representation used by older versions are
+        accepted."""
+        from hathor.transaction import Block, Transaction
+        if data.startswith(b'{'):
+            return cls.from_json_bytes(data, target=target)
+
+        version = data[0]
+        if version != _BINARY_FORMAT_VERSION:
+            raise ValueError(f'unknown static metadata format version: {version}')
+
+        buf: bytes | memoryview = memoryview(data)[1:]
+        static_metadata: VertexStaticMetadata
+        if isinstance(target, Block):
+            static_metadata, buf = BlockStaticMetadata._from_binary(buf)
+        elif isinstance(target, Transaction):
+            static_metadata, buf = TransactionStaticMetadata._from_binary(buf)
+        else:
+            raise NotImplementedError
+        if buf:
+            raise ValueError('invalid static metadata: trailing data')
+        return static_metadata
+
+    @classmethod
+    def from_json_bytes(cls, data: bytes, *, target: 'BaseTransaction') -> 'VertexStaticMetadata':
         """Create a static metadata instance from a json bytes representation, with a known vertex type target."""
         from hathor.transaction import Block, Transaction
         json_dict = json_loadb(data)
@@ -62,6 +94,15 @@ class VertexStaticMetadata(ABC, BaseModel):
 
         raise NotImplementedError
 
+    def to_bytes(self) -> bytes:
+        """Serialize this instance to its binary representation. This should be used for storage."""
+        return bytes([_BINARY_FORMAT_VERSION]) + self._to_binary()
+
+    @abstractmethod
+    def _to_binary(self) -> bytes:
+        """Return the fields of this instance serialized, the format version is not included."""
+        raise NotImplementedError
+
 
 class BlockStaticMetadata(VertexStaticMetadata):
     height: int
@@ -74,6 +115,38 @@ class BlockStaticMetadata(VertexStaticMetadata):
     # A dict of features in the feature activation process and their respective state.
     feature_states: dict[Feature, FeatureState]
 
+    @override
+    def _to_binary(self) -> bytes:
+        counts = self.feature_activation_bit_counts
+        parts = [
+            struct.pack('!QQH', self.min_height, self.height, len(counts)),
+            struct.pack(f'!{len(counts)}I', *counts),
+            struct.pack('!B', len(self.feature_states)),
+        ]
+        for feature, state in self.feature_states.items():
+            parts.append(_pack_str(feature.value))
+            parts.append(_pack_str(state.value))
+        return b''.join(parts)
+
+    @classmethod
+    def _from_binary(cls, buf: bytes | memoryview) -> tuple[Self, bytes | memoryview]:
+        (min_height, height, counts_len), buf = unpack('!QQH', buf)
+        counts, buf = unpack(f'!{counts_len}I', buf)
+        (states_len,), buf = unpack('!B', buf)
+        feature_states: dict[Feature, FeatureState] = {}
+        for _ in range(states_len):
+            feature, buf = _unpack_str(buf)
+            state, buf = _unpack_str(buf)
+            feature_states[Feature(feature)] = FeatureState(state)
+        # The data was created by `_to_binary()`, so validation can be skipped, which is most of the loading time.
+        static_metadata = cls.construct(
+            height=height,
+            min_height=min_height,
+            feature_activation_bit_counts=list(counts),
+            feature_states=feature_states,
+        )
+        return static_metadata, buf
+
     @classmethod
     def create_from_storage(cls, block: 'Block', settings: HathorSettings, storage: 'TransactionStorage') -> Self:
         """Create a `BlockStaticMetadata` using dependencies provided by a storage."""
@@ -180,6 +253,20 @@ class TransactionStaticMetadata(VertexStaticMetadata):
     # including both funds and verification DAGs. It's used by Feature Activation for Transactions.
     closest_ancestor_block: VertexId
 
+    @override
+    def _to_binary(self) -> bytes:
+        return struct.pack('!Q32s', self.min_height, self.closest_ancestor_block)
+
+    @classmethod
+    def _from_binary(cls, buf: bytes | memoryview) -> tuple[Self, bytes | memoryview]:
+        (min_height, closest_ancestor_block), buf = unpack('!Q32s', buf)
+        # The data was created by `_to_binary()`, so validation can be skipped, which is most of the loading time.
+        static_metadata = cls.construct(
+            min_height=min_height,
+            closest_ancestor_block=VertexId(closest_ancestor_block),
+        )
+        return static_metadata, buf
+
     @classmethod
     def create_from_storage(cls, tx: 'Transaction', settings: HathorSettings, storage: 'TransactionStorage') -> Self:
         """Create a `TransactionStaticMetadata` using dependencies provided by a storage."""
@@ -292,3 +379,14 @@ class TransactionStaticMetadata(VertexStaticMetadata):
         json_dict = self.dict()
         json_dict['closest_ancestor_block'] = json_dict['closest_ancestor_block'].hex()
         return json_dumpb(json_dict)
+
+
+def _pack_str(value: str) -> bytes:
+    data = value.encode('ascii')
+    return struct.pack('!B', len(data)) + data
+
+
+def _unpack_str(buf: bytes | memoryview) -> tuple[str, bytes | memoryview]:
+    (length,), buf = unpack('!B', buf)
+    data, buf = unpack_len(length, buf)
+    return data.decode('ascii'), buf
@@ -14,7 +14,10 @@
 
 from __future__ import annotations
 
-from collections import OrderedDict
+import time
+from collections import Counter, defaultdict
+from itertools import chain
+from threading import Lock, RLock
 from typing import TYPE_CHECKING, Any, Iterator, Optional
 
 from twisted.internet import threads
@@ -24,8 +27,11 @@ from hathor.indexes import IndexesManager
 from hathor.reactor import ReactorProtocol as Reactor
 from hathor.transaction import BaseTransaction
 from hathor.transaction.storage.migrations import MigrationState
+from hathor.transaction.storage.rocksdb_storage import TransactionRocksDBStorage
+from hathor.transaction.storage.snapshot import StorageSnapshot
 from hathor.transaction.storage.transaction_storage import BaseTransactionStorage
 from hathor.transaction.storage.tx_allow_scope import TxAllowScope
+from hathor.transaction.storage.vertex_cache import VertexCache
 from hathor.transaction.vertex_children import VertexChildrenService
 
 if TYPE_CHECKING:
@@ -37,7 +43,7 @@ class TransactionCacheStorage(BaseTransactionStorage):
     """Caching storage to be used 'on top' of other storages.
     """
 
-    cache: OrderedDict[bytes, BaseTransaction]
+    cache: VertexCache
     dirty_txs: set[bytes]
 
     def __init__(
@@ -47,6 +53,9 @@ class TransactionCacheStorage(BaseTransactionStorage):
         interval: int = 5,
         capacity: int = 10000,
         *,
+        max_bytes: Optional[int] = None,
+        flush_batch_size: int = 10000,
+        flush_sync: bool = False,
         settings: 'HathorSettings',
         nc_storage_factory: NCStorageFactory,
         vertex_children_service: VertexChildrenService,
@@ -63,9 +72,18 @@ class TransactionCacheStorage(BaseTransactionStorage):
         :param interval: the cache flush interval. Writes will happen every interval seconds
         :type interval: int
 
-        :param capacity: cache capacity
+        :param capacity: cache capacity, in number of transactions
         :type capacity: int
 
+        :param max_bytes: optional cache capacity, in bytes, estimated from the size of transactions and metadata
+        :type max_bytes: Optional[int]
+
+        :param flush_batch_size: max number of transactions written to the store in a single batch
+        :type flush_batch_size: int
+
+        :param flush_sync: whether each flushed batch waits until it is persisted to disk
+        :type flush_sync: bool
+
         :param _clone_if_needed: *private parameter*, defaults to True, controls whether to clone
                                  transaction/blocks/metadata when returning those objects.
         :type _clone_if_needed: bool
@@ -77,13 +95,34 @@ class TransactionCacheStorage(BaseTransactionStorage):
         self.store = store
         self.reactor = reactor
         self.interval = interval
-        self.capacity = capacity
         self.flush_deferred = None
         self._clone_if_needed = _clone_if_needed
-        self.cache = OrderedDict()
+        self.cache = VertexCache(capacity, max_bytes=max_bytes)
+        # Reading a tx changes the cache and the weakref, and txs are also read from other threads, e.g. during
+        # speculative nano execution, so all changes to them are made while holding this lock.
+        self._cache_lock = RLock()
+        # Flushes run in the flush thread and in the reactor, they are serialized by this lock. When both locks are
+        # needed, this one must be acquired first.
+        self._flush_lock = Lock()
         # dirty_txs has the txs that have been modified but are not persisted yet
         self.dirty_txs = set()
-        self.stats = dict(hit=0, miss=0)
+        # dirty txs evicted from the cache, they are kept here until the next flush writes them
+        self._evicted_dirty_txs: dict[bytes, BaseTransaction] = {}
+        # txs being written by a flush, which are no longer in dirty_txs, see `snapshot()`
+        self._flushing_txs: dict[bytes, BaseTransaction] = {}
+        # version of the last save of each tx that was not written yet, so a flush never writes an older version of a
+        # tx over a newer one, see `_write_batches()`
+        self._versions: dict[bytes, int] = {}
+        self._last_version = 0
+        # metadata bytes of the txs that were not written yet, with the version they were serialized from, so the
+        # snapshots only serialize the metadata of the txs saved since the previous snapshot, see `snapshot()`
+        self._metadata_bytes: dict[bytes, tuple[int, bytes]] = {}
+        self.flush_batch_size = flush_batch_size
+        self.flush_sync = flush_sync
+        self.flush_stats = dict(count=0, txs=0, batches=0, last_duration=0.0, total_duration=0.0)
+        self.stats = dict(hit=0, miss=0, eviction=0)
+        # the same stats, by vertex type name
+        self.stats_by_type: defaultdict[str, Counter[str]] = defaultdict(Counter)
 
         # we need to use only one weakref dict, so we must first initialize super, and then
         # attribute the same weakref for both.
@@ -104,12 +143,37 @@ class TransactionCacheStorage(BaseTransactionStorage):
     def get_allow_scope(self) -> TxAllowScope:
         return self.store._allow_scope
 
+    @property
+    def capacity(self) -> int:
+        """Max number of items in cache."""
+        return self.cache.capacity
+
+    @capacity.setter
+    def capacity(self, capacity: int) -> None:
+        assert capacity >= 0
+        self.cache.capacity = capacity
+
+    @property
+    def max_bytes(self) -> Optional[int]:
+        """Max estimated size of the items in cache, in bytes, if limited."""
+        return self.cache.max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, max_bytes: Optional[int]) -> None:
+        assert max_bytes is None or max_bytes >= 0
+        self.cache.max_bytes = max_bytes
+
     def set_capacity(self, capacity: int) -> None:
         """Change the max number of items in cache."""
-        assert capacity >= 0
         self.capacity = capacity
-        while len(self.cache) > self.capacity:
-            self._cache_popitem()
+        with self._cache_lock:
+            for removed_tx in self.cache.shrink():
+                self._on_evicted(removed_tx)
+        self._flush_evicted_if_needed()
+
+    def _count_stat(self, tx: BaseTransaction, name: str) -> None:
+        self.stats[name] += 1
+        self.stats_by_type[type(tx).__name__][name] += 1
 
     def _clone(self, x: BaseTransaction) -> BaseTransaction:
         if self._clone_if_needed:
@@ -140,12 +204,12 @@ class TransactionCacheStorage(BaseTransactionStorage):
 
     def _start_flush_thread(self) -> None:
         if self.flush_deferred is None:
-            deferred = threads.deferToThread(self._flush_to_storage, self.dirty_txs.copy())
+            deferred = threads.deferToThread(self._flush_to_storage)
             deferred.addCallback(self._cb_flush_thread)
             deferred.addErrback(self._err_flush_thread)
             self.flush_deferred = deferred
 
-    def _cb_flush_thread(self, flushed_txs: set[bytes]) -> None:
+    def _cb_flush_thread(self, _: None) -> None:
         self.reactor.callLater(self.interval, self._start_flush_thread)
         self.flush_deferred = None
 
@@ -154,27 +218,111 @@ class TransactionCacheStorage(BaseTransactionStorage):
         self.reactor.callLater(self.interval, self._start_flush_thread)
         self.flush_deferred = None
 
-    def _flush_to_storage(self, dirty_txs_copy: set[bytes]) -> None:
-        """Write dirty pages to disk."""
-        for tx_hash in dirty_txs_copy:
-            # a dirty tx might be removed from self.cache outside this thread: if _update_cache is called
-            # and we need to save the tx to disk immediately. So it might happen that the tx which was
-            # in the dirty set when the flush thread began is not in cache anymore, hence this `if` check
-            if tx_hash in self.cache:
-                tx = self._clone(self.cache[tx_hash])
-                self.dirty_txs.discard(tx_hash)
-                self.store._save_transaction(tx)
+    def _flush_to_storage(self) -> None:
+        """Write dirty pages to disk, in batches of at most `flush_batch_size` transactions."""
+        with self._flush_lock:
+            start = time.monotonic()
+            with self._cache_lock:
+                evicted_txs = self._get_evicted_txs_to_flush()
+                dirty_txs = list(self.dirty_txs)
+            entries = [(tx, version) for _, tx, version in evicted_txs]
+            for tx_hash in dirty_txs:
+                # Each tx stops being dirty in the same step it is taken, so a save that happens afterwards makes it
+                # dirty again and it's written by the next flush. It is set as flushing before it stops being dirty.
+                with self._cache_lock:
+                    if tx_hash not in self.dirty_txs:
+                        continue
+                    self.dirty_txs.discard(tx_hash)
+                    # a dirty tx that is not in the cache anymore was evicted, it will be written by the next flush
+                    cached_tx = self.cache.peek(tx_hash)
+                    if cached_tx is None:
+                        continue
+                    tx = self._clone(cached_tx)
+                    self._flushing_txs[tx_hash] = tx
+                    entries.append((tx, self._versions[tx_hash]))
+            try:
+                written_count = self._write_batches(entries)
+            finally:
+                with self._cache_lock:
+                    self._flushing_txs = {}
+            self._forget_evicted_txs(evicted_txs)
+
+            duration = time.monotonic() - start
+            self.flush_stats['count'] += 1
+            self.flush_stats['last_duration'] = duration
+            self.flush_stats['total_duration'] += duration
+            if written_count:
+                self.log.debug('flushed transactions', count=written_count, duration=duration)
+
+    def _flush_evicted_if_needed(self) -> None:
+        """Write the evicted dirty txs right away when the flush thread is not keeping up.
+
+        It must not be called while holding `_cache_lock`, see `_flush_lock`."""
+        if len(self._evicted_dirty_txs) < self.flush_batch_size:
+            return
+        with self._flush_lock:
+            with self._cache_lock:
+                evicted_txs = self._get_evicted_txs_to_flush()
+            self._write_batches([(tx, version) for _, tx, version in evicted_txs])
+            self._forget_evicted_txs(evicted_txs)
+
+    def _get_evicted_txs_to_flush(self) -> list[tuple[bytes, BaseTransaction, int]]:
+        """Return the evicted dirty txs along with their versions, it must be called while holding `_cache_lock`.
+
+        A tx that was saved again after it was evicted is dirty again, and only that newer version is written."""
+        return [
+            (tx_hash, tx, self._versions[tx_hash])
+            for tx_hash, tx in self._evicted_dirty_txs.items()
+            if tx_hash not in self.dirty_txs
+        ]
+
+    def _write_batches(self, entries: list[tuple[BaseTransaction, int]]) -> int:
+        """Write the txs to the store, splitting them in batches of at most `flush_batch_size` transactions.
+
+        Each tx comes with the version of the save it was taken from. A tx that was saved again since is skipped, its
+        newer version is pending and will be written by a later flush. It returns the number of txs written."""
+        batch_size = max(self.flush_batch_size, 1)
+        written_count = 0
+        for i in range(0, len(entries), batch_size):
+            batch = entries[i:i + batch_size]
+            with self._cache_lock:
+                txs = [tx for tx, version in batch if self._versions.get(tx.hash) == version]
+            if not txs:
+                continue
+            self.store._save_transactions(txs, sync=self.flush_sync)
+            with self._cache_lock:
+                for tx, version in batch:
+                    if self._versions.get(tx.hash) == version:
+                        del self._versions[tx.hash]
+                        self._metadata_bytes.pop(tx.hash, None)
+            self.flush_stats['batches'] += 1
+            written_count += len(txs)
+        self.flush_stats['txs'] += written_count
+        return written_count
+
+    def _forget_evicted_txs(self, evicted_txs: list[tuple[bytes, BaseTransaction, int]]) -> None:
+        """Stop keeping evicted txs that were written to the store, unless they were evicted again since."""
+        with self._cache_lock:
+            for tx_hash, tx, _ in evicted_txs:
+                if self._evicted_dirty_txs.get(tx_hash) is tx:
+                    del self._evicted_dirty_txs[tx_hash]
 
     def remove_transaction(self, tx: BaseTransaction) -> None:
         super().remove_transaction(tx)
-        self.cache.pop(tx.hash, None)
-        self.dirty_txs.discard(tx.hash)
-        self.store.remove_transaction(tx)
-        self._remove_from_weakref(tx)
+        with self._cache_lock:
+            self.cache.pop(tx.hash)
+            self.dirty_txs.discard(tx.hash)
+            self._evicted_dirty_txs.pop(tx.hash, None)
+            self._versions.pop(tx.hash, None)
+            self._metadata_bytes.pop(tx.hash, None)
+            self.store.remove_transaction(tx)
+            self._remove_from_weakref(tx)
 
     def save_transaction(self, tx: 'BaseTransaction', *, only_metadata: bool = False) -> None:
-        self._save_transaction(tx)
-        self._save_to_weakref(tx)
+        with self._cache_lock:
+            self._save_transaction(tx)
+            self._save_to_weakref(tx)
+        self._flush_evicted_if_needed()
 
         # call super which adds to index if needed
         super().save_transaction(tx, only_metadata=only_metadata)
@@ -188,60 +336,139 @@ class TransactionCacheStorage(BaseTransactionStorage):
 
     def _save_transaction(self, tx: BaseTransaction, *, only_metadata: bool = False) -> None:
         """Saves the transaction without modifying TimestampIndex entries (in superclass)."""
-        self._update_cache(tx)
-        self.dirty_txs.add(tx.hash)
+        with self._cache_lock:
+            self._update_cache(tx, is_write=True)
+            self.dirty_txs.add(tx.hash)
+            self._last_version += 1
+            self._versions[tx.hash] = self._last_version
+
+    def _on_evicted(self, removed_tx: BaseTransaction) -> None:
+        """Called for each tx evicted from the cache, while holding `_cache_lock`.
 
-    def _cache_popitem(self) -> BaseTransaction:
-        """Pop the last recently used cache item."""
-        (_, removed_tx) = self.cache.popitem(last=False)
+        The evicted dirty txs are written by `_flush_evicted_if_needed()` if there are too many of them."""
+        self._count_stat(removed_tx, 'eviction')
         if removed_tx.hash in self.dirty_txs:
-            # write to disk so we don't lose the last update
+            # keep it until the next flush so we don't lose the last update
             self.dirty_txs.discard(removed_tx.hash)
-            self.store.save_transaction(removed_tx)
-        return removed_tx
+            self._evicted_dirty_txs[removed_tx.hash] = removed_tx
 
-    def _update_cache(self, tx: BaseTransaction) -> None:
-        """Updates the cache making sure it has at most the number of elements configured
-        as its capacity.
+    def _update_cache(self, tx: BaseTransaction, *, is_write: bool = False) -> None:
+        """Updates the cache making sure it is within the limits configured as its capacity.
 
-        If we need to evict a tx from cache and it's dirty, write it to disk immediately.
+        Written txs are likely to be used again soon, so they skip the probationary segment of the cache.
+
+        If we need to evict a tx from cache and it's dirty, it is kept until the next flush writes it to disk.
         """
-        _tx = self.cache.get(tx.hash, None)
-        if not _tx:
-            if len(self.cache) >= self.capacity:
-                self._cache_popitem()
-            self.cache[tx.hash] = self._clone(tx)
-        else:
-            # Tx might have been updated
-            self.cache[tx.hash] = self._clone(tx)
-            self.cache.move_to_end(tx.hash, last=True)
+        # Tx might have been updated
+        for removed_tx in self.cache.put(self._clone(tx), protected=is_write):
+            self._on_evicted(removed_tx)
+
+    @override
+    def snapshot(self) -> StorageSnapshot:
+        assert isinstance(self.store, TransactionRocksDBStorage)
+        # The flush thread can be writing at the same time. A tx becomes flushing before it stops being dirty, and
+        # stops being flushing or evicted only after it's written, so reading them together, before the RocksDB
+        # snapshot is taken, doesn't miss any tx.
+        with self._cache_lock:
+            dirty_txs = [tx for tx in map(self.cache.peek, self.dirty_txs) if tx is not None]
+            pending_txs: dict[bytes, BaseTransaction] = {}
+            # the last update of a tx wins: dirty in the cache, then evicted, then flushing
+            for tx in chain(self._flushing_txs.values(), self._evicted_dirty_txs.values(), dirty_txs):
+                pending_txs[tx.hash] = tx
+            versions = {tx_hash: self._versions.get(tx_hash) for tx_hash in pending_txs}
+            metadata_bytes: dict[bytes, bytes] = {}
+            for tx_hash in pending_txs:
+                cached = self._metadata_bytes.get(tx_hash)
+                if cached is not None and cached[0] == versions[tx_hash]:
+                    metadata_bytes[tx_hash] = cached[1]
+
+        # The metadata of a tx is serialized by the first snapshot after each save, and reused by the next ones until
+        # it's saved again, so a large set of pending txs doesn't make every snapshot serialize all of them again.
+        pending_vertices: dict[bytes, tuple[BaseTransaction, bytes]] = {}
+        serialized: list[tuple[bytes, int, bytes]] = []
+        for tx_hash, tx in pending_txs.items():
+            data = metadata_bytes.get(tx_hash)
+            if data is None:
+                data = tx.get_metadata(use_storage=False).to_bytes()
+                version = versions[tx_hash]
+                if version is not None:
+                    serialized.append((tx_hash, version, data))
+            pending_vertices[tx_hash] = (tx, data)
+
+        if serialized:
+            with self._cache_lock:
+                for tx_hash, version, data in serialized:
+                    # a tx saved again or written since then is skipped
+                    if self._versions.get(tx_hash) == version:
+                        self._metadata_bytes[tx_hash] = (version, data)
+        return StorageSnapshot(
+            self.store,
+            indexes=self.indexes,
+            pending_vertices=pending_vertices,
+            best_block_tips=self.get_best_block_tips(),
+        )
 
     def transaction_exists(self, hash_bytes: bytes) -> bool:
-        if hash_bytes in self.cache:
+        if hash_bytes in self.cache or hash_bytes in self._evicted_dirty_txs:
             return True
         return self.store.transaction_exists(hash_bytes)
 
     def _get_transaction(self, hash_bytes: bytes) -> BaseTransaction:
-        tx: Optional[BaseTransaction]
-        if hash_bytes in self.cache:
-            tx = self._clone(self.cache[hash_bytes])
-            self.cache.move_to_end(hash_bytes, last=True)
-            self.stats['hit'] += 1
-        else:
-            tx = self.get_transaction_from_weakref(hash_bytes)
+        tx = self._get_cached_transaction(hash_bytes)
+        if tx is None:
+            tx = self.store.get_transaction(hash_bytes)
+            self._add_stored_transaction(tx)
+        return tx
+
+    @override
+    def _get_transactions(self, hashes: list[bytes]) -> list[BaseTransaction]:
+        txs: dict[bytes, BaseTransaction] = {}
+        missing: list[bytes] = []
+        for hash_bytes in dict.fromkeys(hashes):
+            tx = self._get_cached_transaction(hash_bytes)
+            if tx is None:
+                missing.append(hash_bytes)
+            else:
+                txs[hash_bytes] = tx
+
+        if missing:
+            for tx in self.store.get_transactions(missing):
+                self._add_stored_transaction(tx)
+                txs[tx.hash] = tx
+
+        return [txs[hash_bytes] for hash_bytes in hashes]
+
+    def _get_cached_transaction(self, hash_bytes: bytes) -> Optional[BaseTransaction]:
+        """Return a transaction from the cache or the weakref, or None if it has to be loaded from the store."""
+        with self._cache_lock:
+            tx = self.cache.get(hash_bytes)
             if tx is not None:
-                self.stats['hit'] += 1
+                tx = self._clone(tx)
             else:
-                tx = self.store.get_transaction(hash_bytes)
-                tx.storage = self
-                self.stats['miss'] += 1
-            self._update_cache(tx)
-        self._save_to_weakref(tx)
-        assert tx is not None
+                tx = self._evicted_dirty_txs.get(hash_bytes)
+                if tx is not None:
+                    tx = self._clone(tx)
+                else:
+                    tx = self.get_transaction_from_weakref(hash_bytes)
+                    if tx is None:
+                        return None
+                self._update_cache(tx)
+            self._count_stat(tx, 'hit')
+            self._save_to_weakref(tx)
+        self._flush_evicted_if_needed()
         return tx
 
+    def _add_stored_transaction(self, tx: BaseTransaction) -> None:
+        """Add to the cache a transaction that has just been loaded from the store."""
+        tx.storage = self
+        with self._cache_lock:
+            self._count_stat(tx, 'miss')
+            self._update_cache(tx)
+            self._save_to_weakref(tx)
+        self._flush_evicted_if_needed()
+
     def _get_all_transactions(self) -> Iterator[BaseTransaction]:
-        self._flush_to_storage(self.dirty_txs.copy())
+        self._flush_to_storage()
         # XXX: explicitly use _get_all_transaction instead of get_all_transactions because there will already be a
         #      TransactionCacheStorage.get_all_transactions outer method
         for tx in self.store._get_all_transactions():
@@ -250,7 +477,7 @@ class TransactionCacheStorage(BaseTransactionStorage):
             yield tx
 
     def is_empty(self) -> bool:
-        self._flush_to_storage(self.dirty_txs.copy())
+        self._flush_to_storage()
         return self.store.is_empty()
 
     def add_value(self, key: str, value: str) -> None:
@@ -263,8 +490,15 @@ class TransactionCacheStorage(BaseTransactionStorage):
         return self.store.get_value(key)
 
     def flush(self):
-        self._flush_to_storage(self.dirty_txs.copy())
+        self._flush_to_storage()
+
+    def close(self) -> None:
+        self.store.close()
 
     @override
     def migrate_vertex_children(self) -> None:
         self.store.migrate_vertex_children()
+
+    @override
+    def migrate_static_metadata_to_binary(self) -> None:
+        self.store.migrate_static_metadata_to_binary()
@@ -14,7 +14,7 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Iterator, Optional
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional, Union
 
 from structlog import get_logger
 from typing_extensions import override
@@ -24,7 +24,9 @@ from hathor.storage import RocksDBStorage
 from hathor.transaction.static_metadata import VertexStaticMetadata
 from hathor.transaction.storage.exceptions import TransactionDoesNotExist
 from hathor.transaction.storage.migrations import MigrationState
+from hathor.transaction.storage.snapshot import StorageSnapshot
 from hathor.transaction.storage.transaction_storage import BaseTransactionStorage
+from hathor.transaction.storage.vertex_blob_store import BlobLocation, VertexBlobStore
 from hathor.transaction.vertex_children import RocksDBVertexChildrenService
 from hathor.transaction.vertex_parser import VertexParser
 from hathor.types import VertexId
@@ -45,12 +47,17 @@ _CF_NAME_META = b'meta'
 _CF_NAME_STATIC_META = b'static-meta'
 _CF_NAME_ATTR = b'attr'
 _CF_NAME_MIGRATIONS = b'migrations'
+_CF_NAME_TX_LOCATION = b'tx-location'
+_ATTR_VERTEX_BLOB_STORE = 'vertex_blob_store'
 
 
 class TransactionRocksDBStorage(BaseTransactionStorage):
     """This storage saves tx and metadata to the same key on RocksDB
 
     It uses Protobuf serialization internally.
+
+    When a `VertexBlobStore` is used, the bytes of the vertices are saved in it instead, and RocksDB only keeps their
+    location. A database must always be opened with or always without a blob store.
     """
 
     def __init__(
@@ -62,6 +69,7 @@ class TransactionRocksDBStorage(BaseTransactionStorage):
         vertex_parser: VertexParser,
         nc_storage_factory: NCStorageFactory,
         vertex_children_service: RocksDBVertexChildrenService,
+        vertex_blob_store: Optional[VertexBlobStore] = None,
     ) -> None:
         self._cf_tx = rocksdb_storage.get_or_create_column_family(_CF_NAME_TX)
         self._cf_meta = rocksdb_storage.get_or_create_column_family(_CF_NAME_META)
@@ -72,6 +80,14 @@ class TransactionRocksDBStorage(BaseTransactionStorage):
         self._rocksdb_storage = rocksdb_storage
         self._db = rocksdb_storage.get_db()
         self.vertex_parser = vertex_parser
+
+        self._vertex_blob_store = vertex_blob_store
+        # column family with the bytes of the vertices, or with their location in the blob store
+        self._cf_vertex = self._cf_tx
+        if vertex_blob_store is not None:
+            self._cf_vertex = rocksdb_storage.get_or_create_column_family(_CF_NAME_TX_LOCATION)
+        self._check_vertex_blob_store()
+
         super().__init__(
             indexes=indexes,
             settings=settings,
@@ -79,17 +95,44 @@ class TransactionRocksDBStorage(BaseTransactionStorage):
             vertex_children_service=vertex_children_service,
         )
 
-    def _load_from_bytes(self, tx_data: bytes, meta_data: bytes) -> 'BaseTransaction':
+    def _load_from_bytes(
+        self,
+        tx_data: bytes,
+        meta_data: bytes,
+        static_meta_data: Optional[bytes],
+    ) -> 'BaseTransaction':
         from hathor.transaction.transaction_metadata import TransactionMetadata
 
         tx = self.vertex_parser.deserialize(tx_data)
         tx._metadata = TransactionMetadata.from_bytes(meta_data)
         tx.storage = self
+        self._load_static_metadata(tx, static_meta_data)
         return tx
 
     def _tx_to_bytes(self, tx: 'BaseTransaction') -> bytes:
         return bytes(tx)
 
+    def _check_vertex_blob_store(self) -> None:
+        """Make sure the database is not opened with a blob store if it was created without one, and vice versa."""
+        uses_blob_store = self.get_value(_ATTR_VERTEX_BLOB_STORE) == '1'
+        if self._vertex_blob_store is None:
+            if uses_blob_store:
+                raise ValueError('this database saves vertices in a vertex blob store, which must be enabled')
+            return
+        if uses_blob_store:
+            return
+        keys = self._db.iterkeys(self._cf_tx)
+        keys.seek_to_first()
+        if any(True for _ in keys):
+            raise ValueError('the vertex blob store cannot be enabled in a database created without it')
+        self.add_value(_ATTR_VERTEX_BLOB_STORE, '1')
+
+    def _get_vertex_data(self, value: bytes) -> bytes:
+        """Return the bytes of a vertex from what's saved in its column family."""
+        if self._vertex_blob_store is None:
+            return value
+        return self._vertex_blob_store.read(BlobLocation.from_bytes(value))
+
     def get_migration_state(self, migration_name: str) -> MigrationState:
         key = migration_name.encode('ascii')
         value = self._db.get((self._cf_migrations, key))
@@ -104,7 +147,7 @@ class TransactionRocksDBStorage(BaseTransactionStorage):
 
     def remove_transaction(self, tx: 'BaseTransaction') -> None:
         super().remove_transaction(tx)
-        self._db.delete((self._cf_tx, tx.hash))
+        self._db.delete((self._cf_vertex, tx.hash))
         self._db.delete((self._cf_meta, tx.hash))
         self._db.delete((self._cf_static_meta, tx.hash))
         self._remove_from_weakref(tx)
@@ -115,32 +158,90 @@ class TransactionRocksDBStorage(BaseTransactionStorage):
         self._save_to_weakref(tx)
 
     def _save_transaction(self, tx: 'BaseTransaction', *, only_metadata: bool = False) -> None:
+        self._put_transaction(tx, only_metadata=only_metadata, database=self._db)
+
+    @override
+    def close(self) -> None:
+        if self._vertex_blob_store is not None:
+            self._vertex_blob_store.close()
+
+    @override
+    def _save_transactions(self, txs: Iterable['BaseTransaction'], *, sync: bool = False) -> None:
+        """Save many transactions and their metadata with a single `WriteBatch`."""
+        import rocksdb
+        batch = rocksdb.WriteBatch()
+
+        txs_by_hash = {tx.hash: tx for tx in txs}
+        stored: list[Optional[bytes]] = [None] * len(txs_by_hash)
+        if self._vertex_blob_store is not None:
+            # vertices already in the blob store are not appended again
+            stored = self._db.multi_get([(self._cf_vertex, key) for key in txs_by_hash], as_dict=False)
+        for tx, stored_value in zip(txs_by_hash.values(), stored):
+            self._put_transaction(tx, only_metadata=False, database=batch, is_stored=stored_value is not None)
+
+        if sync and self._vertex_blob_store is not None:
+            self._vertex_blob_store.sync()
+        self._db.write(batch, sync=sync)
+
+    def _put_transaction(
+        self,
+        tx: 'BaseTransaction',
+        *,
+        only_metadata: bool,
+        database: Union['rocksdb.DB', 'rocksdb.WriteBatch'],
+        is_stored: Optional[bool] = None,
+    ) -> None:
         key = tx.hash
         if not only_metadata:
-            tx_data = self._tx_to_bytes(tx)
-            self._db.put((self._cf_tx, key), tx_data)
+            self._put_vertex_data(tx, database=database, is_stored=is_stored)
         meta_data = tx.get_metadata(use_storage=False).to_bytes()
-        self._db.put((self._cf_meta, key), meta_data)
+        database.put((self._cf_meta, key), meta_data)
+
+    def _put_vertex_data(
+        self,
+        tx: 'BaseTransaction',
+        *,
+        database: Union['rocksdb.DB', 'rocksdb.WriteBatch'],
+        is_stored: Optional[bool],
+    ) -> None:
+        """Save the bytes of a vertex. When using a blob store, `is_stored` tells whether it's already stored in it,
+        or None if it must be checked."""
+        if self._vertex_blob_store is None:
+            database.put((self._cf_tx, tx.hash), self._tx_to_bytes(tx))
+            return
+        if is_stored is None:
+            is_stored = self.transaction_exists(tx.hash)
+        if not is_stored:
+            location = self._vertex_blob_store.append(self._tx_to_bytes(tx))
+            database.put((self._cf_vertex, tx.hash), location.to_bytes())
 
     @override
     def _save_static_metadata(self, tx: 'BaseTransaction') -> None:
-        self._db.put((self._cf_static_meta, tx.hash), tx.static_metadata.json_dumpb())
+        self._db.put((self._cf_static_meta, tx.hash), tx.static_metadata.to_bytes())
 
-    def _load_static_metadata(self, vertex: 'BaseTransaction') -> None:
+    def _load_static_metadata(self, vertex: 'BaseTransaction', data: Optional[bytes]) -> None:
         """Set vertex static metadata loaded from what's saved in this storage."""
         if vertex.is_genesis:
             vertex.init_static_metadata_from_storage(self._settings, self)
             return
-        data = self._db.get((self._cf_static_meta, vertex.hash))
         assert data is not None, f'static metadata not found for vertex {vertex.hash_hex}'
         static_metadata = VertexStaticMetadata.from_bytes(data, target=vertex)
         vertex.set_static_metadata(static_metadata)
 
+    @override
+    def snapshot(self) -> StorageSnapshot:
+        return StorageSnapshot(
+            self,
+            indexes=self.indexes,
+            pending_vertices={},
+            best_block_tips=self.get_best_block_tips(),
+        )
+
     def transaction_exists(self, hash_bytes: bytes) -> bool:
-        may_exist, _ = self._db.key_may_exist((self._cf_tx, hash_bytes))
+        may_exist, _ = self._db.key_may_exist((self._cf_vertex, hash_bytes))
         if not may_exist:
             return False
-        tx_exists = self._db.get((self._cf_tx, hash_bytes)) is not None
+        tx_exists = self._db.get((self._cf_vertex, hash_bytes)) is not None
         return tx_exists
 
     def _get_transaction(self, hash_bytes: bytes) -> 'BaseTransaction':
@@ -159,23 +260,64 @@ class TransactionRocksDBStorage(BaseTransactionStorage):
         self._save_to_weakref(tx)
         return tx
 
+    @override
+    def _get_transactions(self, hashes: list[bytes]) -> list['BaseTransaction']:
+        txs: dict[bytes, 'BaseTransaction'] = {}
+        for hash_bytes in hashes:
+            tx = self.get_transaction_from_weakref(hash_bytes)
+            if tx is not None:
+                txs[hash_bytes] = tx
+
+        missing = [hash_bytes for hash_bytes in dict.fromkeys(hashes) if hash_bytes not in txs]
+        for hash_bytes, tx in zip(missing, self._get_transactions_from_db(missing)):
+            if not tx:
+                raise TransactionDoesNotExist(hash_bytes.hex())
+            assert tx.hash == hash_bytes
+            self._save_to_weakref(tx)
+            txs[hash_bytes] = tx
+
+        return [txs[hash_bytes] for hash_bytes in hashes]
+
     def _get_transaction_from_db(self, hash_bytes: bytes) -> Optional['BaseTransaction']:
-        key = hash_bytes
-        tx_data = self._db.get((self._cf_tx, key))
-        meta_data = self._db.get((self._cf_meta, key))
-        if tx_data is None:
-            return None
-        assert meta_data is not None, 'expected metadata to exist when tx exists'
-        tx = self._load_from_bytes(tx_data, meta_data)
-        self._load_static_metadata(tx)
+        tx, = self._get_transactions_from_db([hash_bytes])
         return tx
 
-    def _get_tx(self, hash_bytes: bytes, tx_data: bytes) -> 'BaseTransaction':
+    def _get_transactions_from_db(
+        self,
+        hashes: list[bytes],
+        snapshot: Optional['rocksdb.Snapshot'] = None,
+    ) -> list[Optional['BaseTransaction']]:
+        """Load transactions from the database, in the same order, or None for the ones that do not exist.
+
+        The tx, metadata and static metadata of all transactions are read with a single `multi_get`, from `snapshot`
+        if it's given. The transactions are not added to the weakref, so this is safe to call from another thread."""
+        if not hashes:
+            return []
+        keys: list[tuple['rocksdb.ColumnFamilyHandle', bytes]] = []
+        for hash_bytes in hashes:
+            keys.append((self._cf_vertex, hash_bytes))
+            keys.append((self._cf_meta, hash_bytes))
+            keys.append((self._cf_static_meta, hash_bytes))
+        values = iter(self._db.multi_get(keys, as_dict=False, snapshot=snapshot))
+
+        txs: list[Optional['BaseTransaction']] = []
+        for vertex_value, meta_data, static_meta_data in zip(values, values, values):
+            if vertex_value is None:
+                txs.append(None)
+                continue
+            assert meta_data is not None, 'expected metadata to exist when tx exists'
+            tx_data = self._get_vertex_data(vertex_value)
+            txs.append(self._load_from_bytes(tx_data, meta_data, static_meta_data))
+        return txs
+
+    def _get_tx(self, hash_bytes: bytes, vertex_value: bytes) -> 'BaseTransaction':
         tx = self.get_transaction_from_weakref(hash_bytes)
         if tx is None:
-            meta_data = self._db.get((self._cf_meta, hash_bytes))
-            tx = self._load_from_bytes(tx_data, meta_data)
-            self._load_static_metadata(tx)
+            meta_data, static_meta_data = self._db.multi_get(
+                [(self._cf_meta, hash_bytes), (self._cf_static_meta, hash_bytes)],
+                as_dict=False,
+            )
+            tx = self._load_from_bytes(self._get_vertex_data(vertex_value), meta_data, static_meta_data)
             assert tx.hash == hash_bytes
             self._save_to_weakref(tx)
         return tx
@@ -183,18 +325,18 @@ class TransactionRocksDBStorage(BaseTransactionStorage):
     def _get_all_transactions(self) -> Iterator['BaseTransaction']:
         tx: Optional['BaseTransaction']
 
-        items = self._db.iteritems(self._cf_tx)
+        items = self._db.iteritems(self._cf_vertex)
         items.seek_to_first()
 
-        for key, tx_data in items:
+        for key, vertex_value in items:
             _, hash_bytes = key
 
             lock = self._get_lock(hash_bytes)
             if lock:
                 with lock:
-                    tx = self._get_tx(hash_bytes, tx_data)
+                    tx = self._get_tx(hash_bytes, vertex_value)
             else:
-                tx = self._get_tx(hash_bytes, tx_data)
+                tx = self._get_tx(hash_bytes, vertex_value)
 
             assert tx is not None
             yield tx
@@ -202,7 +344,7 @@ class TransactionRocksDBStorage(BaseTransactionStorage):
     def is_empty(self) -> bool:
         # We consider 3 or less transactions as empty, because we want to ignore the genesis
         # block and txs
-        keys = self._db.iterkeys(self._cf_tx)
+        keys = self._db.iterkeys(self._cf_vertex)
         keys.seek_to_first()
         count = 0
 
@@ -229,6 +371,10 @@ class TransactionRocksDBStorage(BaseTransactionStorage):
         for cf in column_families:
             sizes[cf.name] = float(self._db.get_property(b'rocksdb.total-sst-files-size', cf))
 
+        if cfs is None and self._vertex_blob_store is not None:
+            # not a column family, but it's where the vertices are
+            sizes[b'vertex-blobs'] = float(self._vertex_blob_store.get_total_size())
+
         return sizes
 
     def add_value(self, key: str, value: str) -> None:
@@ -283,3 +429,20 @@ class TransactionRocksDBStorage(BaseTransactionStorage):
             assert get_old_children_set(vertex.hash) == set(self.vertex_children.get_children(vertex))
             # saving metadata will remove the children list from the stored json.
             self.save_transaction(vertex, only_metadata=True)
+
+    @override
+    def migrate_static_metadata_to_binary(self) -> None:
+        """Rewrite the static metadata saved as json by older versions using the binary format."""
+        import rocksdb
+
+        batch = rocksdb.WriteBatch()
+        max_writes_per_batch = 10_000
+
+        self.log.info('converting static metadata to binary...')
+        for vertex in progress(self._get_all_transactions(), log=self.log, total=None):
+            batch.put((self._cf_static_meta, vertex.hash), vertex.static_metadata.to_bytes())
+            if batch.count() >= max_writes_per_batch:
+                self._db.write(batch)
+                batch.clear()
+
+        self._db.write(batch)  # one last write to clear the last batch
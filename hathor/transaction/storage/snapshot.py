@@ -0,0 +1,205 @@
+# Copyright 2025 Hathor Labs
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Iterable, Optional, cast
+
+from typing_extensions import override
+
+from hathor.transaction import BaseTransaction, Block, TransactionMetadata
+from hathor.transaction.storage.exceptions import TransactionDoesNotExist
+from hathor.transaction.storage.vertex_storage_protocol import VertexStorageProtocol
+from hathor.types import VertexId
+
+if TYPE_CHECKING:
+    import rocksdb
+
+    from hathor.indexes import IndexesManager
+    from hathor.nanocontracts.storage import NCBlockStorage, NCContractStorage
+    from hathor.nanocontracts.types import ContractId
+    from hathor.transaction.storage.rocksdb_storage import TransactionRocksDBStorage
+    from hathor.transaction.storage.transaction_storage import TransactionStorage
+
+
+class _SnapshotDB:
+    """Read-only view of a RocksDB database, where all reads are done on the same snapshot.
+
+    It has the read methods of `rocksdb.DB` that the storage and the indexes use, the write methods are missing on
+    purpose."""
+
+    def __init__(self, db: rocksdb.DB, snapshot: rocksdb.Snapshot) -> None:
+        self._db = db
+        self._snapshot = snapshot
+
+    def get_column_family(self, name: bytes) -> Optional[rocksdb.ColumnFamilyHandle]:
+        return self._db.get_column_family(name)
+
+    def get(self, key: Any) -> Optional[bytes]:
+        return self._db.get(key, snapshot=self._snapshot)
+
+    def multi_get(self, keys: list[Any], *, as_dict: bool = True) -> Any:
+        return self._db.multi_get(keys, as_dict=as_dict, snapshot=self._snapshot)
+
+    def key_may_exist(self, key: Any) -> tuple[bool, Optional[bytes]]:
+        return self._db.key_may_exist(key, snapshot=self._snapshot)
+
+    def iterkeys(self, *args: Any) -> Any:
+        return self._db.iterkeys(*args, snapshot=self._snapshot)
+
+    def itervalues(self, *args: Any) -> Any:
+        return self._db.itervalues(*args, snapshot=self._snapshot)
+
+    def iteritems(self, *args: Any) -> Any:
+        return self._db.iteritems(*args, snapshot=self._snapshot)
+
+
+class StorageSnapshot(VertexStorageProtocol):
+    """A consistent read-only view of a storage and of its RocksDB indexes, as they were when it was taken.
+
+    It's taken with `TransactionStorage.snapshot()`, which must be called in the reactor thread, and then it can be
+    read from any thread, without blocking the reactor and without seeing the changes that happen after it was taken,
+    like the ones of a reorg. The vertices that are only in memory, because the cache hasn't written them yet, are
+    given to it when it's taken.
+
+    The vertices returned by the snapshot are not the objects of the storage: their `storage` is the snapshot itself,
+    so they can be serialized without touching the storage, and they must not be changed or saved. The indexes that
+    are kept in memory are not part of `indexes`, see `IndexesManager.read_snapshot()`.
+
+    The RocksDB snapshot keeps the old versions of the data alive until this object is garbage collected, so it
+    shouldn't be kept longer than needed.
+    """
+
+    def __init__(
+        self,
+        store: TransactionRocksDBStorage,
+        *,
+        indexes: Optional[IndexesManager],
+        pending_vertices: dict[VertexId, tuple[BaseTransaction, bytes]],
+        best_block_tips: list[VertexId],
+    ) -> None:
+        """
+        :param store: the storage whose database is read
+        :param indexes: the indexes of the storage
+        :param pending_vertices: the vertices that are not in the database yet and the bytes of their metadata
+        :param best_block_tips: the best block tips of the storage when the snapshot is taken
+        """
+        self._store = store
+        self._snapshot = store._db.snapshot()
+        # XXX: the snapshot has all the methods of the database that are used for reading
+        self._db = cast('rocksdb.DB', _SnapshotDB(store._db, self._snapshot))
+        self._pending_vertices = pending_vertices
+        self._best_block_tips = best_block_tips
+        self.indexes = indexes.read_snapshot(self._db) if indexes is not None else None
+        self._nc_storage_factory = store._nc_storage_factory.read_snapshot(self._db)
+
+    def get_transaction(self, hash_bytes: bytes) -> BaseTransaction:
+        """Return a vertex, with the same interface as `TransactionStorage.get_transaction()`."""
+        tx, = self.get_transactions([hash_bytes])
+        return tx
+
+    def get_transactions(self, hashes: Iterable[bytes]) -> list[BaseTransaction]:
+        """Return many vertices in the same order, with the same interface as `TransactionStorage.get_transactions()`.
+        """
+        hashes = list(hashes)
+        txs: dict[bytes, BaseTransaction] = {}
+        missing: list[bytes] = []
+        for hash_bytes in dict.fromkeys(hashes):
+            pending = self._pending_vertices.get(hash_bytes)
+            if pending is None:
+                missing.append(hash_bytes)
+                continue
+            tx, meta_data = pending
+            # the vertex itself doesn't change, only its metadata, which is a copy made when the snapshot was taken
+            tx = tx.clone(include_metadata=False, include_storage=False)
+            tx._metadata = TransactionMetadata.from_bytes(meta_data)
+            txs[hash_bytes] = tx
+
+        for hash_bytes, stored_tx in zip(missing, self._store._get_transactions_from_db(missing, self._snapshot)):
+            if stored_tx is None:
+                raise TransactionDoesNotExist(hash_bytes.hex())
+            txs[hash_bytes] = stored_tx
+
+        for tx in txs.values():
+            # XXX: the snapshot has the methods of the storage that are used to read the vertices
+            tx.storage = cast('TransactionStorage', self)
+        return [txs[hash_bytes] for hash_bytes in hashes]
+
+    def get_best_block(self) -> Block:
+        """Return the best block when the snapshot was taken, with the same interface as
+        `TransactionStorage.get_best_block()`."""
+        assert self.indexes is not None
+        return self.get_block(self.indexes.height.get_tip())
+
+    def get_newest_blocks(self, count: int) -> tuple[list[Block], bool]:
+        """Return the newest blocks, with the same interface as `TransactionStorage.get_newest_blocks()`."""
+        assert self.indexes is not None
+        block_hashes, has_more = self.indexes.sorted_blocks.get_newest(count)
+        return [cast(Block, block) for block in self.get_transactions(block_hashes)], has_more
+
+    def get_newest_txs(self, count: int) -> tuple[list[BaseTransaction], bool]:
+        """Return the newest transactions, with the same interface as `TransactionStorage.get_newest_txs()`."""
+        assert self.indexes is not None
+        tx_hashes, has_more = self.indexes.sorted_txs.get_newest(count)
+        return self.get_transactions(tx_hashes), has_more
+
+    def get_nc_block_storage(self, block: Block) -> NCBlockStorage:
+        """Return the nano block storage for a given block, read from the snapshot, with the same interface as
+        `HathorManager.get_nc_block_storage()`."""
+        return self._nc_storage_factory.get_block_storage_from_block(block)
+
+    def get_nc_storage(self, block: Block, contract_id: ContractId) -> NCContractStorage:
+        """Return a contract storage with the contract state at a given block, read from the snapshot, with the same
+        interface as `TransactionStorage.get_nc_storage()`."""
+        from hathor.nanocontracts.types import ContractId, VertexId as NCVertexId
+        if not block.is_genesis:
+            block_storage = self._nc_storage_factory.get_block_storage_from_block(block)
+        else:
+            block_storage = self._nc_storage_factory.get_empty_block_storage()
+        return block_storage.get_contract_storage(ContractId(NCVertexId(contract_id)))
+
+    def get_metadata(self, hash_bytes: bytes) -> Optional[TransactionMetadata]:
+        """Return the metadata of a vertex, or None if it doesn't exist."""
+        try:
+            return self.get_transaction(hash_bytes).get_metadata(use_storage=False)
+        except TransactionDoesNotExist:
+            return None
+
+    def transaction_exists(self, hash_bytes: bytes) -> bool:
+        """Return whether a vertex exists."""
+        if hash_bytes in self._pending_vertices:
+            return True
+        return self._db.get((self._store._cf_vertex, hash_bytes)) is not None
+
+    @override
+    def get_vertex(self, vertex_id: VertexId) -> BaseTransaction:
+        return self.get_transaction(vertex_id)
+
+    @override
+    def get_vertices(self, vertex_ids: Iterable[VertexId]) -> list[BaseTransaction]:
+        return self.get_transactions(vertex_ids)
+
+    @override
+    def get_block(self, block_id: VertexId) -> Block:
+        block = self.get_vertex(block_id)
+        assert isinstance(block, Block)
+        return block
+
+    @override
+    def get_parent_block(self, block: Block) -> Block:
+        return self.get_block(block.get_block_parent_hash())
+
+    @override
+    def get_best_block_tips(self) -> list[VertexId]:
+        return self._best_block_tips[:]
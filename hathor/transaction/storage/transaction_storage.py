@@ -17,9 +17,9 @@ from __future__ import annotations
 import hashlib
 from abc import ABC, abstractmethod, abstractproperty
 from collections import deque
-from contextlib import AbstractContextManager
+from contextlib import AbstractContextManager, ExitStack
 from threading import Lock
-from typing import TYPE_CHECKING, Any, Iterator, NamedTuple, Optional, cast
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, NamedTuple, Optional, cast
 from weakref import WeakValueDictionary
 
 from intervaltree.interval import Interval
@@ -46,6 +46,7 @@ from hathor.transaction.storage.migrations import (
     include_funds_for_first_block,
     migrate_vertex_children,
     nc_storage_compat2,
+    static_metadata_to_binary,
 )
 from hathor.transaction.storage.tx_allow_scope import TxAllowScope, tx_allow_context
 from hathor.transaction.transaction import Transaction
@@ -60,6 +61,7 @@ if TYPE_CHECKING:
     from hathor.nanocontracts.catalog import NCBlueprintCatalog
     from hathor.nanocontracts.storage import NCBlockStorage, NCContractStorage, NCStorageFactory
     from hathor.nanocontracts.types import BlueprintId, ContractId
+    from hathor.transaction.storage.snapshot import StorageSnapshot
     from hathor.transaction.token_creation_tx import TokenCreationTransaction
 
 cpu = get_cpu_profiler()
@@ -70,6 +72,7 @@ cpu = get_cpu_profiler()
 NULL_INDEX_LAST_STARTED_AT = 0
 NULL_LAST_STARTED_AT = 1
 INDEX_ATTR_PREFIX = 'index_'
+INDEX_BACKFILL_ATTR_PREFIX = 'index_backfill_'
 
 
 class AllTipsCache(NamedTuple):
@@ -108,6 +111,7 @@ class TransactionStorage(ABC):
         include_funds_for_first_block.Migration,
         nc_storage_compat2.Migration,
         migrate_vertex_children.Migration,
+        static_metadata_to_binary.Migration,
     ]
 
     _migrations: list[BaseMigration]
@@ -162,6 +166,10 @@ class TransactionStorage(ABC):
 
         self._saving_genesis = False
 
+        # Cache of loaded on-chain blueprint classes, shared by all instances of the blueprint transactions.
+        from hathor.nanocontracts.blueprint_cache import BlueprintClassCache
+        self.blueprint_cache: BlueprintClassCache = BlueprintClassCache()
+
         # Migrations instances
         self._migrations = [cls() for cls in self._migration_factories]
 
@@ -523,6 +531,15 @@ class TransactionStorage(ABC):
         """
         raise NotImplementedError
 
+    def _get_transactions(self, hashes: list[bytes]) -> list[BaseTransaction]:
+        """Returns the transactions with the given hashes, in the same order.
+
+        By default they are fetched one by one, storages should override it when they can fetch many at once.
+
+        :raises TransactionDoesNotExist: If any of the transactions does not exist.
+        """
+        return [self._get_transaction(hash_bytes) for hash_bytes in hashes]
+
     def disable_lock(self) -> None:
         """ Turn off lock
         """
@@ -561,6 +578,27 @@ class TransactionStorage(ABC):
         self.post_get_validation(tx)
         return tx
 
+    def get_transactions(self, hashes: Iterable[bytes]) -> list[BaseTransaction]:
+        """Acquire the locks and get the transactions with the given hashes, in the same order.
+
+        This is faster than calling `get_transaction()` for each hash, because the storage can fetch all of them at
+        once.
+
+        :raises TransactionDoesNotExist: If any of the transactions does not exist.
+        """
+        hashes = list(hashes)
+        with ExitStack() as stack:
+            if self._should_lock:
+                # Locks are always acquired in the same order, so concurrent calls cannot deadlock.
+                for hash_bytes in sorted(set(hashes)):
+                    lock = self._get_lock(hash_bytes)
+                    assert lock is not None
+                    stack.enter_context(lock)
+            txs = self._get_transactions(hashes)
+        for tx in txs:
+            self.post_get_validation(tx)
+        return txs
+
     def get_tx(self, vertex_id: VertexId) -> Transaction:
         """Return a Transaction."""
         tx = self.get_transaction(vertex_id)
@@ -601,6 +639,14 @@ class TransactionStorage(ABC):
         except TransactionDoesNotExist:
             return None
 
+    def snapshot(self) -> StorageSnapshot:
+        """Take a consistent read-only view of this storage and its indexes, which can be read from another thread.
+
+        It must be called in the reactor thread, between the processing of two vertices, so the snapshot never has
+        half-applied changes. See `StorageSnapshot`.
+        """
+        raise NotImplementedError
+
     def get_all_transactions(self) -> Iterator[BaseTransaction]:
         """Return all vertices (transactions and blocks) within the allowed scope.
         """
@@ -993,6 +1039,20 @@ class TransactionStorage(ABC):
         attr_name = INDEX_ATTR_PREFIX + index_db_name
         self.add_value(attr_name, str(timestamp))
 
+    def get_index_backfill_cursor(self, index_db_name: str) -> Optional[str]:
+        """ Return the position of the background initialization of an index, or None if it isn't being backfilled.
+        """
+        return self.get_value(INDEX_BACKFILL_ATTR_PREFIX + index_db_name)
+
+    def set_index_backfill_cursor(self, index_db_name: str, cursor: Optional[str]) -> None:
+        """ Update the position of the background initialization of an index, None means it has finished.
+        """
+        attr_name = INDEX_BACKFILL_ATTR_PREFIX + index_db_name
+        if cursor is None:
+            self.remove_value(attr_name)
+        else:
+            self.add_value(attr_name, cursor)
+
     def update_last_started_at(self, timestamp: int) -> None:
         """ Updates the respective timestamps of when the node was last started.
 
@@ -1014,6 +1074,13 @@ class TransactionStorage(ABC):
         """
         raise NotImplementedError
 
+    def close(self) -> None:
+        """Release the resources held by the storage, it's called after the last flush during the shutdown of the node.
+
+           Should be implemented by storages that keep files open besides the RocksDB database.
+        """
+        pass
+
     def iter_mempool_tips_from_tx_tips(self) -> Iterator[Transaction]:
         """ Same behavior as the mempool index for iterating over the tips.
 
@@ -1125,6 +1192,9 @@ class TransactionStorage(ABC):
     def get_vertex(self, vertex_id: VertexId) -> BaseTransaction:
         return self.get_transaction(vertex_id)
 
+    def get_vertices(self, vertex_ids: Iterable[VertexId]) -> list[BaseTransaction]:
+        return self.get_transactions(vertex_ids)
+
     def get_block(self, block_id: VertexId) -> Block:
         block = self.get_vertex(block_id)
         assert isinstance(block, Block)
@@ -1207,7 +1277,7 @@ class TransactionStorage(ABC):
         from hathor.nanocontracts import OnChainBlueprint
         blueprint = self._get_blueprint(blueprint_id)
         if isinstance(blueprint, OnChainBlueprint):
-            return blueprint.get_blueprint_class()
+            return self.blueprint_cache.get_blueprint_class(blueprint)
         else:
             return blueprint
 
@@ -1236,6 +1306,10 @@ class TransactionStorage(ABC):
     def migrate_vertex_children(self) -> None:
         raise NotImplementedError
 
+    @abstractmethod
+    def migrate_static_metadata_to_binary(self) -> None:
+        raise NotImplementedError
+
 
 class BaseTransactionStorage(TransactionStorage):
     indexes: Optional[IndexesManager]
@@ -1280,6 +1354,14 @@ class BaseTransactionStorage(TransactionStorage):
     def _save_transaction(self, tx: BaseTransaction, *, only_metadata: bool = False) -> None:
         raise NotImplementedError
 
+    def _save_transactions(self, txs: Iterable[BaseTransaction], *, sync: bool = False) -> None:
+        """Save many transactions and their metadata, without modifying indexes.
+
+        Storages that can write them atomically in a single batch should override this method. When `sync` is True
+        the write is only finished after it is persisted to disk."""
+        for tx in txs:
+            self._save_transaction(tx)
+
     def reset_indexes(self) -> None:
         """Reset all indexes. This function should not be called unless you know what you are doing."""
         assert self.indexes is not None, 'Cannot reset indexes because they have not been enabled.'
@@ -1527,13 +1609,15 @@ class BaseTransactionStorage(TransactionStorage):
                 raise NotImplementedError
         assert self.indexes is not None
         self._all_tips_cache = None
-        self.indexes.add_tx(tx)
+        with self.indexes.write_batch():
+            self.indexes.add_tx(tx)
 
     def del_from_indexes(self, tx: BaseTransaction, *, remove_all: bool = False, relax_assert: bool = False) -> None:
         if self.indexes is None:
             raise NotImplementedError
         assert self.indexes is not None
-        self.indexes.del_tx(tx, remove_all=remove_all, relax_assert=relax_assert)
+        with self.indexes.write_batch():
+            self.indexes.del_tx(tx, remove_all=remove_all, relax_assert=relax_assert)
 
     def get_block_count(self) -> int:
         if self.indexes is None:
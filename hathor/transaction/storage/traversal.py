@@ -115,11 +115,13 @@ class GenericWalk(ABC):
         """ Add neighbors of `tx` to be visited later according to the configuration.
         """
         it = self._get_iterator(tx, is_left_to_right=self.is_left_to_right)
+        neighbor_ids: list['VertexId'] = []
         for _hash in it:
             if _hash not in self.seen:
                 self.seen.add(_hash)
-                neighbor = self.storage.get_vertex(_hash)
-                self._push_visit(neighbor)
+                neighbor_ids.append(_hash)
+        for neighbor in self.storage.get_vertices(neighbor_ids):
+            self._push_visit(neighbor)
 
     def skip_neighbors(self, tx: 'BaseTransaction') -> None:
         """ Mark `tx` to have its neighbors skipped, i.e., they will not be added to be
@@ -0,0 +1,172 @@
+# Copyright 2025 Hathor Labs
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import mmap
+import os
+import re
+import struct
+from threading import Lock
+from typing import BinaryIO, NamedTuple
+
+from structlog import get_logger
+
+logger = get_logger()
+
+# Name of the directory of the blob store, inside the data directory.
+VERTEX_BLOB_STORE_DIR: str = 'vertex_blobs'
+
+# Default max size of each segment file. A segment can be larger than this if a single blob is larger.
+DEFAULT_MAX_SEGMENT_SIZE: int = 256 * 1024 * 1024
+
+# Default size by which a segment must grow past its memory map before it's mapped again, blobs appended after it was
+# mapped are read from the file until then.
+DEFAULT_MMAP_GROWTH_STEP: int = 16 * 1024 * 1024
+
+_SEGMENT_NAME_FORMAT = 'segment-{:08d}.blob'
+_SEGMENT_NAME_RE = re.compile(r'^segment-(\d{8})\.blob$')
+_LOCATION_STRUCT = struct.Struct('!IQI')
+
+
+class BlobLocation(NamedTuple):
+    """Location of a blob in the segment files."""
+    segment_id: int
+    offset: int
+    length: int
+
+    def to_bytes(self) -> bytes:
+        return _LOCATION_STRUCT.pack(self.segment_id, self.offset, self.length)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> BlobLocation:
+        return cls(*_LOCATION_STRUCT.unpack(data))
+
+
+class VertexBlobStore:
+    """Append-only store for the bytes of vertices, which never change after they are saved.
+
+    Blobs are appended to segment files, and a new segment is started when the current one reaches
+    `max_segment_size`. The caller keeps the `BlobLocation` of each blob, which is used to read it back through a
+    memory map of its segment. The segment being appended to is mapped again each time it grows by `mmap_growth_step`,
+    the blobs past its map are read from the file. Blobs are never removed, space of removed vertices is not reclaimed.
+
+    Appending and reading can be done from different threads.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        max_segment_size: int = DEFAULT_MAX_SEGMENT_SIZE,
+        mmap_growth_step: int = DEFAULT_MMAP_GROWTH_STEP,
+    ) -> None:
+        self.log = logger.new()
+        self.path = path
+        self.max_segment_size = max_segment_size
+        self.mmap_growth_step = mmap_growth_step
+        self._lock = Lock()
+        self._mmaps: dict[int, mmap.mmap] = {}
+        # read-only file descriptors of the segments that were read, used to map them and to read past their maps
+        self._read_fds: dict[int, int] = {}
+
+        os.makedirs(self.path, exist_ok=True)
+        segment_ids = self._list_segment_ids()
+        self._segment_id = segment_ids[-1] if segment_ids else 0
+        self._segment_file: BinaryIO = open(self._segment_path(self._segment_id), 'ab')
+        self._segment_size = self._segment_file.tell()
+        self.log.debug('open vertex blob store', path=self.path, segments=len(segment_ids))
+
+    def _list_segment_ids(self) -> list[int]:
+        segment_ids = []
+        for name in os.listdir(self.path):
+            match = _SEGMENT_NAME_RE.match(name)
+            if match is not None:
+                segment_ids.append(int(match.group(1)))
+        return sorted(segment_ids)
+
+    def _segment_path(self, segment_id: int) -> str:
+        return os.path.join(self.path, _SEGMENT_NAME_FORMAT.format(segment_id))
+
+    def append(self, data: bytes) -> BlobLocation:
+        """Append a blob and return its location. The data is handed to the OS before this method returns, so it is
+        as durable as a RocksDB write without sync."""
+        with self._lock:
+            if self._segment_size > 0 and self._segment_size + len(data) > self.max_segment_size:
+                self._start_new_segment()
+            location = BlobLocation(self._segment_id, self._segment_size, len(data))
+            self._segment_file.write(data)
+            self._segment_file.flush()
+            self._segment_size += len(data)
+        return location
+
+    def sync(self) -> None:
+        """Wait until all appended blobs are persisted to disk."""
+        with self._lock:
+            os.fsync(self._segment_file.fileno())
+
+    def _start_new_segment(self) -> None:
+        os.fsync(self._segment_file.fileno())
+        self._segment_file.close()
+        self._segment_id += 1
+        self._segment_file = open(self._segment_path(self._segment_id), 'ab')
+        self._segment_size = 0
+
+    def read(self, location: BlobLocation) -> bytes:
+        """Read a blob from its location, copying it straight from the memory map of its segment."""
+        end = location.offset + location.length
+        segment_map = self._mmaps.get(location.segment_id)
+        if segment_map is not None and len(segment_map) >= end:
+            return segment_map[location.offset:end]
+        return self._read_unmapped(location)
+
+    def _read_unmapped(self, location: BlobLocation) -> bytes:
+        """Read a blob past the memory map of its segment. The segment is mapped again if it's not mapped yet or if it
+        has grown by `mmap_growth_step` since it was mapped, otherwise the blob is read from the file."""
+        end = location.offset + location.length
+        with self._lock:
+            segment_map = self._mmaps.get(location.segment_id)
+            if segment_map is not None and len(segment_map) >= end:
+                return segment_map[location.offset:end]
+            fd = self._read_fds.get(location.segment_id)
+            if fd is None:
+                fd = os.open(self._segment_path(location.segment_id), os.O_RDONLY)
+                self._read_fds[location.segment_id] = fd
+            size = os.fstat(fd).st_size
+            if size < end:
+                raise ValueError(f'blob out of segment {location.segment_id} bounds: {end} > {size}')
+            if segment_map is not None and size - len(segment_map) < self.mmap_growth_step:
+                return os.pread(fd, location.length, location.offset)
+            new_map = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+            # The old map is not closed, a read on another thread might be slicing it. It is closed when collected.
+            self._mmaps[location.segment_id] = new_map
+            return new_map[location.offset:end]
+
+    def get_total_size(self) -> int:
+        """Return the total size of all segments, in bytes."""
+        return sum(os.path.getsize(self._segment_path(segment_id)) for segment_id in self._list_segment_ids())
+
+    def close(self, *, sync: bool = True) -> None:
+        with self._lock:
+            if self._segment_file.closed:
+                return
+            if sync:
+                os.fsync(self._segment_file.fileno())
+            self._segment_file.close()
+            for segment_map in self._mmaps.values():
+                segment_map.close()
+            self._mmaps.clear()
+            for fd in self._read_fds.values():
+                os.close(fd)
+            self._read_fds.clear()
@@ -0,0 +1,248 @@
+# Copyright 2025 Hathor Labs
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterator, Optional
+
+if TYPE_CHECKING:
+    from hathor.transaction import BaseTransaction
+
+# Default share of the capacity that can be taken by vertices that were accessed more than once.
+DEFAULT_PROTECTED_RATIO: float = 0.8
+
+# Parameters used to estimate the memory used by a vertex from its serialized size. They were measured for regular
+# transactions and blocks, whose python objects take about 1.3kB plus 2.6 bytes per serialized byte.
+_VERTEX_BASE_SIZE: int = 1500
+_VERTEX_SIZE_PER_BYTE: float = 2.6
+# Estimated memory used by each vertex id in the metadata, including the list or set entry.
+_METADATA_ID_SIZE: int = 100
+
+
+def estimate_vertex_size(vertex: BaseTransaction) -> int:
+    """Return an estimate, in bytes, of the memory used by a vertex and its metadata."""
+    return _estimate_struct_size(vertex) + _estimate_metadata_size(vertex)
+
+
+def _estimate_struct_size(vertex: BaseTransaction) -> int:
+    """Return an estimate of the memory used by a vertex without its metadata, which requires serializing it."""
+    return _VERTEX_BASE_SIZE + int(_VERTEX_SIZE_PER_BYTE * len(vertex.get_struct()))
+
+
+def _estimate_metadata_size(vertex: BaseTransaction) -> int:
+    """Return an estimate of the memory used by the metadata of a vertex, the part of its size that can change."""
+    meta = vertex._metadata
+    if meta is None:
+        return 0
+    ids_count = sum(len(spent_by) for spent_by in meta.spent_outputs.values())
+    ids_count += len(meta.voided_by or ())
+    ids_count += len(meta.conflict_with or ())
+    return _METADATA_ID_SIZE * ids_count
+
+
+@dataclass(slots=True)
+class _CacheEntry:
+    vertex: BaseTransaction
+    size: int
+    # Part of `size` that doesn't depend on the metadata. The serialized vertex never changes for the same hash, so
+    # it is estimated once, when the vertex enters the cache.
+    struct_size: int
+
+
+class VertexCache:
+    """Segmented LRU cache of vertices, bounded by the number of vertices and, optionally, by their estimated size.
+
+    New vertices enter the probationary segment and are promoted to the protected segment when they are accessed
+    again, vertices written by the node can enter the protected segment directly. Vertices are evicted from the
+    probationary segment first, so a single scan over many vertices (like an index rebuild or an API paginating the
+    whole history) cannot evict the vertices that are used often. The protected segment takes at most
+    `protected_ratio` of the limits, the least recently used vertices exceeding it are moved back to the probationary
+    segment.
+
+    This class only keeps the vertices, writing evicted dirty vertices to disk is up to the caller.
+    """
+
+    __slots__ = (
+        'capacity',
+        'max_bytes',
+        'protected_ratio',
+        'total_bytes',
+        'count_by_type',
+        'bytes_by_type',
+        '_probation',
+        '_protected',
+        '_protected_bytes',
+    )
+
+    def __init__(
+        self,
+        capacity: int,
+        *,
+        max_bytes: Optional[int] = None,
+        protected_ratio: float = DEFAULT_PROTECTED_RATIO,
+    ) -> None:
+        assert capacity >= 0
+        assert max_bytes is None or max_bytes >= 0
+        assert 0 <= protected_ratio < 1
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self.protected_ratio = protected_ratio
+        # Estimated size of all cached vertices, in bytes.
+        self.total_bytes = 0
+        # Number and estimated size of the cached vertices, by vertex type name.
+        self.count_by_type: Counter[str] = Counter()
+        self.bytes_by_type: Counter[str] = Counter()
+        self._probation: OrderedDict[bytes, _CacheEntry] = OrderedDict()
+        self._protected: OrderedDict[bytes, _CacheEntry] = OrderedDict()
+        self._protected_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._probation) + len(self._protected)
+
+    def __contains__(self, vertex_id: bytes) -> bool:
+        return vertex_id in self._probation or vertex_id in self._protected
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._probation
+        yield from self._protected
+
+    def __getitem__(self, vertex_id: bytes) -> BaseTransaction:
+        """Return a vertex without marking it as accessed."""
+        entry = self._probation.get(vertex_id) or self._protected[vertex_id]
+        return entry.vertex
+
+    def __delitem__(self, vertex_id: bytes) -> None:
+        if self.pop(vertex_id) is None:
+            raise KeyError(vertex_id)
+
+    def peek(self, vertex_id: bytes) -> Optional[BaseTransaction]:
+        """Return a vertex without marking it as accessed, or None if it is not in the cache."""
+        entry = self._probation.get(vertex_id) or self._protected.get(vertex_id)
+        return entry.vertex if entry is not None else None
+
+    def get(self, vertex_id: bytes) -> Optional[BaseTransaction]:
+        """Return a vertex and mark it as accessed, or None if it is not in the cache."""
+        entry = self._access(vertex_id)
+        return entry.vertex if entry is not None else None
+
+    def put(self, vertex: BaseTransaction, *, protected: bool = False) -> list[BaseTransaction]:
+        """Add or replace a vertex, marking it as accessed. Return the vertices evicted to make room for it.
+
+        New vertices enter the probationary segment, unless `protected` is True."""
+        entry = self._access(vertex.hash)
+        if entry is not None:
+            # only the metadata can change for the same hash, so the vertex isn't serialized again
+            new_size = entry.struct_size + _estimate_metadata_size(vertex)
+            if vertex.hash in self._protected:
+                self._protected_bytes += new_size - entry.size
+            self._add_size(entry, -1)
+            entry.vertex = vertex
+            entry.size = new_size
+            self._add_size(entry, 1)
+            self._demote_protected()
+            # an accessed vertex is the last one to be evicted, so only the other vertices are evicted here
+            evicted = []
+            while len(self) > 1 and self._is_over_limits(len(self), self.total_bytes):
+                evicted.append(self.popitem())
+            return evicted
+
+        struct_size = _estimate_struct_size(vertex)
+        entry = _CacheEntry(vertex, struct_size + _estimate_metadata_size(vertex), struct_size)
+        evicted = []
+        while len(self) > 0 and self._is_over_limits(len(self) + 1, self.total_bytes + entry.size):
+            evicted.append(self.popitem())
+        if self.capacity == 0:
+            return evicted
+        self._add_size(entry, 1)
+        if protected:
+            self._protected[vertex.hash] = entry
+            self._protected_bytes += entry.size
+            self._demote_protected()
+        else:
+            self._probation[vertex.hash] = entry
+        return evicted
+
+    def pop(self, vertex_id: bytes) -> Optional[BaseTransaction]:
+        """Remove a vertex, returning it if it was in the cache."""
+        entry = self._probation.pop(vertex_id, None)
+        if entry is None:
+            entry = self._protected.pop(vertex_id, None)
+            if entry is None:
+                return None
+            self._protected_bytes -= entry.size
+        self._add_size(entry, -1)
+        return entry.vertex
+
+    def popitem(self) -> BaseTransaction:
+        """Remove and return the vertex that should be evicted first."""
+        segment = self._probation if self._probation else self._protected
+        _, entry = segment.popitem(last=False)
+        if segment is self._protected:
+            self._protected_bytes -= entry.size
+        self._add_size(entry, -1)
+        return entry.vertex
+
+    def shrink(self) -> list[BaseTransaction]:
+        """Evict vertices until the cache is within its limits, which is needed after they are reduced."""
+        evicted = []
+        while len(self) > 0 and self._is_over_limits(len(self), self.total_bytes):
+            evicted.append(self.popitem())
+        return evicted
+
+    def clear(self) -> None:
+        self._probation.clear()
+        self._protected.clear()
+        self._protected_bytes = 0
+        self.total_bytes = 0
+        self.count_by_type.clear()
+        self.bytes_by_type.clear()
+
+    def _is_over_limits(self, count: int, total_bytes: int) -> bool:
+        if count > self.capacity:
+            return True
+        return self.max_bytes is not None and total_bytes > self.max_bytes
+
+    def _access(self, vertex_id: bytes) -> Optional[_CacheEntry]:
+        entry = self._protected.get(vertex_id)
+        if entry is not None:
+            self._protected.move_to_end(vertex_id, last=True)
+            return entry
+
+        entry = self._probation.pop(vertex_id, None)
+        if entry is None:
+            return None
+        # accessed a second time, so it is promoted
+        self._protected[vertex_id] = entry
+        self._protected_bytes += entry.size
+        self._demote_protected()
+        return entry
+
+    def _demote_protected(self) -> None:
+        """Move the least recently used protected vertices back to probation while the segment is over its limits."""
+        max_count = int(self.capacity * self.protected_ratio)
+        max_bytes = int(self.max_bytes * self.protected_ratio) if self.max_bytes is not None else None
+        while len(self._protected) > 1 and (
+            len(self._protected) > max_count or (max_bytes is not None and self._protected_bytes > max_bytes)
+        ):
+            vertex_id, entry = self._protected.popitem(last=False)
+            self._protected_bytes -= entry.size
+            self._probation[vertex_id] = entry
+
+    def _add_size(self, entry: _CacheEntry, sign: int) -> None:
+        vertex_type = type(entry.vertex).__name__
+        self.total_bytes += sign * entry.size
+        self.count_by_type[vertex_type] += sign
+        self.bytes_by_type[vertex_type] += sign * entry.size
@@ -13,7 +13,7 @@
 #  limitations under the License.
 
 from abc import abstractmethod
-from typing import Protocol
+from typing import Iterable, Protocol
 
 from hathor.transaction import BaseTransaction, Block
 from hathor.types import VertexId
@@ -32,6 +32,11 @@ class VertexStorageProtocol(Protocol):
         """Return a vertex from the storage."""
         raise NotImplementedError
 
+    @abstractmethod
+    def get_vertices(self, vertex_ids: Iterable[VertexId]) -> list[BaseTransaction]:
+        """Return many vertices from the storage, in the same order."""
+        raise NotImplementedError
+
     @abstractmethod
     def get_block(self, block_id: VertexId) -> Block:
         """Return a block from the storage."""
@@ -113,12 +113,14 @@ class TransactionVerifier:
             enable_checkdatasig_count=enable_checkdatasig_count,
         )
 
+        assert tx.storage is not None
+        try:
+            spent_txs = tx.storage.get_transactions(tx_input.tx_id for tx_input in tx.inputs)
+        except TransactionDoesNotExist as e:
+            raise InexistentInput('Input tx does not exist: {}'.format(e.args[0]))
+
         n_txops = 0
-        for tx_input in tx.inputs:
-            try:
-                spent_tx = tx.get_spent_tx(tx_input)
-            except TransactionDoesNotExist:
-                raise InexistentInput('Input tx does not exist: {}'.format(tx_input.tx_id.hex()))
+        for tx_input, spent_tx in zip(tx.inputs, spent_txs):
             if tx_input.index >= len(spent_tx.outputs):
                 raise InexistentInput('Output spent by this input does not exist: {} index {}'.format(
                     tx_input.tx_id.hex(), tx_input.index))
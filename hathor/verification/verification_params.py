@@ -27,6 +27,10 @@ class VerificationParams:
     enable_checkdatasig_count: bool
     reject_locked_reward: bool = True
     skip_block_weight_verification: bool = False
+    # only for vertices that are known to be valid, like the ones confirmed under a checkpoint
+    skip_script_verification: bool = False
+    # only for vertices whose proof-of-work was already verified, by the import workers or the sync pipeline
+    skip_pow_verification: bool = False
     enable_nano: bool = False
 
     reject_too_old_vertices: bool = False
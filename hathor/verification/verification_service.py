@@ -261,7 +261,8 @@ class VerificationService:
             return
         self.verify_without_storage(tx, params)
         self.verifiers.tx.verify_sigops_input(tx, params.enable_checkdatasig_count)
-        self.verifiers.tx.verify_inputs(tx)  # need to run verify_inputs first to check if all inputs exist
+        # need to run verify_inputs first to check if all inputs exist
+        self.verifiers.tx.verify_inputs(tx, skip_script=params.skip_script_verification)
         self.verifiers.tx.verify_version(tx, params)
 
         block_storage = self._get_block_storage(params)
@@ -331,7 +332,8 @@ class VerificationService:
     def _verify_without_storage_block(self, block: Block, params: VerificationParams) -> None:
         """ Run all verifications that do not need a storage.
         """
-        self.verifiers.vertex.verify_pow(block)
+        if not params.skip_pow_verification:
+            self.verifiers.vertex.verify_pow(block)
         self._verify_without_storage_base_block(block, params)
 
     def _verify_without_storage_merge_mined_block(self, block: MergeMinedBlock, params: VerificationParams) -> None:
@@ -343,7 +345,7 @@ class VerificationService:
     def _verify_without_storage_tx(self, tx: Transaction, params: VerificationParams) -> None:
         """ Run all verifications that do not need a storage.
         """
-        if self._settings.CONSENSUS_ALGORITHM.is_pow():
+        if self._settings.CONSENSUS_ALGORITHM.is_pow() and not params.skip_pow_verification:
             self.verifiers.vertex.verify_pow(tx)
         self.verifiers.tx.verify_number_of_inputs(tx)
         self.verifiers.vertex.verify_outputs(tx)
@@ -86,44 +86,55 @@ class VertexVerifier:
         my_parents_blocks = 0   # number of block parents
         min_timestamp: Optional[int] = None
 
-        for parent_hash in vertex.parents:
-            try:
-                parent = vertex.storage.get_transaction(parent_hash)
-                if vertex.timestamp <= parent.timestamp:
-                    raise TimestampError('tx={} timestamp={}, parent={} timestamp={}'.format(
+        parents: list[Optional[BaseTransaction]]
+        try:
+            parents = list(vertex.storage.get_transactions(vertex.parents))
+        except TransactionDoesNotExist:
+            # some parent is missing, they're loaded one by one so the parents before it are checked first
+            parents = []
+            for parent_hash in vertex.parents:
+                try:
+                    parents.append(vertex.storage.get_transaction(parent_hash))
+                except TransactionDoesNotExist:
+                    parents.append(None)
+
+        for parent_hash, parent in zip(vertex.parents, parents):
+            if parent is None:
+                raise ParentDoesNotExist('tx={} parent={}'.format(vertex.hash_hex, parent_hash.hex()))
+
+            if vertex.timestamp <= parent.timestamp:
+                raise TimestampError('tx={} timestamp={}, parent={} timestamp={}'.format(
+                    vertex.hash_hex,
+                    vertex.timestamp,
+                    parent.hash_hex,
+                    parent.timestamp,
+                ))
+
+            if parent.is_block:
+                if vertex.is_block and not parent.is_genesis:
+                    if vertex.timestamp - parent.timestamp > self._settings.MAX_DISTANCE_BETWEEN_BLOCKS:
+                        raise TimestampError('Distance between blocks is too big'
+                                             ' ({} seconds)'.format(vertex.timestamp - parent.timestamp))
+                if my_parents_txs > 0:
+                    raise IncorrectParents('Parents which are blocks must come before transactions')
+                for pi_hash in parent.parents:
+                    pi = vertex.storage.get_transaction(parent_hash)
+                    if not pi.is_block:
+                        min_timestamp = (
+                            min(min_timestamp, pi.timestamp) if min_timestamp is not None
+                            else pi.timestamp
+                        )
+                my_parents_blocks += 1
+            else:
+                if min_timestamp and parent.timestamp < min_timestamp:
+                    raise TimestampError('tx={} timestamp={}, parent={} timestamp={}, min_timestamp={}'.format(
                         vertex.hash_hex,
                         vertex.timestamp,
                         parent.hash_hex,
                         parent.timestamp,
+                        min_timestamp
                     ))
-
-                if parent.is_block:
-                    if vertex.is_block and not parent.is_genesis:
-                        if vertex.timestamp - parent.timestamp > self._settings.MAX_DISTANCE_BETWEEN_BLOCKS:
-                            raise TimestampError('Distance between blocks is too big'
-                                                 ' ({} seconds)'.format(vertex.timestamp - parent.timestamp))
-                    if my_parents_txs > 0:
-                        raise IncorrectParents('Parents which are blocks must come before transactions')
-                    for pi_hash in parent.parents:
-                        pi = vertex.storage.get_transaction(parent_hash)
-                        if not pi.is_block:
-                            min_timestamp = (
-                                min(min_timestamp, pi.timestamp) if min_timestamp is not None
-                                else pi.timestamp
-                            )
-                    my_parents_blocks += 1
-                else:
-                    if min_timestamp and parent.timestamp < min_timestamp:
-                        raise TimestampError('tx={} timestamp={}, parent={} timestamp={}, min_timestamp={}'.format(
-                            vertex.hash_hex,
-                            vertex.timestamp,
-                            parent.hash_hex,
-                            parent.timestamp,
-                            min_timestamp
-                        ))
-                    my_parents_txs += 1
-            except TransactionDoesNotExist:
-                raise ParentDoesNotExist('tx={} parent={}'.format(vertex.hash_hex, parent_hash.hex()))
+                my_parents_txs += 1
 
         # check for correct number of parents
         if vertex.is_block:
@@ -14,7 +14,7 @@
 
 import datetime
 from dataclasses import replace
-from typing import Any, Generator
+from typing import Any, Container, Generator
 
 from structlog import get_logger
 from twisted.internet.defer import inlineCallbacks
@@ -33,6 +33,7 @@ from hathor.reactor import ReactorProtocol
 from hathor.transaction import BaseTransaction, Block, Transaction
 from hathor.transaction.storage import TransactionStorage
 from hathor.transaction.storage.exceptions import TransactionDoesNotExist
+from hathor.types import VertexId
 from hathor.verification.verification_params import VerificationParams
 from hathor.verification.verification_service import VerificationService
 from hathor.wallet import BaseWallet
@@ -84,8 +85,14 @@ class VertexHandler:
 
     @cpu.profiler('on_new_block')
     @inlineCallbacks
-    def on_new_block(self, block: Block, *, deps: list[Transaction]) -> Generator[Any, Any, bool]:
-        """Called by block sync."""
+    def on_new_block(
+        self,
+        block: Block,
+        *,
+        deps: list[Transaction],
+        pow_verified: Container[VertexId] = (),
+    ) -> Generator[Any, Any, bool]:
+        """Called by block sync. The proof-of-work of the vertices in `pow_verified` is not verified again."""
         parent_block_hash = block.get_block_parent_hash()
         parent_block = self._tx_storage.get_block(parent_block_hash)
         parent_meta = parent_block.get_metadata()
@@ -109,14 +116,18 @@ class VertexHandler:
             nc_block_root_id=parent_meta.nc_block_root_id,
         )
 
+        skip_pow_params = replace(params, skip_pow_verification=True)
+
         for tx in deps:
             if not self._tx_storage.transaction_exists(tx.hash):
-                if not self._old_on_new_vertex(tx, params):
+                tx_params = skip_pow_params if tx.hash in pow_verified else params
+                if not self._old_on_new_vertex(tx, tx_params):
                     return False
                 yield deferLater(self._reactor, 0, lambda: None)
 
         if not self._tx_storage.transaction_exists(block.hash):
-            if not self._old_on_new_vertex(block, params):
+            block_params = skip_pow_params if block.hash in pow_verified else params
+            if not self._old_on_new_vertex(block, block_params):
                 return False
 
         return True
@@ -139,6 +150,8 @@ class VertexHandler:
         *,
         quiet: bool = False,
         reject_locked_reward: bool = True,
+        skip_script_verification: bool = False,
+        skip_pow_verification: bool = False,
     ) -> bool:
         """Called for unsolicited vertex received, usually due to real time relay."""
         best_block = self._tx_storage.get_best_block()
@@ -150,6 +163,8 @@ class VertexHandler:
         params = VerificationParams(
             enable_checkdatasig_count=True,
             reject_locked_reward=reject_locked_reward,
+            skip_script_verification=skip_script_verification,
+            skip_pow_verification=skip_pow_verification,
             enable_nano=enable_nano,
             nc_block_root_id=best_block_meta.nc_block_root_id,
         )
@@ -83,6 +83,9 @@ class AddressBalanceResource(Resource):
         if not addresses_index or not tokens_index:
             request.setResponseCode(503)
             return json_dumpb({'success': False})
+        if self.manager.tx_storage.indexes.is_building(addresses_index):
+            request.setResponseCode(503)
+            return json_dumpb({'success': False, 'message': 'wallet index is warming up'})
 
         raw_args = get_args(request)
         if b'address' in raw_args:
@@ -16,13 +16,16 @@ from json import JSONDecodeError
 from typing import Any, Optional
 
 from structlog import get_logger
+from twisted.internet import threads
 from twisted.web.http import Request
+from twisted.web.server import NOT_DONE_YET
 
 from hathor._openapi.register import register_resource
 from hathor.api_util import Resource, get_args, get_missing_params_msg, set_cors
 from hathor.conf.get_settings import get_global_settings
 from hathor.crypto.util import decode_address
 from hathor.transaction.storage.exceptions import TransactionDoesNotExist
+from hathor.transaction.storage.snapshot import StorageSnapshot
 from hathor.util import json_dumpb, json_loadb
 from hathor.wallet.exceptions import InvalidAddress
 
@@ -46,7 +49,7 @@ class AddressHistoryResource(Resource):
         self.max_inputs_outputs_address_history = settings.MAX_INPUTS_OUTPUTS_ADDRESS_HISTORY
 
     # TODO add openapi docs for this API
-    def render_POST(self, request: Request) -> bytes:
+    def render_POST(self, request: Request) -> bytes | int:
         """ POST request for /thin_wallet/address_history/
 
             It has the same behaviour as the GET request but when using the GET
@@ -71,9 +74,9 @@ class AddressHistoryResource(Resource):
         addresses = post_data['addresses']
         assert isinstance(addresses, list)
 
-        return self.get_address_history(addresses, post_data.get('hash'), post_data.get('tx_version'))
+        return self._render_address_history(request, addresses, post_data.get('hash'), post_data.get('tx_version'))
 
-    def render_GET(self, request: Request) -> bytes:
+    def render_GET(self, request: Request) -> bytes | int:
         """ GET request for /thin_wallet/address_history/
 
             Expects 'addresses[]' as request args, and 'hash'
@@ -141,15 +144,46 @@ class AddressHistoryResource(Resource):
             if allowed_tx_versions_arg is not None
             else None
         )
-        return self.get_address_history(
+        return self._render_address_history(
+            request,
             [address.decode('utf-8') for address in addresses],
             ref_hash,
             allowed_tx_versions
         )
 
+    def _render_address_history(self,
+                                request: Request,
+                                addresses: list[str],
+                                ref_hash: Optional[str],
+                                allowed_tx_versions: Optional[set[int]]) -> int:
+        """Build the history in another thread, from a snapshot of the storage taken now, so a long history doesn't
+        block the reactor and it doesn't see a reorg that happens while it's built."""
+        snapshot = self.manager.tx_storage.snapshot()
+        deferred = threads.deferToThread(
+            self.get_address_history, snapshot, addresses, ref_hash, allowed_tx_versions
+        )
+        deferred.addCallback(self._cb_tx_resolve, request)
+        deferred.addErrback(self._err_tx_resolve, request)
+        return NOT_DONE_YET
+
+    def _cb_tx_resolve(self, result: bytes, request: Request) -> None:
+        """ Called when `get_address_history` finishes
+        """
+        request.write(result)
+        request.finish()
+
+    def _err_tx_resolve(self, reason: Any, request: Request) -> None:
+        """ Called when an error occur in `get_address_history`
+        """
+        request.processingFailed(reason)
+
     def _validate_index(self, request: Request) -> bytes | None:
         """Return None if validation is successful (addresses index is enabled), and an error message otherwise."""
-        if self.manager.tx_storage.indexes.addresses:
+        addresses_index = self.manager.tx_storage.indexes.addresses
+        if addresses_index and self.manager.tx_storage.indexes.is_building(addresses_index):
+            request.setResponseCode(503)
+            return json_dumpb({'success': False, 'message': 'wallet index is warming up'})
+        if addresses_index:
             return None
 
         self._log.warn(
@@ -160,6 +194,7 @@ class AddressHistoryResource(Resource):
         return json_dumpb({'success': False, 'message': 'wallet index is disabled'})
 
     def get_address_history(self,
+                            snapshot: StorageSnapshot,
                             addresses: list[str],
                             ref_hash: Optional[str],
                             allowed_tx_versions: Optional[set[int]]) -> bytes:
@@ -174,7 +209,9 @@ class AddressHistoryResource(Resource):
                     'message': 'Invalid hash {}'.format(ref_hash)
                 })
 
-        addresses_index = self.manager.tx_storage.indexes.addresses
+        assert snapshot.indexes is not None
+        addresses_index = snapshot.indexes.addresses
+        assert addresses_index is not None
 
         # Pagination variables
         has_more = False
@@ -199,7 +236,7 @@ class AddressHistoryResource(Resource):
                 ref_tx = None
                 if ref_hash_bytes:
                     try:
-                        ref_tx = self.manager.tx_storage.get_transaction(ref_hash_bytes)
+                        ref_tx = snapshot.get_transaction(ref_hash_bytes)
                     except TransactionDoesNotExist:
                         return json_dumpb({
                             'success': False,
@@ -221,7 +258,7 @@ class AddressHistoryResource(Resource):
                     break
 
                 if tx_hash not in seen:
-                    tx = self.manager.tx_storage.get_transaction(tx_hash)
+                    tx = snapshot.get_transaction(tx_hash)
                     if allowed_tx_versions and tx.version not in allowed_tx_versions:
                         # Transaction version is not in the version filter
                         continue
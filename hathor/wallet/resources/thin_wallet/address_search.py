@@ -88,6 +88,9 @@ class AddressSearchResource(Resource):
         if not addresses_index:
             request.setResponseCode(503)
             return json_dumpb({'success': False})
+        if self.manager.tx_storage.indexes.is_building(addresses_index):
+            request.setResponseCode(503)
+            return json_dumpb({'success': False, 'message': 'wallet index is warming up'})
 
         raw_args = get_args(request)
         if b'address' not in raw_args:
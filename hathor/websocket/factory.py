@@ -327,16 +327,23 @@ class HathorAdminWebsocketFactory(WebSocketServerFactory):
             response['message'] = errmsg
         connection.sendMessage(json_dumpb(response), False)
 
+    def is_address_index_building(self) -> bool:
+        """Return whether the address index is being backfilled, so it doesn't have the whole history yet."""
+        indexes = self.manager.tx_storage.indexes
+        return self.address_index is not None and indexes is not None and indexes.is_building(self.address_index)
+
     def subscribe_address(self, connection: HathorAdminWebsocketProtocol, address: str) -> tuple[bool, str]:
         """Subscribe an address to send real time updates to a websocket connection."""
         subs: set[str] = connection.subscribed_to
         if self.max_subs_addrs_conn is not None and len(subs) >= self.max_subs_addrs_conn:
             return False, f'Reached maximum number of subscribed addresses ({self.max_subs_addrs_conn}).'
 
+        # While the address index is building, addresses with history might look empty, so they are not counted.
+        is_address_index_ready = bool(self.address_index) and not self.is_address_index_building()
         empty_addresses: set[str] = connection.empty_addresses
         if (
             self.max_subs_addrs_empty is not None
-            and self.address_index
+            and is_address_index_ready
             and len(empty_addresses) >= self.max_subs_addrs_empty
             and self._update_and_count_empty(empty_addresses) >= self.max_subs_addrs_empty
         ):
@@ -344,7 +351,7 @@ class HathorAdminWebsocketFactory(WebSocketServerFactory):
 
         self.address_connections[address].add(connection)
         connection.subscribed_to.add(address)
-        if self.address_index and self.address_index.is_address_empty(address):
+        if self.address_index is not None and is_address_index_ready and self.address_index.is_address_empty(address):
             connection.empty_addresses.add(address)
         return True, ''
 
@@ -129,9 +129,12 @@ async def gap_limit_search(
     gap_limit: int
 ) -> AddressSearch:
     """An async iterator that yields addresses and vertices, stopping when the gap limit is reached.
+
+    The address index must not be building, otherwise addresses with history could count towards the gap limit.
     """
     assert manager.tx_storage.indexes is not None
     assert manager.tx_storage.indexes.addresses is not None
+    assert not manager.tx_storage.indexes.is_building(manager.tx_storage.indexes.addresses)
     addresses_index = manager.tx_storage.indexes.addresses
     empty_addresses_counter = 0
     async for item in address_iter:
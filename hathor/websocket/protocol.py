@@ -151,6 +151,18 @@ class HathorAdminWebsocketProtocol(WebSocketServerProtocol):
         ))
         return True
 
+    def fail_if_address_index_is_building(self, stream_id: str) -> bool:
+        """Return false if the address index has the whole history. Otherwise, it sends an error message and returns
+        true, since streaming an incomplete history would make the gap limit search stop early."""
+        if not self.factory.is_address_index_building():
+            return False
+
+        self.send_message(StreamErrorMessage(
+            id=stream_id,
+            errmsg='Wallet index is warming up.'
+        ))
+        return True
+
     def _create_streamer(self, stream_id: str, search: AddressSearch, window_size: int | None) -> None:
         """Create the streamer and handle its callbacks."""
         assert self._history_streamer is None
@@ -178,6 +190,9 @@ class HathorAdminWebsocketProtocol(WebSocketServerProtocol):
             ))
             return
 
+        if self.fail_if_address_index_is_building(stream_id):
+            return
+
         xpub = message['xpub']
         gap_limit = message.get('gap-limit', 20)
         first_index = message.get('first-index', 0)
@@ -248,6 +263,9 @@ class HathorAdminWebsocketProtocol(WebSocketServerProtocol):
             ))
             return
 
+        if self.fail_if_address_index_is_building(stream_id):
+            return
+
         address_iter = ManualAddressSequencer()
         self._manual_address_iter = address_iter
         if not self._add_addresses_to_manual_iter(stream_id, addresses, last):
@@ -23,6 +23,7 @@ from structlog import get_logger
 from hathor_cli.run_node_args import RunNodeArgs
 from hathor_cli.side_dag import SideDagArgs
 from hathor.consensus import ConsensusAlgorithm
+from hathor.consensus.nc_speculative_execution import NCSpeculativeExecutor
 from hathor.daa import DifficultyAdjustmentAlgorithm
 from hathor.event import EventManager
 from hathor.exception import BuilderError
@@ -86,7 +87,9 @@ class CliBuilder:
         from hathor.p2p.netfilter.utils import add_peer_id_blacklist
         from hathor.p2p.peer_discovery import BootstrapPeerDiscovery, DNSPeerDiscovery
         from hathor.storage import RocksDBStorage
+        from hathor.storage.rocksdb_profile import get_rocksdb_profile
         from hathor.transaction.storage import TransactionCacheStorage, TransactionRocksDBStorage, TransactionStorage
+        from hathor.transaction.storage.vertex_blob_store import VERTEX_BLOB_STORE_DIR, VertexBlobStore
         from hathor.util import get_environment_info
 
         settings = get_global_settings()
@@ -128,12 +131,19 @@ class CliBuilder:
 
         self.check_or_raise(bool(self._args.data) or self._args.temp_data, 'either --data or --temp-data is expected')
         cache_capacity = self._args.rocksdb_cache
+        rocksdb_profile = get_rocksdb_profile(self._args.rocksdb_profile)
         self.rocksdb_storage = (
-            RocksDBStorage(path=self._args.data, cache_capacity=cache_capacity)
-            if self._args.data else RocksDBStorage.create_temp(cache_capacity)
+            RocksDBStorage(path=self._args.data, cache_capacity=cache_capacity, profile=rocksdb_profile)
+            if self._args.data else RocksDBStorage.create_temp(cache_capacity, rocksdb_profile)
         )
 
-        self.nc_storage_factory: NCStorageFactory = NCRocksDBStorageFactory(self.rocksdb_storage)
+        nc_storage_factory_kwargs: dict[str, Any] = {}
+        if self._args.nc_node_cache_size is not None:
+            nc_storage_factory_kwargs['node_cache_capacity'] = self._args.nc_node_cache_size
+        self.nc_storage_factory: NCStorageFactory = NCRocksDBStorageFactory(
+            self.rocksdb_storage,
+            **nc_storage_factory_kwargs,
+        )
 
         # Initialize indexes manager.
         indexes = RocksDBIndexesManager(self.rocksdb_storage, settings=settings)
@@ -144,6 +154,10 @@ class CliBuilder:
             # We should only pass indexes if cache is disabled. Otherwise,
             # only TransactionCacheStorage should have indexes.
             kwargs['indexes'] = indexes
+        if self._args.x_vertex_blob_store:
+            kwargs['vertex_blob_store'] = VertexBlobStore(
+                os.path.join(self.rocksdb_storage.path, VERTEX_BLOB_STORE_DIR)
+            )
         tx_storage = TransactionRocksDBStorage(
             self.rocksdb_storage,
             settings=settings,
@@ -162,7 +176,12 @@ class CliBuilder:
 
         if self._args.disable_cache:
             self.check_or_raise(self._args.cache_size is None, 'cannot use --disable-cache with --cache-size')
+            self.check_or_raise(self._args.cache_max_bytes is None,
+                                'cannot use --disable-cache with --cache-max-bytes')
             self.check_or_raise(self._args.cache_interval is None, 'cannot use --disable-cache with --cache-interval')
+            self.check_or_raise(self._args.cache_flush_batch_size is None,
+                                'cannot use --disable-cache with --cache-flush-batch-size')
+            self.check_or_raise(not self._args.cache_flush_sync, 'cannot use --disable-cache with --cache-flush-sync')
 
         if not self._args.disable_cache:
             tx_storage = TransactionCacheStorage(
@@ -173,10 +192,21 @@ class CliBuilder:
                 nc_storage_factory=self.nc_storage_factory,
                 vertex_children_service=vertex_children_service,
             )
-            tx_storage.capacity = self._args.cache_size if self._args.cache_size is not None else DEFAULT_CACHE_SIZE
+            if self._args.cache_size is not None:
+                tx_storage.capacity = self._args.cache_size
+            elif self._args.cache_max_bytes is not None:
+                # the cache is sized by memory only
+                tx_storage.capacity = sys.maxsize
+            else:
+                tx_storage.capacity = DEFAULT_CACHE_SIZE
+            tx_storage.max_bytes = self._args.cache_max_bytes
             if self._args.cache_interval:
                 tx_storage.interval = self._args.cache_interval
-            self.log.info('with cache', capacity=tx_storage.capacity, interval=tx_storage.interval)
+            if self._args.cache_flush_batch_size:
+                tx_storage.flush_batch_size = self._args.cache_flush_batch_size
+            tx_storage.flush_sync = self._args.cache_flush_sync
+            self.log.info('with cache', capacity=tx_storage.capacity, max_bytes=tx_storage.max_bytes,
+                          interval=tx_storage.interval, flush_batch_size=tx_storage.flush_batch_size)
 
         self.tx_storage = tx_storage
         self.log.info('with indexes', indexes_class=type(tx_storage.indexes).__name__)
@@ -185,6 +215,16 @@ class CliBuilder:
             from hathor.nanocontracts.catalog import generate_catalog_from_settings
             self.tx_storage.nc_catalog = generate_catalog_from_settings(settings)
 
+        if self._args.nc_blueprint_cache_size is not None or self._args.nc_persist_compiled_blueprints:
+            from hathor.nanocontracts.blueprint_cache import DEFAULT_BLUEPRINT_CACHE_CAPACITY, BlueprintClassCache
+            blueprint_cache_capacity = self._args.nc_blueprint_cache_size
+            if blueprint_cache_capacity is None:
+                blueprint_cache_capacity = DEFAULT_BLUEPRINT_CACHE_CAPACITY
+            self.tx_storage.blueprint_cache = BlueprintClassCache(
+                blueprint_cache_capacity,
+                rocksdb_storage=self.rocksdb_storage if self._args.nc_persist_compiled_blueprints else None,
+            )
+
         self.wallet = None
         if self._args.wallet:
             self.wallet = self.create_wallet()
@@ -235,6 +275,10 @@ class CliBuilder:
             self.log.debug('enable nano indexes')
             tx_storage.indexes.enable_nc_indexes()
 
+        if self._args.x_index_backfill and tx_storage.indexes is not None:
+            self.log.warn('--x-index-backfill is experimental, some APIs are unavailable until the indexes are ready')
+            tx_storage.indexes.enable_backfill()
+
         from hathor.nanocontracts.sorter.random_sorter import random_nc_calls_sorter
         nc_calls_sorter = random_nc_calls_sorter
 
@@ -253,6 +297,11 @@ class CliBuilder:
         )
         self.feature_service = FeatureService(settings=settings, tx_storage=tx_storage)
 
+        nc_speculative_executor: Optional[NCSpeculativeExecutor] = None
+        if self._args.x_nc_speculative_workers is not None:
+            self.log.info('with speculative nano execution', workers=self._args.x_nc_speculative_workers)
+            nc_speculative_executor = NCSpeculativeExecutor(self._args.x_nc_speculative_workers)
+
         soft_voided_tx_ids = set(settings.SOFT_VOIDED_TX_IDS)
         consensus_algorithm = ConsensusAlgorithm(
             self.nc_storage_factory,
@@ -264,6 +313,7 @@ class CliBuilder:
             nc_calls_sorter=nc_calls_sorter,
             feature_service=self.feature_service,
             nc_exec_fail_trace=self._args.nc_exec_fail_trace,
+            nc_speculative_executor=nc_speculative_executor,
         )
 
         if self._args.x_enable_event_queue or self._args.enable_event_queue:
@@ -380,6 +430,21 @@ class CliBuilder:
         if poa_block_producer:
             poa_block_producer.manager = self.manager
 
+        if self._args.x_nc_state_gc_keep_blocks is not None:
+            from hathor.nanocontracts.storage.garbage_collector import NCStateGarbageCollector
+            self.log.warn('--x-nc-state-gc-keep-blocks is experimental, older nano states will not be available')
+            assert isinstance(self.nc_storage_factory, NCRocksDBStorageFactory)
+            self.manager.nc_state_gc = NCStateGarbageCollector(
+                store=self.nc_storage_factory.get_node_store(),
+                tx_storage=tx_storage,
+                checkpoints=settings.CHECKPOINTS,
+                keep_blocks=self._args.x_nc_state_gc_keep_blocks,
+            )
+
+        if self._args.x_index_backfill:
+            from hathor.indexes.backfill import IndexesBackfill
+            self.manager.index_backfill = IndexesBackfill(reactor=reactor, tx_storage=tx_storage)
+
         if self._args.stratum:
             stratum_factory = StratumFactory(self.manager, reactor=reactor)
             self.manager.stratum_factory = stratum_factory
@@ -0,0 +1,240 @@
+# Copyright 2025 Hathor Labs
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Chunked format of the database export.
+
+The file starts with `MAGIC_HEADER_CHUNKED` and a version byte, followed by the chunks, the index and the trailer:
+
+    chunk   = [compressed_size: 4][raw_size: 4][vertex_count: 4][first_height: 4][last_height: 4][sha256: 32][data]
+    index   = [chunk_count: 4] then, for each chunk, [offset: 8][vertex_count: 4][first_height: 4][last_height: 4]
+    trailer = [index_offset: 8][tx_count: 4][block_count: 4]
+
+The data of a chunk is zlib-compressed, and the raw data is a sequence of vertices in the same format as the flat
+export, each one prefixed by its length. The checksum is the sha256 of the compressed data. The heights of a chunk are
+the best height before its first vertex and after its last one, so the index tells which chunks are needed to reach
+a height.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import struct
+import zlib
+from typing import TYPE_CHECKING, BinaryIO, Iterator, NamedTuple, Optional
+
+if TYPE_CHECKING:
+    from hathor.conf.settings import HathorSettings
+
+MAGIC_HEADER_CHUNKED = b'HathDC'
+CHUNKED_FORMAT_VERSION = 1
+
+# Default number of vertices in each chunk.
+DEFAULT_CHUNK_SIZE: int = 10_000
+
+# Default zlib compression level of the chunks.
+DEFAULT_COMPRESSION_LEVEL: int = 6
+
+_CHUNK_HEADER = struct.Struct('!IIIII32s')
+_INDEX_ENTRY = struct.Struct('!QIII')
+_TRAILER = struct.Struct('!QII')
+_VERTEX_LEN = struct.Struct('!I')
+
+
+class ChunkError(Exception):
+    """The file is not a valid chunked export."""
+
+
+class ChunkHeader(NamedTuple):
+    compressed_size: int
+    raw_size: int
+    vertex_count: int
+    first_height: int
+    last_height: int
+    checksum: bytes
+
+
+class ChunkIndexEntry(NamedTuple):
+    offset: int
+    vertex_count: int
+    first_height: int
+    last_height: int
+
+
+class ChunkedExportInfo(NamedTuple):
+    """What is read from the index and the trailer of a chunked export."""
+    tx_count: int
+    block_count: int
+    chunks: list[ChunkIndexEntry]
+
+
+class ChunkWriter:
+    """Write vertices to a chunked export, see the module docstring for the format.
+
+    The file must be seekable, because the index is written at the end and the file starts with the header.
+    """
+
+    def __init__(
+        self,
+        out_file: BinaryIO,
+        *,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        compression_level: int = DEFAULT_COMPRESSION_LEVEL,
+    ) -> None:
+        assert chunk_size > 0
+        self.out_file = out_file
+        self.chunk_size = chunk_size
+        self.compression_level = compression_level
+        self._index: list[ChunkIndexEntry] = []
+        self._buffer = bytearray()
+        self._vertex_count = 0
+        self._first_height = 0
+        self._last_height = 0
+        self.out_file.write(MAGIC_HEADER_CHUNKED)
+        self.out_file.write(bytes([CHUNKED_FORMAT_VERSION]))
+
+    def add(self, vertex_bytes: bytes, *, best_height: int) -> None:
+        """Add a vertex, `best_height` is the best height after it."""
+        self._buffer.extend(_VERTEX_LEN.pack(len(vertex_bytes)))
+        self._buffer.extend(vertex_bytes)
+        self._vertex_count += 1
+        self._last_height = best_height
+        if self._vertex_count >= self.chunk_size:
+            self._flush_chunk()
+
+    def _flush_chunk(self) -> None:
+        if self._vertex_count == 0:
+            return
+        data = zlib.compress(self._buffer, self.compression_level)
+        header = ChunkHeader(
+            compressed_size=len(data),
+            raw_size=len(self._buffer),
+            vertex_count=self._vertex_count,
+            first_height=self._first_height,
+            last_height=self._last_height,
+            checksum=hashlib.sha256(data).digest(),
+        )
+        self._index.append(ChunkIndexEntry(
+            offset=self.out_file.tell(),
+            vertex_count=header.vertex_count,
+            first_height=header.first_height,
+            last_height=header.last_height,
+        ))
+        self.out_file.write(_CHUNK_HEADER.pack(*header))
+        self.out_file.write(data)
+        self._buffer = bytearray()
+        self._vertex_count = 0
+        self._first_height = self._last_height
+
+    def close(self, *, tx_count: int, block_count: int) -> None:
+        """Write the last chunk, the index and the trailer."""
+        self._flush_chunk()
+        index_offset = self.out_file.tell()
+        self.out_file.write(struct.pack('!I', len(self._index)))
+        for entry in self._index:
+            self.out_file.write(_INDEX_ENTRY.pack(*entry))
+        self.out_file.write(_TRAILER.pack(index_offset, tx_count, block_count))
+        self.out_file.flush()
+
+
+def read_version(in_file: BinaryIO) -> None:
+    """Read and check the version, which comes right after the magic header."""
+    version = in_file.read(1)
+    if version != bytes([CHUNKED_FORMAT_VERSION]):
+        raise ChunkError(f'unsupported version: {version!r}')
+
+
+def read_info(in_file: BinaryIO) -> ChunkedExportInfo:
+    """Read the index and the trailer, and seek back to where the file was."""
+    pos = in_file.tell()
+    try:
+        in_file.seek(-_TRAILER.size, 2)
+        index_offset, tx_count, block_count = _TRAILER.unpack(_read_exactly(in_file, _TRAILER.size))
+        in_file.seek(index_offset)
+        chunk_count, = struct.unpack('!I', _read_exactly(in_file, 4))
+        chunks = [
+            ChunkIndexEntry(*_INDEX_ENTRY.unpack(_read_exactly(in_file, _INDEX_ENTRY.size)))
+            for _ in range(chunk_count)
+        ]
+    finally:
+        in_file.seek(pos)
+    return ChunkedExportInfo(tx_count=tx_count, block_count=block_count, chunks=chunks)
+
+
+def iter_chunks(in_file: BinaryIO, info: ChunkedExportInfo) -> Iterator[tuple[ChunkHeader, bytes]]:
+    """Iterate over the headers and compressed data of the chunks, checking them against the index."""
+    for entry in info.chunks:
+        in_file.seek(entry.offset)
+        header = ChunkHeader(*_CHUNK_HEADER.unpack(_read_exactly(in_file, _CHUNK_HEADER.size)))
+        if (header.vertex_count, header.first_height, header.last_height) != entry[1:]:
+            raise ChunkError(f'chunk at {entry.offset} does not match the index')
+        yield header, _read_exactly(in_file, header.compressed_size)
+
+
+def decode_chunk(header: ChunkHeader, data: bytes) -> list[bytes]:
+    """Check and decompress a chunk, and return the bytes of its vertices."""
+    if hashlib.sha256(data).digest() != header.checksum:
+        raise ChunkError('chunk checksum mismatch')
+    raw = zlib.decompress(data)
+    if len(raw) != header.raw_size:
+        raise ChunkError(f'chunk size mismatch: expected {header.raw_size}, got {len(raw)}')
+    vertices = []
+    view = memoryview(raw)
+    pos = 0
+    while pos < len(raw):
+        vertex_len, = _VERTEX_LEN.unpack_from(view, pos)
+        pos += _VERTEX_LEN.size
+        if pos + vertex_len > len(raw):
+            raise ChunkError('vertex out of chunk bounds')
+        vertices.append(bytes(view[pos:pos + vertex_len]))
+        pos += vertex_len
+    if len(vertices) != header.vertex_count:
+        raise ChunkError(f'chunk vertex count mismatch: expected {header.vertex_count}, got {len(vertices)}')
+    return vertices
+
+
+# settings of the worker processes, see `init_worker()`
+_worker_settings: Optional[HathorSettings] = None
+
+
+def init_worker(settings: HathorSettings) -> None:
+    """Initialize a worker process of the import, it must be used as the initializer of the process pool."""
+    global _worker_settings
+    _worker_settings = settings
+
+
+def decode_and_check_chunk(header: ChunkHeader, data: bytes) -> list[bytes]:
+    """Decode a chunk and run the checks that don't need the storage on its vertices: they must be parseable and,
+    when the consensus is proof-of-work, their hashes must be below their targets. Meant to run in a worker process.
+
+    The importer doesn't verify the proof-of-work of the vertices again. They are still parsed again by the importer,
+    sending the parsed vertices back from a worker would cost about as much as parsing them.
+    """
+    from hathor.conf.get_settings import get_global_settings
+    from hathor.transaction.vertex_parser import VertexParser
+    settings = _worker_settings or get_global_settings()
+    parser = VertexParser(settings=settings)
+    is_pow = settings.CONSENSUS_ALGORITHM.is_pow()
+    vertices = decode_chunk(header, data)
+    for vertex_bytes in vertices:
+        vertex = parser.deserialize(vertex_bytes)
+        if is_pow and int(vertex.hash_hex, vertex.HEX_BASE) >= vertex.get_target():
+            raise ChunkError(f'vertex {vertex.hash_hex} has an invalid proof-of-work')
+    return vertices
+
+
+def _read_exactly(in_file: BinaryIO, size: int) -> bytes:
+    data = in_file.read(size)
+    if len(data) != size:
+        raise ChunkError(f'unexpected end of file, expected {size} bytes, got {len(data)}')
+    return data
@@ -56,6 +56,11 @@ class DbExport(RunNode):
                             help='Make no assumption about the mempool when using this option. It may be partially'
                             'exported or not, depending on the timestamps and the traversal algorithm.')
         parser.add_argument('--export-skip-voided', action='store_true', help='Do not export voided txs/blocks')
+        parser.add_argument('--export-format', choices=['flat', 'chunked'], default='flat',
+                            help='The chunked format has compressed chunks with checksums and an index of heights, '
+                            'it can be imported in parallel')
+        parser.add_argument('--export-chunk-size', type=int, default=None,
+                            help='Number of vertices in each chunk of the chunked format')
         return parser
 
     def prepare(self, *, register_resources: bool = True) -> None:
@@ -78,6 +83,8 @@ class DbExport(RunNode):
 
         self.export_height = self._args.export_max_height
         self.skip_voided = self._args.export_skip_voided
+        self.export_format = self._args.export_format
+        self.chunk_size = self._args.export_chunk_size
 
     def iter_tx(self) -> Iterator['BaseTransaction']:
         from hathor.conf.get_settings import get_global_settings
@@ -94,17 +101,22 @@ class DbExport(RunNode):
             yield tx
 
     def run(self) -> None:
+        from hathor_cli.db_chunks import DEFAULT_CHUNK_SIZE, ChunkWriter
         from hathor.transaction import Block
         from hathor.util import tx_progress
-        self.log.info('export')
-        self.out_file.write(MAGIC_HEADER)
+        self.log.info('export', format=self.export_format)
         tx_count = 0
         block_count = 0
         best_height = 0
-        # XXX: pre-write the count to reserve the space, we will seek to it and write the correct value at the end
-        write_pos_count = self.out_file.tell()
-        self.out_file.write(struct.pack('!I', tx_count))
-        self.out_file.write(struct.pack('!I', block_count))
+        chunk_writer: Optional[ChunkWriter] = None
+        if self.export_format == 'chunked':
+            chunk_writer = ChunkWriter(self.out_file, chunk_size=self.chunk_size or DEFAULT_CHUNK_SIZE)
+        else:
+            self.out_file.write(MAGIC_HEADER)
+            # XXX: pre-write the count to reserve the space, we will seek to it and write the correct value at the end
+            write_pos_count = self.out_file.tell()
+            self.out_file.write(struct.pack('!I', tx_count))
+            self.out_file.write(struct.pack('!I', block_count))
         # estimated total, this will obviously be wrong if we're not exporting everything, but it's still better than
         # nothing, and it's probably better to finish sooner than expected, rather than later than expected
         total = self.tx_storage.get_vertices_count()
@@ -122,8 +134,11 @@ class DbExport(RunNode):
             if tx.is_genesis:
                 continue
             tx_bytes = bytes(tx)
-            self.out_file.write(struct.pack('!I', len(tx_bytes)))
-            self.out_file.write(tx_bytes)
+            if chunk_writer is not None:
+                chunk_writer.add(tx_bytes, best_height=best_height)
+            else:
+                self.out_file.write(struct.pack('!I', len(tx_bytes)))
+                self.out_file.write(tx_bytes)
             # stop as soon as we reach our target height (if any) and after writing it
             if self.export_height is not None and best_height >= self.export_height:
                 break
@@ -131,9 +146,12 @@ class DbExport(RunNode):
         if self.export_height is not None and best_height < self.export_height:
             self.log.warn('max export height not reached', best_height=best_height)
         # finally, write the correct counts and close
-        self.out_file.seek(write_pos_count)
-        self.out_file.write(struct.pack('!I', tx_count))
-        self.out_file.write(struct.pack('!I', block_count))
+        if chunk_writer is not None:
+            chunk_writer.close(tx_count=tx_count, block_count=block_count)
+        else:
+            self.out_file.seek(write_pos_count)
+            self.out_file.write(struct.pack('!I', tx_count))
+            self.out_file.write(struct.pack('!I', block_count))
         self.out_file.flush()
         del self.out_file
         self.log.info('exported', tx_count=tx_count, block_count=block_count)
@@ -13,14 +13,16 @@
 # limitations under the License.
 
 import io
+import os
 import struct
 import sys
 from argparse import ArgumentParser, FileType
-from typing import TYPE_CHECKING, Iterator
+from typing import TYPE_CHECKING, Iterator, Optional
 
 from hathor_cli.run_node import RunNode
 
 if TYPE_CHECKING:
+    from hathor_cli.db_chunks import ChunkedExportInfo, ChunkHeader
     from hathor.transaction import BaseTransaction
 
 
@@ -36,6 +38,12 @@ class DbImport(RunNode):
         parser = super().create_parser()
         parser.add_argument('--import-file', type=FileType('rb', 0), required=True,
                             help='Save the export to this file')
+        parser.add_argument('--import-workers', type=int, default=os.cpu_count() or 1,
+                            help='Number of processes that decode and check the chunks of a chunked export, '
+                            'use 0 to do it in the main process')
+        parser.add_argument('--import-trust-checkpoint', action='store_true',
+                            help='Do not verify the scripts of the vertices of a chunked export that are under the '
+                            'latest checkpoint, only use it with exports from a trusted node')
         return parser
 
     def prepare(self, *, register_resources: bool = True) -> None:
@@ -43,24 +51,40 @@ class DbImport(RunNode):
 
         # allocating io.BufferedReader here so we "own" it
         self.in_file = io.BufferedReader(self._args.import_file)
+        self.workers = self._args.import_workers
+        self.trust_checkpoint = self._args.import_trust_checkpoint
 
     def run(self) -> None:
+        from hathor_cli.db_chunks import MAGIC_HEADER_CHUNKED, ChunkError, read_info, read_version
         from hathor_cli.db_export import MAGIC_HEADER
         from hathor.util import tx_progress
 
+        assert len(MAGIC_HEADER) == len(MAGIC_HEADER_CHUNKED)
         header = self.in_file.read(len(MAGIC_HEADER))
-        if header != MAGIC_HEADER:
+        iter_tx: Iterator['BaseTransaction']
+        if header == MAGIC_HEADER_CHUNKED:
+            try:
+                read_version(self.in_file)
+                info = read_info(self.in_file)
+            except ChunkError as e:
+                self.log.error('not a valid chunked file', error=str(e))
+                sys.exit(1)
+            tx_count, block_count = info.tx_count, info.block_count
+            iter_tx = self._import_chunked_txs(info)
+        elif header == MAGIC_HEADER:
+            tx_count, = struct.unpack('!I', self.in_file.read(4))
+            block_count, = struct.unpack('!I', self.in_file.read(4))
+            iter_tx = self._import_txs()
+        else:
             self.log.error('wrong header, not a valid file')
             sys.exit(1)
 
-        tx_count, = struct.unpack('!I', self.in_file.read(4))
-        block_count, = struct.unpack('!I', self.in_file.read(4))
         total = tx_count + block_count
         self.log.info('import database', tx_count=tx_count, block_count=block_count)
         self.tx_storage.pre_init()
         actual_tx_count = 0
         actual_block_count = 0
-        for tx in tx_progress(self._import_txs(), log=self.log, total=total):
+        for tx in tx_progress(iter_tx, log=self.log, total=total):
             if tx.is_block:
                 actual_block_count += 1
             else:
@@ -93,6 +117,116 @@ class DbImport(RunNode):
             self.manager.on_new_tx(tx, quiet=True)
             yield tx
 
+    def _import_chunked_txs(self, info: 'ChunkedExportInfo') -> Iterator['BaseTransaction']:
+        """Import the vertices of a chunked export, in order, while the next chunks are decoded and checked by the
+        worker processes."""
+        from hathor_cli.db_chunks import ChunkError
+        from hathor.conf.get_settings import get_global_settings
+        from hathor.transaction.vertex_parser import VertexParser
+        settings = get_global_settings()
+        parser = VertexParser(settings=settings)
+
+        trusted_height: Optional[int] = None
+        if self.trust_checkpoint:
+            if settings.CHECKPOINTS:
+                trusted_height = settings.CHECKPOINTS[-1].height
+            else:
+                self.log.warn('there are no checkpoints to trust, all scripts will be verified')
+        # txs whose scripts were not verified, they are checked at the end, see `_verify_skipped_scripts()`
+        skipped_txs: list[bytes] = []
+
+        try:
+            for header, vertices in self._iter_decoded_chunks(info):
+                skip_scripts = trusted_height is not None and header.last_height <= trusted_height
+                for tx_bytes in vertices:
+                    tx = parser.deserialize(tx_bytes)
+                    tx.storage = self.tx_storage
+                    # the proof-of-work was verified by `decode_and_check_chunk()`
+                    self.manager.on_new_tx(
+                        tx,
+                        quiet=True,
+                        skip_script_verification=skip_scripts,
+                        skip_pow_verification=True,
+                    )
+                    if skip_scripts and not tx.is_block:
+                        skipped_txs.append(tx.hash)
+                    yield tx
+        except ChunkError as e:
+            self.log.error('invalid chunk', error=str(e))
+            sys.exit(2)
+
+        if skipped_txs:
+            assert trusted_height is not None
+            self._verify_skipped_scripts(skipped_txs, trusted_height)
+
+    def _iter_decoded_chunks(self, info: 'ChunkedExportInfo') -> Iterator[tuple['ChunkHeader', list[bytes]]]:
+        """Decode and check the chunks in a process pool, yielding them in order. A few chunks are decoded ahead, so
+        the workers are kept busy while the vertices of the current chunk are added."""
+        import multiprocessing
+        from collections import deque
+        from concurrent.futures import Future, ProcessPoolExecutor
+
+        from hathor_cli.db_chunks import decode_and_check_chunk, init_worker, iter_chunks
+        from hathor.conf.get_settings import get_global_settings
+
+        chunks = iter_chunks(self.in_file, info)
+        if self.workers <= 0:
+            for header, data in chunks:
+                yield header, decode_and_check_chunk(header, data)
+            return
+
+        max_pending = 2 * self.workers
+        pending: deque[tuple['ChunkHeader', Future[list[bytes]]]] = deque()
+        # XXX: the workers are spawned instead of forked, a fork would inherit the RocksDB handles and the locks held
+        #      by the reactor and RocksDB threads at the time of the fork
+        mp_context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(
+            self.workers,
+            mp_context=mp_context,
+            initializer=init_worker,
+            initargs=(get_global_settings(),),
+        ) as pool:
+            for header, data in chunks:
+                pending.append((header, pool.submit(decode_and_check_chunk, header, data)))
+                if len(pending) >= max_pending:
+                    next_header, future = pending.popleft()
+                    yield next_header, future.result()
+            while pending:
+                next_header, future = pending.popleft()
+                yield next_header, future.result()
+
+    def _verify_skipped_scripts(self, skipped_txs: list[bytes], trusted_height: int) -> None:
+        """Verify the scripts that were skipped, unless the tx is confirmed by a block under the checkpoint and the
+        checkpoint is in the best chain, which means the export had the same history as the checkpoint."""
+        from hathor.conf.get_settings import get_global_settings
+        from hathor.exception import HathorError
+        from hathor.transaction import Transaction
+
+        settings = get_global_settings()
+        checkpoint = settings.CHECKPOINTS[-1]
+        assert checkpoint.height == trusted_height
+        assert self.tx_storage.indexes is not None
+        checkpoint_reached = self.tx_storage.indexes.height.get(checkpoint.height) == checkpoint.hash
+        if not checkpoint_reached:
+            self.log.warn('checkpoint not reached, verifying all skipped scripts', checkpoint_height=checkpoint.height)
+
+        verifiers = self.manager.verification_service.verifiers
+        verified = 0
+        for tx_hash in skipped_txs:
+            tx = self.tx_storage.get_transaction(tx_hash)
+            first_block = tx.get_metadata().first_block
+            if checkpoint_reached and first_block is not None:
+                if self.tx_storage.get_block(first_block).get_height() <= trusted_height:
+                    continue
+            assert isinstance(tx, Transaction)
+            try:
+                verifiers.tx.verify_inputs(tx)
+            except HathorError as e:
+                self.log.error('invalid script in a trusted tx', tx=tx.hash_hex, error=repr(e))
+                sys.exit(3)
+            verified += 1
+        self.log.info('skipped scripts', skipped=len(skipped_txs) - verified, verified=verified)
+
 
 def main():
     DbImport().run()
@@ -45,6 +45,7 @@ class CliManager:
             multisig_signature,
             multisig_spend,
             nc_dump,
+            nc_state_gc,
             nginx_config,
             openapi_json,
             oracle_create_key,
@@ -101,6 +102,7 @@ class CliManager:
         self.add_cmd('dev', 'x-export', db_export, 'EXPERIMENTAL: Export database to a simple format.')
         self.add_cmd('dev', 'x-import', db_import, 'EXPERIMENTAL: Import database from exported format.')
         self.add_cmd('dev', 'x-nc-dump', nc_dump, 'EXPERIMENTAL: Dump the nc storage in a text format.')
+        self.add_cmd('dev', 'x-nc-state-gc', nc_state_gc, 'EXPERIMENTAL: Remove unreachable nodes from nc storage.')
         self.add_cmd('dev', 'replay-logs', replay_logs, 'EXPERIMENTAL: re-play json logs as console printed')
         self.add_cmd('dev', 'load-from-logs', load_from_logs,
                      'Load vertices as they are found in a log dump that was parsed with parse-logs')
@@ -0,0 +1,74 @@
+# Copyright 2025 Hathor Labs
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from argparse import ArgumentParser
+
+from hathor_cli.run_node import RunNode
+
+
+class NcStateGC(RunNode):
+    def start_manager(self) -> None:
+        pass
+
+    def register_signal_handlers(self) -> None:
+        pass
+
+    @classmethod
+    def create_parser(cls) -> ArgumentParser:
+        from hathor.nanocontracts.storage.garbage_collector import DEFAULT_GC_BATCH_SIZE, DEFAULT_GC_KEEP_BLOCKS
+        parser = super().create_parser()
+        parser.add_argument('--keep-blocks', type=int, default=DEFAULT_GC_KEEP_BLOCKS,
+                            help='Keep the nano contract state of this many best-chain blocks. It must be larger than '
+                                 'any expected reorg, older states are no longer available after this runs.')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_GC_BATCH_SIZE,
+                            help='Number of nodes removed in each write.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report how many nodes and bytes would be removed.')
+        parser.add_argument('--compact', action='store_true',
+                            help='Compact the nc-state column family afterwards, to reclaim disk space.')
+        return parser
+
+    def prepare(self, *, register_resources: bool = True) -> None:
+        super().prepare(register_resources=False)
+
+    def run(self) -> None:
+        from hathor.nanocontracts import NCRocksDBStorageFactory
+        from hathor.nanocontracts.storage.garbage_collector import NCStateGarbageCollector
+
+        nc_storage_factory = self.manager.consensus_algorithm.nc_storage_factory
+        assert isinstance(nc_storage_factory, NCRocksDBStorageFactory)
+        store = nc_storage_factory.get_node_store()
+        garbage_collector = NCStateGarbageCollector(
+            store=store,
+            tx_storage=self.tx_storage,
+            checkpoints=self.manager.checkpoints,
+            keep_blocks=self._args.keep_blocks,
+            batch_size=self._args.batch_size,
+        )
+        stats = garbage_collector.run(dry_run=self._args.dry_run)
+        if self._args.compact and not self._args.dry_run:
+            self.log.info('compacting nc-state')
+            store.compact()
+        self.log.info(
+            'nc-state garbage collection done',
+            dry_run=self._args.dry_run,
+            removed=stats.removed_count,
+            removed_size=stats.removed_size,
+            total=stats.total_count,
+            total_size=stats.total_size,
+        )
+
+
+def main():
+    NcStateGC().run()
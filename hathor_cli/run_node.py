@@ -70,6 +70,7 @@ class RunNode:
         from hathor_cli.util import create_parser
         from hathor.feature_activation.feature import Feature
         from hathor.nanocontracts.nc_exec_logs import NCLogConfig
+        from hathor.storage.rocksdb_profile import RocksDBProfileName
         parser = create_parser(prefix=cls.env_vars_prefix)
 
         parser.add_argument('--hostname', help='Hostname used to be accessed by other peers')
@@ -107,6 +108,23 @@ class RunNode:
         parser.add_argument('--memory-storage', action='store_true', help=SUPPRESS)  # deprecated
         parser.add_argument('--memory-indexes', action='store_true', help=SUPPRESS)  # deprecated
         parser.add_argument('--rocksdb-cache', type=int, help='RocksDB block-table cache size (bytes)', default=None)
+        possible_rocksdb_profiles = [profile.value for profile in RocksDBProfileName]
+        parser.add_argument('--rocksdb-profile', default=RocksDBProfileName.DEFAULT, choices=possible_rocksdb_profiles,
+                            help='RocksDB tuning profile, sets compression, bloom filters and block caches of each '
+                                 f'column family. One of {possible_rocksdb_profiles}')
+        parser.add_argument('--nc-node-cache-size', type=int, default=None,
+                            help='Nano contract state decoded node cache size (bytes), use 0 to disable it')
+        parser.add_argument('--nc-blueprint-cache-size', type=int, default=None,
+                            help='Number of on-chain blueprint classes kept loaded in memory, use 0 to disable it')
+        parser.add_argument('--nc-persist-compiled-blueprints', action='store_true',
+                            help='Persist the compiled code of on-chain blueprints, so they are not compiled again '
+                                 'after a restart')
+        parser.add_argument('--x-nc-speculative-workers', type=int, default=None,
+                            help='Speculatively execute the nano transactions of each block in parallel with this '
+                                 'many threads. The results are identical to serial execution.')
+        parser.add_argument('--x-nc-state-gc-keep-blocks', type=int, default=None,
+                            help='Periodically remove the nano contract state of blocks older than this many '
+                                 'best-chain blocks, in the background. It must be larger than any expected reorg.')
         parser.add_argument('--wallet', help='Set wallet type. Options are hd (Hierarchical Deterministic) or keypair',
                             default=None)
         parser.add_argument('--wallet-enable-api', action='store_true',
@@ -121,6 +139,9 @@ class RunNode:
                             help='Create an index of UTXOs by token/address/amount and allow searching queries')
         parser.add_argument('--nc-indexes', action='store_true',
                             help='Enable indexes related to nano contracts')
+        parser.add_argument('--x-index-backfill', action='store_true',
+                            help='Initialize the address and nano contract indexes in the background, while the node '
+                                 'runs. The APIs that depend on them are unavailable until they are ready.')
         parser.add_argument('--prometheus', action='store_true', help='Send metric data to Prometheus')
         parser.add_argument('--prometheus-prefix', default='',
                             help='A prefix that will be added in all Prometheus metrics')
@@ -128,7 +149,14 @@ class RunNode:
         cache_args.add_argument('--cache', action='store_true', help=SUPPRESS)  # moved to --disable-cache
         cache_args.add_argument('--disable-cache', action='store_true', help='Disable cache for tx storage')
         parser.add_argument('--cache-size', type=int, help='Number of txs to keep on cache')
+        parser.add_argument('--cache-max-bytes', type=int,
+                            help='Max estimated size of the txs kept on cache (bytes), the number of txs is not '
+                                 'limited unless --cache-size is also given')
         parser.add_argument('--cache-interval', type=int, help='Cache flush interval')
+        parser.add_argument('--cache-flush-batch-size', type=int,
+                            help='Max number of txs written to disk in a single batch when flushing the cache')
+        parser.add_argument('--cache-flush-sync', action='store_true',
+                            help='Wait until each cache flush batch is persisted to disk (fsync)')
         parser.add_argument('--recursion-limit', type=int, help='Set python recursion limit')
         parser.add_argument('--allow-mining-without-peers', action='store_true', help='Allow mining without peers')
         parser.add_argument('--procname-prefix', help='Add a prefix to the process name', default='')
@@ -167,6 +195,9 @@ class RunNode:
                             help='Log tx bytes for debugging')
         parser.add_argument('--disable-ws-history-streaming', action='store_true',
                             help='Disable websocket history streaming API')
+        parser.add_argument('--x-vertex-blob-store', action='store_true',
+                            help='Save the bytes of vertices in append-only files instead of RocksDB. Can only be '
+                                 'enabled when creating a new database, and must be used every time it is opened')
         parser.add_argument('--x-enable-ipv6', action='store_true',
                             help='Enables listening on IPv6 interface and connecting to IPv6 peers')
         parser.add_argument('--x-disable-ipv4', action='store_true',
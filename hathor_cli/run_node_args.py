@@ -18,6 +18,7 @@ from pydantic import Extra
 
 from hathor.feature_activation.feature import Feature  # skip-cli-import-custom-check
 from hathor.nanocontracts.nc_exec_logs import NCLogConfig  # skip-cli-import-custom-check
+from hathor.storage.rocksdb_profile import RocksDBProfileName  # skip-cli-import-custom-check
 from hathor.utils.pydantic import BaseModel  # skip-cli-import-custom-check
 
 
@@ -47,6 +48,12 @@ class RunNodeArgs(BaseModel, extra=Extra.allow):
     memory_indexes: bool
     temp_data: bool
     rocksdb_cache: Optional[int]
+    rocksdb_profile: RocksDBProfileName
+    nc_node_cache_size: Optional[int]
+    nc_blueprint_cache_size: Optional[int]
+    nc_persist_compiled_blueprints: bool
+    x_nc_speculative_workers: Optional[int]
+    x_nc_state_gc_keep_blocks: Optional[int]
     wallet: Optional[str]
     wallet_enable_api: bool
     words: Optional[str]
@@ -59,7 +66,10 @@ class RunNodeArgs(BaseModel, extra=Extra.allow):
     cache: bool
     disable_cache: bool
     cache_size: Optional[int]
+    cache_max_bytes: Optional[int]
     cache_interval: Optional[int]
+    cache_flush_batch_size: Optional[int]
+    cache_flush_sync: bool
     recursion_limit: Optional[int]
     allow_mining_without_peers: bool
     procname_prefix: str
@@ -87,9 +97,11 @@ class RunNodeArgs(BaseModel, extra=Extra.allow):
     nano_testnet: bool
     log_vertex_bytes: bool
     disable_ws_history_streaming: bool
+    x_vertex_blob_store: bool
     x_enable_ipv6: bool
     x_disable_ipv4: bool
     localnet: bool
     nc_indexes: bool
+    x_index_backfill: bool
     nc_exec_logs: NCLogConfig
     nc_exec_fail_trace: bool
@@ -1,5 +1,15 @@
+import io
 import os
 
+from hathor_cli.db_chunks import (
+    MAGIC_HEADER_CHUNKED,
+    ChunkError,
+    ChunkWriter,
+    decode_chunk,
+    iter_chunks,
+    read_info,
+    read_version,
+)
 from hathor_cli.db_export import DbExport
 from hathor_tests import unittest
 
@@ -10,3 +20,33 @@ class TestDbExport(unittest.TestCase):
         tmp_file = os.path.join(tmp_dir, 'test_file')
         db_export = DbExport(argv=['--temp-data', '--export-file', tmp_file])
         assert db_export is not None
+
+    def test_db_export_chunked(self):
+        tmp_dir = self.mkdtemp()
+        tmp_file = os.path.join(tmp_dir, 'test_file')
+        db_export = DbExport(argv=['--temp-data', '--export-file', tmp_file, '--export-format', 'chunked',
+                                   '--export-chunk-size', '100'])
+        assert db_export.export_format == 'chunked'
+        assert db_export.chunk_size == 100
+
+    def test_chunks_round_trip(self):
+        vertices = [bytes([i]) * (i + 1) for i in range(8)]
+        out_file = io.BytesIO()
+        writer = ChunkWriter(out_file, chunk_size=3)
+        for i, vertex_bytes in enumerate(vertices):
+            writer.add(vertex_bytes, best_height=i // 2)
+        writer.close(tx_count=5, block_count=3)
+
+        in_file = io.BytesIO(out_file.getvalue())
+        assert in_file.read(len(MAGIC_HEADER_CHUNKED)) == MAGIC_HEADER_CHUNKED
+        read_version(in_file)
+        info = read_info(in_file)
+        assert (info.tx_count, info.block_count) == (5, 3)
+        assert [(chunk.first_height, chunk.last_height) for chunk in info.chunks] == [(0, 1), (1, 2), (2, 3)]
+        decoded = [vertex for header, data in iter_chunks(in_file, info) for vertex in decode_chunk(header, data)]
+        assert decoded == vertices
+
+        # a corrupted chunk is detected by its checksum
+        header, data = next(iter_chunks(in_file, info))
+        with self.assertRaises(ChunkError):
+            decode_chunk(header, data[:-1] + bytes([data[-1] ^ 0xff]))
@@ -9,3 +9,10 @@ class TestDbImport(unittest.TestCase):
         _, tmp_file = tempfile.mkstemp()
         db_import = DbImport(argv=['--temp-data', '--import-file', tmp_file])
         assert db_import is not None
+
+    def test_db_import_chunked_options(self):
+        _, tmp_file = tempfile.mkstemp()
+        db_import = DbImport(argv=['--temp-data', '--import-file', tmp_file, '--import-workers', '0',
+                                   '--import-trust-checkpoint'])
+        assert db_import.workers == 0
+        assert db_import.trust_checkpoint
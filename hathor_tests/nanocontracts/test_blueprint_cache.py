@@ -0,0 +1,93 @@
+from hathor.nanocontracts import OnChainBlueprint
+from hathor.nanocontracts.blueprint_cache import BlueprintClassCache
+from hathor.nanocontracts.types import BlueprintId, VertexId
+from hathor_tests import unittest
+from hathor_tests.dag_builder.builder import TestDAGBuilder
+
+
+class BlueprintClassCacheTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        builder = self.get_builder().enable_nc_persist_compiled_blueprints()
+        self.manager = self.create_peer_from_builder(builder)
+        self.tx_storage = self.manager.tx_storage
+        dag_builder = TestDAGBuilder.from_manager(self.manager)
+        private_key = unittest.OCB_TEST_PRIVKEY.hex()
+        password = unittest.OCB_TEST_PASSWORD.hex()
+
+        artifacts = dag_builder.build_from_str(f"""
+            blockchain genesis b[1..11]
+            b10 < dummy
+
+            ocb1.ocb_private_key = "{private_key}"
+            ocb1.ocb_password = "{password}"
+
+            ocb2.ocb_private_key = "{private_key}"
+            ocb2.ocb_password = "{password}"
+
+            ocb1 <-- ocb2 <-- b11
+
+            ocb1.ocb_code = test_blueprint1.py, TestBlueprint1
+            ocb2.ocb_code = ```
+                from hathor import Blueprint, Context, export, public
+                @export
+                class MyBlueprint(Blueprint):
+                    @public
+                    def initialize(self, ctx: Context) -> None:
+                        pass
+            ```
+        """)
+        artifacts.propagate_with(self.manager)
+        self.ocb1, self.ocb2 = artifacts.get_typed_vertices(['ocb1', 'ocb2'], OnChainBlueprint)
+
+    def _new_instance(self, ocb: OnChainBlueprint) -> OnChainBlueprint:
+        """Return a new instance of the same blueprint, like the storage would after evicting it."""
+        clone = self.manager.vertex_parser.deserialize(bytes(ocb))
+        assert isinstance(clone, OnChainBlueprint)
+        clone._metadata = ocb.get_metadata()
+        return clone
+
+    def test_shared_between_instances(self) -> None:
+        blueprint_cache = self.tx_storage.blueprint_cache
+        blueprint_id = BlueprintId(VertexId(self.ocb1.hash))
+        blueprint_class = self.tx_storage.get_blueprint_class(blueprint_id)
+        assert blueprint_class.__name__ == 'TestBlueprint1'
+        assert blueprint_id in blueprint_cache
+
+        hits = blueprint_cache.stats['hit']
+        clone = self._new_instance(self.ocb1)
+        assert blueprint_cache.get_blueprint_class(clone) is blueprint_class
+        assert blueprint_cache.stats['hit'] == hits + 1
+        # the new instance did not have to load its code
+        assert clone._blueprint_loaded_env is None
+
+    def test_eviction(self) -> None:
+        blueprint_cache = BlueprintClassCache(1)
+        blueprint_class1 = blueprint_cache.get_blueprint_class(self._new_instance(self.ocb1))
+        assert blueprint_class1.__name__ == 'TestBlueprint1'
+        blueprint_class2 = blueprint_cache.get_blueprint_class(self._new_instance(self.ocb2))
+        assert blueprint_class2.__name__ == 'MyBlueprint'
+        assert len(blueprint_cache) == 1
+        assert self.ocb1.hash not in blueprint_cache
+        assert self.ocb2.hash in blueprint_cache
+        assert blueprint_cache.stats == dict(hit=0, miss=2, eviction=1, compiled_hit=0)
+
+        assert blueprint_cache.get_blueprint_class(self._new_instance(self.ocb1)) is not blueprint_class1
+        assert blueprint_cache.stats['miss'] == 3
+
+    def test_persisted_compiled_code(self) -> None:
+        rocksdb_storage = self.manager.tx_storage._rocksdb_storage  # type: ignore[attr-defined]
+        self.tx_storage.get_blueprint_class(BlueprintId(VertexId(self.ocb1.hash)))
+        # a new cache, as if the node had been restarted
+        blueprint_cache = BlueprintClassCache(rocksdb_storage=rocksdb_storage)
+        blueprint_class1 = blueprint_cache.get_blueprint_class(self._new_instance(self.ocb1))
+        assert blueprint_class1.__name__ == 'TestBlueprint1'
+        assert blueprint_cache.stats['compiled_hit'] == 1
+
+        # a blueprint that was never loaded is compiled and persisted
+        blueprint_cache.get_blueprint_class(self._new_instance(self.ocb2))
+        assert blueprint_cache.stats['compiled_hit'] == 1
+        blueprint_cache.clear()
+        blueprint_class2 = blueprint_cache.get_blueprint_class(self._new_instance(self.ocb2))
+        assert blueprint_class2.__name__ == 'MyBlueprint'
+        assert blueprint_cache.stats['compiled_hit'] == 2
@@ -0,0 +1,109 @@
+import time
+from typing import Any, Callable
+from unittest.mock import patch
+
+import pytest
+
+from hathor import NCFail
+from hathor.nanocontracts import Blueprint, Context, public
+from hathor.nanocontracts.metered_exec import MeteredExecutor
+from hathor.nanocontracts.on_chain_blueprint import PYTHON_CODE_COMPAT_VERSION
+from hathor_tests.nanocontracts.blueprints.unittest import BlueprintTestCase
+
+
+def legacy_call(self: MeteredExecutor, func: Callable[..., Any], /, *, args: tuple[Any, ...]) -> Any:
+    """The implementation of `MeteredExecutor.call` that compiled the trampoline on every call."""
+    from hathor.nanocontracts.custom_builtins import EXEC_BUILTINS
+    env: dict[str, object] = {
+        '__builtins__': EXEC_BUILTINS,
+        '__func__': func,
+        '__args__': args,
+        '__result__': None,
+    }
+    code = compile(
+        source='__result__ = __func__(*__args__)',
+        filename='<blueprint>',
+        mode='exec',
+        flags=0,
+        dont_inherit=True,
+        optimize=0,
+        _feature_version=PYTHON_CODE_COMPAT_VERSION[1],
+    )
+    try:
+        exec(code, env)
+    except NCFail:
+        raise
+    except Exception as e:
+        raise NCFail from e
+    return env['__result__']
+
+
+class MyBlueprint(Blueprint):
+    @public
+    def initialize(self, ctx: Context) -> None:
+        pass
+
+    @public
+    def nop(self, ctx: Context) -> None:
+        pass
+
+    @public
+    def fail(self, ctx: Context) -> None:
+        raise ValueError('fail')
+
+
+class MeteredExecutorTestCase(BlueprintTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.blueprint_id = self._register_blueprint_class(MyBlueprint)
+        self.contract_id = self.gen_random_contract_id()
+        self.runner.create_contract(self.contract_id, self.blueprint_id, self.create_context())
+
+    def test_restricted_builtins(self) -> None:
+        from hathor.nanocontracts.custom_builtins import EXEC_BUILTINS
+        executor = MeteredExecutor(fuel=0, memory_limit=0)
+        # The builtins seen by the trampoline frame are the restricted ones.
+        assert executor.call(eval, args=('sorted(__builtins__.keys())',)) == sorted(EXEC_BUILTINS.keys())
+
+    def test_exception_is_converted(self) -> None:
+        with self.assertRaises(NCFail) as cm:
+            self.runner.call_public_method(self.contract_id, 'fail', self.create_context())
+        assert isinstance(cm.exception.__cause__, ValueError)
+
+    def test_call_matches_legacy_trampoline(self) -> None:
+        executor = MeteredExecutor(fuel=0, memory_limit=0)
+        calls: list[tuple[Callable[..., Any], tuple[Any, ...]]] = [
+            (sorted, ([3, 1, 2],)),
+            (divmod, (7, 2)),
+            (eval, ('sorted(__builtins__.keys())',)),
+        ]
+        for func, args in calls:
+            assert executor.call(func, args=args) == legacy_call(executor, func, args=args)
+
+        # Public methods behave the same with both trampolines.
+        with patch.object(MeteredExecutor, 'call', legacy_call):
+            self.runner.call_public_method(self.contract_id, 'nop', self.create_context())
+            with self.assertRaises(NCFail) as legacy_cm:
+                self.runner.call_public_method(self.contract_id, 'fail', self.create_context())
+        self.runner.call_public_method(self.contract_id, 'nop', self.create_context())
+        with self.assertRaises(NCFail) as cm:
+            self.runner.call_public_method(self.contract_id, 'fail', self.create_context())
+        assert isinstance(legacy_cm.exception.__cause__, ValueError)
+        assert isinstance(cm.exception.__cause__, ValueError)
+
+    @pytest.mark.slow
+    def test_call_public_method_benchmark(self) -> None:
+        n_calls = 1_000
+
+        def run() -> float:
+            t0 = time.perf_counter()
+            for _ in range(n_calls):
+                self.runner.call_public_method(self.contract_id, 'nop', self.create_context())
+            return time.perf_counter() - t0
+
+        with patch.object(MeteredExecutor, 'call', legacy_call):
+            legacy_time = run()
+        time_ = run()
+
+        print('legacy trampoline calls/s', n_calls / legacy_time)
+        print('precompiled trampoline calls/s', n_calls / time_)
@@ -1,14 +1,34 @@
 import hashlib
 import tempfile
+import time
 from math import log
 from typing import Optional
 
+import pytest
+
 from hathor.nanocontracts.storage.backends import RocksDBNodeTrieStore
-from hathor.nanocontracts.storage.patricia_trie import Node, PatriciaTrie
+from hathor.nanocontracts.storage.patricia_trie import DictChildren, Node, NodeId, PatriciaTrie
 from hathor.storage.rocksdb_storage import RocksDBStorage
 from hathor_tests import unittest
 
 
+def linear_find_prefix(children: DictChildren, a: bytes) -> Optional[tuple[bytes, NodeId]]:
+    """Find the child whose key is a prefix of `a` by scanning all children, for comparison with `find_prefix()`."""
+    for key, node_id in children.items():
+        if a.startswith(key):
+            return key, node_id
+    return None
+
+
+def make_wide_children() -> DictChildren:
+    """Return the children of a node with one child per possible first byte, which is the widest node possible."""
+    children = DictChildren()
+    for i in range(256):
+        key = bytes([i]) + hashlib.sha256(bytes([i])).digest()[:4]
+        children[key] = NodeId(hashlib.sha256(key).digest())
+    return children
+
+
 def export_trie_outline(trie: PatriciaTrie, *, node: Optional[Node] = None) -> tuple[bytes, Optional[bytes], dict]:
     """Return the tree outline for testing purposes.
 
@@ -213,3 +233,155 @@ class PatriciaTrieTestCase(unittest.TestCase):
 
         for k, v in data.items():
             self.assertEqual(trie.get(k), v)
+
+    def test_dict_children(self) -> None:
+        children = DictChildren({b'abc': NodeId(b'1'), b'x': NodeId(b'2')})
+        self.assertEqual(children.find_prefix(b'abcdef'), (b'abc', b'1'))
+        self.assertEqual(children.find_prefix(b'abc'), (b'abc', b'1'))
+        self.assertIsNone(children.find_prefix(b'abd'))
+        self.assertIsNone(children.find_prefix(b'ab'))
+        self.assertEqual(children.find_first_byte(b'ab'), (b'abc', b'1'))
+        self.assertEqual(children.find_prefix(b'xyz'), (b'x', b'2'))
+        self.assertIsNone(children.find_prefix(b'y'))
+        self.assertIsNone(children.find_prefix(b''))
+
+        children_copy = children.copy()
+        del children_copy[b'abc']
+        children_copy[b'ab'] = NodeId(b'3')
+        self.assertEqual(children_copy.find_prefix(b'abcdef'), (b'ab', b'3'))
+        self.assertEqual(children.find_prefix(b'abcdef'), (b'abc', b'1'))
+
+        children_copy.pop(b'ab')
+        self.assertIsNone(children_copy.find_prefix(b'abcdef'))
+        children_copy.update({b'a': NodeId(b'4')})
+        self.assertEqual(children_copy.find_prefix(b'abcdef'), (b'a', b'4'))
+        children_copy.clear()
+        self.assertIsNone(children_copy.find_prefix(b'xyz'))
+
+    def test_find_prefix_wide_node(self) -> None:
+        children = make_wide_children()
+        for key, node_id in children.items():
+            self.assertEqual(children.find_prefix(key + b'suffix'), (key, node_id))
+            self.assertEqual(children.find_prefix(key), (key, node_id))
+            self.assertIsNone(children.find_prefix(key[:-1]))
+        for i in range(256):
+            self.assertIsNone(children.find_prefix(bytes([i]) + b'miss'))
+
+        # The indexed lookup agrees with a linear scan of the children.
+        lookups = [key + b'suffix' for key in children] + [bytes([i]) + b'miss' for i in range(256)]
+        self.assertEqual(
+            [children.find_prefix(a) for a in lookups],
+            [linear_find_prefix(children, a) for a in lookups],
+        )
+
+    @pytest.mark.slow
+    def test_find_prefix_wide_node_benchmark(self) -> None:
+        children = make_wide_children()
+        lookups = [key + b'suffix' for key in children] + [bytes([i]) + b'miss' for i in range(256)]
+
+        n_rounds = 50
+        t0 = time.perf_counter()
+        for _ in range(n_rounds):
+            expected = [linear_find_prefix(children, a) for a in lookups]
+        t1 = time.perf_counter()
+        for _ in range(n_rounds):
+            result = [children.find_prefix(a) for a in lookups]
+        t2 = time.perf_counter()
+
+        self.assertEqual(result, expected)
+        n_lookups = n_rounds * len(lookups)
+        print('linear scan lookups/s', n_lookups / (t1 - t0))
+        print('indexed lookups/s', n_lookups / (t2 - t1))
+
+    def test_node_cache(self) -> None:
+        store = RocksDBNodeTrieStore(self.rocksdb_storage, cache_capacity=1024 * 1024)
+        trie = PatriciaTrie(store)
+        assert store.cache is not None
+
+        data = {}
+        for v_int in range(1_000):
+            v = str(v_int).encode('ascii')
+            k = hashlib.sha256(v).digest()
+            data[k] = v
+            trie.update(k, v)
+        trie.commit()
+
+        # All committed nodes are in the cache, so a new trie with the same root never misses.
+        trie2 = PatriciaTrie(store, root_id=trie.root.id)
+        misses = store.cache.stats['miss']
+        for k, v in data.items():
+            self.assertEqual(trie2.get(k), v)
+        self.assertEqual(store.cache.stats['miss'], misses)
+        self.assertGreater(store.cache.stats['hit'], 0)
+        self.assertEqual(store.cache.stats['eviction'], 0)
+
+        # A store without cache reads the same nodes directly from the database.
+        store_no_cache = RocksDBNodeTrieStore(self.rocksdb_storage)
+        self.assertIsNone(store_no_cache.cache)
+        trie3 = PatriciaTrie(store_no_cache, root_id=trie.root.id)
+        for k, v in data.items():
+            self.assertEqual(trie3.get(k), v)
+
+    def test_node_cache_eviction(self) -> None:
+        store = RocksDBNodeTrieStore(self.rocksdb_storage, cache_capacity=4096)
+        trie = PatriciaTrie(store)
+        assert store.cache is not None
+
+        data = {}
+        for v_int in range(1_000):
+            v = str(v_int).encode('ascii')
+            k = hashlib.sha256(v).digest()
+            data[k] = v
+            trie.update(k, v)
+        trie.commit()
+
+        self.assertGreater(store.cache.stats['eviction'], 0)
+        self.assertLessEqual(store.cache.size, store.cache.capacity)
+
+        trie2 = PatriciaTrie(store, root_id=trie.root.id)
+        for k, v in data.items():
+            self.assertEqual(trie2.get(k), v)
+        self.assertGreater(store.cache.stats['miss'], 0)
+        self.assertLessEqual(store.cache.size, store.cache.capacity)
+
+    def test_write_batch(self) -> None:
+        store = RocksDBNodeTrieStore(self.rocksdb_storage, cache_capacity=1024 * 1024)
+        other_store = RocksDBNodeTrieStore(self.rocksdb_storage)
+        trie = PatriciaTrie(store)
+
+        data = {}
+        with store.write_batch():
+            for v_int in range(100):
+                v = str(v_int).encode('ascii')
+                k = hashlib.sha256(v).digest()
+                data[k] = v
+                trie.update(k, v)
+                trie.commit()
+            root_id = trie.root.id
+
+            # Pending nodes can be read from the same store, but they have not been written yet.
+            trie2 = PatriciaTrie(store, root_id=root_id)
+            for k, v in data.items():
+                self.assertEqual(trie2.get(k), v)
+            self.assertNotIn(root_id, other_store)
+
+        self.assertIn(root_id, other_store)
+        trie3 = PatriciaTrie(other_store, root_id=root_id)
+        for k, v in data.items():
+            self.assertEqual(trie3.get(k), v)
+
+    def test_write_batch_discarded_on_error(self) -> None:
+        store = RocksDBNodeTrieStore(self.rocksdb_storage, cache_capacity=1024 * 1024)
+        trie = PatriciaTrie(store)
+
+        with self.assertRaises(ValueError):
+            with store.write_batch():
+                trie.update(b'my-key', b'1')
+                trie.commit()
+                root_id = trie.root.id
+                self.assertIn(root_id, store)
+                raise ValueError
+
+        self.assertNotIn(root_id, store)
+        with self.assertRaises(KeyError):
+            store[root_id]
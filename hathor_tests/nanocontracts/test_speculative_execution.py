@@ -0,0 +1,106 @@
+from unittest.mock import patch
+
+from hathor.daa import DifficultyAdjustmentAlgorithm, TestMode
+from hathor.manager import HathorManager
+from hathor.nanocontracts import Blueprint, Context, NCFail, public
+from hathor.nanocontracts.storage import NCBlockStorage
+from hathor.transaction import BaseTransaction
+from hathor.util import not_none
+from hathor_tests.dag_builder.builder import TestDAGBuilder
+from hathor_tests.nanocontracts.blueprints.unittest import BlueprintTestCase
+
+
+class MyBlueprint(Blueprint):
+    counter: int
+
+    @public
+    def initialize(self, ctx: Context) -> None:
+        self.counter = 0
+
+    @public
+    def inc(self, ctx: Context) -> None:
+        self.counter += 1
+
+    @public
+    def inc_random(self, ctx: Context) -> None:
+        self.counter += self.syscall.rng.randbits(32)
+
+    @public
+    def fail(self, ctx: Context) -> None:
+        self.counter += 1
+        raise NCFail('fail')
+
+
+class NCSpeculativeExecutionTestCase(BlueprintTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.blueprint_id = self._register_blueprint_class(MyBlueprint)
+        builder = self.get_builder() \
+            .set_settings(self._settings._replace(NETWORK_NAME='unittests')) \
+            .set_daa(DifficultyAdjustmentAlgorithm(settings=self._settings, test_mode=TestMode.TEST_ALL_WEIGHT)) \
+            .enable_nc_speculative_execution(workers=4)
+        self.speculative_manager = self.create_peer_from_builder(builder)
+        not_none(self.speculative_manager.tx_storage.nc_catalog).blueprints[self.blueprint_id] = MyBlueprint
+
+    def _propagate_copy(self, vertices: list[BaseTransaction], manager: HathorManager) -> None:
+        for vertex in vertices:
+            clone = manager.vertex_parser.deserialize(bytes(vertex))
+            clone.name = vertex.name
+            assert manager.vertex_handler.on_new_relayed_vertex(clone)
+
+    def test_same_result_as_serial(self) -> None:
+        dag_builder = TestDAGBuilder.from_manager(self.manager)
+        artifacts = dag_builder.build_from_str(f'''
+            blockchain genesis b[1..13]
+            b10 < dummy
+
+            nc1.nc_id = "{self.blueprint_id.hex()}"
+            nc1.nc_method = initialize()
+            nc2.nc_id = "{self.blueprint_id.hex()}"
+            nc2.nc_method = initialize()
+            nc3.nc_id = "{self.blueprint_id.hex()}"
+            nc3.nc_method = initialize()
+            nc4.nc_id = "{self.blueprint_id.hex()}"
+            nc4.nc_method = initialize()
+
+            tx1.nc_id = nc1
+            tx1.nc_method = inc()
+            tx2.nc_id = nc2
+            tx2.nc_method = inc()
+            tx3.nc_id = nc1
+            tx3.nc_method = inc()
+            tx4.nc_id = nc3
+            tx4.nc_method = inc_random()
+            tx5.nc_id = nc4
+            tx5.nc_method = inc()
+
+            tx6.nc_id = nc1
+            tx6.nc_method = inc()
+            tx7.nc_id = nc2
+            tx7.nc_method = fail()
+            tx8.nc_id = nc3
+            tx8.nc_method = inc()
+            tx9.nc_id = nc4
+            tx9.nc_method = inc()
+
+            nc1 <-- nc2 <-- nc3 <-- nc4 <-- b11
+            tx1 <-- tx2 <-- tx3 <-- tx4 <-- tx5 <-- b12
+            tx6 <-- tx7 <-- tx8 <-- tx9 <-- b13
+        ''')
+        artifacts.propagate_with(self.manager)
+        vertices = [vertex for _, vertex in artifacts.list]
+
+        with patch.object(NCBlockStorage, 'apply_changes_from', autospec=True,
+                          side_effect=NCBlockStorage.apply_changes_from) as apply_changes_from:
+            self._propagate_copy(vertices, self.speculative_manager)
+        # Some transactions were not executed again, e.g., the ones creating contracts.
+        assert apply_changes_from.call_count > 0
+
+        for vertex in vertices:
+            expected_meta = vertex.get_metadata()
+            meta = self.speculative_manager.tx_storage.get_metadata(vertex.hash)
+            assert meta is not None
+            assert meta.nc_block_root_id == expected_meta.nc_block_root_id, vertex.name
+            assert meta.nc_execution == expected_meta.nc_execution, vertex.name
+            assert meta.voided_by == expected_meta.voided_by, vertex.name
+            assert meta.nc_calls == expected_meta.nc_calls, vertex.name
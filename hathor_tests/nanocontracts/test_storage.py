@@ -1,8 +1,11 @@
 from typing import TypeVar
+from unittest.mock import patch
 
 from hathor.nanocontracts import NCRocksDBStorageFactory
 from hathor.nanocontracts.nc_types import NCType, NullNCType, make_nc_type_for_arg_type as make_nc_type
-from hathor.nanocontracts.storage import NCChangesTracker
+from hathor.nanocontracts.storage import NCChangesTracker, NCContractStorage
+from hathor.nanocontracts.storage.contract_storage import MutableBalance, _copy_cached
+from hathor.nanocontracts.storage.patricia_trie import PatriciaTrie
 from hathor.nanocontracts.types import Amount, ContractId, Timestamp, VertexId
 from hathor_tests import unittest
 
@@ -135,3 +138,118 @@ class NCRocksDBStorageTestCase(unittest.TestCase):
         with self.assertRaises(TypeError):
             # inner string is not int
             changes_tracker.put_obj(b'y', nested_nc_type, {1: {'foo'}})  # type: ignore[misc]
+
+    def test_value_cache(self) -> None:
+        list_nc_type = make_nc_type(list[int])
+        self.storage.put_obj(b'x', INT_NC_TYPE, 1)
+        self.storage.put_obj(b'y', list_nc_type, [1, 2])
+        self.storage.add_balance(b'token', 10)
+        # Written values are cached, so a new storage is used to read them.
+        self.storage.commit()
+        self.storage = NCContractStorage(
+            trie=self.storage._trie,
+            nc_id=self.storage.nc_id,
+            token_proxy=self.storage._token_proxy,
+        )
+
+        with patch.object(PatriciaTrie, 'get', autospec=True, side_effect=PatriciaTrie.get) as trie_get:
+            for _ in range(3):
+                self.assertEqual(self.storage.get_obj(b'x', INT_NC_TYPE), 1)
+                self.assertTrue(self.storage.has_obj(b'x'))
+                self.assertFalse(self.storage.has_obj(b'z'))
+            # Mutable objects are not shared between reads.
+            y = self.storage.get_obj(b'y', list_nc_type)
+            y.append(3)
+            self.assertEqual(self.storage.get_obj(b'y', list_nc_type), [1, 2])
+            balance = self.storage._get_mutable_balance(b'token')
+            balance.value += 1
+            self.assertEqual(self.storage.get_balance(b'token').value, 10)
+            # Each key is read from the trie only once.
+            self.assertEqual(trie_get.call_count, 4)
+
+        changes_tracker = NCChangesTracker(ContractId(VertexId(b'')), self.storage)
+        changes_tracker.del_obj(b'x')
+        changes_tracker.commit()
+        self.assertFalse(self.storage.has_obj(b'x'))
+        with self.assertRaises(KeyError):
+            self.storage.get_obj(b'x', INT_NC_TYPE)
+
+    def test_value_cache_shared_trie(self) -> None:
+        self.storage.put_obj(b'x', INT_NC_TYPE, 1)
+        self.assertEqual(self.storage.get_obj(b'x', INT_NC_TYPE), 1)
+
+        # Another storage of the same contract updates the trie, the cached value must not be used.
+        other_storage = NCContractStorage(
+            trie=self.storage._trie,
+            nc_id=self.storage.nc_id,
+            token_proxy=self.storage._token_proxy,
+        )
+        other_storage.put_obj(b'x', INT_NC_TYPE, 2)
+        self.assertEqual(self.storage.get_obj(b'x', INT_NC_TYPE), 2)
+
+    def test_copy_cached(self) -> None:
+        immutable = (1, 'a', (b'b', None))
+        self.assertIs(_copy_cached(immutable), immutable)
+
+        # balances are copied even when they are nested in tuples
+        cached = (1, (MutableBalance.get_default(), 'a'))
+        copied = _copy_cached(cached)
+        self.assertEqual(copied, cached)
+        copied[1][0].value += 1
+        self.assertEqual(cached[1][0].value, 0)
+
+
+class NCBlockStorageDeferredCommitsTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        rocksdb_storage = self.create_rocksdb_storage()
+        self.factory = NCRocksDBStorageFactory(rocksdb_storage, node_cache_capacity=0)
+        block_storage = self.factory.get_empty_block_storage()
+        block_storage.commit()
+        self.block_root_id = block_storage.get_root_id()
+        self.contract_id = ContractId(VertexId(b'\x01' * 32))
+
+    def _execute(self, *, defer_contract_commits: bool) -> tuple[bytes, list[bytes]]:
+        """Simulate three calls to the same contract in a block, returning the block root and all contract roots."""
+        block_storage = self.factory.get_block_storage(
+            self.block_root_id,
+            defer_contract_commits=defer_contract_commits,
+        )
+        contract_root_ids = []
+
+        storage = block_storage.get_empty_contract_storage(self.contract_id)
+        storage.put_obj(b'x', INT_NC_TYPE, 0)
+        block_storage.update_contract_trie(self.contract_id, storage.get_root_id())
+        contract_root_ids.append(storage.get_root_id())
+        if not defer_contract_commits:
+            storage.commit()
+
+        for i in range(1, 3):
+            storage = block_storage.get_contract_storage(self.contract_id)
+            self.assertEqual(storage.get_obj(b'x', INT_NC_TYPE), i - 1)
+            storage.put_obj(b'x', INT_NC_TYPE, i)
+            block_storage.update_contract_trie(self.contract_id, storage.get_root_id())
+            contract_root_ids.append(storage.get_root_id())
+            if not defer_contract_commits:
+                storage.commit()
+
+        block_storage.commit()
+        return block_storage.get_root_id(), contract_root_ids
+
+    def test_deferred_commits(self) -> None:
+        block_root_id, contract_root_ids = self._execute(defer_contract_commits=True)
+        *intermediate_root_ids, final_root_id = contract_root_ids
+
+        # Only the final state of the contract is saved.
+        store = self.factory._store
+        self.assertIn(final_root_id, store)
+        for root_id in intermediate_root_ids:
+            self.assertNotIn(root_id, store)
+
+        block_storage = self.factory.get_block_storage(block_root_id)
+        storage = block_storage.get_contract_storage(self.contract_id)
+        self.assertEqual(storage.get_obj(b'x', INT_NC_TYPE), 2)
+
+    def test_deferred_commits_same_root(self) -> None:
+        expected = self._execute(defer_contract_commits=False)
+        self.assertEqual(self._execute(defer_contract_commits=True), expected)
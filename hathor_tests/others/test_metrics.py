@@ -291,3 +291,10 @@ class MetricsTest(unittest.TestCase):
         # Assertion
         self.assertEquals(manager.metrics.transaction_cache_hits, 10)
         self.assertEquals(manager.metrics.transaction_cache_misses, 20)
+        self.assertEquals(manager.metrics.transaction_cache_size, len(tx_storage.cache))
+        self.assertGreater(manager.metrics.transaction_cache_bytes, 0)
+        block_data = manager.metrics.transaction_cache_data_by_type['Block']
+        self.assertEquals(block_data['size'], tx_storage.cache.count_by_type['Block'])
+        self.assertEquals(block_data['bytes'], tx_storage.cache.bytes_by_type['Block'])
+        # other metrics collected afterwards can hit the cache too
+        self.assertLessEqual(block_data['hits'], tx_storage.stats_by_type['Block']['hit'])
@@ -1,7 +1,13 @@
+from twisted.python.failure import Failure
+
+from hathor.nanocontracts.storage.block_storage import ContractKey
+from hathor.nanocontracts.storage.patricia_trie import Node, NodeId, PatriciaTrie
 from hathor.p2p.messages import ProtocolMessages
+from hathor.p2p.nc_state_sync import MAX_NC_DB_NODES_PER_REQUEST, NCStateSyncClient, NCStateSyncError
 from hathor.p2p.states import ReadyState
 from hathor.simulator import FakeConnection
 from hathor.simulator.trigger import StopAfterNMinedBlocks
+from hathor.types import VertexId
 from hathor_tests.simulation.base import SimulatorTestCase
 
 
@@ -88,3 +94,93 @@ class NCStateTestCase(SimulatorTestCase):
             'key': '',
         }
         assert peer_node_data == expected_node_data
+
+    def test_nc_state_sync(self) -> None:
+        manager1 = self.create_peer()
+        manager2 = self.create_peer()
+        conn12 = FakeConnection(manager1, manager2, latency=0.05)
+        self.simulator.add_connection(conn12)
+        self.simulator.run(3600)
+
+        miner = self.simulator.create_miner(manager1, hashpower=1e6)
+        miner.start()
+        trigger = StopAfterNMinedBlocks(miner, quantity=5)
+        self.assertTrue(self.simulator.run(1000, trigger=trigger))
+        miner.stop()
+        self.simulator.run(10)
+
+        # build a state with a few contracts only on manager1, big enough to need several requests
+        store1 = manager1.consensus_algorithm.nc_storage_factory._store
+        store2 = manager2.consensus_algorithm.nc_storage_factory._store
+        block_trie = PatriciaTrie(store1)
+        contract_roots = []
+        for i in range(3):
+            contract_trie = PatriciaTrie(store1)
+            for j in range(200):
+                contract_trie.update(f'key-{j}'.encode(), f'value-{i}-{j}'.encode())
+            contract_trie.commit()
+            contract_roots.append(contract_trie.root.id)
+            block_trie.update(bytes(ContractKey(bytes([i]) * 32)), contract_trie.root.id)
+        block_trie.commit()
+        block_root_id = block_trie.root.id
+
+        best_block = manager1.tx_storage.get_best_block()
+        best_block.get_metadata().nc_block_root_id = block_root_id
+        manager1.tx_storage.save_transaction(best_block, only_metadata=True)
+        assert block_root_id not in store2
+
+        # manager2 downloads it from manager1
+        protocol = list(manager2.connections.connected_peers.values())[0]
+        state = protocol.state
+        assert isinstance(state, ReadyState)
+        assert state.enable_nano_state_sync
+        results: list[NodeId] = []
+        state.sync_nc_state(best_block.hash).addCallback(results.append)
+        sync_client = state.nc_state_sync
+        assert sync_client is not None
+        self.simulator.run(30)
+        assert results == [block_root_id]
+        assert state.nc_state_sync is None
+        assert sync_client.received_count == sync_client.written_count > MAX_NC_DB_NODES_PER_REQUEST
+
+        # the downloaded state is complete
+        for i, contract_root in enumerate(contract_roots):
+            block_trie2 = PatriciaTrie(store2, root_id=block_root_id)
+            assert block_trie2.get(bytes(ContractKey(bytes([i]) * 32))) == contract_root
+            contract_trie2 = PatriciaTrie(store2, root_id=contract_root)
+            for j in range(200):
+                assert contract_trie2.get(f'key-{j}'.encode()) == f'value-{i}-{j}'.encode()
+
+        # nothing is downloaded when the state is already there
+        results.clear()
+        state.sync_nc_state(best_block.hash).addCallback(results.append)
+        sync_client = state.nc_state_sync
+        assert sync_client is not None
+        self.simulator.run(5)
+        assert results == [block_root_id]
+        assert sync_client.received_count == 0
+
+    def test_nc_state_sync_invalid_node(self) -> None:
+        manager1 = self.create_peer()
+        manager2 = self.create_peer()
+        conn12 = FakeConnection(manager1, manager2, latency=0.05)
+        self.simulator.add_connection(conn12)
+        self.simulator.run(3600)
+
+        protocol = list(manager2.connections.connected_peers.values())[0]
+        state = protocol.state
+        assert isinstance(state, ReadyState)
+        store2 = manager2.consensus_algorithm.nc_storage_factory._store
+        sync_client = NCStateSyncClient(state, store2, VertexId(b'\x00' * 32))
+        failures: list[Failure] = []
+        sync_client.wait().addErrback(failures.append)
+
+        # a node that does not match its id is rejected
+        node = Node(key=b'', length=0, content=b'abc')
+        node.update_id()
+        tampered_node = Node(key=b'', length=0, content=b'abd', _id=node.id)
+        sync_client.handle_block_nc_root_id(VertexId(b'\x00' * 32), node.id)
+        sync_client.handle_nc_db_nodes([tampered_node])
+        assert len(failures) == 1
+        failures[0].trap(NCStateSyncError)
+        assert node.id not in store2
@@ -14,6 +14,7 @@ from hathor.p2p.peer import PrivatePeer
 from hathor.p2p.peer_endpoint import PeerAddress, PeerEndpoint
 from hathor.p2p.protocol import HathorLineReceiver, HathorProtocol
 from hathor.simulator import FakeConnection
+from hathor.simulator.utils import add_new_blocks
 from hathor.util import json_dumps, json_loadb
 from hathor_tests import unittest
 
@@ -281,6 +282,81 @@ class HathorProtocolTestCase(unittest.TestCase):
         self.assertTrue('192.168.1.1' in map(lambda x: x.host, conn.proto2.peer.info.entrypoints))
         self.assertEqual(next(iter(conn.proto1.peer.info.entrypoints)).host, '192.168.1.1')
 
+    def test_binary_framing(self) -> None:
+        """Tests the connection between peers with the binary framing capability.
+           Expected behavior: the messages after the HELLO are sent in binary frames and the peers sync.
+        """
+        capabilities = [self._settings.CAPABILITY_SYNC_VERSION, self._settings.CAPABILITY_BINARY_FRAMING]
+        manager1 = self.create_peer(self.network, capabilities=capabilities)
+        manager2 = self.create_peer(self.network, capabilities=capabilities)
+        add_new_blocks(manager1, 10, advance_clock=15)
+
+        conn = FakeConnection(manager1, manager2)
+        self._check_result_only_cmd(conn.peek_tr1_value(), b'HELLO')
+        conn.run_one_step()  # HELLO
+        self.assertTrue(conn.proto1.binary_framing)
+        self.assertTrue(conn.proto2.binary_framing)
+        self.assertFalse(conn.tr1.value().startswith(b'PEER-ID'))
+
+        for _ in range(1000):
+            if conn.is_empty():
+                break
+            conn.run_one_step()
+            self.clock.advance(0.1)
+        self.assertIsConnected(conn)
+        self.assertTrue(conn.proto1.is_state(conn.proto1.PeerState.READY))
+        self.assertTrue(conn.proto2.is_state(conn.proto2.PeerState.READY))
+        self.assertConsensusEqual(manager1, manager2)
+
+    def test_compression(self) -> None:
+        """Tests the connection between peers with the compression capability, with and without binary framing.
+           Expected behavior: what is sent after the HELLO is compressed and the peers sync.
+        """
+        for binary_framing in [False, True]:
+            capabilities = [self._settings.CAPABILITY_SYNC_VERSION, self._settings.CAPABILITY_COMPRESSION]
+            if binary_framing:
+                capabilities.append(self._settings.CAPABILITY_BINARY_FRAMING)
+            manager1 = self.create_peer(self.network, capabilities=capabilities)
+            manager2 = self.create_peer(self.network, capabilities=capabilities)
+            add_new_blocks(manager1, 10, advance_clock=15)
+
+            conn = FakeConnection(manager1, manager2)
+            conn.run_one_step()  # HELLO
+            self.assertTrue(conn.proto1.compression)
+            self.assertTrue(conn.proto2.compression)
+            self.assertEqual(conn.proto1.binary_framing, binary_framing)
+            self.assertFalse(conn.tr1.value().startswith(b'PEER-ID'))
+
+            for _ in range(1000):
+                if conn.is_empty():
+                    break
+                conn.run_one_step()
+                self.clock.advance(0.1)
+            self.assertIsConnected(conn)
+            self.assertConsensusEqual(manager1, manager2)
+
+            metrics = conn.proto1.metrics
+            self.assertGreater(metrics.sent_compressed_bytes, 0)
+            self.assertLess(metrics.sent_compressed_bytes, metrics.sent_bytes)
+            self.assertEqual(metrics.sent_compressed_bytes, conn.proto2.metrics.received_compressed_bytes)
+
+    def test_binary_framing_fallback(self) -> None:
+        """Tests the connection between peers with and without the binary framing capability.
+           Expected behavior: the messages are sent in lines.
+        """
+        manager1 = self.create_peer(
+            self.network,
+            capabilities=[self._settings.CAPABILITY_SYNC_VERSION, self._settings.CAPABILITY_BINARY_FRAMING]
+        )
+        manager2 = self.create_peer(self.network, capabilities=[self._settings.CAPABILITY_SYNC_VERSION])
+
+        conn = FakeConnection(manager1, manager2)
+        conn.run_one_step()  # HELLO
+        self.assertFalse(conn.proto1.binary_framing)
+        self.assertFalse(conn.proto2.binary_framing)
+        self._check_result_only_cmd(conn.peek_tr1_value(), b'PEER-ID')
+        self._check_result_only_cmd(conn.peek_tr2_value(), b'PEER-ID')
+
     def test_invalid_same_peer_id(self) -> None:
         manager3 = self.create_peer(self.network, peer=self.peer1)
         conn = FakeConnection(self.manager1, manager3)
@@ -1,9 +1,20 @@
+from unittest.mock import Mock, patch
+
+from twisted.internet.defer import TimeoutError, maybeDeferred
+
 from hathor.checkpoint import Checkpoint as cp
 from hathor.crypto.util import decode_address
+from hathor.p2p.manager import ANNOUNCED_REQUEST_TIMEOUT
+from hathor.p2p.messages import ProtocolMessages
+from hathor.p2p.sync_v2.agent import STOPPED_BLOCK_RANGE_TIMEOUT, _HeightInfo
+from hathor.p2p.sync_v2.block_download import BlockRangeClient
+from hathor.p2p.sync_v2.exception import InvalidVertexError, StreamingError
 from hathor.simulator import FakeConnection
 from hathor.transaction import Block, Transaction
 from hathor.transaction.storage.exceptions import TransactionIsNotABlock
+from hathor.types import VertexId
 from hathor.util import not_none
+from hathor.verification.vertex_verifier import VertexVerifier
 from hathor_tests import unittest
 from hathor_tests.utils import add_blocks_unlock_reward
 
@@ -152,6 +163,79 @@ class SyncMethodsTestCase(unittest.TestCase):
         self.assertEqual(node_sync2.peer_best_block.height, self.manager2.tx_storage.get_height_best_block())
         self.assertConsensusEqual(self.manager2, self.manager3)
 
+    def test_tx_propagation_with_announce(self) -> None:
+        """ manager1 <- manager2, new transactions are announced and requested, blocks are sent right away
+        """
+        capabilities = [*self.manager1.capabilities, self._settings.CAPABILITY_RELAY_ANNOUNCE]
+        self.manager1 = self.create_peer(self.network, unlock_wallet=True, capabilities=capabilities)
+        self._add_new_blocks(25)
+
+        manager2 = self.create_peer(self.network, capabilities=capabilities)
+        conn = FakeConnection(self.manager1, manager2)
+        conn.disable_idle_timeout()
+
+        def run_until_empty() -> None:
+            for i in range(1000):
+                if i > 100 and conn.is_empty():
+                    break
+                conn.run_one_step()
+                self.clock.advance(0.1)
+
+        run_until_empty()
+        self.assertTipsEqual(self.manager1, manager2)
+
+        send_message = Mock(wraps=conn.proto1.send_message)
+        conn.proto1.send_message = send_message
+        self._add_new_transactions(2)
+        self._add_new_blocks(1)
+        run_until_empty()
+        self.assertTipsEqual(self.manager1, manager2)
+        self.assertConsensusEqual(self.manager1, manager2)
+
+        sent = [(call.args[0], call.args[1]) for call in send_message.call_args_list if len(call.args) > 1]
+        self.assertEqual(len([cmd for cmd, _ in sent if cmd == ProtocolMessages.ANNOUNCE]), 2)
+        relayed_data = [payload for cmd, payload in sent if cmd == ProtocolMessages.DATA]
+        self.assertEqual(len([payload for payload in relayed_data if payload.startswith('relay ')]), 2)
+        self.assertEqual(len([payload for payload in relayed_data if ' ' not in payload]), 1)
+        self.assertEqual(manager2.connections._announced_requests, {})
+
+        # the requested transactions were sent with the serialization kept when they were announced
+        for tx in self.manager1.tx_storage.get_all_transactions():
+            if tx.is_transaction and not tx.is_genesis:
+                self.assertIsNotNone(self.manager1.connections.get_serialized_vertex(tx.hash))
+
+    def test_announced_request_failover(self) -> None:
+        """ An announced vertex is requested from the other peers that announced it when the first one fails
+        """
+        connections = self.manager1.connections
+        vertex_id = VertexId(b'\x01' * 32)
+        agent1, agent2, agent3 = Mock(), Mock(), Mock()
+        self.assertTrue(connections.start_announced_request(vertex_id, agent1))
+        self.assertFalse(connections.start_announced_request(vertex_id, agent2))
+        self.assertFalse(connections.start_announced_request(vertex_id, agent3))
+        self.assertFalse(connections.start_announced_request(vertex_id, agent2))
+
+        # the first peer doesn't send it in time
+        self.clock.advance(ANNOUNCED_REQUEST_TIMEOUT)
+        agent2.request_announced_vertex.assert_called_once_with(vertex_id)
+        agent3.request_announced_vertex.assert_not_called()
+
+        # the second one doesn't have it anymore
+        connections.fail_announced_request(vertex_id, agent2)
+        agent3.request_announced_vertex.assert_called_once_with(vertex_id)
+
+        connections.finish_announced_request(vertex_id)
+        self.assertEqual(connections._announced_requests, {})
+        self.clock.advance(ANNOUNCED_REQUEST_TIMEOUT)
+        agent1.request_announced_vertex.assert_not_called()
+        agent2.request_announced_vertex.assert_called_once_with(vertex_id)
+
+        # without alternates left the request is dropped, so the next announce starts a new one
+        self.assertTrue(connections.start_announced_request(vertex_id, agent1))
+        self.clock.advance(ANNOUNCED_REQUEST_TIMEOUT)
+        self.assertEqual(connections._announced_requests, {})
+        self.assertTrue(connections.start_announced_request(vertex_id, agent2))
+
     def test_check_sync_state(self) -> None:
         """Tests if the LoopingCall to check the sync state works"""
         # Initially it should do nothing, since there is no recent activity
@@ -265,6 +349,155 @@ class SyncMethodsTestCase(unittest.TestCase):
         self.assertConsensusValid(self.manager1)
         self.assertConsensusValid(manager2)
 
+    def test_block_sync_parallel_download(self) -> None:
+        """ manager1 <- manager2, then manager3 downloads the blocks from both at once
+        """
+        self._add_new_blocks(100)
+
+        manager2 = self.create_peer(self.network)
+        conn12 = FakeConnection(self.manager1, manager2)
+        for _ in range(1000):
+            if conn12.is_empty():
+                break
+            conn12.run_one_step()
+            self.clock.advance(1)
+        self.assertConsensusEqual(self.manager1, manager2)
+
+        settings = self._settings._replace(ENABLE_PARALLEL_BLOCK_DOWNLOAD=True)
+        manager3 = self.create_peer(self.network, settings=settings)
+        block_download = not_none(manager3.connections.block_download)
+        block_download.range_size = 10
+        fetch_range_from = Mock(wraps=block_download._fetch_range_from)
+        block_download._fetch_range_from = fetch_range_from  # type: ignore[method-assign]
+
+        conn13 = FakeConnection(self.manager1, manager3)
+        conn23 = FakeConnection(manager2, manager3)
+        for i in range(2000):
+            if i > 100 and conn13.is_empty() and conn23.is_empty():
+                break
+            conn13.run_one_step()
+            conn23.run_one_step()
+            self.clock.advance(0.1)
+
+        self.assertFalse(block_download.is_downloading())
+        self.assertConsensusEqual(self.manager1, manager3)
+        self.assertConsensusValid(manager3)
+        # the ranges were downloaded from both peers
+        agents = {call.args[0] for call in fetch_range_from.call_args_list}
+        self.assertEqual(agents, {conn13.proto2.state.sync_agent, conn23.proto2.state.sync_agent})
+
+    def test_block_range_download_stopped(self) -> None:
+        self._add_new_blocks(20)
+        manager2 = self.create_peer(self.network)
+        conn = FakeConnection(self.manager1, manager2)
+        for _ in range(100):
+            if conn.is_empty():
+                break
+            conn.run_one_step()
+            self.clock.advance(1)
+        self.assertConsensusEqual(self.manager1, manager2)
+
+        node_sync = conn.proto2.state.sync_agent
+        start_block, end_block = (
+            _HeightInfo(height, not_none(self.manager1.tx_storage.get_block_by_height(height)).hash)
+            for height in (5, 15)
+        )
+        errors: list[StreamingError] = []
+
+        # the range stops before the peer answers, the blocks it already sent are dropped
+        deferred = node_sync.start_block_range_download(BlockRangeClient(node_sync, start_block, end_block))
+        deferred.addErrback(lambda failure: errors.append(failure.value))
+        node_sync.stop_block_range_download()
+        self.assertEqual(len(errors), 1)
+        self.assertIsNone(node_sync._blk_range_client)
+        self.assertTrue(node_sync._is_blk_range_stopped())
+        conn.run_until_empty(max_steps=1000)
+        self.assertFalse(node_sync._is_blk_range_stopped())
+        self.assertFalse(conn.tr1.disconnecting)
+        self.assertFalse(conn.tr2.disconnecting)
+
+        # the peer never answers, the messages stop being dropped after a while
+        node_sync.start_block_range_download(BlockRangeClient(node_sync, start_block, end_block)).addErrback(
+            lambda failure: errors.append(failure.value))
+        node_sync.stop_block_range_download()
+        self.assertTrue(node_sync._is_blk_range_stopped())
+        self.clock.advance(STOPPED_BLOCK_RANGE_TIMEOUT)
+        self.assertFalse(node_sync._is_blk_range_stopped())
+        self.assertEqual(len(errors), 2)
+
+    def test_peer_block_hashes_timeout(self) -> None:
+        self._add_new_blocks(20)
+        manager2 = self.create_peer(self.network)
+        conn = FakeConnection(self.manager1, manager2)
+        for _ in range(100):
+            if conn.is_empty():
+                break
+            conn.run_one_step()
+            self.clock.advance(1)
+        self.assertConsensusEqual(self.manager1, manager2)
+
+        node_sync = conn.proto2.state.sync_agent
+        end_block = _HeightInfo(15, not_none(self.manager1.tx_storage.get_block_by_height(15)).hash)
+        errors: list[Exception] = []
+
+        # the peer doesn't answer in time, the agent can be used again after the timeout
+        deferred = node_sync.get_peer_block_hashes([end_block.height]).addTimeout(10, self.clock)
+        deferred.addErrback(lambda failure: errors.append(failure.value))
+        self.assertFalse(node_sync.can_download_block_range(end_block.height))
+        self.clock.advance(10)
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], TimeoutError)
+        self.assertIsNone(node_sync._deferred_peer_block_hashes)
+        self.assertTrue(node_sync.can_download_block_range(end_block.height))
+
+        # the late reply to the cancelled request isn't taken as the reply to the next one
+        results: list[list[_HeightInfo]] = []
+        node_sync.get_peer_block_hashes([end_block.height]).addCallback(results.append)
+        conn.run_until_empty(max_steps=1000)
+        self.assertEqual(results, [[end_block]])
+        self.assertEqual(node_sync._peer_block_hashes_to_ignore, 0)
+        self.assertFalse(conn.tr1.disconnecting)
+        self.assertFalse(conn.tr2.disconnecting)
+
+    def test_sync_with_verification_pipeline(self) -> None:
+        self._add_new_blocks(10)
+        add_blocks_unlock_reward(self.manager1)
+        self._add_new_transactions(5)
+        self._add_new_blocks(5)
+
+        settings = self._settings._replace(SYNC_VERIFICATION_THREADS=1)
+        manager2 = self.create_peer(self.network, settings=settings)
+        pipeline = not_none(manager2.sync_verification_pipeline)
+        # the vertices are decoded and verified right away, instead of in the thread pool
+        submit = Mock(side_effect=lambda vertex_bytes: maybeDeferred(pipeline._decode_and_verify, vertex_bytes))
+        pipeline.submit = submit  # type: ignore[method-assign]
+        verify_pow = Mock(wraps=manager2.verification_service.verifiers.vertex.verify_pow)
+
+        conn = FakeConnection(self.manager1, manager2)
+        with patch.object(VertexVerifier, 'verify_pow', verify_pow):
+            for i in range(2000):
+                if i > 100 and conn.is_empty():
+                    break
+                conn.run_one_step()
+                self.clock.advance(0.1)
+
+        self.assertConsensusEqual(self.manager1, manager2)
+        self.assertConsensusValid(manager2)
+        verified = [self.manager1.vertex_parser.deserialize(call.args[0]) for call in submit.call_args_list]
+        self.assertTrue(any(vertex.is_transaction for vertex in verified))
+        # the proof-of-work is verified by the pipeline only, not again by the full validation
+        self.assertEqual(verify_pow.call_count, sum(not vertex.is_genesis for vertex in verified))
+
+    def test_verification_pipeline_invalid_vertex(self) -> None:
+        settings = self._settings._replace(SYNC_VERIFICATION_THREADS=1)
+        manager2 = self.create_peer(self.network, settings=settings)
+        pipeline = not_none(manager2.sync_verification_pipeline)
+
+        # the parser doesn't raise only `struct.error` for malformed vertices
+        for vertex_bytes in [b'', b'\x00', b'\x00\x00', bytes(self.manager1.tx_storage.get_best_block())[:50]]:
+            with self.assertRaises(InvalidVertexError):
+                pipeline._decode_and_verify(vertex_bytes)
+
     def test_block_sync_new_blocks(self) -> None:
         self._add_new_blocks(15)
 
@@ -7,6 +7,8 @@ from hathor.nanocontracts.nc_exec_logs import NCLogConfig
 from hathor.nanocontracts.resources import NanoContractHistoryResource
 from hathor.transaction import Transaction
 from hathor.transaction.resources import TransactionResource
+from hathor.transaction.scripts import parse_address_script
+from hathor.wallet.resources.thin_wallet import AddressHistoryResource
 from hathor_tests.dag_builder.builder import TestDAGBuilder
 from hathor_tests.resources.base_resource import StubSite, _BaseResourceTest
 
@@ -45,6 +47,7 @@ class TransactionNanoContractTest(_BaseResourceTest._ResourceTest):
         self.manager.tx_storage.nc_catalog = self.catalog
         self.web_transaction = StubSite(TransactionResource(self.manager))
         self.web_history = StubSite(NanoContractHistoryResource(self.manager))
+        self.web_address_history = StubSite(AddressHistoryResource(self.manager))
 
     @inlineCallbacks
     def test_include_nc_logs_and_events(self):
@@ -147,3 +150,36 @@ class TransactionNanoContractTest(_BaseResourceTest._ResourceTest):
         self.assertEqual(len(nc2_in_history['nc_events']), 1)
         event = nc2_in_history['nc_events'][0]
         self.assertEqual(bytes.fromhex(event['data']), b'combined test')
+
+    @inlineCallbacks
+    def test_address_history_with_nc_call(self):
+        """The address history is built from a snapshot of the storage, which must read the contract state."""
+        dag_builder = TestDAGBuilder.from_manager(self.manager)
+        artifacts = dag_builder.build_from_str(f'''
+            blockchain genesis b[1..33]
+            b30 < dummy
+
+            nc1.nc_id = "{self.blueprint_id.hex()}"
+            nc1.nc_method = initialize(42)
+
+            nc2.nc_id = nc1
+            nc2.nc_method = log_and_emit("history")
+            nc2.out[0] = 1 HTR
+
+            b31 --> nc1
+            b32 --> nc2
+        ''')
+        artifacts.propagate_with(self.manager)
+
+        nc2 = artifacts.get_typed_vertex('nc2', Transaction)
+        script_type_out = parse_address_script(nc2.outputs[0].script)
+        assert script_type_out is not None
+
+        response = yield self.web_address_history.get('thin_wallet/address_history', {
+            b'addresses[]': script_type_out.address.encode(),
+        })
+        data = response.json_value()
+        self.assertTrue(data['success'])
+        nc2_in_history = [tx_data for tx_data in data['history'] if tx_data['tx_id'] == nc2.hash_hex]
+        self.assertEqual(len(nc2_in_history), 1)
+        self.assertEqual(nc2_in_history[0]['nc_blueprint_id'], self.blueprint_id.hex())
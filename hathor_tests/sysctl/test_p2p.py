@@ -3,6 +3,7 @@ import tempfile
 from unittest.mock import MagicMock
 
 from hathor.p2p.peer_id import PeerId
+from hathor.p2p.states import ReadyState
 from hathor.sysctl import ConnectionsManagerSysctl
 from hathor.sysctl.exception import SysctlException
 from hathor_tests.simulation.base import SimulatorTestCase
@@ -180,3 +181,29 @@ class RandomSimulatorTestCase(SimulatorTestCase):
 
         with self.assertRaises(SysctlException):
             sysctl.unsafe_set('kill_connection', 'unknown-peer-id')
+
+    def test_nc_state_sync(self):
+        manager = self.create_peer()
+        p2p_manager = manager.connections
+        sysctl = ConnectionsManagerSysctl(p2p_manager)
+
+        peer_id = '0e2bd0d8cd1fb6d040801c32ec27e8986ce85eb8810b6c878dcad15bce3b5b1e'
+        block_id = '00' * 32
+        with self.assertRaises(SysctlException):
+            sysctl.unsafe_set('nc_state_sync', (peer_id, block_id))
+
+        conn = MagicMock()
+        conn.state = MagicMock(spec=ReadyState)
+        conn.state.enable_nano_state_sync = True
+        conn.state.nc_state_sync = None
+        p2p_manager.connected_peers[PeerId(peer_id)] = conn
+        with self.assertRaises(SysctlException):
+            sysctl.unsafe_set('nc_state_sync', (peer_id, 'invalid-block-id'))
+        self.assertEqual(conn.state.sync_nc_state.call_count, 0)
+
+        sysctl.unsafe_set('nc_state_sync', (peer_id, block_id))
+        conn.state.sync_nc_state.assert_called_once_with(bytes.fromhex(block_id))
+
+        conn.state.nc_state_sync = MagicMock()
+        with self.assertRaises(SysctlException):
+            sysctl.unsafe_set('nc_state_sync', (peer_id, block_id))
@@ -0,0 +1,60 @@
+from unittest.mock import Mock, call
+
+from hathor.indexes import RocksDBIndexesManager
+from hathor.storage import RocksDBStorage
+from hathor.storage.rocksdb_profile import RocksDBCompression, RocksDBProfileName, get_rocksdb_profile
+from hathor.sysctl import RocksDBStorageSysctl
+from hathor_tests import unittest
+
+
+class RocksDBStorageSysctlTestCase(unittest.TestCase):
+    def test_profile(self):
+        rocksdb_storage = RocksDBStorage.create_temp(profile=get_rocksdb_profile(RocksDBProfileName.FULLNODE))
+        rocksdb_storage.get_or_create_column_family(b'tx')
+        rocksdb_storage.get_or_create_column_family(b'address-index')
+        sysctl = RocksDBStorageSysctl(rocksdb_storage)
+
+        self.assertEqual(sysctl.get('rocksdb.profile'), 'fullnode')
+        column_families = sysctl.get('rocksdb.column_families')
+        self.assertIn('compression=lz4', column_families['tx']['options'])
+        self.assertIn('compression=none', column_families['address-index']['options'])
+        self.assertEqual(column_families['tx']['total_sst_files_size'], 0)
+        rocksdb_storage.close()
+
+    def test_default_profile(self):
+        rocksdb_storage = RocksDBStorage.create_temp()
+        sysctl = RocksDBStorageSysctl(rocksdb_storage)
+        self.assertEqual(sysctl.get('rocksdb.profile'), 'default')
+        rocksdb_storage.close()
+
+    def test_cf_profiles(self):
+        profile = get_rocksdb_profile('archive')
+        self.assertEqual(profile.get_cf_profile(b'tx').compression, RocksDBCompression.ZSTD)
+        self.assertEqual(profile.get_cf_profile(b'utxo-index').compression, RocksDBCompression.LZ4)
+        self.assertEqual(profile.get_cf_profile(b'nc-history-index-stats').compression, RocksDBCompression.LZ4)
+        self.assertIsNotNone(profile.get_cf_profile(b'nc-state').block_cache_size)
+        self.assertTrue(profile.get_cf_profile(b'nc-state').point_lookups)
+
+        # reopening the database applies the profile to existing column families
+        rocksdb_storage = RocksDBStorage.create_temp()
+        cf = rocksdb_storage.get_or_create_column_family(b'tx')
+        rocksdb_storage.get_db().put((cf, b'key'), b'value')
+        temp_dir = rocksdb_storage.temp_dir
+        assert temp_dir is not None
+        rocksdb_storage.close()
+
+        rocksdb_storage = RocksDBStorage(path=temp_dir, profile=profile)
+        cf = rocksdb_storage.get_or_create_column_family(b'tx')
+        self.assertEqual(rocksdb_storage.get_db().get((cf, b'key')), b'value')
+        rocksdb_storage.close()
+
+    def test_index_cf_options(self):
+        rocksdb_storage = RocksDBStorage.create_temp(profile=get_rocksdb_profile(RocksDBProfileName.FULLNODE))
+        get_cf_options = Mock(wraps=rocksdb_storage.get_column_family_options)
+        rocksdb_storage.get_column_family_options = get_cf_options  # type: ignore[method-assign]
+
+        # new index column families are created with the options of the profile, not only after reopening
+        indexes = RocksDBIndexesManager(rocksdb_storage, settings=self._settings)
+        indexes.enable_tokens_index()
+        get_cf_options.assert_has_calls([call(b'height-index'), call(b'tokens-index')], any_order=True)
+        rocksdb_storage.close()
@@ -1,7 +1,10 @@
+from unittest.mock import Mock, patch
+
 from hathor.daa import TestMode
 from hathor.simulator.utils import add_new_blocks
 from hathor.transaction import Transaction, TransactionMetadata
 from hathor.transaction.storage import TransactionCacheStorage
+from hathor.transaction.storage.vertex_cache import VertexCache, estimate_vertex_size
 from hathor_tests import unittest
 from hathor_tests.utils import add_new_transactions
 
@@ -57,7 +60,7 @@ class CacheStorageTest(unittest.TestCase):
             self.assertIn(tx.hash, self.cache_storage.dirty_txs)
 
         # should flush to disk and empty dirty set
-        self.cache_storage._flush_to_storage(self.cache_storage.dirty_txs.copy())
+        self.cache_storage._flush_to_storage()
         self.assertEqual(0, len(self.cache_storage.dirty_txs))
 
     def test_capacity(self):
@@ -140,7 +143,7 @@ class CacheStorageTest(unittest.TestCase):
 
         # Remove element from cache to test a part of the code
         del self.cache_storage.cache[next(iter(self.cache_storage.dirty_txs))]
-        self.cache_storage._flush_to_storage(self.cache_storage.dirty_txs.copy())
+        self.cache_storage._flush_to_storage()
 
     def test_topological_sort_dfs(self):
         self.manager.daa.TEST_MODE = TestMode.TEST_ALL_WEIGHT
@@ -151,3 +154,176 @@ class CacheStorageTest(unittest.TestCase):
         for tx in self.cache_storage._run_topological_sort_dfs(root=tx, visited=dict()):
             total += 1
         self.assertEqual(total, 5)
+
+    def test_scan_resistance(self):
+        # txs read more than once are kept even after a scan over more txs than the cache capacity
+        txs = [self._get_new_tx(nonce) for nonce in range(3 * CACHE_SIZE)]
+        for tx in txs:
+            self.cache_storage.save_transaction(tx)
+        self.cache_storage._flush_to_storage()
+
+        self.cache_storage.get_transaction(txs[0].hash)
+        self.cache_storage.get_transaction(txs[0].hash)
+        for tx in txs[CACHE_SIZE:]:
+            self.cache_storage.get_transaction(tx.hash)
+
+        self.assertIn(txs[0].hash, self.cache_storage.cache)
+        self.assertEqual(CACHE_SIZE, len(self.cache_storage.cache))
+
+    def test_max_bytes(self):
+        txs = [self._get_new_tx(nonce) for nonce in range(2 * CACHE_SIZE)]
+        tx_size = estimate_vertex_size(txs[0])
+        self.cache_storage.max_bytes = 3 * tx_size
+        for tx in txs:
+            self.cache_storage.save_transaction(tx)
+
+        self.assertEqual(3, len(self.cache_storage.cache))
+        self.assertEqual(3 * tx_size, self.cache_storage.cache.total_bytes)
+        self.assertEqual(3 * tx_size, self.cache_storage.cache.bytes_by_type['Transaction'])
+        self.assertEqual(3, self.cache_storage.cache.count_by_type['Transaction'])
+
+        # evicted txs are written to disk
+        txs2 = [self.cache_storage.get_transaction(tx.hash) for tx in txs]
+        self.assertEqual(txs, txs2)
+
+    def test_replace_updates_size(self):
+        txs = [self._get_new_tx(nonce) for nonce in range(2)]
+        tx_size = estimate_vertex_size(txs[0])
+        cache = VertexCache(CACHE_SIZE, max_bytes=3 * tx_size)
+        for tx in txs:
+            cache.put(tx)
+
+        # the replaced tx is bigger, so the other one no longer fits
+        tx2 = txs[1].clone()
+        tx2.get_metadata().voided_by = {bytes([i]) * 32 for i in range(tx_size // 50)}
+        tx2_size = estimate_vertex_size(tx2)
+        self.assertGreater(tx2_size, 2 * tx_size)
+        # the size of the vertex is reused, only the metadata is estimated again
+        with patch.object(Transaction, 'get_struct', Mock(wraps=tx2.get_struct)) as get_struct:
+            self.assertEqual([txs[0]], cache.put(tx2))
+        get_struct.assert_not_called()
+        self.assertIs(tx2, cache.peek(tx2.hash))
+        self.assertEqual(tx2_size, cache.total_bytes)
+        self.assertEqual(tx2_size, cache.bytes_by_type['Transaction'])
+        self.assertEqual(1, cache.count_by_type['Transaction'])
+
+        self.assertEqual([], cache.put(txs[1]))
+        self.assertEqual(tx_size, cache.total_bytes)
+        self.assertEqual(tx_size, cache.bytes_by_type['Transaction'])
+
+    def test_stats_by_type(self):
+        txs = [self._get_new_tx(nonce) for nonce in range(CACHE_SIZE + 1)]
+        for tx in txs:
+            self.cache_storage.save_transaction(tx)
+        self.cache_storage.get_transaction(txs[-1].hash)
+
+        stats_by_type = self.cache_storage.stats_by_type
+        self.assertGreaterEqual(stats_by_type['Transaction']['hit'], 1)
+        for name in ['hit', 'miss', 'eviction']:
+            self.assertEqual(sum(stats[name] for stats in stats_by_type.values()), self.cache_storage.stats[name])
+        self.assertGreater(self.cache_storage.stats['eviction'], 0)
+
+    def test_evicted_dirty_txs_are_flushed(self):
+        txs = [self._get_new_tx(nonce) for nonce in range(2 * CACHE_SIZE)]
+        for tx in txs:
+            self.cache_storage.save_transaction(tx)
+
+        # evicted txs are only written on the next flush, but they can still be read
+        self.assertNotIn(txs[0].hash, self.cache_storage.cache)
+        self.assertFalse(self.cache_storage.store.transaction_exists(txs[0].hash))
+        self.assertTrue(self.cache_storage.transaction_exists(txs[0].hash))
+        self.assertEqual(txs[0], self.cache_storage.get_transaction(txs[0].hash))
+
+        self.cache_storage.flush_batch_size = 2
+        self.cache_storage._flush_to_storage()
+        self.assertEqual(0, len(self.cache_storage._evicted_dirty_txs))
+        self.assertEqual(0, len(self.cache_storage.dirty_txs))
+        for tx in txs:
+            self.assertTrue(self.cache_storage.store.transaction_exists(tx.hash))
+        self.assertEqual(2 * CACHE_SIZE, self.cache_storage.flush_stats['txs'])
+        self.assertEqual(CACHE_SIZE, self.cache_storage.flush_stats['batches'])
+        self.assertEqual(1, self.cache_storage.flush_stats['count'])
+
+    def test_evicted_dirty_txs_over_batch_size(self):
+        # when too many dirty txs are evicted before a flush, they are written in a single batch
+        self.cache_storage.flush_batch_size = 3
+        txs = [self._get_new_tx(nonce) for nonce in range(2 * CACHE_SIZE)]
+        for tx in txs:
+            self.cache_storage.save_transaction(tx)
+
+        self.assertEqual(1, self.cache_storage.flush_stats['batches'])
+        self.assertEqual(2, len(self.cache_storage._evicted_dirty_txs))
+        for tx in txs[:3]:
+            self.assertTrue(self.cache_storage.store.transaction_exists(tx.hash))
+
+    def test_flush_skips_older_versions(self):
+        tx = self._get_new_tx(0)
+        self.cache_storage.save_transaction(tx)
+        version = self.cache_storage._versions[tx.hash]
+        tx.get_metadata().voided_by = {tx.hash}
+        self.cache_storage.save_transaction(tx, only_metadata=True)
+
+        # a version taken before the last save, e.g. by a concurrent flush, is not written over the newer one
+        self.assertEqual(0, self.cache_storage._write_batches([(tx, version)]))
+        self.assertFalse(self.cache_storage.store.transaction_exists(tx.hash))
+
+        self.cache_storage._flush_to_storage()
+        self.assertTrue(self.cache_storage.store.transaction_exists(tx.hash))
+        self.assertNotIn(tx.hash, self.cache_storage._versions)
+
+    def test_snapshot(self):
+        txs = [self._get_new_tx(nonce) for nonce in range(2 * CACHE_SIZE)]
+        for tx in txs[:CACHE_SIZE]:
+            self.cache_storage.save_transaction(tx)
+        self.cache_storage._flush_to_storage()
+        # these are dirty, and some of them are evicted
+        for tx in txs[CACHE_SIZE:-1]:
+            self.cache_storage.save_transaction(tx)
+        self.assertGreater(len(self.cache_storage._evicted_dirty_txs), 0)
+        # this one is being written by the flush thread, it's no longer dirty
+        self.cache_storage.save_transaction(txs[-1])
+        self.cache_storage.dirty_txs.discard(txs[-1].hash)
+        self.cache_storage._flushing_txs = {txs[-1].hash: txs[-1]}
+
+        snapshot = self.cache_storage.snapshot()
+        self.cache_storage._flushing_txs = {}
+        for tx in txs:
+            self.assertTrue(snapshot.transaction_exists(tx.hash))
+        snapshot_txs = snapshot.get_transactions([tx.hash for tx in txs])
+        self.assertEqual(txs, snapshot_txs)
+        for tx, snapshot_tx in zip(txs, snapshot_txs):
+            self.assertIsNot(tx, snapshot_tx)
+            self.assertIs(snapshot, snapshot_tx.storage)
+
+        # the changes after the snapshot is taken are not seen by it, before and after they are flushed
+        new_tx = self._get_new_tx(2 * CACHE_SIZE)
+        self.cache_storage.save_transaction(new_tx)
+        for tx in [txs[0], txs[-2]]:
+            tx.get_metadata().voided_by = {tx.hash}
+            self.cache_storage.save_transaction(tx, only_metadata=True)
+        for _ in range(2):
+            self.assertFalse(snapshot.transaction_exists(new_tx.hash))
+            self.assertIsNone(snapshot.get_metadata(new_tx.hash))
+            for tx in [txs[0], txs[-2]]:
+                self.assertTrue(self.cache_storage.get_metadata(tx.hash).voided_by)
+                self.assertFalse(snapshot.get_metadata(tx.hash).voided_by)
+            self.cache_storage._flush_to_storage()
+
+    def test_snapshot_reuses_metadata_bytes(self):
+        txs = [self._get_new_tx(nonce) for nonce in range(3)]
+        for tx in txs:
+            self.cache_storage.save_transaction(tx)
+
+        original_to_bytes = TransactionMetadata.to_bytes
+        with patch.object(TransactionMetadata, 'to_bytes', autospec=True, side_effect=original_to_bytes) as to_bytes:
+            self.cache_storage.snapshot()
+            self.assertEqual(to_bytes.call_count, len(txs))
+            # only the metadata of the tx saved since the previous snapshot is serialized again
+            txs[0].get_metadata().voided_by = {txs[0].hash}
+            self.cache_storage.save_transaction(txs[0], only_metadata=True)
+            snapshot = self.cache_storage.snapshot()
+            self.assertEqual(to_bytes.call_count, len(txs) + 1)
+        self.assertTrue(snapshot.get_metadata(txs[0].hash).voided_by)
+
+        self.cache_storage._flush_to_storage()
+        self.assertEqual(self.cache_storage._metadata_bytes, {})
@@ -698,7 +698,7 @@ class RocksDBIndexesTest(BaseIndexesTest):
         from hathor.transaction.storage import TransactionRocksDBStorage
 
         super().setUp()
-        self.wallet = Wallet()
+        self.wallet = Wallet(directory=self.mkdtemp())
         directory = tempfile.mkdtemp()
         self.tmpdirs.append(directory)
         rocksdb_storage = RocksDBStorage(path=directory)
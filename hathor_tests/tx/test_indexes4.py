@@ -1,4 +1,5 @@
 from hathor.crypto.util import decode_address
+from hathor.indexes.backfill import BACKFILL_START, IndexesBackfill
 from hathor.simulator.utils import add_new_blocks, gen_new_tx
 from hathor.transaction import Transaction
 from hathor.wallet.base_wallet import WalletOutputInfo
@@ -108,6 +109,72 @@ class SimulatorIndexesTestCase(unittest.TestCase):
         self.assertEqual(newinit_address_index, base_address_index)
         self.assertEqual(newinit_utxo_index, base_utxo_index)
 
+    def test_index_initialization_in_batches(self):
+        self.manager = self._build_randomized_blockchain(utxo_index=True)
+        tx_storage = self.manager.tx_storage
+        assert tx_storage.indexes is not None
+
+        base_address_index = list(tx_storage.indexes.addresses.get_all_internal())
+        base_utxo_index = list(tx_storage.indexes.utxo.get_all_internal())
+
+        # small batches, so the indexes are written many times during the initialization
+        tx_storage.indexes.rebuild_batch_size = 7
+        tx_storage._manually_initialize()
+        tx_storage.indexes.enable_address_index(self.manager.pubsub)
+        tx_storage._manually_initialize_indexes()
+
+        self.assertEqual(list(tx_storage.indexes.addresses.get_all_internal()), base_address_index)
+        self.assertEqual(list(tx_storage.indexes.utxo.get_all_internal()), base_utxo_index)
+        # the indexes write directly to the database again after they are initialized
+        self.assertIsNone(tx_storage.indexes.addresses._write_batch)
+        self.assertIsNone(tx_storage.indexes.utxo._write_batch)
+
+    def test_index_backfill(self):
+        self.manager = self._build_randomized_blockchain(utxo_index=True)
+        tx_storage = self.manager.tx_storage
+        indexes = tx_storage.indexes
+        assert indexes is not None
+        addresses = indexes.addresses
+        assert addresses is not None
+
+        base_address_index = list(addresses.get_all_internal())
+        base_utxo_index = list(indexes.utxo.get_all_internal())
+
+        # the address index needs initialization, it's left building instead
+        indexes.enable_backfill()
+        tx_storage.set_index_last_started_at(addresses.get_db_name(), 0)
+        tx_storage.set_index_last_started_at(indexes.utxo.get_db_name(), 0)
+        indexes._manually_initialize(tx_storage)
+        self.assertEqual(list(indexes.get_building_indexes()), [addresses])
+        self.assertEqual(indexes.get_building_indexes()[addresses], BACKFILL_START)
+        self.assertTrue(indexes.is_building(addresses))
+        self.assertEqual(list(addresses.get_all_internal()), [])
+        # the utxo index doesn't support it, so it's initialized right away
+        self.assertFalse(indexes.is_building(indexes.utxo))
+        self.assertEqual(list(indexes.utxo.get_all_internal()), base_utxo_index)
+
+        # run a single step, the cursor is persisted and used when the node restarts
+        backfill = IndexesBackfill(reactor=self.clock, tx_storage=tx_storage, batch_size=10, interval=1)
+        backfill.start()
+        self.clock.advance(0)
+        backfill.stop()
+        cursor = indexes.get_building_indexes()[addresses]
+        self.assertNotEqual(cursor, BACKFILL_START)
+        self.assertEqual(tx_storage.get_index_backfill_cursor(addresses.get_db_name()), cursor.to_str())
+        partial_address_index = list(addresses.get_all_internal())
+        self.assertGreater(len(partial_address_index), 0)
+        indexes._manually_initialize(tx_storage)
+        self.assertEqual(indexes.get_building_indexes(), {addresses: cursor})
+        self.assertEqual(list(addresses.get_all_internal()), partial_address_index)
+
+        # run it until the end
+        backfill.start()
+        self.clock.advance(1000)
+        self.assertFalse(backfill.is_running())
+        self.assertFalse(indexes.is_building(addresses))
+        self.assertIsNone(tx_storage.get_index_backfill_cursor(addresses.get_db_name()))
+        self.assertEqual(list(addresses.get_all_internal()), base_address_index)
+
     def test_topological_iterators(self):
         self.manager = self._build_randomized_blockchain()
         tx_storage = self.manager.tx_storage
@@ -1,5 +1,6 @@
 from hathor.conf import HathorSettings
 from hathor.crypto.util import get_address_b58_from_bytes
+from hathor.indexes.rebuild import IndexesRebuild
 from hathor.nanocontracts import Blueprint, Context, public
 from hathor.nanocontracts.catalog import NCBlueprintCatalog
 from hathor.nanocontracts.utils import sign_openssl
@@ -167,6 +168,36 @@ class NCHistoryIndexesTest(unittest.TestCase):
         assert nc_history_index.get_transaction_count(nc1.hash) == 3
         assert nc_history_index.get_transaction_count(nc2.hash) == 4
 
+        # Test rebuilding the index in batches, the counts are accumulated across batches
+        base_nc_history_index = list(nc_history_index.get_all_internal())
+        nc_history_index.force_clear()
+        IndexesRebuild([nc_history_index], batch_size=3).run(manager.tx_storage.topological_iterator())
+        assert list(nc_history_index.get_all_internal()) == base_nc_history_index
+        assert nc_history_index.get_transaction_count(nc1.hash) == 3
+        assert nc_history_index.get_transaction_count(nc2.hash) == 4
+
+        # Test the shared write batch, the changes are seen by the index but only written when the context exits
+        with indexes_manager.write_batch():
+            nc_history_index.remove_tx(nc7)
+            nc_history_index.add_tx(nc7)
+            nc_history_index.remove_tx(nc7)
+            assert nc_history_index.get_transaction_count(nc1.hash) == 2
+            assert list(nc_history_index.get_all_internal()) == base_nc_history_index
+        assert nc_history_index.get_transaction_count(nc1.hash) == 2
+        assert len(list(nc_history_index.get_all_internal())) == len(base_nc_history_index) - 1
+
+        # The pending changes are discarded when the context exits with an error
+        with self.assertRaises(ZeroDivisionError):
+            with indexes_manager.write_batch():
+                nc_history_index.add_tx(nc7)
+                1 / 0
+        assert nc_history_index.get_transaction_count(nc1.hash) == 2
+
+        with indexes_manager.write_batch():
+            nc_history_index.add_tx(nc7)
+        assert list(nc_history_index.get_all_internal()) == base_nc_history_index
+        assert nc_history_index.get_transaction_count(nc1.hash) == 3
+
         assert isinstance(manager.tx_storage, TransactionRocksDBStorage)
         manager.stop()
         manager.tx_storage._rocksdb_storage.close()
@@ -192,7 +223,7 @@ class RocksDBNCHistoryIndexesTest(NCHistoryIndexesTest):
         from hathor.transaction.vertex_parser import VertexParser
 
         super().setUp()
-        self.wallet = Wallet()
+        self.wallet = Wallet(directory=self.mkdtemp())
         directory = tempfile.mkdtemp()
         self.tmpdirs.append(directory)
         rocksdb_storage = RocksDBStorage(path=directory)
@@ -19,7 +19,7 @@ DEBUG: bool = False
 class TransactionTest(unittest.TestCase):
     def setUp(self):
         super().setUp()
-        self.wallet = Wallet()
+        self.wallet = Wallet(directory=self.mkdtemp())
 
         # read genesis keys
         self.genesis_private_key = get_genesis_key()
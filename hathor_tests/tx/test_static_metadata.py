@@ -17,8 +17,10 @@ from _pytest.fixtures import fixture
 
 from hathor.conf.get_settings import get_global_settings
 from hathor.conf.settings import HathorSettings
+from hathor.feature_activation.feature import Feature
+from hathor.feature_activation.model.feature_state import FeatureState
 from hathor.transaction import Block, Transaction, TxInput, Vertex
-from hathor.transaction.static_metadata import BlockStaticMetadata, TransactionStaticMetadata
+from hathor.transaction.static_metadata import BlockStaticMetadata, TransactionStaticMetadata, VertexStaticMetadata
 from hathor.types import VertexId
 
 
@@ -84,3 +86,33 @@ def test_closest_ancestor_block(
     static_metadata = TransactionStaticMetadata.create(tx, settings, lambda vertex_id: tx_storage[vertex_id])
 
     assert static_metadata.closest_ancestor_block == expected
+
+
+@pytest.mark.parametrize(
+    'static_metadata',
+    [
+        BlockStaticMetadata(
+            min_height=0,
+            height=0,
+            feature_activation_bit_counts=[],
+            feature_states={},
+        ),
+        BlockStaticMetadata(
+            min_height=10,
+            height=1_000_000,
+            feature_activation_bit_counts=[0, 1, 300, 0],
+            feature_states={Feature.NOP_FEATURE_1: FeatureState.ACTIVE, Feature.NOP_FEATURE_2: FeatureState.FAILED},
+        ),
+        TransactionStaticMetadata(
+            min_height=150,
+            closest_ancestor_block=VertexId(bytes(range(32))),
+        ),
+    ],
+)
+def test_bytes_round_trip(static_metadata: VertexStaticMetadata) -> None:
+    target = Block() if isinstance(static_metadata, BlockStaticMetadata) else Transaction()
+    data = static_metadata.to_bytes()
+    assert VertexStaticMetadata.from_bytes(data, target=target) == static_metadata
+    # the json representation used by older versions is still accepted
+    assert VertexStaticMetadata.from_bytes(static_metadata.json_dumpb(), target=target) == static_metadata
+    assert len(data) < len(static_metadata.json_dumpb())
@@ -49,7 +49,7 @@ from hathor_tests.utils import (
 class TransactionTest(unittest.TestCase):
     def setUp(self):
         super().setUp()
-        self.wallet = Wallet()
+        self.wallet = Wallet(directory=self.mkdtemp())
 
         # this makes sure we can spend the genesis outputs
         self.manager = self.create_peer('testnet', unlock_wallet=True, wallet_index=True)
@@ -497,6 +497,31 @@ class TransactionTest(unittest.TestCase):
         with self.assertRaises(ParentDoesNotExist):
             self.manager.verification_service.verify(block, self.get_verification_params(self.manager))
 
+    def test_block_unknown_parent_after_invalid_parent(self):
+        address = get_address_from_public_key(self.genesis_public_key)
+        output_script = P2PKH.create_output_script(address)
+        tx_outputs = [TxOutput(100, output_script)]
+
+        # the timestamp of the first parent is checked before the unknown parent
+        genesis_block = self.genesis_blocks[0]
+        parents = [genesis_block.hash, hashlib.sha256().digest()]
+
+        block = Block(
+            nonce=100,
+            outputs=tx_outputs,
+            parents=parents,
+            timestamp=genesis_block.timestamp,
+            weight=1,  # low weight so we don't waste time with PoW
+            storage=self.tx_storage)
+
+        self.manager.cpu_mining_service.resolve(block)
+        with self.assertRaises(TimestampError):
+            self._verifiers.vertex.verify_parents(block)
+
+        block.timestamp = genesis_block.timestamp + 1
+        with self.assertRaises(ParentDoesNotExist):
+            self._verifiers.vertex.verify_parents(block)
+
     def test_block_number_parents(self):
         address = get_address_from_public_key(self.genesis_public_key)
         output_script = P2PKH.create_output_script(address)
@@ -1,3 +1,4 @@
+import os
 import shutil
 import tempfile
 import time
@@ -443,6 +444,22 @@ class BaseTransactionStorageTest(unittest.TestCase):
         with self.assertRaises(TransactionDoesNotExist):
             self.tx_storage.get_transaction(hex_error)
 
+    def test_get_transactions(self):
+        self.validate_save(self.block)
+        self.validate_save(self.tx)
+        genesis_tx = self.genesis_txs[0]
+
+        hashes = [self.tx.hash, genesis_tx.hash, self.block.hash, self.tx.hash]
+        txs = self.tx_storage.get_transactions(hashes)
+        self.assertEqual([tx.hash for tx in txs], hashes)
+        self.assertEqual(txs, [self.tx, genesis_tx, self.block, self.tx])
+        for tx in txs:
+            self.assertEqual(tx.static_metadata, self.tx_storage.get_transaction(tx.hash).static_metadata)
+
+        hex_error = bytes.fromhex('00001c5c0b69d13b05534c94a69b2c8272294e6b0c536660a3ac264820677024')
+        with self.assertRaises(TransactionDoesNotExist):
+            self.tx_storage.get_transactions([self.tx.hash, hex_error])
+
     def test_save_metadata(self):
         # Saving genesis metadata
         self.tx_storage.save_transaction(self.genesis_txs[0], only_metadata=True)
@@ -608,9 +625,83 @@ class TransactionRocksDBStorageTest(BaseTransactionStorageTest):
         self.tx_storage._always_use_topological_dfs = True
         super().test_storage_new_blocks()
 
+    def test_migrate_static_metadata_to_binary(self):
+        self.validate_save(self.block)
+        self.validate_save(self.tx)
+        db = self.tx_storage._db
+        cf_static_meta = self.tx_storage._cf_static_meta
+        # static metadata saved by older versions
+        for tx in [self.block, self.tx]:
+            db.put((cf_static_meta, tx.hash), tx.static_metadata.json_dumpb())
+            self.assertEqual(self.tx_storage.get_transaction(tx.hash).static_metadata, tx.static_metadata)
+
+        self.tx_storage.migrate_static_metadata_to_binary()
+        for tx in [self.block, self.tx]:
+            self.assertEqual(db.get((cf_static_meta, tx.hash)), tx.static_metadata.to_bytes())
+            self.assertEqual(self.tx_storage.get_transaction(tx.hash).static_metadata, tx.static_metadata)
+
 
 class CacheRocksDBStorageTest(BaseCacheStorageTest):
     __test__ = True
 
     def _config_builder(self, builder: TestBuilder) -> None:
         builder.use_tx_storage_cache(capacity=5)
+
+
+class VertexBlobStoreRocksDBStorageTest(BaseTransactionStorageTest):
+    __test__ = True
+
+    def _config_builder(self, builder: TestBuilder) -> None:
+        builder.use_vertex_blob_store()
+
+    def test_vertex_bytes_in_blob_store(self):
+        self.validate_save(self.block)
+        self.assertIsNone(self.tx_storage._db.get((self.tx_storage._cf_tx, self.block.hash)))
+        blob_store = self.tx_storage._vertex_blob_store
+        self.assertGreater(blob_store.get_total_size(), 0)
+
+        # saving it again does not append it again
+        total_size = blob_store.get_total_size()
+        self.tx_storage.save_transaction(self.block)
+        self.tx_storage._save_transactions([self.block, self.block])
+        self.assertEqual(total_size, blob_store.get_total_size())
+
+    def test_blob_store_reads_past_map(self):
+        from hathor.transaction.storage.vertex_blob_store import VertexBlobStore
+        blob_store = VertexBlobStore(os.path.join(self.tmpdir, 'blobs'), mmap_growth_step=100)
+        location1 = blob_store.append(b'a' * 10)
+        self.assertEqual(b'a' * 10, blob_store.read(location1))
+        segment_map = blob_store._mmaps[location1.segment_id]
+
+        # the blobs appended after the segment was mapped are read from the file until it grows enough
+        location2 = blob_store.append(b'b' * 50)
+        self.assertEqual(b'b' * 50, blob_store.read(location2))
+        self.assertIs(segment_map, blob_store._mmaps[location1.segment_id])
+        location3 = blob_store.append(b'c' * 50)
+        self.assertEqual(b'c' * 50, blob_store.read(location3))
+        self.assertIsNot(segment_map, blob_store._mmaps[location1.segment_id])
+        self.assertEqual(110, len(blob_store._mmaps[location1.segment_id]))
+
+        blob_store.close()
+        blob_store.close()
+        self.assertEqual({}, blob_store._mmaps)
+        self.assertEqual({}, blob_store._read_fds)
+
+    def test_cannot_open_without_blob_store(self):
+        from hathor.transaction.storage import TransactionRocksDBStorage
+        with self.assertRaises(ValueError):
+            TransactionRocksDBStorage(
+                self.tx_storage._rocksdb_storage,
+                settings=self._settings,
+                vertex_parser=self.tx_storage.vertex_parser,
+                nc_storage_factory=self.tx_storage._nc_storage_factory,
+                vertex_children_service=self.tx_storage.vertex_children,
+            )
+
+
+class VertexBlobStoreCacheRocksDBStorageTest(BaseCacheStorageTest):
+    __test__ = True
+
+    def _config_builder(self, builder: TestBuilder) -> None:
+        builder.use_tx_storage_cache(capacity=5)
+        builder.use_vertex_blob_store()
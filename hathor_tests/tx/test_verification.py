@@ -12,6 +12,7 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+from dataclasses import replace
 from unittest.mock import Mock, patch
 
 from hathor.crypto.util import get_address_from_public_key
@@ -167,6 +168,23 @@ class VerificationTest(unittest.TestCase):
         verify_data_wrapped.assert_called_once()
         verify_sigops_output_wrapped.assert_called_once()
 
+    def test_block_verify_without_storage_skip_pow(self) -> None:
+        block = self._get_valid_block()
+        params = replace(self.get_verification_params(self.manager), skip_pow_verification=True)
+
+        verify_pow_wrapped = Mock(wraps=self.verifiers.vertex.verify_pow)
+        verify_outputs_wrapped = Mock(wraps=self.verifiers.vertex.verify_outputs)
+
+        with (
+            patch.object(VertexVerifier, 'verify_pow', verify_pow_wrapped),
+            patch.object(VertexVerifier, 'verify_outputs', verify_outputs_wrapped),
+        ):
+            self.manager.verification_service.verify_without_storage(block, params)
+
+        # the other verifications that don't need the storage are still run
+        verify_pow_wrapped.assert_not_called()
+        verify_outputs_wrapped.assert_called_once()
+
     def test_block_verify(self) -> None:
         block = self._get_valid_block()
 
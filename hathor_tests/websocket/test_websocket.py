@@ -179,6 +179,33 @@ class WebsocketTest(_BaseResourceTest._ResourceTest):
         value = self._decode_value(self.transport.value())
         self.assertIsNone(value)
 
+    def test_history_streaming_while_address_index_is_building(self):
+        indexes = self.manager.tx_storage.indexes
+        self.factory.address_index = indexes.addresses
+        indexes.is_building = Mock(return_value=True)
+        self.protocol.state = HathorAdminWebsocketProtocol.STATE_OPEN
+
+        address = '1Q4qyTjhpUXUZXzwKs6Yvh2RNnF5J1XN9a'
+        payload = json_dumpb({
+            'type': 'request:history:manual',
+            'id': 'stream-1',
+            'first': True,
+            'last': True,
+            'addresses': [[0, address]],
+        })
+        self.protocol.onMessage(payload, True)
+        value = self._decode_value(self.transport.value())
+        self.assertEqual(value['type'], 'stream:history:error')
+        self.assertEqual(value['id'], 'stream-1')
+        self.assertIsNone(self.protocol._history_streamer)
+        indexes.is_building.assert_called_with(indexes.addresses)
+
+        # the empty addresses are not counted, since the index might not have their history yet
+        payload = json_dumpb({'type': 'subscribe_address', 'address': address})
+        self.protocol.onMessage(payload, True)
+        self.assertEqual(len(self.factory.address_connections), 1)
+        self.assertEqual(len(self.protocol.empty_addresses), 0)
+
     def test_connections(self):
         self.protocol.state = HathorAdminWebsocketProtocol.STATE_OPEN
         request_mock = Mock(peer=None)